@@ -0,0 +1,163 @@
+#!/bin/python3
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+""" Benchmarks the grpc.aio axon against the threaded axon under bursts of concurrent forward requests.
+
+Each mode serves a last hidden state callback with a fixed cost from a separate process, the load generator
+fires a burst of concurrently signed requests and samples the server thread count and RSS while they are in flight.
+The threaded axon needs a server thread per in flight request, so it is given max_workers equal to the burst size.
+
+Example:
+    $ python3 benchmarks/axon_aio.py --concurrency 64 256 1024 4096
+    $ python3 benchmarks/axon_aio.py --concurrency 1024 --call_cost 0.01 --compute_workers 16
+
+"""
+import argparse
+import asyncio
+import multiprocessing
+import time
+import uuid
+
+import grpc
+import psutil
+import torch
+import bittensor
+from rich.console import Console
+from rich.table import Table
+
+def serve( aio: bool, port: int, concurrency: int, args, ready, stop ):
+    r""" Serves an axon until stop is set, run in a child process.
+    """
+    def forward( inputs_x: torch.FloatTensor, synapse, model_output = None ):
+        time.sleep( args.call_cost )
+        return None, model_output, torch.zeros( [ inputs_x.shape[0], inputs_x.shape[1], bittensor.__network_dim__ ] )
+    axon = bittensor.axon(
+        wallet = bittensor.wallet.mock(),
+        ip = '127.0.0.1',
+        port = port,
+        aio = aio,
+        max_workers = concurrency,
+        maximum_concurrent_rpcs = concurrency,
+        synapse_lasthidden_timeout = args.timeout,
+        priority = lambda pubkey, inputs_x, request_type: 0,
+        priority_threadpool = bittensor.prioritythreadpool( max_workers = args.compute_workers ),
+    )
+    axon.attach_synapse_callback( forward, synapse_type = bittensor.proto.Synapse.SynapseType.TEXT_LAST_HIDDEN_STATE )
+    axon.start()
+    ready.set()
+    stop.wait()
+    axon.stop()
+
+def signature( sender_wallet: 'bittensor.Wallet', receiver_hotkey: str ) -> str:
+    r""" Returns a v2 request signature with a fresh nonce and receptor uuid.
+    """
+    nonce, receptor_uid = str( time.time_ns() ), str( uuid.uuid1() )
+    sender_hotkey = sender_wallet.hotkey.ss58_address
+    message = "{}.{}.{}.{}".format( nonce, sender_hotkey, receiver_hotkey, receptor_uid )
+    return ".".join( [ nonce, sender_hotkey, "0x" + sender_wallet.hotkey.sign( message ).hex(), receptor_uid ] )
+
+async def burst( port: int, concurrency: int, args, server: psutil.Process ):
+    r""" Fires concurrency requests at once over args.channels connections, returns the latencies of the successful
+        requests, the error count and the peak server threads and RSS seen while the requests were in flight.
+    """
+    sender_wallet = bittensor.wallet.mock()
+    receiver_hotkey = sender_wallet.hotkey.ss58_address
+    synapse = bittensor.synapse.TextLastHiddenState()
+    request = bittensor.proto.TensorMessage(
+        version = bittensor.__version_as_int__,
+        hotkey = sender_wallet.hotkey.ss58_address,
+        tensors = [ synapse.serialize_forward_request_tensor( torch.randint( 0, 50258, ( args.batch_size, args.sequence_length ) ) ) ],
+        synapses = [ synapse.serialize_to_wire_proto() ],
+    )
+    metadatas = [ (
+        ( 'rpc-auth-header', 'Bittensor' ),
+        ( 'bittensor-signature', signature( sender_wallet, receiver_hotkey ) ),
+        ( 'bittensor-version', str( bittensor.__version_as_int__ ) ),
+    ) for _ in range( concurrency ) ]
+    channels = [ grpc.aio.insecure_channel( '127.0.0.1:{}'.format( port ) ) for _ in range( args.channels ) ]
+    stubs = [ bittensor.grpc.BittensorStub( channel ) for channel in channels ]
+
+    latencies, errors = [], 0
+    async def call( index: int ):
+        nonlocal errors
+        start_time = time.perf_counter()
+        try:
+            response = await stubs[ index % len( stubs ) ].Forward( request, metadata = metadatas[ index ], timeout = args.timeout )
+            if response.return_code != bittensor.proto.ReturnCode.Success:
+                raise ValueError( response.message )
+            latencies.append( time.perf_counter() - start_time )
+        except Exception:
+            errors += 1
+
+    peak_threads, peak_rss = 0, 0
+    async def sample():
+        nonlocal peak_threads, peak_rss
+        while True:
+            peak_threads = max( peak_threads, server.num_threads() )
+            peak_rss = max( peak_rss, server.memory_info().rss )
+            await asyncio.sleep( 0.05 )
+
+    sampler = asyncio.ensure_future( sample() )
+    start_time = time.perf_counter()
+    await asyncio.gather( *[ call( index ) for index in range( concurrency ) ] )
+    wall_time = time.perf_counter() - start_time
+    sampler.cancel()
+    for channel in channels:
+        await channel.close()
+    return torch.tensor( latencies ), errors, wall_time, peak_threads, peak_rss
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--concurrency', type=int, nargs='+', help='Burst sizes of concurrent requests.', default=[64, 256, 1024, 4096])
+    parser.add_argument('--channels', type=int, help='Client connections the requests are spread over.', default=16)
+    parser.add_argument('--compute_workers', type=int, help='Priority threadpool workers running the callback.', default=16)
+    parser.add_argument('--call_cost', type=float, help='Simulated seconds of cost per callback.', default=0.02)
+    parser.add_argument('--timeout', type=int, help='Request timeout in seconds.', default=12)
+    parser.add_argument('--batch_size', type=int, help='Rows per request.', default=1)
+    parser.add_argument('--sequence_length', type=int, help='Tokens per row.', default=8)
+    parser.add_argument('--port', type=int, help='Port the axon is served on.', default=8391)
+    args = parser.parse_args()
+
+    console = Console()
+    context = multiprocessing.get_context( 'spawn' )
+    table = Table( title = 'Axon server modes, {} compute workers x {}ms calls'.format( args.compute_workers, args.call_cost * 1000 ) )
+    for column in [ 'mode', 'concurrency', 'ok', 'errors', 'requests/s', 'p99 (ms)', 'peak threads', 'RSS growth (MB)', 'KB / request' ]:
+        table.add_column( column, justify = 'right' )
+    for concurrency in args.concurrency:
+        for aio in [ False, True ]:
+            ready, stop = context.Event(), context.Event()
+            process = context.Process( target = serve, args = ( aio, args.port, concurrency, args, ready, stop ), daemon = True )
+            process.start()
+            ready.wait()
+            server = psutil.Process( process.pid )
+            rss_before = server.memory_info().rss
+            latencies, errors, wall_time, peak_threads, peak_rss = asyncio.run( burst( args.port, concurrency, args, server ) )
+            stop.set()
+            process.join()
+            rss_growth = max( peak_rss - rss_before, 0 )
+            table.add_row(
+                'aio' if aio else 'threaded',
+                str( concurrency ),
+                str( len( latencies ) ),
+                str( errors ),
+                '{:.1f}'.format( len( latencies ) / wall_time ),
+                '{:.1f}'.format( latencies.quantile( 0.99 ).item() * 1000 ) if len( latencies ) > 0 else '-',
+                str( peak_threads ),
+                '{:.1f}'.format( rss_growth / 2**20 ),
+                '{:.1f}'.format( rss_growth / 1024 / concurrency ),
+            )
+    console.print( table )
@@ -0,0 +1,99 @@
+#!/bin/python3
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+""" Benchmarks axon micro-batching throughput and latency under concurrent synthetic load.
+
+The synapse callback simulates a GPU model behind the server mutex, its cost is a fixed
+per call overhead plus a per row cost, so coalescing requests amortizes the overhead.
+
+Example:
+    $ python3 benchmarks/axon_batching.py --clients 16 --duration 10
+    $ python3 benchmarks/axon_batching.py --clients 16 --duration 10 --max_batch_size 64 --window 0.002
+
+"""
+import argparse
+import threading
+import time
+
+import torch
+import bittensor
+from rich.console import Console
+from rich.table import Table
+
+def synthetic_callback( call_overhead: float, row_cost: float ):
+    r""" Returns a last hidden state callback costing call_overhead + row_cost * rows seconds, serialized by a mutex.
+    """
+    mutex = threading.Lock()
+    def forward( inputs_x: torch.FloatTensor, synapse, model_output = None ):
+        with mutex:
+            time.sleep( call_overhead + row_cost * inputs_x.shape[0] )
+            return None, model_output, torch.zeros( [ inputs_x.shape[0], inputs_x.shape[1], 8 ] )
+    return forward
+
+def run_load( call, clients: int, duration: float, batch_size: int, sequence_length: int ):
+    r""" Runs clients threads issuing back to back calls for duration seconds, returns the per request latencies.
+    """
+    latencies = [ [] for _ in range( clients ) ]
+    stop_time = time.time() + duration
+    def client( index: int ):
+        inputs_x = torch.randint( 0, 50258, ( batch_size, sequence_length ) )
+        while time.time() < stop_time:
+            start_time = time.perf_counter()
+            call( inputs_x )
+            latencies[ index ].append( time.perf_counter() - start_time )
+    threads = [ threading.Thread( target = client, args = ( index, ) ) for index in range( clients ) ]
+    for thread in threads: thread.start()
+    for thread in threads: thread.join()
+    return torch.tensor( [ latency for client_latencies in latencies for latency in client_latencies ] )
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, help='Number of concurrent clients.', default=16)
+    parser.add_argument('--duration', type=float, help='Seconds to run each mode.', default=10)
+    parser.add_argument('--batch_size', type=int, help='Rows per request.', default=2)
+    parser.add_argument('--sequence_length', type=int, help='Tokens per row.', default=20)
+    parser.add_argument('--call_overhead', type=float, help='Simulated seconds of fixed cost per model call.', default=0.02)
+    parser.add_argument('--row_cost', type=float, help='Simulated seconds of cost per input row.', default=0.001)
+    parser.add_argument('--max_batch_size', type=int, help='Micro-batcher max rows per call.', default=32)
+    parser.add_argument('--window', type=float, help='Micro-batcher window in seconds.', default=0.005)
+    args = parser.parse_args()
+
+    console = Console()
+    forward = synthetic_callback( args.call_overhead, args.row_cost )
+    synapse = bittensor.synapse.TextLastHiddenState()
+    batcher = bittensor.MicroBatcher( max_batch_size = args.max_batch_size, window = args.window )
+    modes = {
+        'direct': lambda inputs_x: forward( inputs_x, synapse ),
+        'batched': lambda inputs_x: batcher.submit( forward, synapse, inputs_x ).result(),
+    }
+
+    table = Table( title = 'Axon micro-batching, {} clients x {} rows'.format( args.clients, args.batch_size ) )
+    for column in [ 'mode', 'requests/s', 'p50 (ms)', 'p99 (ms)', 'calls' ]:
+        table.add_column( column, justify = 'right' )
+    for mode, call in modes.items():
+        batches_before = batcher.stats.batches
+        latencies = run_load( call, args.clients, args.duration, args.batch_size, args.sequence_length )
+        calls = batcher.stats.batches - batches_before if mode == 'batched' else len( latencies )
+        table.add_row(
+            mode,
+            '{:.1f}'.format( len( latencies ) / args.duration ),
+            '{:.1f}'.format( latencies.quantile( 0.5 ).item() * 1000 ),
+            '{:.1f}'.format( latencies.quantile( 0.99 ).item() * 1000 ),
+            str( calls ),
+        )
+    batcher.stop()
+    console.print( table )
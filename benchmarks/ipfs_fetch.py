@@ -0,0 +1,125 @@
+#!/bin/python3
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+""" Benchmarks the dataset IPFS fetcher against a local stub of the IPFS block api.
+
+Synthetic text files are chunked into UnixFS blocks and served with a simulated per request latency.
+The baseline fetches each file with a new requests session per call from a thread pool, as the dataset
+did before, the fetcher runs cold and then again against its content addressed block store.
+
+Example:
+    $ python3 benchmarks/ipfs_fetch.py --files 64 --file_size 1000000 --latency 0.05
+    $ python3 benchmarks/ipfs_fetch.py --concurrency 32 --store_size 20000000
+
+"""
+import argparse
+import concurrent.futures
+import http.server
+import os
+import random
+import tempfile
+import threading
+import time
+import urllib.parse
+
+import requests
+from rich.console import Console
+from rich.table import Table
+
+from bittensor._dataset.ipfs_fetcher import ContentStore, IPFSFetcher, encode_file
+
+def serve_blocks( blocks, latency: float ):
+    r""" Serves the blocks on a local stub of the IPFS block/get api, each response delayed by latency seconds.
+    """
+    class Handler( http.server.BaseHTTPRequestHandler ):
+        protocol_version = 'HTTP/1.1'
+        def do_POST( self ):
+            cid = urllib.parse.parse_qs( urllib.parse.urlparse( self.path ).query )[ 'arg' ][ 0 ]
+            block = blocks.get( cid, b'' )
+            time.sleep( latency )
+            self.send_response( 200 if cid in blocks else 500 )
+            self.send_header( 'Content-Length', str( len( block ) ) )
+            self.end_headers()
+            self.wfile.write( block )
+
+        def log_message( self, *args ):
+            pass
+
+    server = http.server.ThreadingHTTPServer( ( '127.0.0.1', 0 ), Handler )
+    server.daemon_threads = True
+    threading.Thread( target = server.serve_forever, daemon = True ).start()
+    return server
+
+def fetch_baseline( block_url: str, files, concurrency: int ) -> int:
+    r""" Fetches every block with a new session per request from a thread pool, returns the number of bytes.
+    """
+    def get( cid ):
+        session = requests.Session()
+        session.params.update( ( ( 'arg', cid ), ) )
+        return len( session.post( block_url, timeout = 60 ).content )
+    with concurrent.futures.ThreadPoolExecutor( max_workers = concurrency ) as executor:
+        return sum( executor.map( get, [ cid for _, blocks in files for cid in blocks ] ) )
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--files', type=int, help='Number of synthetic text files.', default=64)
+    parser.add_argument('--file_size', type=int, help='Bytes per file.', default=1000000)
+    parser.add_argument('--latency', type=float, help='Simulated seconds of latency per request.', default=0.05)
+    parser.add_argument('--concurrency', type=int, help='Requests in flight.', default=16)
+    parser.add_argument('--store_size', type=float, help='Block store size in bytes.', default=5e8)
+    args = parser.parse_args()
+
+    console = Console()
+    rng = random.Random( 0 )
+    words = [ ''.join( rng.choice( 'abcdefghijklmnopqrstuvwxyz' ) for _ in range( rng.randint( 2, 9 ) ) ) for _ in range( 5000 ) ]
+    files, served = [], {}
+    for _ in range( args.files ):
+        text = ' '.join( rng.choice( words ) for _ in range( args.file_size // 6 ) ).encode()[ : args.file_size ]
+        cid, blocks = encode_file( text )
+        files.append( ( cid, blocks ) )
+        served.update( blocks )
+    server = serve_blocks( served, args.latency )
+    block_url = 'http://127.0.0.1:{}/api/v0/block/get'.format( server.server_address[ 1 ] )
+    total_bytes = sum( len( block ) for block in served.values() )
+
+    table = Table( title = 'IPFS fetch, {} files of {} bytes, {:.0f}ms latency'.format( args.files, args.file_size, args.latency * 1000 ) )
+    for column in [ 'mode', 'seconds', 'MB/s', 'hit rate', 'fetched blocks' ]:
+        table.add_column( column, justify = 'right' )
+
+    start_time = time.time()
+    fetched = fetch_baseline( block_url, files, args.concurrency )
+    seconds = time.time() - start_time
+    table.add_row( 'thread pool', '{:.2f}'.format( seconds ), '{:.1f}'.format( fetched / seconds / 1e6 ), '-', str( len( served ) ) )
+
+    with tempfile.TemporaryDirectory() as store_path:
+        fetcher = IPFSFetcher( block_url, store = ContentStore( store_path, max_size = args.store_size ), concurrency = args.concurrency )
+        for mode in [ 'fetcher cold', 'fetcher warm' ]:
+            hits, misses, blocks = fetcher.stats.hits, fetcher.stats.misses, fetcher.stats.blocks
+            start_time = time.time()
+            fetcher.fetch( [ cid for cid, _ in files ], lambda cid, data: False )
+            seconds = time.time() - start_time
+            hits, misses = fetcher.stats.hits - hits, fetcher.stats.misses - misses
+            table.add_row(
+                mode,
+                '{:.2f}'.format( seconds ),
+                '{:.1f}'.format( total_bytes / seconds / 1e6 ),
+                '{:.2f}'.format( hits / max( hits + misses, 1 ) ),
+                str( fetcher.stats.blocks - blocks ),
+            )
+        fetcher.close()
+    server.shutdown()
+    console.print( table )
@@ -0,0 +1,95 @@
+#!/bin/python3
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+""" Benchmarks the per request metagraph lookups of the core_server priority and blacklist callbacks.
+
+Each request looks up the caller uid by hotkey for its priority, registration, stake and synapse
+checks. The lookups through the hotkeys list, rebuilt on every access with a dummy endpoint
+comparison per neuron, are compared with the identity index built once per Metagraph.sync.
+
+Example:
+    $ python3 benchmarks/metagraph_lookup.py
+    $ python3 benchmarks/metagraph_lookup.py --neurons 1024 4096 16384 --requests 2000
+
+"""
+import argparse
+import random
+import time
+
+import bittensor
+from rich.console import Console
+from rich.table import Table
+from metagraph_sync import synthetic_neuron, SyntheticSubtensor
+
+def rebuilt_hotkeys( metagraph ):
+    r""" The hotkeys list as Metagraph.hotkeys built it on every access, before the identity index.
+    """
+    return [ neuron.hotkey if neuron != bittensor.endpoint.dummy() else '' for neuron in metagraph.endpoint_objs ]
+
+def request_list( metagraph, pubkey: str, min_stake: float ) -> bool:
+    r""" The priority, registration, stake and synapse checks of one request through the rebuilt hotkeys list.
+    """
+    try:
+        priority = metagraph.S[ rebuilt_hotkeys( metagraph ).index( pubkey ) ].item()
+    except ValueError:
+        priority = 0
+    if pubkey not in rebuilt_hotkeys( metagraph ):
+        return False
+    if metagraph.S[ rebuilt_hotkeys( metagraph ).index( pubkey ) ].item() < min_stake:
+        return False
+    return metagraph.S[ rebuilt_hotkeys( metagraph ).index( pubkey ) ] >= priority
+
+def request_index( metagraph, pubkey: str, min_stake: float ) -> bool:
+    r""" The same checks through Metagraph.hotkey_to_uid.
+    """
+    uid = metagraph.hotkey_to_uid( pubkey )
+    priority = 0 if uid == -1 else metagraph.S[ uid ].item()
+    if metagraph.hotkey_to_uid( pubkey ) == -1:
+        return False
+    uid = metagraph.hotkey_to_uid( pubkey )
+    if uid == -1 or metagraph.S[ uid ].item() < min_stake:
+        return False
+    return metagraph.S[ metagraph.hotkey_to_uid( pubkey ) ] >= priority
+
+def request_rate( request, metagraph, pubkeys, min_stake: float ) -> float:
+    r""" Returns the requests per second of request over pubkeys.
+    """
+    start_time = time.perf_counter()
+    for pubkey in pubkeys:
+        request( metagraph, pubkey, min_stake )
+    return len( pubkeys ) / ( time.perf_counter() - start_time )
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--neurons', type=int, nargs='+', help='Numbers of synthetic neurons.', default=[1024, 4096])
+    parser.add_argument('--requests', type=int, help='Requests per metagraph size and path.', default=500)
+    parser.add_argument('--unregistered', type=float, help='Fraction of requests from unregistered hotkeys.', default=0.1)
+    parser.add_argument('--min_stake', type=float, help='Blacklist stake threshold.', default=100)
+    args = parser.parse_args()
+
+    console = Console()
+    table = Table( title = 'Server priority and blacklist lookups per request' )
+    for column in [ 'n', 'list (req/s)', 'index (req/s)', 'speedup' ]:
+        table.add_column( column, justify = 'right' )
+    for n in args.neurons:
+        neurons = [ synthetic_neuron( uid, n, 0 ) for uid in range( n ) ]
+        metagraph = bittensor.metagraph( subtensor = SyntheticSubtensor( neurons ) ).sync()
+        pubkeys = [ '5{:047d}'.format( random.randrange( n ) if random.random() >= args.unregistered else n + uid ) for uid in range( args.requests ) ]
+        list_rate = request_rate( request_list, metagraph, pubkeys, args.min_stake )
+        index_rate = request_rate( request_index, metagraph, pubkeys, args.min_stake )
+        table.add_row( str( n ), '{:.0f}'.format( list_rate ), '{:.0f}'.format( index_rate ), '{:.0f}x'.format( index_rate / list_rate ) )
+    console.print( table )
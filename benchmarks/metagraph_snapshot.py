@@ -0,0 +1,82 @@
+#!/bin/python3
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+""" Benchmarks loading a saved metagraph from a torch state_dict and from a columnar snapshot.
+
+Tools that read a saved metagraph often only need a few columns, like the stake and hotkeys of each uid.
+The torch state_dict is unpickled whole and the hotkeys are decoded from every endpoint. The snapshot
+is memory mapped, reads only the requested columns and keeps the hotkeys as a column of their own.
+
+Example:
+    $ python3 benchmarks/metagraph_snapshot.py
+    $ python3 benchmarks/metagraph_snapshot.py --neurons 1024 4096 --n_weights 512 --sparse
+
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import bittensor
+from rich.console import Console
+from rich.table import Table
+from metagraph_sync import synthetic_neuron, SyntheticSubtensor
+
+def load_time( path: str, materialize: bool, repeat: int ) -> float:
+    r""" Returns the mean seconds to load the metagraph at path and read its stake and hotkeys,
+        or every parameter when materialize is set.
+    """
+    start_time = time.perf_counter()
+    for _ in range( repeat ):
+        metagraph = bittensor.metagraph( subtensor = SyntheticSubtensor( [] ) ).load_from_path( path )
+        metagraph.stake
+        metagraph.hotkeys
+        if materialize:
+            metagraph.materialize()
+    return ( time.perf_counter() - start_time ) / repeat
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--neurons', type=int, nargs='+', help='Numbers of synthetic neurons.', default=[1024, 4096])
+    parser.add_argument('--n_weights', type=int, help='Number of non zero weights per neuron.', default=256)
+    parser.add_argument('--sparse', action='store_true', help='Sync into sparse weights and bonds.', default=False)
+    parser.add_argument('--repeat', type=int, help='Loads per metagraph size and format.', default=5)
+    args = parser.parse_args()
+
+    console = Console()
+    table = Table( title = 'Saved metagraph load, stake and hotkeys' )
+    for column in [ 'n', '.pt (MB)', '.mg (MB)', '.pt (s)', '.mg (s)', 'speedup', '.mg all columns (s)' ]:
+        table.add_column( column, justify = 'right' )
+    with tempfile.TemporaryDirectory() as root:
+        for n in args.neurons:
+            neurons = [ synthetic_neuron( uid, n, args.n_weights ) for uid in range( n ) ]
+            metagraph = bittensor.metagraph( subtensor = SyntheticSubtensor( neurons ) ).sync( sparse = args.sparse )
+            metagraph.save_to_path( path = root, filename = 'metagraph.pt' )
+            metagraph.save_snapshot( os.path.join( root, 'metagraph.mg' ) )
+            state_dict_time = load_time( os.path.join( root, 'metagraph.pt' ), False, args.repeat )
+            snapshot_time = load_time( os.path.join( root, 'metagraph.mg' ), False, args.repeat )
+            materialized_time = load_time( os.path.join( root, 'metagraph.mg' ), True, args.repeat )
+            table.add_row(
+                str( n ),
+                '{:.1f}'.format( os.path.getsize( os.path.join( root, 'metagraph.pt' ) ) / 2**20 ),
+                '{:.1f}'.format( os.path.getsize( os.path.join( root, 'metagraph.mg' ) ) / 2**20 ),
+                '{:.4f}'.format( state_dict_time ),
+                '{:.4f}'.format( snapshot_time ),
+                '{:.0f}x'.format( state_dict_time / snapshot_time ),
+                '{:.4f}'.format( materialized_time ),
+            )
+    console.print( table )
@@ -0,0 +1,108 @@
+#!/bin/python3
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+""" Benchmarks Metagraph.sync wall time and peak RSS on a synthetic neurons list.
+
+With --changed, a second sync follows after that fraction of the uids set new weights, and is
+timed both as a full rebuild and as an incremental sync patching only the changed rows.
+
+Example:
+    $ python3 benchmarks/metagraph_sync.py --n 4096 --n_weights 256
+    $ python3 benchmarks/metagraph_sync.py --n 4096 --n_weights 256 --sparse
+    $ python3 benchmarks/metagraph_sync.py --n 4096 --n_weights 256 --changed 0.02
+
+"""
+import argparse
+import copy
+import random
+import resource
+import time
+from types import SimpleNamespace
+
+import bittensor
+from rich.console import Console
+
+def synthetic_neuron( uid: int, n: int, n_weights: int ) -> SimpleNamespace:
+    r""" Returns a neuron record shaped like the output of Subtensor.neurons.
+    """
+    weight_uids = random.sample( range(n), min( n, n_weights ) )
+    return SimpleNamespace(
+        uid = uid, active = 1, stake = random.random() * 1000, rank = random.random(), trust = random.random(),
+        consensus = random.random(), incentive = random.random(), dividends = random.random(), emission = random.random(),
+        last_update = random.randint( 0, 1000 ), version = 1, modality = 0, ip_type = 4, ip = random.randint( 1, 2**32 - 1 ),
+        port = 8091, priority = 0, is_null = False,
+        hotkey = '5{:047d}'.format( uid ), coldkey = '5{:047d}'.format( uid ),
+        weights = [ ( w_uid, random.randint( 0, 4294967295 ) ) for w_uid in weight_uids ],
+        bonds = [ ( w_uid, random.randint( 0, 2**40 ) ) for w_uid in weight_uids ],
+    )
+
+class SyntheticSubtensor:
+    r""" Serves a fixed neurons list to Metagraph.sync.
+    """
+    network = 'synthetic'
+
+    def __init__( self, neurons ):
+        self._neurons = neurons
+
+    def get_current_block( self ) -> int:
+        return 0
+
+    def neurons( self, block: int = None ):
+        return self._neurons
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--n', type=int, help='Number of synthetic neurons.', default=4096)
+    parser.add_argument('--n_weights', type=int, help='Number of non zero weights per neuron.', default=256)
+    parser.add_argument('--sparse', action='store_true', help='Sync into sparse weights and bonds.', default=False)
+    parser.add_argument('--changed', type=float, help='Fraction of uids with new weights before a second, incremental sync.', default=None)
+    bittensor.metagraph.add_args( parser )
+    args = bittensor.config( parser )
+
+    console = Console()
+    neurons = [ synthetic_neuron( uid, args.n, args.n_weights ) for uid in range( args.n ) ]
+    metagraph = bittensor.metagraph( config = args, subtensor = SyntheticSubtensor( neurons ) )
+
+    rss_before = resource.getrusage( resource.RUSAGE_SELF ).ru_maxrss
+    start_time = time.perf_counter()
+    metagraph.sync( sparse = args.sparse )
+    sync_time = time.perf_counter() - start_time
+    rss_after = resource.getrusage( resource.RUSAGE_SELF ).ru_maxrss
+
+    console.print( 'Metagraph.sync n={} n_weights={} sparse={}'.format( args.n, args.n_weights, args.sparse ) )
+    console.print( '  wall time: {:.3f}s'.format( sync_time ) )
+    console.print( '  peak RSS growth: {:.1f}MB'.format( ( rss_after - rss_before ) / 1024 ) )
+
+    if args.changed != None:
+        # Every neuron gets new stake, the changed fraction sets new weights.
+        neurons = [ copy.copy( neuron ) for neuron in neurons ]
+        for neuron in neurons:
+            neuron.stake = random.random() * 1000
+        for uid in random.sample( range( args.n ), int( args.changed * args.n ) ):
+            neurons[uid] = synthetic_neuron( uid, args.n, args.n_weights )
+            neurons[uid].last_update += 1000
+        metagraph.subtensor._neurons = neurons
+
+        start_time = time.perf_counter()
+        metagraph.sync( incremental = True )
+        incremental_time = time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        bittensor.metagraph( config = args, subtensor = SyntheticSubtensor( neurons ) ).sync( sparse = args.sparse )
+        full_time = time.perf_counter() - start_time
+        console.print( 'Second sync with {} changed uids'.format( len( metagraph.changed_uids ) ) )
+        console.print( '  full: {:.3f}s'.format( full_time ) )
+        console.print( '  incremental: {:.3f}s'.format( incremental_time ) )
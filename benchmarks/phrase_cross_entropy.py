@@ -0,0 +1,131 @@
+#!/bin/python3
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+""" Benchmarks phrase_cross_entropy of the TextCausalLMNext validation on synthetic topk phrase responses.
+
+The loop over batch items and sub target lengths phrase_cross_entropy ran before is compared with the
+batched implementation called per response, and with all responses stacked into one call, as the core
+validator scores the responses of one step. The losses of the three are checked to match.
+
+Example:
+    $ python3 benchmarks/phrase_cross_entropy.py
+    $ python3 benchmarks/phrase_cross_entropy.py --responses 20 100 --synapse_topk 4096 --device cuda
+
+"""
+import argparse
+import time
+
+import torch
+import bittensor
+from rich.console import Console
+from rich.table import Table
+from bittensor.utils.tokenizer_utils import phrase_cross_entropy
+
+def phrase_cross_entropy_loop( target_phrases: torch.Tensor, topk_tensor: torch.Tensor, ignore_index: int = -100,
+                               vocab_size_min: int = 50257 ):
+    r""" The unreduced phrase_cross_entropy looping over batch items and sub target lengths, before batching.
+    """
+    batch_size, topk_p1, max_len = topk_tensor.shape
+    topk = topk_p1 - 1
+    topk_tokens = topk_tensor[:, :-1, 1:].round().int()
+    topk_probs = torch.clamp( topk_tensor[:, :-1, 0], 0, 1 )
+    floor_probs = torch.clamp( topk_tensor[:, -1, 0], 0, 1 )
+    total_probs = topk_probs.sum( dim = -1 ) + max( 0, vocab_size_min - topk ) * floor_probs
+    n_topk_probs = topk_probs / total_probs[:, None]
+    n_floor_probs = floor_probs / total_probs
+
+    val_probs = torch.zeros( batch_size ).to( topk_probs.device )
+    match_probs = torch.zeros( batch_size ).to( topk_probs.device )
+    for b in range( batch_size ):
+        target_phrase = target_phrases[b]
+        match = ( topk_tokens[b, :, 0] == target_phrase[0].item() )
+        if match.sum() > 0:
+            val_probs[b] = n_topk_probs[b, match].sum()
+        else:
+            val_probs[b] = n_floor_probs[b]
+
+        check_len = min( max_len - 1, len( target_phrase ) )
+        for c in range( 1, check_len + 1 ):
+            target = ignore_index * torch.ones( check_len, dtype = torch.int32 ).to( topk_tensor.device )
+            target[:c] = target_phrase[:c]
+            match = ( topk_tokens[b, :, :check_len] == target )
+            match_idx = torch.where( match.sum( dim = -1 ) == check_len )[0]
+            if len( match_idx ):
+                match_probs[b] += n_topk_probs[b, match_idx].sum()
+            else:
+                match_probs[b] += n_floor_probs[b]
+
+    loss_val = - torch.log( torch.clamp( val_probs, 0, 1 ) + 1e-40 )
+    loss = - torch.log( torch.clamp( match_probs, 0, 1 ) + 1e-40 )
+    return loss_val, loss
+
+def synthetic_responses( num_responses: int, targets: torch.Tensor, synapse_topk: int, max_len: int, device: str ):
+    r""" Returns num_responses topk phrase responses of shape [batch_size, synapse_topk + 1, max_len],
+        with a few phrases of each batch item being prefixes of its target phrase.
+    """
+    batch_size = targets.shape[0]
+    responses = []
+    for _ in range( num_responses ):
+        response = -100 * torch.ones( ( batch_size, synapse_topk + 1, max_len ) )
+        probs = torch.rand( ( batch_size, synapse_topk ) )
+        response[ :, :-1, 0 ] = 0.9 * probs / probs.sum( dim = -1, keepdim = True )
+        response[ :, -1, 0 ] = 0.1 / bittensor.__vocab_size__
+        phrase_lens = torch.randint( 1, max_len, ( batch_size, synapse_topk ) )
+        tokens = torch.randint( 0, bittensor.__vocab_size__, ( batch_size, synapse_topk, max_len - 1 ) )
+        tokens[ :, :max_len - 1 ] = targets[ :, None, :max_len - 1 ]  # target prefixes
+        tokens[ torch.arange( max_len - 1 )[ None, None, : ] >= phrase_lens[ ..., None ] ] = -100
+        response[ :, :-1, 1: ] = tokens.float()
+        responses.append( response.to( device ) )
+    return responses
+
+def timed( function, repeat: int ):
+    r""" Returns the result of function and its mean seconds over repeat calls.
+    """
+    start_time = time.perf_counter()
+    for _ in range( repeat ):
+        result = function()
+    return result, ( time.perf_counter() - start_time ) / repeat
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--responses', type=int, nargs='+', help='Numbers of responses scored per validator step.', default=[20, 100])
+    parser.add_argument('--batch_size', type=int, help='Validator batch size.', default=10)
+    parser.add_argument('--validation_len', type=int, help='Target phrase length.', default=8)
+    parser.add_argument('--synapse_topk', type=int, help='Topk token phrases per response.', default=4096)
+    parser.add_argument('--max_len', type=int, help='Phrase tensor width, probability and phrase tokens.', default=8)
+    parser.add_argument('--repeat', type=int, help='Timed repeats per path.', default=3)
+    parser.add_argument('--device', type=str, help='Torch device.', default='cpu')
+    args = parser.parse_args()
+
+    console = Console()
+    table = Table( title = 'phrase_cross_entropy per step, batch_size {} x synapse topk {} on {}'.format( args.batch_size, args.synapse_topk, args.device ) )
+    for column in [ 'responses', 'loop (s)', 'batched (s)', 'stacked (s)', 'batched speedup', 'stacked speedup' ]:
+        table.add_column( column, justify = 'right' )
+    for num_responses in args.responses:
+        targets = torch.randint( 0, bittensor.__vocab_size__, ( args.batch_size, args.validation_len ) ).to( args.device )
+        responses = synthetic_responses( num_responses, targets, args.synapse_topk, args.max_len, args.device )
+
+        loop, loop_time = timed( lambda: [ phrase_cross_entropy_loop( targets, response ) for response in responses ], args.repeat )
+        batched, batched_time = timed( lambda: [ phrase_cross_entropy( targets, response, reduce = False ) for response in responses ], args.repeat )
+        stacked, stacked_time = timed( lambda: phrase_cross_entropy( targets, torch.stack( responses ), reduce = False ), args.repeat )
+
+        for index, ( loss_val, loss ) in enumerate( loop ):
+            assert torch.allclose( batched[ index ][0], loss_val, atol = 1e-5 ) and torch.allclose( batched[ index ][1], loss, atol = 1e-5 )
+            assert torch.allclose( stacked[0][ index ], loss_val, atol = 1e-5 ) and torch.allclose( stacked[1][ index ], loss, atol = 1e-5 )
+        table.add_row( str( num_responses ), '{:.4f}'.format( loop_time ), '{:.4f}'.format( batched_time ),
+                       '{:.4f}'.format( stacked_time ), '{:.1f}x'.format( loop_time / batched_time ), '{:.1f}x'.format( loop_time / stacked_time ) )
+    console.print( table )
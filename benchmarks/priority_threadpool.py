@@ -0,0 +1,125 @@
+#!/bin/python3
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+""" Benchmarks the priority threadpool scheduler under synthetic overload.
+
+Callers with random stakes submit Poisson arrivals of fixed cost calls with a deadline at a rate
+above the pool capacity. Goodput counts calls completed before their deadline, late calls are
+work the pool spent on requests their callers had already given up on.
+
+Example:
+    $ python3 benchmarks/priority_threadpool.py --overload 2 --duration 10
+    $ python3 benchmarks/priority_threadpool.py --callers 256 --workers 8 --service_time 0.01 --timeout 0.5
+
+"""
+import argparse
+import concurrent.futures
+import queue
+import random
+import threading
+import time
+
+import torch
+import bittensor
+from rich.console import Console
+from rich.table import Table
+
+def run_load( submit, stakes, rate: float, duration: float, service_time: float, timeout: float, seed: int ):
+    r""" Submits Poisson arrivals at rate calls per second for duration seconds, returns the per call outcomes.
+        Outcomes are ( caller, latency, on_time ) for completed calls and ( caller, None, False ) for dropped calls.
+    """
+    rng = random.Random( seed )
+    outcomes = []
+    lock = threading.Lock()
+    def work():
+        time.sleep( service_time )
+
+    def record( caller, start_time ):
+        def done( future ):
+            latency = time.time() - start_time
+            completed = not future.cancelled() and future.exception() == None
+            with lock:
+                outcomes.append( ( caller, latency if completed else None, completed and latency <= timeout ) )
+        return done
+
+    callers = list( range( len( stakes ) ) )
+    futures = []
+    next_time = time.time()
+    stop_time = next_time + duration
+    while next_time < stop_time:
+        time.sleep( max( next_time - time.time(), 0 ) )
+        caller = rng.choice( callers )
+        start_time = time.time()
+        try:
+            future = submit( work, caller, stakes[ caller ], start_time + timeout )
+        except queue.Full:
+            with lock:
+                outcomes.append( ( caller, None, False ) )
+        else:
+            future.add_done_callback( record( caller, start_time ) )
+            futures.append( future )
+        next_time += rng.expovariate( rate )
+    concurrent.futures.wait( futures )
+    return outcomes
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--callers', type=int, help='Number of distinct caller hotkeys.', default=64)
+    parser.add_argument('--workers', type=int, help='Number of pool threads.', default=4)
+    parser.add_argument('--service_time', type=float, help='Seconds of work per call.', default=0.01)
+    parser.add_argument('--timeout', type=float, help='Seconds after submission at which the caller gives up.', default=0.5)
+    parser.add_argument('--overload', type=float, help='Offered load as a multiple of the pool capacity.', default=2)
+    parser.add_argument('--duration', type=float, help='Seconds to run each mode.', default=10)
+    parser.add_argument('--max_per_caller', type=int, help='Fair pool queued calls per caller.', default=8)
+    parser.add_argument('--max_wait', type=float, help='Fair pool aging threshold in seconds.', default=0.25)
+    parser.add_argument('--seed', type=int, help='Random seed for stakes and arrivals.', default=0)
+    args = parser.parse_args()
+
+    console = Console()
+    stakes = [ random.Random( args.seed + caller ).paretovariate( 1.2 ) for caller in range( args.callers ) ]
+    top_callers = set( sorted( range( args.callers ), key = lambda caller: -stakes[ caller ] )[ : max( args.callers // 10, 1 ) ] )
+    rate = args.overload * args.workers / args.service_time
+
+    fifo_pool = concurrent.futures.ThreadPoolExecutor( max_workers = args.workers )
+    fair_pool = bittensor.prioritythreadpool( max_workers = args.workers, maxsize = -1, max_per_caller = args.max_per_caller, max_wait = args.max_wait )
+    modes = {
+        'fifo': lambda fn, caller, stake, deadline: fifo_pool.submit( fn ),
+        'fair': lambda fn, caller, stake, deadline: fair_pool.submit( fn, priority = stake, caller = caller, deadline = deadline ),
+    }
+
+    table = Table( title = 'Priority threadpool, {:.0f} calls/s offered to {:.0f} calls/s capacity'.format( rate, args.workers / args.service_time ) )
+    for column in [ 'mode', 'goodput/s', 'late', 'dropped', 'p50 (ms)', 'p99 (ms)', 'top 10% stake share' ]:
+        table.add_column( column, justify = 'right' )
+    for mode, submit in modes.items():
+        outcomes = run_load( submit, stakes, rate, args.duration, args.service_time, args.timeout, args.seed )
+        on_time = [ outcome for outcome in outcomes if outcome[2] ]
+        late = [ outcome for outcome in outcomes if outcome[1] != None and not outcome[2] ]
+        latencies = torch.tensor( [ outcome[1] for outcome in on_time ] if on_time else [ float('nan') ] )
+        table.add_row(
+            mode,
+            '{:.1f}'.format( len( on_time ) / args.duration ),
+            str( len( late ) ),
+            str( len( outcomes ) - len( on_time ) - len( late ) ),
+            '{:.1f}'.format( latencies.quantile( 0.5 ).item() * 1000 ),
+            '{:.1f}'.format( latencies.quantile( 0.99 ).item() * 1000 ),
+            '{:.2f}'.format( sum( outcome[0] in top_callers for outcome in on_time ) / max( len( on_time ), 1 ) ),
+        )
+    fifo_pool.shutdown()
+    fair_pool.shutdown()
+    console.print( table )
+    if fair_pool.stats.submitted > 0:
+        console.print( fair_pool.get_queue_metrics() )
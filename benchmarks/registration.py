@@ -0,0 +1,132 @@
+#!/bin/python3
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+""" Benchmarks the CPU registration hash rate without a chain, for a fixed block hash and difficulty.
+
+The per nonce python loop the solver used before is compared with the vectorized kernel
+of bittensor.utils.register_cpu at several batch sizes, in a single process. The scaling
+table then runs the solver processes of solve_for_difficulty_fast for 1 to N processes,
+coordinated through the shared block header and hash counters.
+
+Example:
+    $ python3 benchmarks/registration.py --nonces 200000
+    $ python3 benchmarks/registration.py --batch_sizes 4096 16384 65536 --difficulty 1000000
+    $ python3 benchmarks/registration.py --processes 1 2 4 8 --duration 10
+
+"""
+import argparse
+import binascii
+import hashlib
+import multiprocessing
+import time
+
+import bittensor
+from bittensor.utils.register_cpu import solve_cpu
+from Crypto.Hash import keccak
+from rich.console import Console
+from rich.table import Table
+
+def solve_scalar( nonce_start: int, nonce_end: int, block_bytes: bytes, difficulty: int, limit: int ):
+    r""" The per nonce loop, hex encoding, sha256, keccak and a big integer product for every nonce.
+    """
+    for nonce in range( nonce_start, nonce_end ):
+        nonce_bytes = binascii.hexlify( nonce.to_bytes( 8, 'little' ) )
+        pre_seal = nonce_bytes + block_bytes
+        seal_sh256 = hashlib.sha256( bytearray( bittensor.utils.hex_bytes_to_u8_list( pre_seal ) ) ).digest()
+        kec = keccak.new( digest_bits = 256 )
+        seal = kec.update( seal_sh256 ).digest()
+        if int.from_bytes( seal, 'big' ) * difficulty < limit:
+            return nonce, seal
+    return -1, None
+
+def run_solvers( num_processes: int, duration: float, update_interval: int, block_bytes: bytes, difficulty: int, limit: int ):
+    r""" Runs num_processes solver processes on one block for duration seconds, returns the nonces tried per process.
+    """
+    header = bittensor.utils.BlockHeader()
+    counters = bittensor.utils.HashCounters( num_processes )
+    solution_queue = multiprocessing.Queue()
+    header.update( 1, block_bytes, difficulty )
+    solvers = [ bittensor.utils.Solver( i, num_processes, update_interval, solution_queue, header, counters, limit ) for i in range( num_processes ) ]
+    for solver in solvers:
+        solver.start()
+    # Skip the process start up before counting.
+    while sum( counters.totals() ) == 0:
+        time.sleep( 0.01 )
+    start_hashes = counters.totals()
+    time.sleep( duration )
+    hashes = [ end - start for start, end in zip( start_hashes, counters.totals() ) ]
+    header.stop()
+    bittensor.utils.terminate_workers_and_wait_for_exit( solvers )
+    return hashes
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--block_hash', type=str, help='Block hash the seals are computed for.', default='0xba7ea4eb0b16dee271dbef5911838c3f359fcf598c74da65a54b919b68b67279')
+    parser.add_argument('--difficulty', type=int, help='Registration difficulty, set high so that no nonce solves it.', default=2**64 - 1)
+    parser.add_argument('--nonces', type=int, help='Number of nonces evaluated per mode.', default=100000)
+    parser.add_argument('--batch_sizes', type=int, nargs='+', help='Kernel batch sizes to run.', default=[1024, 4096, 16384, 65536])
+    parser.add_argument('--processes', type=int, nargs='+', help='Solver process counts to run, defaults to powers of two up to the core count.', default=None)
+    parser.add_argument('--duration', type=float, help='Seconds to run each process count.', default=5)
+    parser.add_argument('--update_interval', type=int, help='Nonces per solver work block.', default=50_000)
+    args = parser.parse_args()
+
+    console = Console()
+    block_bytes = args.block_hash.encode('utf-8')[2:]
+    limit = int(2**256) - 1
+
+    # Both paths must agree on the seals before their speed means anything.
+    for nonce in range( 16 ):
+        assert solve_cpu( nonce, nonce + 1, block_bytes, 1, limit )[1] == bittensor.utils.create_seal_hash( args.block_hash, nonce )
+
+    modes = [ ( 'python loop', '1', lambda start, end: solve_scalar( start, end, block_bytes, args.difficulty, limit ) ) ]
+    for batch_size in args.batch_sizes:
+        modes.append( ( 'vectorized', str( batch_size ), lambda start, end, batch_size = batch_size: solve_cpu( start, end, block_bytes, args.difficulty, limit, batch_size = batch_size ) ) )
+
+    table = Table( title = 'CPU registration hash rate, difficulty {}'.format( bittensor.utils.millify( args.difficulty ) ) )
+    for column in [ 'mode', 'batch size', 'nonces', 'seconds', 'hash rate', 'speedup' ]:
+        table.add_column( column, justify = 'right' )
+    base_rate = None
+    for mode, batch_size, solve in modes:
+        start_time = time.time()
+        nonce, seal = solve( 0, args.nonces )
+        seconds = time.time() - start_time
+        # A solution stops the block early, only count the nonces evaluated.
+        nonces = args.nonces if nonce == -1 else nonce + 1
+        rate = nonces / seconds
+        base_rate = base_rate or rate
+        table.add_row( mode, batch_size, str( nonces ), '{:.2f}'.format( seconds ), bittensor.utils.get_human_readable( rate, 'H/s' ), '{:.1f}x'.format( rate / base_rate ) )
+    console.print( table )
+
+    cores = bittensor.utils.get_cpu_count()
+    processes = args.processes or sorted( set( [ 2 ** i for i in range( cores.bit_length() ) if 2 ** i <= cores ] + [ cores ] ) )
+    table = Table( title = 'Solver scaling, {} cores available'.format( cores ) )
+    for column in [ 'processes', 'hash rate', 'per process min', 'per process max', 'speedup', 'efficiency' ]:
+        table.add_column( column, justify = 'right' )
+    base_rate = None
+    for num_processes in processes:
+        hashes = run_solvers( num_processes, args.duration, args.update_interval, block_bytes, args.difficulty, limit )
+        rate = sum( hashes ) / args.duration
+        base_rate = base_rate or rate / num_processes
+        table.add_row(
+            str( num_processes ),
+            bittensor.utils.get_human_readable( rate, 'H/s' ),
+            bittensor.utils.get_human_readable( min( hashes ) / args.duration, 'H/s' ),
+            bittensor.utils.get_human_readable( max( hashes ) / args.duration, 'H/s' ),
+            '{:.2f}x'.format( rate / base_rate ),
+            '{:.0%}'.format( rate / base_rate / num_processes ),
+        )
+    console.print( table )
@@ -0,0 +1,71 @@
+#!/bin/python3
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+""" Microbenchmark of the bittensor tensor serializers on TextCausalLM sized payloads.
+
+Example:
+    $ python3 benchmarks/serializer.py --batch_size 32 --sequence_len 20 --vocab_size 50258
+
+"""
+import argparse
+import time
+
+import torch
+import bittensor
+from rich.console import Console
+from rich.table import Table
+
+SERIALIZERS = {
+    'MSGPACK': bittensor.proto.Serializer.MSGPACK,
+    'CMPPACK': bittensor.proto.Serializer.CMPPACK,
+    'RAWBUFFER': bittensor.proto.Serializer.RAWBUFFER,
+}
+
+def benchmark( serializer_type: int, tensor: torch.Tensor, n_calls: int ):
+    r""" Returns the mean serialize time, mean deserialize time and wire size for the serializer.
+    """
+    serializer = bittensor.serializer( serializer_type = serializer_type )
+    serialize_time = 0
+    deserialize_time = 0
+    for _ in range( n_calls ):
+        start_time = time.perf_counter()
+        proto = serializer.serialize( tensor, modality = bittensor.proto.Modality.TENSOR, from_type = bittensor.proto.TensorType.TORCH )
+        wire = proto.SerializeToString()
+        serialize_time += time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        received = bittensor.proto.Tensor.FromString( wire )
+        serializer.deserialize( received, to_type = bittensor.proto.TensorType.TORCH )
+        deserialize_time += time.perf_counter() - start_time
+    return serialize_time / n_calls, deserialize_time / n_calls, len( wire )
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--batch_size', type=int, help='Batch size of the payload.', default=32)
+    parser.add_argument('--sequence_len', type=int, help='Sequence length of the payload.', default=20)
+    parser.add_argument('--vocab_size', type=int, help='Vocab size of the payload.', default=50258)
+    parser.add_argument('--n_calls', type=int, help='Number of round trips per serializer.', default=10)
+    args = parser.parse_args()
+
+    tensor = torch.rand( [args.batch_size, args.sequence_len, args.vocab_size] )
+    table = Table( title = 'Serializer round trip on [{}, {}, {}] float32'.format( args.batch_size, args.sequence_len, args.vocab_size ) )
+    for column in [ 'serializer', 'serialize (ms)', 'deserialize (ms)', 'wire size (MB)' ]:
+        table.add_column( column )
+    for name, serializer_type in SERIALIZERS.items():
+        serialize_time, deserialize_time, size = benchmark( serializer_type, tensor, args.n_calls )
+        table.add_row( name, '{:.2f}'.format( serialize_time * 1000 ), '{:.2f}'.format( deserialize_time * 1000 ), '{:.2f}'.format( size / 1e6 ) )
+    Console().print( table )
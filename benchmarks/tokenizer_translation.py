@@ -0,0 +1,132 @@
+#!/bin/python3
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+""" Benchmarks the server side translation of logits to probabilities over the standard tokenizer.
+
+Random logits over each server tokenizer vocabulary are translated for a batch of text, once
+row by row with translate_tokenizer_probs, as the translation ran before, and once through
+translate_logits_to_probs_std, which aligns every row and then translates the whole batch
+with gathers and index adds per token sequence depth. Both outputs are compared.
+
+Example:
+    $ python3 benchmarks/tokenizer_translation.py
+    $ python3 benchmarks/tokenizer_translation.py --tokenizers facebook/opt-125m --batch_size 32 --sequence_len 128
+
+"""
+import argparse
+import time
+
+import torch
+from rich.console import Console
+from rich.table import Table
+from transformers import AutoTokenizer
+from bittensor.utils.tokenizer_utils import *
+
+TEXT = ("The Ethereum blockchain reached a new milestone today, as developers merged the long awaited upgrade. "
+        "Validators, miners and users alike watched the 12,345 blocks finalize in under 3.5 seconds each!\n"
+        "“It's been a long road,” said one contributor. Costs dropped by ~40% — while throughput doubled. ")
+
+def prepare( tokenizer_name: str, std_tokenizer, text_batch: List[str], sequence_len: int ):
+    r""" Tokenizes text_batch with both tokenizers the way the server does, returns the translation inputs.
+    """
+    tokenizer = AutoTokenizer.from_pretrained( tokenizer_name )
+    tokenizer.padding_side = 'left'
+    if tokenizer.pad_token is None and tokenizer.eos_token is not None:
+        tokenizer.pad_token = tokenizer.eos_token
+    prep_tokenizer( tokenizer, std_tokenizer )
+
+    token_batch = std_tokenizer( text_batch, add_special_tokens = False, max_length = sequence_len,
+                                 truncation = True, padding = True, return_tensors = 'pt' )['input_ids']
+    text_batch = std_tokenizer.batch_decode( token_batch )
+    to_text_batch, from_offsets_batch, to_offsets_batch, pad_offsets_batch = translate_special_token_text( text_batch, std_tokenizer, tokenizer )
+    tokens = tokenizer( to_text_batch, padding = True, truncation = True, return_tensors = 'pt', add_special_tokens = False )
+    server_tokens = tokenizer( to_text_batch, return_offsets_mapping = True, add_special_tokens = False )
+    std_tokens = std_tokenizer( text_batch, return_offsets_mapping = True )
+    offset_mapping = pad_offsets( server_tokens['offset_mapping'], to_offsets_batch, pad_offsets_batch )
+    offset_mapping_std = pad_offsets( std_tokens['offset_mapping'], from_offsets_batch, pad_offsets_batch )
+    logits = torch.randn( tokens['input_ids'].shape + ( tokenizer.vocab_len, ) )
+    return tokenizer, logits, offset_mapping, offset_mapping_std, tokens['input_ids'], token_batch
+
+def translate_sequential( logits, offset_mapping, offset_mapping_std, tokenizer, std_tokenizer,
+                          split_map_cache, to_translation_map, from_translation_map, tokens, tokens_std ):
+    r""" Row by row translation with translate_tokenizer_probs, followed by the probability mass corrections.
+    """
+    batch_size = logits.shape[0]
+    probs = torch.softmax( logits, dim = 2 )
+    probs_std = torch.zeros( batch_size, tokens_std.shape[-1], std_tokenizer.vocab_len )
+    for b in range( batch_size ):
+        translate_tokenizer_probs( probs[b][-len( offset_mapping[b] ):], probs_std[b], offset_mapping[b], offset_mapping_std[b],
+                                   tokenizer, std_tokenizer, split_map_cache, to_translation_map, from_translation_map,
+                                   tokens[b][-len( offset_mapping[b] ):], tokens_std[b] )
+    probs_std_sum = probs_std.sum( dim = -1 )
+    over = ( probs_std_sum > 1 )
+    probs_std[over] /= probs_std_sum[over][:, None]
+    probs_std_sum = probs_std.sum( dim = -1 )
+    under = ( probs_std_sum < 1 )
+    probs_std[under] += ( ( 1 - probs_std_sum[under] ) / probs_std[under].shape[-1] )[:, None]
+    return probs_std
+
+def timed( function, repeat: int ):
+    r""" Returns the last result and the mean seconds of repeat calls to function.
+    """
+    start_time = time.perf_counter()
+    for _ in range( repeat ):
+        result = function()
+    return result, ( time.perf_counter() - start_time ) / repeat
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--std_tokenizer', type=str, help='Standard (validator) tokenizer.', default='gpt2')
+    parser.add_argument('--tokenizers', type=str, nargs='+', help='Server tokenizers to translate from.',
+                        default=['EleutherAI/gpt-j-6B', 'benjamin/gerpt2-large', 'facebook/opt-125m', 'google/bigbird-roberta-base'])
+    parser.add_argument('--batch_size', type=int, help='Number of text rows per batch.', default=16)
+    parser.add_argument('--sequence_len', type=int, help='Standard tokenizer sequence length.', default=64)
+    parser.add_argument('--repeat', type=int, help='Translations to average per path.', default=3)
+    args = parser.parse_args()
+
+    std_tokenizer = AutoTokenizer.from_pretrained( args.std_tokenizer )
+    std_tokenizer.pad_token = std_tokenizer.eos_token
+    std_tokenizer.padding_side = 'left'
+    set_vocab_len( std_tokenizer )
+    text_batch = [ TEXT[ i * 7: ] + TEXT[ :i * 7 ] for i in range( args.batch_size ) ]
+
+    console = Console()
+    table = Table( title = 'Tokenizer translation to {}, batch_size {} x sequence_len {}, {} threads'.format(
+        args.std_tokenizer, args.batch_size, args.sequence_len, torch.get_num_threads() ) )
+    for column in [ 'tokenizer', 'sequential (ms)', 'batched (ms)', 'speedup', 'max abs diff' ]:
+        table.add_column( column, justify = 'right' )
+    for tokenizer_name in args.tokenizers:
+        tokenizer, logits, offset_mapping, offset_mapping_std, tokens, tokens_std = prepare( tokenizer_name, std_tokenizer, text_batch, args.sequence_len )
+        to_translation_map = get_translation_map( tokenizer, std_tokenizer )
+        from_translation_map = get_translation_map( std_tokenizer, tokenizer )
+        split_map_cache = {}
+        translate_args = ( logits, offset_mapping, offset_mapping_std, tokenizer, std_tokenizer,
+                           split_map_cache, to_translation_map, from_translation_map, tokens, tokens_std )
+        # Warm up the split map and translation step caches, shared by both paths.
+        translate_logits_to_probs_std( *translate_args, skip_equivalent = False )
+
+        with torch.no_grad():
+            sequential, sequential_time = timed( lambda: translate_sequential( *translate_args ), args.repeat )
+            batched, batched_time = timed( lambda: translate_logits_to_probs_std( *translate_args, skip_equivalent = False ), args.repeat )
+        table.add_row(
+            tokenizer_name,
+            '{:.1f}'.format( 1000 * sequential_time ),
+            '{:.1f}'.format( 1000 * batched_time ),
+            '{:.2f}x'.format( sequential_time / batched_time ),
+            '{:.2e}'.format( ( sequential - batched ).abs().max().item() ),
+        )
+    console.print( table )
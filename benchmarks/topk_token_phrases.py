@@ -0,0 +1,106 @@
+#!/bin/python3
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+""" Benchmarks the server side construction of TextCausalLMNext topk token phrases.
+
+The topk phrases were formed as python lists of [prob] + std_token_phrases[i] for every batch
+item and topk entry, padded and converted with torch.tensor. They are now gathered from the
+padded std_token_phrases table that prep_tokenizer builds once. Both are timed on random logits
+over the server tokenizer vocabulary (GPT-2 by default), followed by compact_topk_token_phrases
+as the synapse encodes the response.
+
+Example:
+    $ python3 benchmarks/topk_token_phrases.py
+    $ python3 benchmarks/topk_token_phrases.py --tokenizer EleutherAI/gpt-j-6B --topk 512 4096 --batch_size 16
+
+"""
+import argparse
+import time
+
+import torch
+from rich.console import Console
+from rich.table import Table
+from transformers import AutoTokenizer
+from bittensor.utils.tokenizer_utils import prep_tokenizer, topk_token_phrases, compact_topk_token_phrases
+
+def topk_token_phrases_lists( logits: torch.Tensor, tokenizer, topk: int, ignore_index: int = -100 ) -> torch.Tensor:
+    r""" The topk phrase construction from python lists, as before the std_token_phrases table.
+    """
+    batch_size, vocab_size = logits.shape
+    probs = torch.softmax( logits.float(), dim = 1 )
+    topk_probs, topk_indices = torch.topk( probs, topk )
+    floor_probs = torch.clamp( 1 - topk_probs.sum( dim = -1 ), 1e-40, 1 ) / ( vocab_size - topk )
+    topk_probs_list, topk_indices_list, floor_probs_list = topk_probs.tolist(), topk_indices.tolist(), floor_probs.tolist()
+    probs, phrases = [], []
+    for b in range( batch_size ):
+        probs += [ topk_probs[b], floor_probs[b] ]
+        phrases += [ [ prob ] + tokenizer.std_token_phrases[i] for prob, i in zip( topk_probs_list[b], topk_indices_list[b] ) ]
+        phrases += [ [ floor_probs_list[b] ] ]
+    max_len = max( [ len( p ) for p in phrases ] )
+    topk_tensor = torch.tensor( [ p + [ ignore_index ] * ( max_len - len( p ) ) for p in phrases ] ).to( logits.device )
+    topk_tensor[:, 0] = torch.hstack( probs )
+    return topk_tensor.reshape( batch_size, topk + 1, max_len )
+
+def timed( function, repeat: int ):
+    r""" Returns the last result and the mean milliseconds of repeat calls to function.
+    """
+    if torch.cuda.is_available():
+        torch.cuda.synchronize()
+    start_time = time.perf_counter()
+    for _ in range( repeat ):
+        result = function()
+    if torch.cuda.is_available():
+        torch.cuda.synchronize()
+    return result, 1000 * ( time.perf_counter() - start_time ) / repeat
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tokenizer', type=str, help='Server tokenizer the logits are over.', default='gpt2')
+    parser.add_argument('--std_tokenizer', type=str, help='Standard (validator) tokenizer.', default='gpt2')
+    parser.add_argument('--topk', type=int, nargs='+', help='Synapse topk values to run.', default=[128, 512, 4096])
+    parser.add_argument('--batch_size', type=int, help='Batch size of the last token logits.', default=10)
+    parser.add_argument('--device', type=str, help='Device of the logits.', default='cpu')
+    parser.add_argument('--repeat', type=int, help='Calls to average per path.', default=10)
+    args = parser.parse_args()
+
+    std_tokenizer = AutoTokenizer.from_pretrained( args.std_tokenizer )
+    tokenizer = AutoTokenizer.from_pretrained( args.tokenizer )
+    start_time = time.perf_counter()
+    prep_tokenizer( tokenizer, std_tokenizer )
+    prep_seconds = time.perf_counter() - start_time
+
+    console = Console()
+    table = Table( title = 'Topk token phrases, {} vocab {} to {}, batch_size {} on {} (prep_tokenizer {:.1f}s)'.format(
+        args.tokenizer, tokenizer.vocab_len, args.std_tokenizer, args.batch_size, args.device, prep_seconds ) )
+    for column in [ 'topk', 'lists (ms)', 'table (ms)', 'speedup', 'lists + compact (ms)', 'table + compact (ms)', 'equal' ]:
+        table.add_column( column, justify = 'right' )
+    for topk in args.topk:
+        logits = torch.randn( args.batch_size, tokenizer.vocab_len, device = args.device )
+        lists, lists_time = timed( lambda: topk_token_phrases_lists( logits, tokenizer, topk ), args.repeat )
+        gathered, table_time = timed( lambda: topk_token_phrases( logits, tokenizer, topk ), args.repeat )
+        _, lists_compact_time = timed( lambda: compact_topk_token_phrases( topk_token_phrases_lists( logits, tokenizer, topk ) ), args.repeat )
+        _, table_compact_time = timed( lambda: compact_topk_token_phrases( topk_token_phrases( logits, tokenizer, topk ) ), args.repeat )
+        table.add_row(
+            str( topk ),
+            '{:.2f}'.format( lists_time ),
+            '{:.2f}'.format( table_time ),
+            '{:.1f}x'.format( lists_time / table_time ),
+            '{:.2f}'.format( lists_compact_time ),
+            '{:.2f}'.format( table_compact_time ),
+            str( torch.equal( lists, gathered ) ),
+        )
+    console.print( table )
@@ -0,0 +1,171 @@
+#!/bin/python3
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+""" Benchmarks the core validator neuron stats update and weight gathering per step as the network grows.
+
+Each validator step pushes the statistics of the queried uids into exponential moving averages, and the
+weights are gathered from the stats of every uid. The dict of per uid stats dicts the validator kept before
+is compared with the columnar NeuronStats store, after checking that both hold the same stats.
+
+Example:
+    $ python3 benchmarks/validator_neuron_stats.py
+    $ python3 benchmarks/validator_neuron_stats.py --neurons 1024 4096 16384 --queried 256 --steps 20
+
+"""
+import argparse
+import math
+import random
+import time
+from types import SimpleNamespace
+
+import torch
+from rich.console import Console
+from rich.table import Table
+from bittensor._neuron.text.core_validator import neuron, NeuronStats, scaling_law_loss_to_params
+
+def synthetic_stats( uids ):
+    r""" Returns TextCausalLMNext step stats of uids, every fifth uid unresponsive.
+    """
+    stats = {}
+    for uid in uids:
+        stats[uid] = { 'uid': uid, 'response_time_nxt': torch.rand( 1 )[0] * 12, 'routing_score': torch.rand( 1 )[0] }
+        if uid % 5 != 4:
+            stats[uid].update( {
+                'loss_val_nxt': torch.rand( 1 )[0] * 5, 'loss_nxt': torch.rand( 1 )[0] * 5,
+                'synergy_nxt': torch.rand( 1 )[0] * 100, 'synergy_loss_diff_nxt': torch.rand( 1 )[0],
+                'logits_divergence_nxt': torch.rand( 1 )[0], 'logits_excess_nxt': torch.rand( 1 )[0],
+            } )
+    return stats
+
+def neuron_stats_update_dicts( self, neuron_stats ):
+    r""" The validator stats update on the dict of per uid stats dicts, before NeuronStats.
+    """
+    responsive_uids = []
+    for _uid, _stats in neuron_stats.items():
+        stats = self.neuron_stats.setdefault( _uid, {} )
+        for key in _stats:
+            if math.isnan( _stats[key] ):
+                continue
+            if key in stats:
+                stats[key] = ( 1 - self.alpha ) * stats[key] + self.alpha * _stats[key]
+            else:
+                stats.setdefault( key, _stats[key] )
+
+        extra_stats = {}
+        if 'loss_nxt' in _stats and 'loss_nxt' in stats:
+            _num_params = scaling_law_loss_to_params( torch.as_tensor( stats['loss_nxt'] ) )
+            _pow_num_params = torch.pow( _num_params, self.config.nucleus.scaling_law_power )
+            extra_stats.update( { 'est_params_nxt': _num_params.item(), 'base_params_nxt': _pow_num_params.item() } )
+            if 'synergy_nxt' in stats:
+                extra_stats['shapley_values_nxt'] = extra_stats['base_params_nxt'] + stats['synergy_nxt']
+            if 'logits_excess_nxt' in stats:
+                extra_stats['shapley_values_nxt'] /= 1 + self.config.nucleus.logits_divergence * stats['logits_excess_nxt']
+
+        if 'updates!' in stats:
+            stats['updates!'] += 1
+        else:
+            stats.setdefault( 'updates!', 1 )
+
+        for key in self.synapse_keys:
+            zkey = key + '!'
+            stats.setdefault( zkey, 0. )
+            if key in _stats and not math.isnan( _stats[key] ):
+                responsive_uids += [_uid]
+                stats[zkey] = ( 1 - self.alpha ) * stats[zkey] + self.alpha * _stats[key]
+            elif key in extra_stats and not math.isnan( extra_stats[key] ):
+                responsive_uids += [_uid]
+                stats[zkey] = ( 1 - self.alpha ) * stats[zkey] + self.alpha * extra_stats[key]
+            else:
+                stats[zkey] = ( 1 - self.alpha ) * stats[zkey]
+
+        for key in self.synapse_keys:
+            if key in _stats or key in extra_stats:
+                updates = 'updates_' + key
+                if updates in stats:
+                    stats[updates] += 1
+                else:
+                    stats.setdefault( updates, 1 )
+
+        for key in extra_stats:
+            if math.isnan( extra_stats[key] ):
+                continue
+            if key in stats:
+                stats[key] = ( 1 - self.alpha ) * stats[key] + self.alpha * extra_stats[key]
+            else:
+                stats.setdefault( key, extra_stats[key] )
+
+    return responsive_uids, list( neuron_stats.keys() )
+
+def neuron_weights_dicts( self, n: int, weight_key: str ) -> torch.FloatTensor:
+    r""" The weights gathered per uid from the dict of stats dicts, as calculate_weights did.
+    """
+    neuron_weights = torch.zeros( n )
+    for uid in self.neuron_stats:
+        if weight_key in self.neuron_stats[uid]:
+            neuron_weights[uid] = torch.tensor( [ self.neuron_stats[uid][weight_key] ] )
+    return neuron_weights
+
+def neuron_weights_columns( self, n: int, weight_key: str ) -> torch.FloatTensor:
+    r""" The weights gathered from the NeuronStats columns, as calculate_weights does.
+    """
+    neuron_weights = torch.zeros( n )
+    n = min( len( neuron_weights ), self.neuron_stats.n )
+    neuron_weights[:n] = self.neuron_stats.get( weight_key )[:n].to( neuron_weights.dtype )
+    return neuron_weights
+
+def step_time( validator, update, weights, steps ) -> float:
+    r""" Returns the mean seconds of the stats update and weight gathering of steps.
+    """
+    start_time = time.perf_counter()
+    for step in steps:
+        update( validator, step )
+        weights( validator, validator.n, 'shapley_values_nxt!' )
+    return ( time.perf_counter() - start_time ) / len( steps )
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--neurons', type=int, nargs='+', help='Numbers of uids in the network.', default=[1024, 4096, 16384])
+    parser.add_argument('--queried', type=int, help='Uids queried per validator step.', default=128)
+    parser.add_argument('--steps', type=int, help='Timed validator steps per network size.', default=20)
+    args = parser.parse_args()
+
+    config = SimpleNamespace( nucleus = SimpleNamespace( scaling_law_power = 0.5, logits_divergence = 0.1 ) )
+    console = Console()
+    table = Table( title = 'Validator neuron stats update and weights per step, {} queried uids'.format( args.queried ) )
+    for column in [ 'n', 'dicts (ms)', 'columns (ms)', 'speedup' ]:
+        table.add_column( column, justify = 'right' )
+    for n in args.neurons:
+        dicts = SimpleNamespace( neuron_stats = {}, n = n, alpha = 0.1, synapse_keys = [ 'shapley_values_nxt' ], config = config )
+        columns = SimpleNamespace( neuron_stats = NeuronStats(), n = n, alpha = 0.1, synapse_keys = [ 'shapley_values_nxt' ], config = config )
+
+        # Every uid has stats before the timed steps, as after the first epochs.
+        uids = list( range( n ) )
+        warmup = [ synthetic_stats( uids[ start: start + args.queried ] ) for start in range( 0, n, args.queried ) ]
+        steps = [ synthetic_stats( random.sample( uids, args.queried ) ) for _ in range( args.steps ) ]
+        for step in warmup:
+            neuron_stats_update_dicts( dicts, step )
+            neuron.neuron_stats_update( columns, step )
+        dicts_time = step_time( dicts, neuron_stats_update_dicts, neuron_weights_dicts, steps )
+        columns_time = step_time( columns, neuron.neuron_stats_update, neuron_weights_columns, steps )
+
+        for uid in uids:
+            expected, stats = dicts.neuron_stats[uid], columns.neuron_stats[uid]
+            assert expected.keys() == stats.keys(), uid
+            for key in expected:
+                assert math.isclose( float( expected[key] ), stats[key], rel_tol = 1e-5 ), ( uid, key )
+        table.add_row( str( n ), '{:.2f}'.format( 1000 * dicts_time ), '{:.2f}'.format( 1000 * columns_time ), '{:.1f}x'.format( dicts_time / columns_time ) )
+    console.print( table )
@@ -0,0 +1,108 @@
+#!/bin/python3
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+""" Benchmarks core validator scoring time per step as the number of queried endpoints grows.
+
+Synthetic TextCausalLMNext responses are scored with the validator shapley base values, logits divergences
+and pairwise synergies, the stages which run on every validator step after the dendrite query returns.
+
+Example:
+    $ python3 benchmarks/validator_scoring.py
+    $ python3 benchmarks/validator_scoring.py --endpoints 64 256 1024 --synapse_topk 4096 --device cuda
+
+"""
+import argparse
+import time
+
+import torch
+import bittensor
+from rich.console import Console
+from rich.table import Table
+from bittensor._neuron.text.core_validator import shapley_base, logits_divergence, shapley_synergy, pairwise_mixture_loss
+from bittensor.utils.tokenizer_utils import topk_first_token_probs
+
+def synthetic_responses( num_endpoints: int, batch_size: int, synapse_topk: int, device: str ):
+    r""" Returns num_endpoints topk phrase responses of shape [batch_size, synapse_topk + 1, 3], every fifth a timeout.
+    """
+    responses = []
+    for _ in range( num_endpoints ):
+        response = -100 * torch.ones( ( batch_size, synapse_topk + 1, 3 ) )
+        probs = torch.rand( ( batch_size, synapse_topk ) )
+        response[ :, :-1, 0 ] = 0.9 * probs / probs.sum( dim = -1, keepdim = True )
+        response[ :, -1, 0 ] = 0.1 / bittensor.__vocab_size__
+        response[ :, :-1, 1 ] = torch.randint( 0, bittensor.__vocab_size__, ( batch_size, synapse_topk ) ).float()
+        responses.append( [ response.to( device ) ] )
+    return_ops = [ torch.tensor( [ bittensor.proto.ReturnCode.Timeout if uid % 5 == 4 else bittensor.proto.ReturnCode.Success ] ) for uid in range( num_endpoints ) ]
+    times = [ torch.tensor( [ 1.0 ] ) for _ in range( num_endpoints ) ]
+    return responses, return_ops, times
+
+def score( num_endpoints: int, batch_size: int, synapse_topk: int, device: str ):
+    r""" Scores one synthetic validator step, returns the seconds spent in each scoring stage.
+    """
+    uids = torch.arange( num_endpoints )
+    query_responses, return_ops, times = synthetic_responses( num_endpoints, batch_size, synapse_topk, device )
+    routing_score = torch.rand( num_endpoints, device = device, requires_grad = True )
+    targets = torch.randint( 0, bittensor.__vocab_size__, ( batch_size, ), device = device )
+
+    def base_params( _stats, query_response ):
+        # First token cross entropy, stands in for the phrase cross entropy of the synapse
+        tokens, probs = topk_first_token_probs( query_response )
+        _losses = -torch.log( ( probs * ( tokens == targets[ :, None ] ) ).sum( dim = -1 ) + 1e-40 )
+        _stats.update( { 'losses_nxt': _losses, 'loss_nxt': _losses.mean(), 'synergy_nxt': 0, 'synergy_loss_diff_nxt': 0 } )
+
+    def synergy( responsives, target, ext ):
+        return pairwise_mixture_loss( torch.exp( -torch.stack( [ _stats[ 'losses_nxt' ] for _stats in responsives ] ) ) )
+
+    stages = {}
+    start_time = time.perf_counter()
+    loss, stats, _ = shapley_base( uids, query_responses, return_ops, times, routing_score, base_params, ext = '_nxt' )
+    stages[ 'base' ] = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    with torch.no_grad():
+        logits_divergence( stats, uids, query_responses, return_ops, times, ext = '_nxt' )
+    stages[ 'divergence' ] = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    shapley_synergy( stats, synergy, '_nxt' )
+    stages[ 'synergy' ] = time.perf_counter() - start_time
+    return stages
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--endpoints', type=int, nargs='+', help='Numbers of queried endpoints (validator nucleus.topk) to score.', default=[64, 128, 256, 512, 1024])
+    parser.add_argument('--batch_size', type=int, help='Validator batch size.', default=10)
+    parser.add_argument('--synapse_topk', type=int, help='Topk token phrases per response.', default=512)
+    parser.add_argument('--device', type=str, help='Device to score on.', default='cpu')
+    parser.add_argument('--steps', type=int, help='Steps to average per size.', default=3)
+    args = parser.parse_args()
+
+    console = Console()
+    table = Table( title = 'Validator scoring, batch_size {} x synapse topk {} on {}'.format( args.batch_size, args.synapse_topk, args.device ) )
+    for column in [ 'endpoints', 'base (ms)', 'divergence (ms)', 'synergy (ms)', 'step (ms)' ]:
+        table.add_column( column, justify = 'right' )
+    for num_endpoints in args.endpoints:
+        runs = [ score( num_endpoints, args.batch_size, args.synapse_topk, args.device ) for _ in range( args.steps ) ]
+        stages = { stage: 1000 * sum( run[ stage ] for run in runs ) / len( runs ) for stage in runs[ 0 ] }
+        table.add_row(
+            str( num_endpoints ),
+            '{:.1f}'.format( stages[ 'base' ] ),
+            '{:.1f}'.format( stages[ 'divergence' ] ),
+            '{:.1f}'.format( stages[ 'synergy' ] ),
+            '{:.1f}'.format( sum( stages.values() ) ),
+        )
+    console.print( table )
@@ -19,9 +19,12 @@
 # DEALINGS IN THE SOFTWARE.
 
 import argparse
+import asyncio
+import collections
 import os
 import copy
 import inspect
+import threading
 import time
 from concurrent import futures
 from typing import Dict, List, Callable, Optional, Tuple, Union
@@ -30,9 +33,12 @@ from bittensor._threadpool import prioritythreadpool
 import torch
 import grpc
 from substrateinterface import Keypair
+from prometheus_client import Counter
 
 import bittensor
-from . import axon_impl
+from . import axon_impl, axon_aio_impl, batcher_impl
+
+PROM_auth_counters = Counter('axon_auth_counters', 'axon_auth_counters', ['wallet', 'name'])
 
 class axon:
     """ The factory class for bittensor.Axon object
@@ -77,6 +83,8 @@ class axon:
             forward_timeout: Optional[int] = None,
             backward_timeout: Optional[int] = None,
             compression:Optional[str] = None,
+            batcher: Optional['bittensor.MicroBatcher'] = None,
+            aio: Optional[bool] = None,
         ) -> 'bittensor.Axon':
         r""" Creates a new bittensor.Axon object from passed arguments.
             Args:
@@ -122,6 +130,10 @@ class axon:
                     timeout on the forward requests. 
                 backward_timeout (:type:`Optional[int]`, `optional`):
                     timeout on the backward requests.              
+                batcher (:obj:`Optional[bittensor.MicroBatcher]`, `optional`):
+                    micro-batcher coalescing concurrent synapse calls, created from config.axon.batching if enabled.
+                aio (:type:`Optional[bool]`, `optional`):
+                    If true, serves on a grpc.aio server where requests await the priority threadpool instead of holding a server thread.
         """   
 
         if config == None: 
@@ -136,6 +148,7 @@ class axon:
         config.axon.forward_timeout = forward_timeout if forward_timeout != None else config.axon.forward_timeout
         config.axon.backward_timeout = backward_timeout if backward_timeout != None else config.axon.backward_timeout
         config.axon.compression = compression if compression != None else config.axon.compression
+        config.axon.aio = aio if aio != None else config.axon.aio
         config.axon.lasthidden_timeout = synapse_lasthidden_timeout if synapse_lasthidden_timeout != None else config.axon.lasthidden_timeout
         config.axon.causallm_timeout = synapse_causallm_timeout if synapse_causallm_timeout != None else config.axon.causallm_timeout
         config.axon.causallmnext_timeout = synapse_causallmnext_timeout if synapse_causallmnext_timeout is not None else config.axon.causallmnext_timeout
@@ -154,10 +167,17 @@ class axon:
             wallet = bittensor.wallet( config = config )
         if thread_pool == None:
             thread_pool = futures.ThreadPoolExecutor( max_workers = config.axon.max_workers )
+        if server == None and config.axon.aio:
+            receiver_hotkey = wallet.hotkey.ss58_address
+            server = axon_aio_impl.AioServer( interceptors=(AioAuthInterceptor(receiver_hotkey=receiver_hotkey, blacklist=blacklist, prometheus_level=config.axon.prometheus.level),),
+                                  maximum_concurrent_rpcs = config.axon.maximum_concurrent_rpcs,
+                                  options = [('grpc.keepalive_time_ms', 100000),
+                                             ('grpc.keepalive_timeout_ms', 500000)]
+                                )
         if server == None:
             receiver_hotkey = wallet.hotkey.ss58_address
             server = grpc.server( thread_pool,
-                                  interceptors=(AuthInterceptor(receiver_hotkey=receiver_hotkey, blacklist=blacklist),),
+                                  interceptors=(AuthInterceptor(receiver_hotkey=receiver_hotkey, blacklist=blacklist, prometheus_level=config.axon.prometheus.level),),
                                   maximum_concurrent_rpcs = config.axon.maximum_concurrent_rpcs,
                                   options = [('grpc.keepalive_time_ms', 100000),
                                              ('grpc.keepalive_timeout_ms', 500000)]
@@ -178,10 +198,14 @@ class axon:
         
         synapse_check_function = synapse_checks if synapse_checks != None else axon.default_synapse_check
 
-        if priority != None and priority_threadpool == None:
+        if (priority != None or config.axon.aio) and priority_threadpool == None:
             priority_threadpool = bittensor.prioritythreadpool(config=config)
 
-        axon_instance = axon_impl.Axon(
+        if batcher == None and config.axon.batching.enabled:
+            batcher = batcher_impl.MicroBatcher( max_batch_size = config.axon.batching.max_batch_size, window = config.axon.batching.window )
+
+        axon_class = axon_aio_impl.AioAxon if config.axon.aio else axon_impl.Axon
+        axon_instance = axon_class(
             wallet = wallet, 
             server = server,
             ip = config.axon.ip,
@@ -197,7 +221,8 @@ class axon:
             priority_threadpool = priority_threadpool,
             forward_timeout = config.axon.forward_timeout,
             backward_timeout = config.axon.backward_timeout,
-            prometheus_level = config.axon.prometheus.level
+            prometheus_level = config.axon.prometheus.level,
+            batcher = batcher,
         )
         bittensor.grpc.add_BittensorServicer_to_server( axon_instance, server )
         full_address = str( config.axon.ip ) + ":" + str( config.axon.port )
@@ -249,8 +274,20 @@ class axon:
                 help='''maximum number of threads in thread pool''', default = bittensor.defaults.axon.priority.max_workers)
             parser.add_argument('--' + prefix_str + 'axon.priority.maxsize', type=int, 
                 help='''maximum size of tasks in priority queue''', default = bittensor.defaults.axon.priority.maxsize)
+            parser.add_argument('--' + prefix_str + 'axon.priority.max_per_caller', type=int, 
+                help='''maximum number of tasks of one caller in priority queue, -1 for no limit''', default = bittensor.defaults.axon.priority.max_per_caller)
+            parser.add_argument('--' + prefix_str + 'axon.priority.max_wait', type=float, 
+                help='''seconds after which a queued task runs before tasks with a higher priority''', default = bittensor.defaults.axon.priority.max_wait)
             parser.add_argument('--' + prefix_str + 'axon.compression', type=str, 
                 help='''Which compression algorithm to use for compression (gzip, deflate, NoCompression) ''', default = bittensor.defaults.axon.compression)
+            parser.add_argument('--' + prefix_str + 'axon.aio', action='store_true',
+                help='''If set, serves on a grpc.aio server where requests await the priority threadpool instead of holding a server thread each.''', default = bittensor.defaults.axon.aio)
+            parser.add_argument('--' + prefix_str + 'axon.batching.enabled', action='store_true',
+                help='''If set, concurrent requests of the same synapse are coalesced into one batched model call.''', default = bittensor.defaults.axon.batching.enabled)
+            parser.add_argument('--' + prefix_str + 'axon.batching.max_batch_size', type=int,
+                help='''Maximum number of input rows per batched model call.''', default = bittensor.defaults.axon.batching.max_batch_size)
+            parser.add_argument('--' + prefix_str + 'axon.batching.window', type=float,
+                help='''Seconds a request waits for others to join its batch.''', default = bittensor.defaults.axon.batching.window)
             parser.add_argument('--' +  prefix_str + 'axon.lasthidden_timeout', type = int, 
             help='Timeout for last hidden synapse', default= bittensor.__blocktime__)
             parser.add_argument('--' +  prefix_str + 'axon.causallm_timeout', type = int, 
@@ -286,8 +323,16 @@ class axon:
         defaults.axon.priority = bittensor.Config()
         defaults.axon.priority.max_workers = os.getenv('BT_AXON_PRIORITY_MAX_WORKERS') if os.getenv('BT_AXON_PRIORITY_MAX_WORKERS') != None else 10
         defaults.axon.priority.maxsize = os.getenv('BT_AXON_PRIORITY_MAXSIZE') if os.getenv('BT_AXON_PRIORITY_MAXSIZE') != None else -1
+        defaults.axon.priority.max_per_caller = os.getenv('BT_AXON_PRIORITY_MAX_PER_CALLER') if os.getenv('BT_AXON_PRIORITY_MAX_PER_CALLER') != None else 8
+        defaults.axon.priority.max_wait = os.getenv('BT_AXON_PRIORITY_MAX_WAIT') if os.getenv('BT_AXON_PRIORITY_MAX_WAIT') != None else 5
 
         defaults.axon.compression = 'NoCompression'
+        defaults.axon.aio = os.getenv('BT_AXON_AIO') if os.getenv('BT_AXON_AIO') != None else False
+
+        defaults.axon.batching = bittensor.Config()
+        defaults.axon.batching.enabled = os.getenv('BT_AXON_BATCHING_ENABLED') if os.getenv('BT_AXON_BATCHING_ENABLED') != None else False
+        defaults.axon.batching.max_batch_size = os.getenv('BT_AXON_BATCHING_MAX_BATCH_SIZE') if os.getenv('BT_AXON_BATCHING_MAX_BATCH_SIZE') != None else 32
+        defaults.axon.batching.window = os.getenv('BT_AXON_BATCHING_WINDOW') if os.getenv('BT_AXON_BATCHING_WINDOW') != None else 0.005
 
         # Prometheus
         defaults.axon.prometheus = bittensor.config()
@@ -342,10 +387,17 @@ class axon:
 class AuthInterceptor(grpc.ServerInterceptor):
     """Creates a new server interceptor that authenticates incoming messages from passed arguments."""
 
+    # Smallest wall clock nonce (2001-09-09 in nanoseconds), monotonic clock nonces of previous receptors are below it.
+    WALL_CLOCK_NONCE_MIN = 10**18
+
     def __init__(
         self,
         receiver_hotkey: str,
         blacklist: Callable = None,
+        max_keypairs: int = 4096,
+        nonce_ttl: float = 3600,
+        nonce_skew: float = 60,
+        prometheus_level: str = None,
     ):
         r"""Creates a new server interceptor that authenticates incoming messages from passed arguments.
         Args:
@@ -353,11 +405,31 @@ class AuthInterceptor(grpc.ServerInterceptor):
                 the SS58 address of the hotkey which should be targeted by RPCs
             black_list (Function, `optional`):
                 black list function that prevents certain pubkeys from sending messages
+            max_keypairs (int, `optional`):
+                number of decoded sender keypairs kept, least recently used are dropped first.
+            nonce_ttl (float, `optional`):
+                seconds after which the last nonce of an idle sender endpoint is dropped, older nonces are rejected.
+            nonce_skew (float, `optional`):
+                seconds of clock difference allowed between the sender and this axon.
+            prometheus_level (str, `optional`):
+                prometheus level, auth counters are exported unless OFF.
         """
         super().__init__()
-        self.nonces = {}
+        # endpoint key -> (last nonce, last seen time), ordered from least to most recently seen.
+        self.nonces = collections.OrderedDict()
+        # sender hotkey -> newest nonce of its dropped endpoints, requests with older nonces may be replays.
+        self.nonce_floors = collections.OrderedDict()
+        # endpoint key -> last nonce of senders signing with the monotonic clock, these can not be dropped by age.
+        self.legacy_nonces = {}
+        self.keypairs = collections.OrderedDict()
+        self.lock = threading.Lock()
         self.blacklist = blacklist
         self.receiver_hotkey = receiver_hotkey
+        self.max_keypairs = max_keypairs
+        self.nonce_ttl = nonce_ttl
+        self.nonce_skew = nonce_skew
+        self.prometheus_level = prometheus_level if prometheus_level != None else bittensor.prometheus.level.OFF.name
+        self.stats = collections.Counter()
 
     def parse_legacy_signature(
         self, signature: str
@@ -405,6 +477,94 @@ class AuthInterceptor(grpc.ServerInterceptor):
                 return parts
         raise Exception("Unknown signature format")
 
+    def count(self, name: str):
+        r"""Increments the auth counter name, exported to prometheus unless the level is OFF"""
+        self.stats[name] += 1
+        if self.prometheus_level != bittensor.prometheus.level.OFF.name:
+            PROM_auth_counters.labels(wallet=self.receiver_hotkey, name=name).inc()
+
+    def get_keypair(self, sender_hotkey: str) -> 'Keypair':
+        r"""Returns the keypair of the sender hotkey, decoding the ss58 address only when it is not cached"""
+        with self.lock:
+            keypair = self.keypairs.get(sender_hotkey)
+            if keypair is not None:
+                self.keypairs.move_to_end(sender_hotkey)
+        if keypair is not None:
+            self.count("keypair_hits")
+            return keypair
+
+        self.count("keypair_misses")
+        keypair = Keypair(ss58_address=sender_hotkey)
+        with self.lock:
+            self.keypairs[sender_hotkey] = keypair
+            while len(self.keypairs) > self.max_keypairs:
+                self.keypairs.popitem(last=False)
+        return keypair
+
+    def nonce_window(self) -> Tuple[int, int]:
+        r"""Returns the oldest and newest wall clock nonce accepted now, in nanoseconds"""
+        now_ns = time.time_ns()
+        return (
+            now_ns - int((self.nonce_ttl + self.nonce_skew) * 1e9),
+            now_ns + int(self.nonce_skew * 1e9),
+        )
+
+    def evict_nonces(self, now: float):
+        r"""Drops the nonces of endpoints idle for longer than nonce_ttl, oldest first.
+        The nonce floor of the sender hotkey is raised to the dropped nonce so requests of dropped endpoints can not be replayed,
+        floors below the nonce window are dropped as well since older nonces are rejected by the wall clock.
+        Expects the lock to be held.
+        """
+        while len(self.nonces) > 0:
+            endpoint_key, (nonce, last_seen) = next(iter(self.nonces.items()))
+            if now - last_seen <= self.nonce_ttl:
+                break
+            self.nonces.popitem(last=False)
+            sender_hotkey = endpoint_key.split(":")[0]
+            self.nonce_floors[sender_hotkey] = max(self.nonce_floors.get(sender_hotkey, 0), nonce)
+            self.nonce_floors.move_to_end(sender_hotkey)
+            self.count("nonce_evictions")
+
+        oldest, _ = self.nonce_window()
+        while len(self.nonce_floors) > 0 and next(iter(self.nonce_floors.values())) < oldest:
+            self.nonce_floors.popitem(last=False)
+
+    def check_nonce(self, nonce: int, sender_hotkey: str, endpoint_key: str):
+        r"""Rejects replayed nonces, expects the lock to be held.
+        Receptors sign with wall clock nanoseconds, which must fall in the nonce window.
+        Receptors of previous versions sign with the monotonic clock, nanoseconds since boot, which only have to increase per endpoint.
+        """
+        if nonce < self.WALL_CLOCK_NONCE_MIN:
+            previous_nonce = self.legacy_nonces.get(endpoint_key)
+            if previous_nonce is not None and nonce <= previous_nonce:
+                self.count("nonce_rejections")
+                raise Exception("Nonce is too small")
+            return
+
+        oldest, newest = self.nonce_window()
+        if nonce <= self.nonce_floors.get(sender_hotkey, 0) or nonce < oldest:
+            self.count("nonce_rejections")
+            raise Exception("Nonce is too old")
+        if nonce > newest:
+            self.count("nonce_rejections")
+            raise Exception("Nonce is too far ahead")
+        if endpoint_key in self.nonces:
+            previous_nonce, _ = self.nonces[endpoint_key]
+            # Nonces must be strictly monotonic over time.
+            if nonce <= previous_nonce:
+                self.count("nonce_rejections")
+                raise Exception("Nonce is too small")
+
+    def record_nonce(self, nonce: int, endpoint_key: str):
+        r"""Keeps the nonce as the last one of the endpoint, expects the lock to be held"""
+        if nonce < self.WALL_CLOCK_NONCE_MIN:
+            self.legacy_nonces[endpoint_key] = nonce
+            return
+        now = time.time()
+        self.nonces[endpoint_key] = (nonce, now)
+        self.nonces.move_to_end(endpoint_key)
+        self.evict_nonces(now)
+
     def check_signature(
         self,
         nonce: int,
@@ -414,7 +574,7 @@ class AuthInterceptor(grpc.ServerInterceptor):
         format: int,
     ):
         r"""verification of signature in metadata. Uses the pubkey and nonce"""
-        keypair = Keypair(ss58_address=sender_hotkey)
+        keypair = self.get_keypair(sender_hotkey)
         # Build the expected message which was used to build the signature.
         if format == 2:
             message = f"{nonce}.{sender_hotkey}.{self.receiver_hotkey}.{receptor_uuid}"
@@ -426,15 +586,18 @@ class AuthInterceptor(grpc.ServerInterceptor):
         # the message.
         endpoint_key = f"{sender_hotkey}:{receptor_uuid}"
 
-        if endpoint_key in self.nonces.keys():
-            previous_nonce = self.nonces[endpoint_key]
-            # Nonces must be strictly monotonic over time.
-            if nonce <= previous_nonce:
-                raise Exception("Nonce is too small")
+        with self.lock:
+            self.check_nonce(nonce, sender_hotkey, endpoint_key)
 
         if not keypair.verify(message, signature):
+            self.count("signature_rejections")
             raise Exception("Signature mismatch")
-        self.nonces[endpoint_key] = nonce
+
+        # Checked again, a concurrent request may have used the nonce while the signature was verified.
+        with self.lock:
+            self.check_nonce(nonce, sender_hotkey, endpoint_key)
+            self.record_nonce(nonce, endpoint_key)
+        self.count("verified")
 
     def black_list_checking(self, hotkey: str, method: str):
         r"""Tries to call to blacklist function in the miner and checks if it should blacklist the pubkey"""
@@ -449,33 +612,55 @@ class AuthInterceptor(grpc.ServerInterceptor):
             raise Exception("Unknown request type")
 
         if self.blacklist(hotkey, request_type):
+            self.count("blacklisted")
             raise Exception("Request type is blacklisted")
 
-    def intercept_service(self, continuation, handler_call_details):
-        r"""Authentication between bittensor nodes. Intercepts messages and checks them"""
+    def authenticate(self, handler_call_details):
+        r"""Checks the signature and blacklist of an incoming call, raises on failure"""
         method = handler_call_details.method
         metadata = dict(handler_call_details.invocation_metadata)
 
-        try:
-            (
-                nonce,
-                sender_hotkey,
-                signature,
-                receptor_uuid,
-                signature_format,
-            ) = self.parse_signature(metadata)
-
-            # signature checking
-            self.check_signature(
-                nonce, sender_hotkey, signature, receptor_uuid, signature_format
-            )
-
-            # blacklist checking
-            self.black_list_checking(sender_hotkey, method)
+        (
+            nonce,
+            sender_hotkey,
+            signature,
+            receptor_uuid,
+            signature_format,
+        ) = self.parse_signature(metadata)
+
+        # signature checking
+        self.check_signature(
+            nonce, sender_hotkey, signature, receptor_uuid, signature_format
+        )
 
+        # blacklist checking, after the signature so the blacklist only sees verified hotkeys
+        self.black_list_checking(sender_hotkey, method)
+
+    def intercept_service(self, continuation, handler_call_details):
+        r"""Authentication between bittensor nodes. Intercepts messages and checks them"""
+        try:
+            self.authenticate(handler_call_details)
             return continuation(handler_call_details)
 
         except Exception as e:
             message = str(e)
             abort = lambda _, ctx: ctx.abort(grpc.StatusCode.UNAUTHENTICATED, message)
             return grpc.unary_unary_rpc_method_handler(abort)
+
+
+class AioAuthInterceptor(AuthInterceptor, grpc.aio.ServerInterceptor):
+    """Asyncio variant of the AuthInterceptor for axons served by grpc.aio."""
+
+    async def intercept_service(self, continuation, handler_call_details):
+        r"""Authentication between bittensor nodes. Intercepts messages and checks them.
+        The signature is verified on the default executor so the server event loop keeps serving other calls.
+        """
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self.authenticate, handler_call_details)
+            return await continuation(handler_call_details)
+
+        except Exception as e:
+            message = str(e)
+            async def abort(_, ctx):
+                await ctx.abort(grpc.StatusCode.UNAUTHENTICATED, message)
+            return grpc.unary_unary_rpc_method_handler(abort)
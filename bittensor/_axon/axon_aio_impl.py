@@ -0,0 +1,151 @@
+""" Implementation of the asyncio Axon, services Forward and Backward requests on a grpc.aio server.
+"""
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+# Copyright © 2022 Opentensor Foundation
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated 
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation 
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, 
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of 
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL 
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION 
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER 
+# DEALINGS IN THE SOFTWARE.
+
+import asyncio
+import concurrent.futures
+import threading
+
+import grpc
+from loguru import logger
+
+import bittensor
+from . import axon_impl
+
+logger = logger.opt(colors=True)
+
+class AioServer:
+    r""" Runs a grpc.aio server on a private event loop thread behind the blocking grpc.Server interface used by the Axon.
+    """
+    def __init__( self, **kwargs ):
+        r""" Creates the event loop thread and the grpc.aio server.
+            Args:
+                kwargs:
+                    Arguments passed to grpc.aio.server.
+        """
+        self.loop = asyncio.new_event_loop()
+        self.started = False
+        self._thread = threading.Thread( target = self.loop.run_forever, name = 'AxonAioLoop', daemon = True )
+        self._thread.start()
+        async def create_server():
+            return grpc.aio.server( **kwargs )
+        self.server = self.run( create_server() )
+
+    def run( self, coroutine ):
+        r""" Runs the coroutine on the server event loop and blocks for its result.
+        """
+        return asyncio.run_coroutine_threadsafe( coroutine, self.loop ).result()
+
+    def add_generic_rpc_handlers( self, generic_rpc_handlers ):
+        async def add():
+            self.server.add_generic_rpc_handlers( generic_rpc_handlers )
+        self.run( add() )
+
+    def add_insecure_port( self, address: str ) -> int:
+        async def add():
+            return self.server.add_insecure_port( address )
+        return self.run( add() )
+
+    def start( self ):
+        # A grpc.aio server can not be restarted once stopped.
+        if not self.started:
+            self.run( self.server.start() )
+            self.started = True
+
+    def stop( self, grace: float = None ):
+        # The loop thread is kept alive so that the blocking interface stays usable after a stop.
+        if self.started:
+            self.run( self.server.stop( grace ) )
+            self.started = False
+
+    def __del__( self ):
+        if self.loop.is_running():
+            self.loop.call_soon_threadsafe( self.loop.stop )
+
+
+class AioAxon( axon_impl.Axon ):
+    r""" Services Forward and Backward requests from other neurons on a grpc.aio server.
+        Requests wait on the priority threadpool as awaited futures instead of parking a server thread each, 
+        so the number of concurrent requests is no longer bound by the server thread count.
+    """
+    def __init__( self, **kwargs ):
+        r""" Initializes a new asyncio Axon tensor processing endpoint, see :obj:`bittensor.Axon` for arguments.
+            A priority_threadpool is required, every forward call runs on it.
+        """
+        super().__init__( **kwargs )
+        if self.priority_threadpool == None:
+            raise ValueError( 'AioAxon requires a priority_threadpool to run forward calls on.' )
+        if self.priority == None:
+            # Route every call through the threadpool with equal priority.
+            self.priority = self.default_priority
+
+    def __str__(self) -> str:
+        return "AioAxon({}, {}, {}, {})".format( self.ip, self.port, self.wallet.hotkey.ss58_address, "started" if self.started else "stopped")
+
+    @staticmethod
+    def default_priority( pubkey: str, inputs_x, request_type ) -> float:
+        return 0
+
+    async def Forward(self, request: bittensor.proto.TensorMessage, context: grpc.aio.ServicerContext) -> bittensor.proto.TensorMessage:
+        r""" The function called by remote GRPC Forward requests from other neurons, see :obj:`bittensor.Axon.Forward`.
+        """
+        forward_response_tensors, code, synapses = await self._forward_async( request )
+        response = bittensor.proto.TensorMessage(
+            version = bittensor.__version_as_int__, 
+            hotkey = self.wallet.hotkey.ss58_address, 
+            return_code = code,
+            tensors = forward_response_tensors if forward_response_tensors is not None else [],
+            requires_grad = request.requires_grad,
+            synapses = synapses,
+        )
+        return response
+
+    async def Backward( self, request: bittensor.proto.TensorMessage, context: grpc.aio.ServicerContext ) -> bittensor.proto.TensorMessage:
+        r""" The function called by remote GRPC Backward requests from other neurons, see :obj:`bittensor.Axon.Backward`.
+            Backward calls are submitted to the priority threadpool without waiting on them.
+        """
+        return super().Backward( request, context )
+
+    async def _forward_async(self, request):
+        r""" Runs the forward request steps, awaiting the priority threadpool future instead of blocking on it.
+            Args:
+                request (:obj:`bittensor.proto`, `required`): 
+                    Tensor request proto.
+            Returns:
+                response (:obj:`bittensor.proto.Tensor, `required`): 
+                    serialized tensor response from the nucleus call or None.
+                code (:obj:`bittensor.proto.ReturnCode`, `required`):
+                    Code from the call.
+                synapses (:obj:`List[ 'bittensor.proto.Synapse' ]` of shape :obj:`(num_synapses)`, `required`):
+                    Synapse wire protos with return codes from forward request.
+        """
+        steps = self._forward_steps( request )
+        try:
+            future, timeout = next( steps )
+            while True:
+                try:
+                    result = await asyncio.wait_for( asyncio.wrap_future( future ), timeout = max( timeout, 0 ) )
+                except asyncio.TimeoutError:
+                    future, timeout = steps.throw( concurrent.futures.TimeoutError() )
+                except Exception as e:
+                    future, timeout = steps.throw( e )
+                else:
+                    future, timeout = steps.send( result )
+        except StopIteration as stop:
+            return stop.value
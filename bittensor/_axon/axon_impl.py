@@ -19,6 +19,7 @@
 # DEALINGS IN THE SOFTWARE.
 
 import sys
+import queue
 import time as clock
 from types import SimpleNamespace
 from typing import List, Tuple, Callable
@@ -75,6 +76,7 @@ class Axon( bittensor.grpc.BittensorServicer ):
         priority_threadpool: 'bittensor.prioritythreadpool' = None,
         forward_timeout: int = None,
         backward_timeout: int = None,
+        batcher: 'bittensor.MicroBatcher' = None,
     ):
         r""" Initializes a new Axon tensor processing endpoint.
             
@@ -95,6 +97,8 @@ class Axon( bittensor.grpc.BittensorServicer ):
                     function to assign priority on requests.
                 priority_threadpool (:obj:`bittensor.prioritythreadpool`, `optional`):
                     bittensor priority_threadpool.
+                batcher (:obj:`bittensor.MicroBatcher`, `optional`):
+                    If set, coalesces concurrent synapse calls into batched callback calls.
         """
         self.ip = ip
         self.port = port
@@ -119,6 +123,7 @@ class Axon( bittensor.grpc.BittensorServicer ):
         # -- Priority 
         self.priority = priority 
         self.priority_threadpool = priority_threadpool
+        self.batcher = batcher
         self._prometheus_uuid = uuid.uuid1()
 
     def __str__(self) -> str:
@@ -184,6 +189,36 @@ class Axon( bittensor.grpc.BittensorServicer ):
     def _forward(self, request):
         r""" Performs validity checks on the grpc request before passing the tensors to the forward queue.
             Returns the outputs and synapses from the backend forward call.
+            Blocks the calling thread while the request waits in the priority threadpool.
+            
+            Args:
+                request (:obj:`bittensor.proto`, `required`): 
+                    Tensor request proto.
+            Returns:
+                response (:obj:`bittensor.proto.Tensor, `required`): 
+                    serialized tensor response from the nucleus call or None.
+                code (:obj:`bittensor.proto.ReturnCode`, `required`):
+                    Code from the call.
+                synapses (:obj:`List[ 'bittensor.proto.Synapse' ]` of shape :obj:`(num_synapses)`, `required`):
+                    Synapse wire protos with return codes from forward request.
+        """
+        steps = self._forward_steps( request )
+        try:
+            future, timeout = next( steps )
+            while True:
+                try:
+                    result = future.result( timeout = timeout )
+                except Exception as e:
+                    future, timeout = steps.throw( e )
+                else:
+                    future, timeout = steps.send( result )
+        except StopIteration as stop:
+            return stop.value
+
+    def _forward_steps(self, request):
+        r""" Generator running the forward request, it yields ( future, timeout ) when waiting on the priority threadpool 
+            and is sent the future result (or thrown its exception) by the caller, so that the wait can be blocking or awaited.
+            Returns the outputs and synapses from the backend forward call.
             
             Args:
                 request (:obj:`bittensor.proto`, `required`): 
@@ -327,9 +362,11 @@ class Axon( bittensor.grpc.BittensorServicer ):
                     inputs_x = deserialized_forward_tensors, 
                     synapses = synapses,
                     priority = priority,
+                    caller = request.hotkey,
+                    deadline = start_time + synapse_timeout,
                     hotkey = request.hotkey
                 )
-                forward_response_tensors, forward_codes, forward_messages = future.result( timeout = synapse_timeout - (clock.time() - start_time) )
+                forward_response_tensors, forward_codes, forward_messages = yield future, synapse_timeout - (clock.time() - start_time)
             else:
                 
                 forward_response_tensors, forward_codes, forward_messages = self.forward_callback(
@@ -359,6 +396,18 @@ class Axon( bittensor.grpc.BittensorServicer ):
             finalize_codes_stats_and_logs()
             return [], bittensor.proto.ReturnCode.Timeout, request.synapses
 
+        # ==========================================
+        # ==== Catch requests shed by the queue ====
+        # ==========================================
+        except queue.Full as e:
+            code = bittensor.proto.ReturnCode.Backoff
+            call_time = clock.time() - start_time
+            synapse_codes = [code for _ in synapses ]
+            synapse_call_times = [call_time for _ in synapses ]
+            synapse_messages = [ 'Server overloaded: {}'.format( e ) for _ in synapses ]
+            finalize_codes_stats_and_logs()
+            return [], bittensor.proto.ReturnCode.Backoff, request.synapses
+
         # ==================================
         # ==== Catch unknown exceptions ====
         # ==================================
@@ -572,7 +621,8 @@ class Axon( bittensor.grpc.BittensorServicer ):
                     inputs_x = deserialized_forward_tensors, 
                     grads_dy = deserialized_forward_gradients,
                     synapses = synapses,
-                    priority = priority
+                    priority = priority,
+                    caller = request.hotkey
                 )
 
             else:
@@ -599,6 +649,19 @@ class Axon( bittensor.grpc.BittensorServicer ):
             finalize_codes_stats_and_logs()
             return [], bittensor.proto.ReturnCode.Timeout, request.synapses
 
+        # ==========================================
+        # ==== Catch requests shed by the queue ====
+        # ==========================================
+        except queue.Full as e:
+            code = bittensor.proto.ReturnCode.Backoff
+            call_time = clock.time() - start_time
+            message = 'Server overloaded: {}'.format( e )
+            synapse_codes = [code for _ in synapses ]
+            synapse_call_times = [call_time for _ in synapses ]
+            synapse_messages = [ message for _ in synapses ]
+            finalize_codes_stats_and_logs()
+            return [], bittensor.proto.ReturnCode.Backoff, request.synapses
+
         # ==================================
         # ==== Catch unknown exceptions ====
         # ==================================
@@ -657,11 +720,17 @@ class Axon( bittensor.grpc.BittensorServicer ):
         
         # --- calling attached synapses ---
         for index, synapse in enumerate(synapses):
+            future = None
             try:
                 synapse_check =  self.synapse_checks(synapse, hotkey)
 
                 if synapse.synapse_type in self.synapse_callbacks and self.synapse_callbacks[synapse.synapse_type] != None and synapse_check:
-                    message, model_output, response_tensor = self.synapse_callbacks[synapse.synapse_type](inputs_x[index], synapse, model_output)
+                    if self.batcher != None and self.batcher.is_batchable( synapse ):
+                        # Coalesced with concurrent requests of the same synapse, model outputs are not shared across synapses.
+                        future = self.batcher.submit( self.synapse_callbacks[synapse.synapse_type], synapse, inputs_x[index] )
+                        message, model_output, response_tensor = future.result( timeout = self.synapse_timeouts[synapse.synapse_type] )
+                    else:
+                        message, model_output, response_tensor = self.synapse_callbacks[synapse.synapse_type](inputs_x[index], synapse, model_output)
                     response_tensors.append(response_tensor)
                     response_codes.append(bittensor.proto.ReturnCode.Success)
                     response_messages.append('Success' if message is None else message)
@@ -676,6 +745,14 @@ class Axon( bittensor.grpc.BittensorServicer ):
                     response_codes.append(bittensor.proto.ReturnCode.NotImplemented)
                     response_messages.append('Not Implemented')
 
+            except concurrent.futures.TimeoutError:
+                # --- Batched call timed out, drop it from the pending batch ---
+                if future != None:
+                    future.cancel()
+                response_tensors.append(None)
+                response_codes.append(bittensor.proto.ReturnCode.Timeout)
+                response_messages.append('Request reached timeout')
+
             except Exception as e: 
                 # --- Exception Hit in Synapse ---
                 response_tensors.append(None)
@@ -824,6 +901,8 @@ class Axon( bittensor.grpc.BittensorServicer ):
         if self.server != None:
             self.server.stop( grace = 1 )
             logger.success("Axon Stopped:".ljust(20) + "<blue>{}</blue>", self.ip + ':' + str(self.port))
+        if self.batcher != None:
+            self.batcher.stop()
         self.started = False
 
         # Switch prometheus ENUM.
@@ -0,0 +1,174 @@
+""" Implementation of the axon micro-batcher, coalesces concurrent synapse requests into one model call.
+"""
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+# Copyright © 2022 Opentensor Foundation
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated 
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation 
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, 
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of 
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL 
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION 
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER 
+# DEALINGS IN THE SOFTWARE.
+
+import threading
+import time as clock
+from concurrent.futures import Future
+from types import SimpleNamespace
+from typing import Callable, List, Tuple
+
+import torch
+from loguru import logger
+
+import bittensor
+from bittensor.utils.tokenizer_utils import split_compact_topk_token_phrases
+
+logger = logger.opt(colors=True)
+
+# Synapses whose callbacks are row independent and whose responses split back along the batch dimension.
+BATCHABLE_SYNAPSES = [
+    bittensor.proto.Synapse.SynapseType.TEXT_LAST_HIDDEN_STATE,
+    bittensor.proto.Synapse.SynapseType.TEXT_CAUSAL_LM,
+    bittensor.proto.Synapse.SynapseType.TEXT_CAUSAL_LM_NEXT,
+]
+
+class MicroBatcher:
+    r""" Coalesces concurrent requests of the same synapse into one callback call.
+        Requests are grouped by callback, synapse arguments and input shape beyond the batch dimension,
+        so inputs are concatenated without padding. A group is run once it holds max_batch_size rows 
+        or its first request has waited window seconds, the response is then split back per request.
+    """
+    def __init__( 
+        self, 
+        max_batch_size: int = 32,
+        window: float = 0.005,
+    ):
+        r""" Initializes a micro-batcher.
+            Args:
+                max_batch_size (:type:`int`, `optional`):
+                    Maximum number of input rows per coalesced callback call.
+                window (:type:`float`, `optional`):
+                    Seconds a request waits for others to join its batch.
+        """
+        self.max_batch_size = max_batch_size
+        self.window = window
+        self.stats = SimpleNamespace( batches = 0, requests = 0, rows = 0 )
+        self._pending = {}
+        self._ready = []
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread( target = self._run, daemon = True )
+        self._thread.start()
+
+    def __str__(self) -> str:
+        return "MicroBatcher({}, {})".format( self.max_batch_size, self.window )
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+    def __del__(self):
+        self.stop()
+
+    @staticmethod
+    def is_batchable( synapse: 'bittensor.Synapse' ) -> bool:
+        return synapse.synapse_type in BATCHABLE_SYNAPSES
+
+    def submit( self, callback: Callable, synapse: 'bittensor.Synapse', inputs_x: torch.Tensor ) -> Future:
+        r""" Queues a synapse call to be run in a batch.
+            Args:
+                callback (:obj:`Callable`, `required`):
+                    Synapse callback with signature ( inputs_x, synapse, model_output ) -> ( message, model_output, response ).
+                synapse (:obj:`bittensor.Synapse`, `required`):
+                    Synapse of the request.
+                inputs_x (:obj:`torch.Tensor`, `required`):
+                    Request inputs with the batch in the first dimension.
+            Returns:
+                future (:obj:`Future`):
+                    Resolves to the ( message, model_output, response ) of this request.
+        """
+        future = Future()
+        key = ( callback, synapse.synapse_type, synapse.serialize_to_instance_proto().SerializeToString(), tuple( inputs_x.shape[1:] ), inputs_x.dtype )
+        with self._condition:
+            group = self._pending.get( key )
+            if group != None and group.rows + inputs_x.shape[0] > self.max_batch_size:
+                # Seal the full group and start a new one.
+                self._ready.append( self._pending.pop( key ) )
+                group = None
+            if group == None:
+                group = SimpleNamespace( callback = callback, synapse = synapse, start_time = clock.time(), rows = 0, items = [] )
+                self._pending[ key ] = group
+            group.items.append( ( inputs_x, future ) )
+            group.rows += inputs_x.shape[0]
+            if group.rows >= self.max_batch_size:
+                self._ready.append( self._pending.pop( key ) )
+            self._condition.notify()
+        return future
+
+    def stop( self ):
+        r""" Stops the batching thread.
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+    def _next_group( self ) -> SimpleNamespace:
+        r""" Blocks until a group is ready to run, returns None once stopped.
+        """
+        with self._condition:
+            while not self._stopped:
+                if len( self._ready ) > 0:
+                    return self._ready.pop( 0 )
+                now = clock.time()
+                wait = None
+                for key, group in self._pending.items():
+                    remaining = group.start_time + self.window - now
+                    if remaining <= 0:
+                        return self._pending.pop( key )
+                    wait = remaining if wait == None else min( wait, remaining )
+                self._condition.wait( timeout = wait )
+            return None
+
+    def _run( self ):
+        while True:
+            group = self._next_group()
+            if group == None:
+                return
+            self._run_group( group )
+
+    def _run_group( self, group: SimpleNamespace ):
+        r""" Runs the group callback once on the concatenated inputs and resolves each request future.
+        """
+        # Drop requests that timed out while waiting.
+        items = [ ( inputs_x, future ) for inputs_x, future in group.items if future.set_running_or_notify_cancel() ]
+        if len( items ) == 0:
+            return
+        split_sizes = [ inputs_x.shape[0] for inputs_x, _ in items ]
+        self.stats.batches += 1
+        self.stats.requests += len( items )
+        self.stats.rows += sum( split_sizes )
+        try:
+            if len( items ) == 1:
+                inputs_x, future = items[0]
+                future.set_result( group.callback( inputs_x, group.synapse, None ) )
+                return
+
+            message, _, response = group.callback( torch.cat( [ inputs_x for inputs_x, _ in items ] ), group.synapse, None )
+            if response.dim() == 1 and group.synapse.synapse_type == bittensor.proto.Synapse.SynapseType.TEXT_CAUSAL_LM_NEXT:
+                # Compacted topk token phrases, split on the batch item probability markers.
+                responses = split_compact_topk_token_phrases( response, group.synapse.topk, split_sizes )
+            else:
+                responses = torch.split( response, split_sizes )
+            for ( _, future ), response in zip( items, responses ):
+                future.set_result( ( message, None, response ) )
+        except Exception as e:
+            logger.warning( 'Batched synapse call failed with: {}'.format( e ) )
+            for _, future in items:
+                if not future.done():
+                    future.set_exception( e )
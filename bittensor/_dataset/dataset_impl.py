@@ -17,14 +17,16 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 # DEALINGS IN THE SOFTWARE.
 
-import concurrent
 import json
 import os
 import random
+import threading
 import time
 from multiprocessing import cpu_count
+from types import SimpleNamespace
 from typing import Union
 
+import numpy as np
 import requests
 import torch
 from loguru import logger
@@ -34,7 +36,8 @@ from torch.utils.data.dataloader import DataLoader
 
 import bittensor
 
-from .thread_queue import ThreadQueue
+from .ipfs_fetcher import ContentStore, IPFSFetcher
+from .token_cache import TokenCache
 
 logger = logger.opt(colors=True)
 
@@ -47,6 +50,7 @@ class Dataset:
         # Used to retrieve directory contentx
         self.dataset_dir = 'http://global.ipfs.opentensor.ai/api/v0/cat' 
         self.text_dir = 'http://global.ipfs.opentensor.ai/api/v0/object/get'
+        self.block_dir = 'http://global.ipfs.opentensor.ai/api/v0/block/get'
         self.mountain_hash = 'QmSdDg6V9dgpdAFtActs75Qfc36qJtm9y8a7yrQ1rHm7ZX'
         # Used when current corpus has been exhausted
         self.refresh_corpus = False
@@ -148,16 +152,22 @@ class GenesisTextDataset( Dataset ):
         self.save_dataset = save_dataset
         self.datafile_size_bound = 262158
         self.max_datasets = max_datasets
-        self.__infinite_dataset_iterator = None
         self.no_tokenizer = no_tokenizer
         self.IPFS_fails = 0
-        self.backup_dataset_cap_size = 5e7 # set 50MB limit per folder
+        self.block_folder = 'blocks'
+        self.block_store_cap_size = 5e8 # set 500MB limit on the verified IPFS block store
         self.IPFS_fails_max = 10
         self.num_batches = num_batches
         self.max_directories = max_directories
 
-        # Retrieve a random slice of the genesis dataset
-        self.data = []
+        # Downloaded texts are tokenized once into a memory mapped token cache per dataset folder.
+        self.token_dtype = np.uint16 if len(self.tokenizer) <= np.iinfo(np.uint16).max + 1 else np.uint32
+        self.token_cache_cap_size = 2e8 # set 200MB limit per folder
+        self.token_caches = {}
+        self.token_caches_lock = threading.Lock()
+
+        # Retrieve a random slice of the genesis dataset, held as token arrays.
+        self.data = np.zeros(0, dtype = self.token_dtype)
         self.data_reserved = []
 
         # Used to refresh corpus if we've exhausted the whole dataset
@@ -166,18 +176,45 @@ class GenesisTextDataset( Dataset ):
         self.build_hash_table()
 
         os.makedirs(os.path.expanduser(data_dir), exist_ok=True)
+
+        # Texts are fetched block by block and verified against their CID, verified blocks are kept in an LRU store.
+        self.fetcher = IPFSFetcher(
+            block_url = self.block_dir,
+            store = ContentStore(os.path.join(data_dir, self.block_folder), max_size = self.block_store_cap_size),
+            concurrency = cpu_count() if self.num_workers == 0 else self.num_workers
+        )
             
-        self.data_queue = ThreadQueue(
-            producer_target = self.reserve_multiple_data,
-            producer_arg = (self.num_batches, ),
-            buffer_size = 1
+        # Batches are cut incrementally from the stream buffer, which is refilled from the reserved tokens.
+        # The reserved tokens are kept topped up by the producer thread, guarded by the reserve condition.
+        self.reserve_condition = threading.Condition()
+        self.stream_lock = threading.Lock()
+        self.stream_data = np.zeros(0, dtype = self.token_dtype)
+        self.stream_order = np.zeros(0, dtype = np.int64)
+        self.stream_block_size = self.block_size
+        self.stream_position = 0
+        self.stats = SimpleNamespace(
+            batches = 0,
+            waits = 0,
+            wait_time = 0.0,
+            max_wait_time = 0.0,
+            last_wait_time = 0.0,
+            reslices = 0,
         )
 
+        self.producer_stopped = threading.Event()
+        self.producer = threading.Thread(target = self.produce, name = 'DatasetProducer', daemon = True)
+        self.producer.start()
+
     def __del__(self):
         self.close()
 
     def close(self):
-        self.data_queue.close()
+        if not self.producer_stopped.is_set():
+            self.producer_stopped.set()
+            with self.reserve_condition:
+                self.reserve_condition.notify_all()
+            self.producer.join()
+        self.fetcher.close()
 
     def get_folder_size(self, folder):
         r""" Get the size (in byte) of a folder inside the data_dir.
@@ -263,21 +300,70 @@ class GenesisTextDataset( Dataset ):
                 The text that we get from the file (from disk or IPFS).     
         """
         text = None
-        response = self.get_ipfs_directory(self.text_dir, file_meta)
-        if (response != None) and (response.status_code == 200):
-            text = response.text
+        data = self.fetcher.get(file_meta['Hash'])
+        if data != None:
+            text = data.decode('utf-8', errors = 'replace')
             self.IPFS_fails = 0
-            
-            if self.save_dataset and self.dataset_hashes[file_meta['Folder']]['Size'] < self.backup_dataset_cap_size:
-                self.save_hash( file_meta, text )
-                self.dataset_hashes[file_meta['Folder']]['Size'] += file_meta['Size']
-            
+
         else:
             logger.warning("Failed to get text".ljust(20) + "<blue>{}</blue>".format(file_meta['Name']))
             self.IPFS_fails += 1
             
         return text 
 
+    def get_token_cache(self, folder):
+        r""" Get the token cache of a folder inside the data_dir.
+        Args:
+            folder (str):
+                The name of the folder
+
+        Returns:
+            token_cache (:obj:`TokenCache`):
+                The token cache of the folder.
+        """
+        with self.token_caches_lock:
+            if folder not in self.token_caches:
+                self.token_caches[folder] = TokenCache(
+                    folder_path = os.path.expanduser(os.path.join(self.data_dir, folder)),
+                    dtype = self.token_dtype,
+                    header = {'tokenizer': self.tokenizer.name_or_path, 'vocab_size': len(self.tokenizer)},
+                    max_size = self.token_cache_cap_size
+                )
+            return self.token_caches[folder]
+
+    def tokenize(self, text):
+        r""" Tokenize a text, with its whitespace normalized to single spaces.
+        Args:
+            text (str):
+                The text to tokenize.
+
+        Returns:
+            tokens (:obj:`np.ndarray`):
+                The tokens of the text.
+        """
+        tokens = self.tokenizer(" ".join(text.split()), verbose = False)["input_ids"]
+        return np.array(tokens, dtype = self.token_dtype)
+
+    def get_tokens(self, file_meta):
+        r""" Either load the tokens of a file from its folder token cache, or get its text and tokenize it into the cache.
+        Args:
+            file_meta (dict of str: int):
+                Specify the details of the file in the format of {'Name': , 'Hash':}.
+
+        Return:
+            tokens (:obj:`np.ndarray`):
+                The tokens of the file, a view of the memory mapped token cache when cached.
+        """
+        token_cache = self.get_token_cache(file_meta['Folder'])
+        tokens = token_cache.get(file_meta['Hash'])
+        if tokens is not None:
+            return tokens
+
+        text = self.get_text(file_meta)
+        if text is None:
+            return None
+        return token_cache.add(file_meta['Hash'], self.tokenize(text))
+
     def get_dataset(self , file_meta):
         r""" Either load a dataset, which is a list of hashes, from disk or download it from IPFS
         Args:
@@ -414,8 +500,17 @@ class GenesisTextDataset( Dataset ):
         return None
 
     def get_text_from_local(self, min_data_len):
+        r""" Get tokens from the texts and token caches saved in the data_dir.
+        Args:
+            min_data_len (int):
+                The number of tokens to stop at.
+
+        Returns:
+            data_corpus (:obj:`List[np.ndarray]`):
+                The tokens of the loaded files.
+        """
 
-        folders = os.listdir( os.path.expanduser (self.data_dir))
+        folders = [folder for folder in os.listdir( os.path.expanduser (self.data_dir)) if folder != self.block_folder]
         if self.dataset_name == 'default':
             folders_avail = folders
             random.shuffle(folders_avail)
@@ -429,8 +524,10 @@ class GenesisTextDataset( Dataset ):
 
         files = [] 
         for folder in folders_avail:
-            file_names = os.listdir(os.path.expanduser(os.path.join(self.data_dir, folder)))
-            sub_files = [{'Name': file_name,'Folder': folder, 'Hash': file_name} for file_name in file_names]
+            file_names = set(os.listdir(os.path.expanduser(os.path.join(self.data_dir, folder))))
+            file_names = {file_name for file_name in file_names if not TokenCache.is_cache_file(file_name)}
+            file_names |= set(self.get_token_cache(folder).hashes())
+            sub_files = [{'Name': file_name,'Folder': folder, 'Hash': file_name} for file_name in sorted(file_names)]
             files += sub_files
 
         random.shuffle(files)
@@ -438,13 +535,17 @@ class GenesisTextDataset( Dataset ):
         total_dataset_len = 0
 
         for text_file in files:
-            # --- Get text from the datafile directory
-            text = self.load_hash(text_file)
-
-            if text != None:
-                text_list = text.split() 
-                data_corpus.extend(text_list)
-                total_dataset_len += len(text_list)
+            # --- Get tokens from the token cache or the datafile directory
+            token_cache = self.get_token_cache(text_file['Folder'])
+            tokens = token_cache.get(text_file['Hash'])
+            if tokens is None:
+                text = self.load_hash(text_file)
+                if text != None:
+                    tokens = token_cache.add(text_file['Hash'], self.tokenize(text))
+
+            if tokens is not None:
+                data_corpus.append(tokens)
+                total_dataset_len += len(tokens)
             
             if (total_dataset_len > min_data_len) :
                 break
@@ -455,12 +556,12 @@ class GenesisTextDataset( Dataset ):
         """ Main function for generating the text data.
         1. Get directories from a random dataset_hash (dataset_hash is the result from calling pin/ls).
         2. Pick a random directory and get the directory that would lead to a datafile.    
-        3. Get text from the directory.
+        3. Get the tokens of the directory text, from the token cache or by downloading and tokenizing it.
         4. Repeat 2,3 until we have reached the min data length
 
         Returns:
-            text: str: 
-                Contents of the text data.
+            data_corpus (:obj:`List[np.ndarray]`):
+                Tokens of the text data.
         """
         self.IPFS_fails = 0
         data_corpus = []
@@ -473,28 +574,36 @@ class GenesisTextDataset( Dataset ):
 
             # --- Pick random directories and get their text contents.
             if directories:
-                total_dataset_size = 0
                 total_dataset_len = 0
-                i = 0
-
-                # --- Dont stop until the corpus size and the minimum data_length was reached.
-                n_workers = cpu_count() if self.num_workers == 0 else self.num_workers
-                with concurrent.futures.ThreadPoolExecutor(max_workers=n_workers) as executor:
-                    future_map = {}
-                    for idx, call_arg in enumerate(directories[:self.max_directories]):
-                        future = executor.submit(self.get_text, call_arg)
-                        future_map[future] = call_arg
-
-                    for i, future in enumerate(concurrent.futures.as_completed(future_map)):
-                        text = future.result()
-
-                        if text is not None:
-                            text_list = text.split()
-                            data_corpus.extend(text_list)
-                            total_dataset_len += len(text_list)
 
-                        if (total_dataset_len > min_data_len) or self.IPFS_fails > self.IPFS_fails_max:
-                            break
+                # --- Take the tokens of texts tokenized before from the token caches.
+                pending = {}
+                for file_meta in directories[:self.max_directories]:
+                    tokens = self.get_token_cache(file_meta['Folder']).get(file_meta['Hash'])
+                    if tokens is not None:
+                        data_corpus.append(tokens)
+                        total_dataset_len += len(tokens)
+                    else:
+                        pending[file_meta['Hash']] = file_meta
+
+                    if total_dataset_len > min_data_len:
+                        break
+
+                # --- Fetch the other texts concurrently, dont stop until the minimum data_length was reached.
+                def add_text(cid, data):
+                    nonlocal total_dataset_len
+                    if data is None:
+                        self.IPFS_fails += 1
+                    else:
+                        self.IPFS_fails = 0
+                        tokens = self.tokenize(data.decode('utf-8', errors = 'replace'))
+                        tokens = self.get_token_cache(pending[cid]['Folder']).add(cid, tokens)
+                        data_corpus.append(tokens)
+                        total_dataset_len += len(tokens)
+                    return (total_dataset_len > min_data_len) or self.IPFS_fails > self.IPFS_fails_max
+
+                if total_dataset_len <= min_data_len and len(pending) > 0:
+                    self.fetcher.fetch(list(pending.keys()), add_text)
 
             else:
                 logger.error("It appears the directory is empty... Restart your miner to try again.")
@@ -526,12 +635,73 @@ class GenesisTextDataset( Dataset ):
         logger.success(f"Reserving data with multiples: {multiples}")
         data_size = epoch_length * self.batch_size * self.block_size
         
-        while len(self.data_reserved) < data_size * multiples :
-            self.data_reserved += self.construct_text_corpus(min_data_len = data_size)
+        while self.reserved_size() < data_size * multiples :
+            data_corpus = self.construct_text_corpus(min_data_len = data_size)
+            with self.reserve_condition:
+                self.data_reserved += data_corpus
+                self.reserve_condition.notify_all()
 
         logger.success(f"Dataset download completed, {multiples} copy of data reserved")
         return True
 
+    def produce(self, multiples = 2):
+        r""" Producer thread loop, keeps the reserved data topped up to multiples epochs of num_batches batches.
+        The producer waits on the reserve condition while the reserve is full and notifies the consumer on every addition, 
+        so the consumer only ever waits when less than a batch of tokens is left.
+        Arg:
+            multiples (int, optional):
+                The number of epochs that the data_reserved should hold.
+        """
+        while not self.producer_stopped.is_set():
+            data_size = self.num_batches * self.batch_size * self.block_size
+            with self.reserve_condition:
+                if self.reserved_size() >= data_size * multiples:
+                    self.reserve_condition.wait(timeout = 1)
+                    continue
+
+            data_corpus = self.construct_text_corpus(min_data_len = data_size)
+            if len(data_corpus) == 0:
+                # Back off instead of spinning while both IPFS and the local files are unavailable.
+                self.producer_stopped.wait(2)
+                continue
+
+            with self.reserve_condition:
+                self.data_reserved += data_corpus
+                self.reserve_condition.notify_all()
+
+    def reserved_size(self):
+        r""" Returns the number of reserved tokens.
+        """
+        return sum(len(tokens) for tokens in self.data_reserved)
+
+    def take_reserved(self, data_size):
+        r""" Removes up to data_size tokens from the front of the reserved data.
+        Args:
+            data_size (int):
+                The number of tokens to take.
+
+        Returns:
+            data (:obj:`np.ndarray`):
+                The taken tokens.
+        """
+        taken = []
+        taken_size = 0
+        with self.reserve_condition:
+            while taken_size < data_size and len(self.data_reserved) > 0:
+                tokens = self.data_reserved.pop(0)
+                if taken_size + len(tokens) > data_size:
+                    # Views of the memory mapped caches are split without a copy.
+                    self.data_reserved.insert(0, tokens[data_size - taken_size:])
+                    tokens = tokens[:data_size - taken_size]
+                taken.append(tokens)
+                taken_size += len(tokens)
+            # Wake the producer up to top the reserve up again.
+            self.reserve_condition.notify_all()
+
+        if len(taken) == 0:
+            return np.zeros(0, dtype = self.token_dtype)
+        return np.concatenate(taken)
+
     def set_data_size(self, batch_size, block_size):
         r""" Update the size of data (batch_size, block_size) that we need.
 
@@ -553,18 +723,17 @@ class GenesisTextDataset( Dataset ):
         old_batch_size = self.batch_size
         old_block_size = self.block_size
         
-        if check_valid(batch_size):
-            self.batch_size = batch_size
-        
-        if check_valid(block_size):
-            self.block_size = block_size
-
-        # empty the queue
-        while not self.data_queue.queue.empty():
-            self.data_queue.queue.get()
+        with self.stream_lock:
+            if check_valid(batch_size):
+                self.batch_size = batch_size
+            
+            if check_valid(block_size):
+                self.block_size = block_size
 
-        # empty the dataset_iterator with the old sizing
-        self.__infinite_dataset_iterator = iter([])
+            # Re-slice the unconsumed tokens with the new sizing instead of dropping them.
+            if self.block_size != self.stream_block_size:
+                self.set_stream(self.stream_remaining())
+                self.stats.reslices += 1
 
         logger.success(f"Updated data size: batch_size: {old_batch_size} --> {self.batch_size}, block_size: {old_block_size} --> {self.block_size}")
 
@@ -580,12 +749,10 @@ class GenesisTextDataset( Dataset ):
         """
         logger.success(f"Getting a new Dataloader")
         data_size = epoch_length * self.batch_size * self.block_size
-        if len(self.data_reserved) < data_size:
+        if self.reserved_size() < data_size:
             self.reserve_multiple_data(self.num_batches, 1)
 
-        self.data = self.data_reserved[:data_size]
-
-        del self.data_reserved[:data_size]
+        self.data = self.take_reserved(data_size)
 
         # Datalaoder calls self._getitem_ functions until the self.data uses up, and group the result by batch size
         return DataLoader(self,
@@ -594,34 +761,79 @@ class GenesisTextDataset( Dataset ):
                     num_workers=self.num_workers,
                     drop_last=True)
     
-    def set_dataset_iterator(self):
-        r""" Get a new dataset that is ready from the queue. The result would be updated to self.__infinite_dataset_iterator__ . 
+    def stream_remaining(self):
+        r""" Returns the tokens of the stream buffer that were not served yet, in stream order.
         """
-        success = False 
-        while not success:
-            if not self.data_queue.queue.empty() :
-                ready = self.data_queue.queue.get() # the queue stores a bool ready signal
-                dataset = self.dataloader(self.num_batches)
-                if dataset:
-                    self.__infinite_dataset_iterator = iter([input for input in dataset])
-                    success = True
-            else:
-                time.sleep(2)
+        blocks_len = len(self.stream_order) * self.stream_block_size
+        blocks = self.stream_data[:blocks_len].reshape(-1, self.stream_block_size)[self.stream_order[self.stream_position:]]
+        return np.concatenate([blocks.reshape(-1), self.stream_data[blocks_len:]])
 
-        return
+    def set_stream(self, tokens):
+        r""" Replaces the stream buffer with tokens, sliced into blocks of block_size served in a random order.
+        Args:
+            tokens (:obj:`np.ndarray`):
+                The tokens of the new stream buffer, the tail shorter than a block is kept for the next refill.
+        """
+        self.stream_data = tokens
+        self.stream_block_size = self.block_size
+        self.stream_order = np.random.permutation(len(tokens) // self.block_size)
+        self.stream_position = 0
+
+    def refill_stream(self):
+        r""" Moves up to an epoch of reserved tokens into the stream buffer. 
+        Only waits on the producer when less than a batch of tokens is available.
+        """
+        remaining = self.stream_remaining()
+        batch_data_size = self.batch_size * self.block_size
+        data_size = max(self.num_batches * batch_data_size, batch_data_size)
+        with self.reserve_condition:
+            while len(remaining) + self.reserved_size() < batch_data_size:
+                if self.producer_stopped.is_set():
+                    raise StopIteration
+                self.stats.waits += 1
+                self.reserve_condition.wait(timeout = 1)
+            taken = self.take_reserved(data_size - len(remaining))
+
+        self.set_stream(np.concatenate([remaining, taken]))
 
     def __next__(self):
-        """Returns the next element from the dataset. 
+        """Returns the next batch of the data stream. 
         """
-        if self.__infinite_dataset_iterator == None:
-            self.set_dataset_iterator()
+        start_time = time.time()
+        with self.stream_lock:
+            if len(self.stream_order) - self.stream_position < self.batch_size:
+                self.refill_stream()
+
+            blocks = self.stream_order[self.stream_position: self.stream_position + self.batch_size]
+            self.stream_position += self.batch_size
+            blocks_len = len(self.stream_order) * self.stream_block_size
+            tokens = self.stream_data[:blocks_len].reshape(-1, self.stream_block_size)[blocks]
+
+        wait_time = time.time() - start_time
+        self.stats.batches += 1
+        self.stats.wait_time += wait_time
+        self.stats.last_wait_time = wait_time
+        self.stats.max_wait_time = max(self.stats.max_wait_time, wait_time)
 
-        try:
-            return next(self.__infinite_dataset_iterator)
-        
-        except StopIteration:
-            self.set_dataset_iterator()
-            return next(self.__infinite_dataset_iterator)
+        if self.no_tokenizer is True:
+            return [self.tokenizer.decode(block.tolist()) for block in tokens]
+        else:
+            return torch.from_numpy(tokens.astype(np.int64))
+
+    def get_stream_metrics(self):
+        r""" Returns the data stream metrics, the waits on data per batch and the buffered token counts.
+        """
+        return {
+            'batches': self.stats.batches,
+            'waits': self.stats.waits,
+            'wait_time': self.stats.wait_time,
+            'avg_wait_time': self.stats.wait_time / max(self.stats.batches, 1),
+            'max_wait_time': self.stats.max_wait_time,
+            'last_wait_time': self.stats.last_wait_time,
+            'reslices': self.stats.reslices,
+            'stream_blocks': len(self.stream_order) - self.stream_position,
+            'reserved_tokens': self.reserved_size(),
+        }
 
     def __len__(self):
         """Returns number of samples (blocks) of dataset
@@ -629,28 +841,27 @@ class GenesisTextDataset( Dataset ):
         Returns:
             length: int
         """
-        if (self.data == None) or (self.block_size == None) or (self.block_size == 0):
+        if (self.data is None) or (self.block_size == None) or (self.block_size == 0):
             return 0
         return round( len(self.data) / self.block_size )
 
     def __getitem__(self, idx: int) -> Union[str, torch.tensor]:
-        """ Returns a block of sentences from text dataset.
+        """ Returns a block of tokens from text dataset.
 
             Args:
                 idx: index of data input
 
             Returns:
-                torch.tensor(dix)
+                torch.tensor(dix), or the decoded text if no_tokenizer is set
         """
         start_idx = (idx * self.block_size) % len(self.data)
         end_idx = start_idx + self.block_size
-        text = " ".join(self.data[start_idx:end_idx])
+        tokens = self.data[start_idx:end_idx]
 
         if self.no_tokenizer is True:
-            return text
+            return self.tokenizer.decode(tokens.tolist())
         else:
-            tokens = self.tokenizer(text, padding=True, truncation=True)["input_ids"]
-            return torch.tensor(tokens, dtype=torch.long)[:self.block_size]
+            return torch.from_numpy(tokens.astype(np.int64))
 
     def build_hash_table(self):
         self.IPFS_fails = 0
@@ -662,7 +873,9 @@ class GenesisTextDataset( Dataset ):
         while response == None:
             self.IPFS_fails += 1
             response = self.get_ipfs_directory(self.text_dir, mountain_meta)
-            
+            if response != None and response.status_code != 200:
+                response = None
+
             if response:
                 dataset_hashes = response.json()['Links']
                 if self.save_dataset:
@@ -672,6 +885,10 @@ class GenesisTextDataset( Dataset ):
                 dataset_hashes = json.loads(self.load_hash(mountain_meta))
                 break
 
+            if response == None:
+                # --- Back off before retrying the mountain hash.
+                time.sleep(min(0.5 * 2 ** self.IPFS_fails, 8))
+
         for i in dataset_hashes:
             name = i['Name'][:-4]
             dataset_meta = {'Name': name, 'Hash': i['Hash'], 'Size': self.get_folder_size(name) }
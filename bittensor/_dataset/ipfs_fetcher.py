@@ -0,0 +1,422 @@
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import asyncio
+import base64
+import collections
+import concurrent.futures
+import hashlib
+import os
+import threading
+import time
+from types import SimpleNamespace
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import base58
+import requests
+from loguru import logger
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.util.retry import Retry
+
+logger = logger.opt(colors=True)
+
+# Multicodec and multihash codes.
+DAG_PB = 0x70
+RAW = 0x55
+SHA2_256 = 0x12
+IDENTITY = 0x00
+
+def read_varint(buffer: bytes, position: int) -> Tuple[int, int]:
+    r""" Reads an unsigned varint, returns its value and the position after it.
+    """
+    result = shift = 0
+    while True:
+        byte = buffer[position]
+        position += 1
+        result |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return result, position
+        shift += 7
+
+def protobuf_fields(buffer: bytes) -> Iterator[Tuple[int, object]]:
+    r""" Yields the (field number, value) pairs of a protobuf message, length delimited values as bytes.
+    """
+    position = 0
+    while position < len(buffer):
+        key, position = read_varint(buffer, position)
+        number, wire_type = key >> 3, key & 0x7
+        if wire_type == 0:
+            value, position = read_varint(buffer, position)
+        elif wire_type == 2:
+            length, position = read_varint(buffer, position)
+            value = buffer[position: position + length]
+            position += length
+        elif wire_type == 1:
+            value, position = buffer[position: position + 8], position + 8
+        elif wire_type == 5:
+            value, position = buffer[position: position + 4], position + 4
+        else:
+            raise ValueError('unsupported protobuf wire type {}'.format(wire_type))
+        yield number, value
+
+def cid_to_bytes(cid: str) -> bytes:
+    r""" Returns the binary form of a base58 CIDv0 or base32 CIDv1 string.
+    """
+    if cid.startswith('Qm'):
+        return base58.b58decode(cid)
+    if cid.startswith('b'):
+        encoded = cid[1:].upper()
+        return base64.b32decode(encoded + '=' * (-len(encoded) % 8))
+    raise ValueError('unsupported CID encoding {}'.format(cid))
+
+def cid_to_str(cid: bytes) -> str:
+    r""" Returns the string form of a binary CID, base58 for CIDv0 and base32 for CIDv1.
+    """
+    if cid[0] == SHA2_256:
+        return base58.b58encode(cid).decode()
+    return 'b' + base64.b32encode(cid).decode().lower().rstrip('=')
+
+def parse_cid(cid: str) -> Tuple[int, int, bytes]:
+    r""" Returns the codec, multihash code and digest of a CID.
+    """
+    raw = cid_to_bytes(cid)
+    codec, position = DAG_PB, 0
+    if raw[0] != SHA2_256:
+        # CIDv1, a version and codec precede the multihash.
+        version, position = read_varint(raw, 0)
+        if version != 1:
+            raise ValueError('unsupported CID version {}'.format(version))
+        codec, position = read_varint(raw, position)
+    hash_code, position = read_varint(raw, position)
+    length, position = read_varint(raw, position)
+    return codec, hash_code, raw[position: position + length]
+
+def verify_block(cid: str, block: bytes) -> Optional[bool]:
+    r""" Checks the block against the content hash of its CID, None if the hash function is not supported.
+    """
+    _, hash_code, digest = parse_cid(cid)
+    if hash_code == SHA2_256:
+        return hashlib.sha256(block).digest() == digest
+    if hash_code == IDENTITY:
+        return block == digest
+    return None
+
+def decode_block(cid: str, block: bytes) -> Tuple[bytes, List[str]]:
+    r""" Returns the file data held by a block and the CIDs of its child blocks.
+    """
+    codec, _, _ = parse_cid(cid)
+    if codec == RAW:
+        return block, []
+    if codec != DAG_PB:
+        raise ValueError('unsupported codec {}'.format(codec))
+
+    unixfs, links = b'', []
+    for number, value in protobuf_fields(block):
+        if number == 1:
+            unixfs = value
+        elif number == 2:
+            for link_number, link_value in protobuf_fields(value):
+                if link_number == 1:
+                    links.append(cid_to_str(link_value))
+    data = b''
+    for number, value in protobuf_fields(unixfs):
+        if number == 2:
+            data = value
+    return data, links
+
+def encode_varint(value: int) -> bytes:
+    encoded = bytearray()
+    while True:
+        byte = value & 0x7f
+        value >>= 7
+        if value:
+            encoded.append(byte | 0x80)
+        else:
+            encoded.append(byte)
+            return bytes(encoded)
+
+def encode_field(number: int, value) -> bytes:
+    if isinstance(value, int):
+        return encode_varint(number << 3) + encode_varint(value)
+    return encode_varint(number << 3 | 2) + encode_varint(len(value)) + value
+
+def encode_file(data: bytes, chunk_size: int = 262144) -> Tuple[str, Dict[str, bytes]]:
+    r""" Builds the CIDv0 dag-pb UnixFS blocks of a file chunked under a single root, as IPFS imports files
+    of up to 174 chunks with its default settings. Used to serve files from local stub servers.
+    Returns:
+        cid (str):
+            The CID of the root block.
+        blocks (:obj:`Dict[str, bytes]`):
+            The blocks by CID.
+    """
+    def block_cid(block):
+        return cid_to_str(bytes([SHA2_256, 32]) + hashlib.sha256(block).digest())
+
+    chunks = [data[start: start + chunk_size] for start in range(0, len(data), chunk_size)] or [b'']
+    leaves = [encode_field(1, encode_field(1, 2) + (encode_field(2, chunk) if chunk else b'') + encode_field(3, len(chunk))) for chunk in chunks]
+    if len(leaves) == 1:
+        return block_cid(leaves[0]), {block_cid(leaves[0]): leaves[0]}
+
+    blocks = {block_cid(leaf): leaf for leaf in leaves}
+    links = b''.join(
+        encode_field(2, encode_field(1, cid_to_bytes(block_cid(leaf))) + encode_field(2, b'') + encode_field(3, len(leaf)))
+        for leaf in leaves
+    )
+    unixfs = encode_field(1, 2) + encode_field(3, len(data)) + b''.join(encode_field(4, len(chunk)) for chunk in chunks)
+    root = links + encode_field(1, unixfs)
+    blocks[block_cid(root)] = root
+    return block_cid(root), blocks
+
+
+class ContentStore:
+    r""" Content addressed store of verified IPFS blocks under a folder, evicting the least recently used
+    blocks once their total size is over max_size. Blocks are verified against their CID when read back,
+    so a corrupted or partially written file is a miss rather than bad data.
+    """
+    def __init__(self, path: str, max_size: float):
+        r""" Opens the store, indexing the blocks already saved in path from the least to the most recently used.
+        Args:
+            path (str):
+                The folder holding one file per block, named by its CID.
+            max_size (float):
+                The maximum total size in bytes of the stored blocks.
+        """
+        self.path = os.path.expanduser(path)
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.blocks = collections.OrderedDict()
+        self.size = 0
+        self.evictions = 0
+        os.makedirs(self.path, exist_ok = True)
+        entries = []
+        for name in os.listdir(self.path):
+            full_path = os.path.join(self.path, name)
+            if os.path.isfile(full_path) and not name.endswith('.tmp'):
+                stat = os.stat(full_path)
+                entries.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self.blocks[name] = size
+            self.size += size
+        with self.lock:
+            self.evict()
+
+    def __contains__(self, cid: str) -> bool:
+        return cid in self.blocks
+
+    def get(self, cid: str) -> Optional[bytes]:
+        r""" Returns the verified block, or None if it is not stored.
+        """
+        with self.lock:
+            if cid not in self.blocks:
+                return None
+            self.blocks.move_to_end(cid)
+        full_path = os.path.join(self.path, cid)
+        try:
+            with open(full_path, mode = 'rb') as f:
+                block = f.read()
+            if verify_block(cid, block) == False:
+                raise ValueError('block does not match its CID')
+            # The modification time orders the blocks when the store is reopened.
+            os.utime(full_path)
+            return block
+        except Exception as e:
+            logger.warning("Dropping stored block:".ljust(20) + "<blue>{}</blue> {}".format(cid, e))
+            self.remove(cid)
+            return None
+
+    def put(self, cid: str, block: bytes):
+        r""" Saves a verified block, written to a temporary file first so a crash never leaves a partial block.
+        """
+        full_path = os.path.join(self.path, cid)
+        temp_path = full_path + '.{}.tmp'.format(threading.get_ident())
+        with open(temp_path, mode = 'wb') as f:
+            f.write(block)
+        os.replace(temp_path, full_path)
+        with self.lock:
+            self.size += len(block) - self.blocks.pop(cid, 0)
+            self.blocks[cid] = len(block)
+            self.evict()
+
+    def remove(self, cid: str):
+        with self.lock:
+            self.size -= self.blocks.pop(cid, 0)
+        try:
+            os.remove(os.path.join(self.path, cid))
+        except FileNotFoundError:
+            pass
+
+    def evict(self):
+        r""" Removes the least recently used blocks until the store fits in max_size, expects the lock to be held.
+        """
+        while self.size > self.max_size and len(self.blocks) > 1:
+            cid, size = self.blocks.popitem(last = False)
+            self.size -= size
+            self.evictions += 1
+            try:
+                os.remove(os.path.join(self.path, cid))
+            except FileNotFoundError:
+                pass
+
+
+class IPFSFetcher:
+    r""" Fetches IPFS files block by block with bounded concurrency, verifying every block against its CID.
+    Requests share one pooled HTTP session and run on a thread pool driven by an asyncio event loop,
+    the blocks of a file and the files of a batch are fetched concurrently. Verified blocks are kept in
+    a ContentStore so files fetched again are served locally.
+    """
+    def __init__(
+            self,
+            block_url: str,
+            store: Optional[ContentStore] = None,
+            concurrency: int = 16,
+            timeout: float = 60,
+            retries: int = 1
+        ):
+        r""" Creates the fetcher.
+        Args:
+            block_url (str):
+                The IPFS API block/get address.
+            store (:obj:`ContentStore`, `optional`):
+                Store of verified blocks, blocks are not cached if None.
+            concurrency (int, `optional`):
+                The maximum number of requests in flight.
+            timeout (float, `optional`):
+                Timeout of each request in seconds.
+            retries (int, `optional`):
+                Number of retries of a failed request.
+        """
+        self.block_url = block_url
+        self.store = store
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.session = requests.Session()
+        retry = Retry(total = retries, read = retries, connect = retries, backoff_factor = 0.5, status_forcelist = (104, 500, 502, 504))
+        adapter = HTTPAdapter(pool_connections = 1, pool_maxsize = concurrency, max_retries = retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers = concurrency, thread_name_prefix = 'IPFSFetcher')
+        self.stats = SimpleNamespace(
+            files = 0,
+            failures = 0,
+            blocks = 0,
+            bytes = 0,
+            fetch_time = 0.0,
+            hits = 0,
+            misses = 0,
+            verification_failures = 0,
+            unverified = 0,
+        )
+
+    def close(self):
+        self.executor.shutdown(wait = False)
+        self.session.close()
+
+    def get_metrics(self) -> Dict[str, float]:
+        r""" Returns the fetcher counters along with the download rate in bytes per second and the store hit rate.
+        """
+        metrics = vars(self.stats).copy()
+        metrics['bytes_per_second'] = self.stats.bytes / max(self.stats.fetch_time, 1e-9)
+        metrics['hit_rate'] = self.stats.hits / max(self.stats.hits + self.stats.misses, 1)
+        if self.store != None:
+            metrics['store_size'] = self.store.size
+            metrics['store_evictions'] = self.store.evictions
+        return metrics
+
+    def request_block(self, cid: str) -> bytes:
+        response = self.session.post(self.block_url, params = (('arg', cid),), timeout = self.timeout)
+        response.raise_for_status()
+        return response.content
+
+    async def fetch_block(self, cid: str, semaphore: asyncio.Semaphore) -> bytes:
+        r""" Returns the verified block from the store or from IPFS.
+        """
+        if self.store != None:
+            block = self.store.get(cid)
+            if block is not None:
+                self.stats.hits += 1
+                return block
+
+        async with semaphore:
+            start_time = time.time()
+            block = await asyncio.get_running_loop().run_in_executor(self.executor, self.request_block, cid)
+            self.stats.fetch_time += time.time() - start_time
+        self.stats.misses += 1
+        self.stats.blocks += 1
+        self.stats.bytes += len(block)
+
+        verified = verify_block(cid, block)
+        if verified == False:
+            self.stats.verification_failures += 1
+            raise ValueError('block {} does not match its CID'.format(cid))
+        if verified == None:
+            self.stats.unverified += 1
+        elif self.store != None:
+            self.store.put(cid, block)
+        return block
+
+    async def fetch_file(self, cid: str, semaphore: asyncio.Semaphore) -> bytes:
+        r""" Returns the data of the file rooted at cid, fetching its child blocks concurrently.
+        """
+        data, links = decode_block(cid, await self.fetch_block(cid, semaphore))
+        if len(links) == 0:
+            return data
+        children = await asyncio.gather(*[self.fetch_file(link, semaphore) for link in links])
+        return data + b''.join(children)
+
+    async def fetch_files(self, cids: List[str], callback: Callable[[str, Optional[bytes]], bool]):
+        r""" Fetches the files concurrently, calling callback(cid, data) as each completes, data is None on failure.
+        Pending fetches are cancelled once the callback returns True.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        async def fetch(cid):
+            try:
+                return cid, await self.fetch_file(cid, semaphore)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Failed to fetch from IPFS:".ljust(20) + "<blue>{}</blue> {}".format(cid, e))
+                return cid, None
+
+        tasks = [asyncio.ensure_future(fetch(cid)) for cid in cids]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                cid, data = await next_done
+                if data is None:
+                    self.stats.failures += 1
+                else:
+                    self.stats.files += 1
+                if callback(cid, data):
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions = True)
+
+    def fetch(self, cids: List[str], callback: Callable[[str, Optional[bytes]], bool]):
+        r""" Blocking form of fetch_files, runs the fetches on a new event loop.
+        """
+        asyncio.run(self.fetch_files(cids, callback))
+
+    def get(self, cid: str) -> Optional[bytes]:
+        r""" Returns the data of one file, or None on failure.
+        """
+        results = {}
+        def callback(cid, data):
+            results[cid] = data
+            return False
+        self.fetch([cid], callback)
+        return results.get(cid)
@@ -0,0 +1,189 @@
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import contextlib
+import fcntl
+import hashlib
+import json
+import os
+import threading
+from typing import List, Optional
+
+import numpy as np
+from loguru import logger
+
+logger = logger.opt(colors=True)
+
+class TokenCache:
+    r""" Append only on disk cache of the tokenized texts of one dataset folder.
+    Tokens of every text are appended to one flat token file which is read back through a memory map,
+    and an index file maps each text hash to its span of tokens. The index is written after the tokens,
+    so a text interrupted while being appended is not indexed and is tokenized again.
+    The token file is never truncated since other processes may map it, invalid index lines are skipped.
+    The cache files are named after the tokenizer header so caches of different tokenizers live side by side,
+    and writes hold an exclusive flock on the token file so processes sharing the folder append safely.
+    """
+    file_prefix = 'tokens.'
+    file_suffixes = ('.bin', '.idx')
+
+    def __init__(self, folder_path: str, dtype: np.dtype, header: dict, max_size: Optional[float] = None):
+        r""" Opens the cache of the header in folder_path.
+        Args:
+            folder_path (str):
+                The dataset folder holding the cache files.
+            dtype (:obj:`np.dtype`):
+                The token dtype, uint16 or uint32 depending on the vocabulary size.
+            header (dict):
+                Identifies the tokenizer, names the cache files and is stored as the first line of the index.
+            max_size (float, `optional`):
+                The maximum size in bytes of the token file, texts beyond it are not cached.
+        """
+        self.folder_path = folder_path
+        self.dtype = np.dtype(dtype)
+        self.header = dict(header, dtype = self.dtype.name)
+        self.max_size = max_size
+        digest = hashlib.sha1(json.dumps(self.header, sort_keys = True).encode()).hexdigest()[:16]
+        self.token_path = os.path.join(folder_path, self.file_prefix + digest + self.file_suffixes[0])
+        self.index_path = os.path.join(folder_path, self.file_prefix + digest + self.file_suffixes[1])
+        self.lock = threading.Lock()
+        self.spans = {}
+        self.size = 0
+        self.memmap = None
+        os.makedirs(folder_path, exist_ok = True)
+        self.load()
+
+    def __len__(self):
+        return len(self.spans)
+
+    def __contains__(self, text_hash: str) -> bool:
+        return text_hash in self.spans
+
+    def hashes(self) -> List[str]:
+        return list(self.spans.keys())
+
+    @classmethod
+    def is_cache_file(cls, file_name: str) -> bool:
+        r""" True if file_name names a token or index file of a cache.
+        """
+        return file_name.startswith(cls.file_prefix) and file_name.endswith(cls.file_suffixes)
+
+    @contextlib.contextmanager
+    def file_lock(self):
+        r""" Holds an exclusive flock on the token file, yields the token file opened for appending.
+        """
+        with open(self.token_path, mode = 'ab') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield f
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def end(self, f) -> int:
+        r""" Returns the number of tokens in the locked token file, padding a partially written token.
+            The file is only ever grown, other processes may hold memory maps of it.
+        """
+        size = os.fstat(f.fileno()).st_size
+        if size % self.dtype.itemsize != 0:
+            f.write(bytes(self.dtype.itemsize - size % self.dtype.itemsize))
+            f.flush()
+        return -(-size // self.dtype.itemsize)
+
+    def parse(self, line: str) -> Optional[tuple]:
+        r""" Returns the text hash and span of an index line, or None if the line is invalid or past the end of the token file.
+        """
+        try:
+            text_hash, offset, length = line.split()
+            offset, length = int(offset), int(length)
+        except ValueError:
+            return None
+        if offset < 0 or length <= 0 or offset + length > self.size:
+            return None
+        return text_hash, (offset, length)
+
+    def load(self):
+        r""" Reads the index, skipping invalid lines and spans past the end of the token file.
+        """
+        with self.file_lock() as f:
+            self.size = self.end(f)
+            try:
+                with open(self.index_path, mode = 'r') as index:
+                    lines = index.read().splitlines()
+            except FileNotFoundError:
+                lines = []
+            try:
+                header = json.loads(lines[0]) if len(lines) > 0 else None
+            except ValueError:
+                header = None
+            if header != self.header:
+                if len(lines) > 0:
+                    logger.warning("Discarding token cache index:".ljust(20) + "<blue>{}</blue> header mismatch".format(self.index_path))
+                # The tokens stay in place, only the index is started again.
+                with open(self.index_path, mode = 'w') as index:
+                    index.write(json.dumps(self.header) + '\n')
+                return
+
+            skipped = 0
+            for line in lines[1:]:
+                entry = self.parse(line)
+                if entry is None:
+                    skipped += 1
+                    continue
+                text_hash, span = entry
+                self.spans[text_hash] = span
+            if skipped > 0:
+                logger.warning("Skipped token cache entries:".ljust(20) + "<blue>{}</blue> {} invalid lines".format(self.index_path, skipped))
+
+    def get(self, text_hash: str) -> Optional[np.ndarray]:
+        r""" Returns the tokens of the text hash as a view of the memory mapped token file, or None if not cached.
+        """
+        with self.lock:
+            if text_hash not in self.spans:
+                return None
+            offset, length = self.spans[text_hash]
+            if self.memmap is None or len(self.memmap) < offset + length:
+                # The token file grew since it was mapped, earlier views keep the previous map alive.
+                self.memmap = np.memmap(self.token_path, dtype = self.dtype, mode = 'r')
+            return self.memmap[offset: offset + length]
+
+    def add(self, text_hash: str, tokens: np.ndarray) -> np.ndarray:
+        r""" Appends the tokens of the text hash, returns the cached view or the tokens if the cache is full.
+        """
+        tokens = np.ascontiguousarray(tokens, dtype = self.dtype)
+        with self.lock:
+            if text_hash in self.spans or len(tokens) == 0:
+                pass
+            elif self.max_size != None and (self.size + len(tokens)) * self.dtype.itemsize > self.max_size:
+                return tokens
+            else:
+                with self.file_lock() as f:
+                    # Other processes may have appended since the last write, the span starts at the end of the file.
+                    offset = self.end(f)
+                    f.write(tokens.tobytes())
+                    f.flush()
+                    # The index line is appended last, in one write, after the tokens it points to.
+                    line = '{} {} {}\n'.format(text_hash, offset, len(tokens)).encode()
+                    with open(self.index_path, mode = 'a+b') as index:
+                        if index.seek(0, os.SEEK_END) > 0:
+                            index.seek(-1, os.SEEK_END)
+                            if index.read(1) != b'\n':
+                                # A previous append was interrupted, its partial line is skipped on load.
+                                line = b'\n' + line
+                        index.write(line)
+                self.spans[text_hash] = (offset, len(tokens))
+                self.size = offset + len(tokens)
+        cached = self.get(text_hash)
+        return cached if cached is not None else tokens
@@ -18,7 +18,7 @@
 # DEALINGS IN THE SOFTWARE.
 
 from types import SimpleNamespace
-from typing import Tuple, List, Union, Optional
+from typing import Iterator, Tuple, List, Union, Optional
 
 import sys
 import torch
@@ -159,7 +159,7 @@ class Dendrite(torch.autograd.Function):
         """
         ctx.receptor_pool = dendrite.receptor_pool
         ctx.endpoints, ctx.synapses, ctx.inputs, ctx.timeout, ctx.does_requires_grad = endpoints, synapses, inputs, timeout, requires_grad
-        inputs:List[torch.Tensor] = [x.cpu().clone().detach() for x in inputs]
+        inputs:List[torch.Tensor] = Dendrite._detach_inputs( inputs )
 
         # Ouputs are list of lists where the outer list corresponds to the endpoints and the 
         # inner list corresponds to the synapses.
@@ -187,6 +187,17 @@ class Dendrite(torch.autograd.Function):
         # Return all outputs as a tuple of torch tensors of length 2 + (num_endpoints * num_synapses) 
         return (flattened_torch_codes, flattened_torch_times, *flattened_forward_outputs)
 
+    @staticmethod
+    def _detach_inputs( inputs: List[torch.Tensor] ) -> List[torch.Tensor]:
+        r""" Returns detached cpu copies of inputs. A tensor passed for several endpoints is copied once and the copy is shared,
+            so that the receptor pool serializes it once for all of them.
+        """
+        copies = {}
+        for x in inputs:
+            if id(x) not in copies:
+                copies[id(x)] = x.cpu().clone().detach()
+        return [copies[id(x)] for x in inputs]
+
     @staticmethod
     @once_differentiable
     def backward(
@@ -526,6 +537,79 @@ class Dendrite(torch.autograd.Function):
         self.update_stats( formatted_endpoints, synapses, formatted_inputs, outputs, codes, times )
         return outputs, codes, times
 
+    def text_as_completed (
+        self,
+        endpoints: Union[ torch.LongTensor, List[torch.LongTensor], List['bittensor.Endpoint'], 'bittensor.Endpoint' ],
+        synapses: List[ 'bittensor.Synapse' ],
+        inputs: Union[str, List[str], List[torch.LongTensor], torch.LongTensor],
+        timeout: int = None,
+        min_successes: int = None,
+        max_time: float = None,
+    ) -> Iterator[ Tuple[ 'bittensor.Endpoint', List[torch.FloatTensor], torch.LongTensor, torch.FloatTensor ] ]:
+        r""" Forward text inputs to a list of neuron endpoints, yielding each endpoint response as soon as it completes
+            instead of waiting on the slowest endpoint. Responses are not differentiable, no gradients are sent back on the wire.
+
+                Args:
+                    endpoints (:obj:`Union[torch.LongTensor, List[torch.LongTensor], List[bittensor.Endpoint], bittensor.Endpoint]` of shape :obj:`(num_endpoints)`, `required`):
+                        Endpoints to send inputs to, see :obj:`Dendrite.text`.
+
+                    synapses (:obj:`List[ 'bittensor.Synapse' ]` of shape :obj:`(num_synapses)`, `required`):
+                        Bittensor synapse objects with arguments. Each corresponds to a synapse function on the axon.
+                        Responses are packed in this ordering. 
+
+                    inputs (:obj:`Union[str,  List[str], List[torch.LongTensor], torch.LongTensor]` of shape :obj:`(num_endpoints * [batch_size, sequence_len])`, `required`):
+                        Tokenized sentences to send on the wire, see :obj:`Dendrite.text`.
+
+                    timeout (:type:`int`, default = dendrite.timeout `optional`):
+                        Request timeout. Queries that do not respond will be replaced by zeros.
+
+                    min_successes (:type:`int`, `optional`):
+                        Stop waiting once this many endpoints responded successfully, the remaining endpoints are yielded as timeouts.
+
+                    max_time (:type:`float`, `optional`):
+                        Stop waiting after this many seconds, the remaining endpoints are yielded as timeouts.
+
+                Yields:
+                    endpoint (:obj:`bittensor.Endpoint`, `required`):
+                        Endpoint which responded.
+
+                    outputs (:obj:`List[ torch.FloatTensor ]` of shape :obj:`num_synapses * ( -1, -1, -1 )`, `required`):
+                        Outputs per synapse. Non-responses are zeroes of relevant synapse shape.
+
+                    codes (:obj:`torch.LongTensor` of shape :obj:`[ num_synapses ]`, `required`):
+                        Return code per synapse.
+
+                    times (:obj:`torch.FloatTensor` of shape :obj:`[ num_synapses ]`, `required`):
+                        Times per synapse.
+            """
+        timeout:int = timeout if timeout is not None else self.config.dendrite.timeout
+        formatted_endpoints, formatted_inputs = self.format_text_inputs ( 
+            endpoints = endpoints, 
+            inputs = inputs
+        )
+        responses = self.receptor_pool.forward_as_completed (
+            endpoints = formatted_endpoints,
+            synapses = synapses,
+            inputs = Dendrite._detach_inputs( formatted_inputs ),
+            timeout = timeout,
+            min_successes = min_successes,
+            max_time = max_time,
+        )
+        completed_endpoints, completed_inputs, completed_outputs, completed_codes, completed_times = [], [], [], [], []
+        try:
+            for index, outputs, codes, times in responses:
+                codes = torch.tensor( codes, dtype = torch.int64 )
+                times = torch.tensor( times, dtype = torch.float32 )
+                completed_endpoints.append( formatted_endpoints[ index ] )
+                completed_inputs.append( formatted_inputs[ index ] )
+                completed_outputs.append( outputs )
+                completed_codes.append( codes )
+                completed_times.append( times )
+                yield formatted_endpoints[ index ], outputs, codes, times
+        finally:
+            responses.close()
+            self.update_stats( completed_endpoints, synapses, completed_inputs, completed_outputs, completed_codes, completed_times )
+
     def text_causal_lm (
         self,
         endpoints: Union [ torch.LongTensor, List [ torch.LongTensor ], List[ 'bittensor.Endpoint' ], 'bittensor.Endpoint' ],
@@ -1017,6 +1101,8 @@ class Dendrite(torch.autograd.Function):
                 'dendrite/avg_out_bytes_per_second' : self.stats.avg_out_bytes_per_second.get(),
                 'dendrite/Total unique queries': len(self.stats.requests_per_pubkey.keys()),
             }
+            for key, value in self.receptor_pool.get_channel_metrics().items():
+                wandb_info[ 'dendrite/receptor_pool/' + key ] = value
             return wandb_info
         except Exception as e:
             bittensor.logging.error( prefix='failed dendrite.to_wandb()', sufix = str(e))
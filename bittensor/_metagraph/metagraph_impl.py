@@ -19,7 +19,8 @@
 
 import os
 
-from typing import List
+from typing import List, Tuple
+from types import SimpleNamespace
 from loguru import logger
 
 import ast
@@ -33,6 +34,8 @@ import bittensor
 import bittensor.utils.networking as net
 import bittensor.utils.weight_utils as weight_utils
 
+from .metagraph_snapshot import MetagraphSnapshot
+
 RAOPERTAO = 1000000000
 U64MAX = 18446744073709551615
 
@@ -90,9 +93,44 @@ class Metagraph( torch.nn.Module ):
         self.endpoints = torch.nn.Parameter( torch.tensor( [], dtype=torch.int64), requires_grad=False )
         self.uids = torch.nn.Parameter( torch.tensor([], dtype = torch.int64),requires_grad=False )
         self._endpoint_objs = None
+        self._identity = None
+        self._fingerprints = None
+        self._snapshot = None
+        self._lazy_parameters = {}
         self.neurons = None
+        self.changed_uids = torch.tensor( [], dtype=torch.int64 )
+        self.replaced_uids = torch.tensor( [], dtype=torch.int64 )
+        return self
+
+    def __getattr__( self, name: str ):
+        # Parameters loaded from a snapshot are read from its memory map on first access.
+        lazy_parameters = self.__dict__.get( '_lazy_parameters' )
+        if lazy_parameters and name in lazy_parameters:
+            snapshot = lazy_parameters.pop( name )
+            parameter = torch.nn.Parameter( snapshot.tensor( name ), requires_grad=False )
+            setattr( self, name, parameter )
+            return parameter
+        return super().__getattr__( name )
+
+    def materialize( self ) -> 'Metagraph':
+        r""" Reads every parameter still pending from a loaded snapshot into memory.
+            Parameters which were replaced since the snapshot was loaded are left as they are.
+        """
+        for name in list( self._lazy_parameters ):
+            if name in self._parameters:
+                del self._lazy_parameters[name]
+            else:
+                getattr( self, name )
         return self
 
+    def state_dict( self, *args, **kwargs ):
+        self.materialize()
+        return super().state_dict( *args, **kwargs )
+
+    def _apply( self, *args, **kwargs ):
+        self.materialize()
+        return super()._apply( *args, **kwargs )
+
     def forward (
         self, 
         uid: int, 
@@ -129,7 +167,7 @@ class Metagraph( torch.nn.Module ):
         if uid >= self.n.item():
             raise ValueError('Passed uid does not exist in the graph. Got {} > {}', uid, self.n.item())
 
-        weight = self.W.detach().clone()
+        weight = self.W.detach().to_dense() if self.W.is_sparse else self.W.detach().clone()
         weight[uid,:] = row_weight
         
         # Compute ranks.
@@ -161,7 +199,7 @@ class Metagraph( torch.nn.Module ):
         print (Inflation)
 
         # Compute bonds.
-        B = self.B.detach().clone().float()
+        B = self.B.detach().to_dense().float() if self.B.is_sparse else self.B.detach().clone().float()
         B_norm = f.normalize(B, p=1, dim=1)
         print (B_norm)
 
@@ -227,48 +265,94 @@ class Metagraph( torch.nn.Module ):
         return self.weights
 
     @property
-    def hotkeys( self ) -> List[str]:
+    def hotkeys( self ) -> Tuple[str]:
         r""" Returns hotkeys for each neuron.
             Returns:
-                hotkeys (:obj:`List[str] of shape :obj:`(metagraph.n)`):
+                hotkeys (:obj:`Tuple[str] of shape :obj:`(metagraph.n)`):
                     Neuron hotkeys.
         """
-        if self.n.item() == 0:
-            return []
-        return [ neuron.hotkey if neuron != bittensor.endpoint.dummy() else '' for neuron in self.endpoint_objs ]
+        return self.identity.hotkeys
 
     @property
-    def coldkeys( self ) -> List[str]:
+    def coldkeys( self ) -> Tuple[str]:
         r""" Returns coldkeys for each neuron.
             Returns:
-                coldkeys (:obj:`List[str] of shape :obj:`(metagraph.n)`):
+                coldkeys (:obj:`Tuple[str] of shape :obj:`(metagraph.n)`):
                     Neuron coldkeys.
         """
-        if self.n.item() == 0:
-            return []
-        return [ neuron.coldkey if neuron != bittensor.endpoint.dummy() else '' for neuron in self.endpoint_objs ]
+        return self.identity.coldkeys
 
     @property
-    def modalities( self ) -> List[str]:
+    def modalities( self ) -> Tuple[str]:
         r""" Returns the modality for each neuron.
             Returns:
-                coldkeys (:obj:`List[str] of shape :obj:`(metagraph.n)`):
-                    Neuron coldkeys.
+                modalities (:obj:`Tuple[str] of shape :obj:`(metagraph.n)`):
+                    Neuron modalities.
         """
-        if self.n.item() == 0:
-            return []
-        return [ neuron.modality if neuron != bittensor.endpoint.dummy() else '' for neuron in self.endpoint_objs ]
+        return self.identity.modalities
 
     @property
-    def addresses( self ) -> List[str]:
+    def addresses( self ) -> Tuple[str]:
         r""" Returns ip addresses for each neuron.
             Returns:
-                coldkeys (:obj:`List[str] of shape :obj:`(metagraph.n)`):
+                addresses (:obj:`Tuple[str] of shape :obj:`(metagraph.n)`):
                     Neuron address.
         """
-        if self.n.item() == 0:
-            return []
-        return [ net.ip__str__( neuron.ip_type, neuron.ip, neuron.port ) if neuron != bittensor.endpoint.dummy() else '' for neuron in self.endpoint_objs ]
+        return self.identity.addresses
+
+    @property
+    def identity( self ) -> SimpleNamespace:
+        r""" Returns the identity columns of the neurons and their hotkey and coldkey indices, built once per sync or load.
+            Unfilled uids have empty strings in every column.
+            Returns:
+                identity (:obj:`SimpleNamespace`):
+                    hotkeys, coldkeys, modalities, addresses (:obj:`Tuple[str] of shape :obj:`(metagraph.n)`),
+                    hotkey_to_uid (:obj:`Dict[str, int]`) first uid of each hotkey and
+                    coldkey_to_uids (:obj:`Dict[str, Tuple[int]]`) uids of each coldkey.
+        """
+        if self._identity == None and self._snapshot != None:
+            # Read the identity columns stored with the snapshot instead of decoding every endpoint.
+            hotkeys = self._snapshot.strings( 'hotkeys' )
+            coldkeys = self._snapshot.strings( 'coldkeys' )
+            modalities = [ int( modality ) if modality != '' else '' for modality in self._snapshot.strings( 'modalities' ) ]
+            addresses = self._snapshot.strings( 'addresses' )
+            self._identity = self._index_identity( hotkeys, coldkeys, modalities, addresses )
+
+        elif self._identity == None:
+            dummy = bittensor.endpoint.dummy()
+            hotkeys, coldkeys, modalities, addresses = [], [], [], []
+            for neuron in self.endpoint_objs:
+                if neuron != dummy:
+                    hotkeys.append( neuron.hotkey )
+                    coldkeys.append( neuron.coldkey )
+                    modalities.append( neuron.modality )
+                    addresses.append( net.ip__str__( neuron.ip_type, neuron.ip, neuron.port ) )
+                else:
+                    hotkeys.append( '' )
+                    coldkeys.append( '' )
+                    modalities.append( '' )
+                    addresses.append( '' )
+            self._identity = self._index_identity( hotkeys, coldkeys, modalities, addresses )
+
+        return self._identity
+
+    @staticmethod
+    def _index_identity( hotkeys: List[str], coldkeys: List[str], modalities: List[str], addresses: List[str] ) -> SimpleNamespace:
+        # Keep the first uid of a repeated hotkey, as hotkeys.index() does.
+        hotkey_to_uid = {}
+        coldkey_to_uids = {}
+        for uid, ( hotkey, coldkey ) in enumerate( zip( hotkeys, coldkeys ) ):
+            hotkey_to_uid.setdefault( hotkey, uid )
+            coldkey_to_uids.setdefault( coldkey, [] ).append( uid )
+
+        return SimpleNamespace(
+            hotkeys = tuple( hotkeys ),
+            coldkeys = tuple( coldkeys ),
+            modalities = tuple( modalities ),
+            addresses = tuple( addresses ),
+            hotkey_to_uid = hotkey_to_uid,
+            coldkey_to_uids = { coldkey: tuple( uids ) for coldkey, uids in coldkey_to_uids.items() },
+        )
 
     @property
     def endpoint_objs( self ) -> List['bittensor.Endpoint']:
@@ -298,22 +382,45 @@ class Metagraph( torch.nn.Module ):
                 uid: (`int`):
                     The uid for specified hotkey, -1 if hotkey does not exist.
         """ 
-        if hotkey in self.hotkeys:
-            return self.hotkeys.index(hotkey) 
-        else:
-            return -1
+        return self.identity.hotkey_to_uid.get( hotkey, -1 )
 
-    def load( self, network:str = None  ) -> 'Metagraph':
-        r""" Loads this metagraph object's state_dict from bittensor root dir.
+    def coldkey_to_uids( self, coldkey:str ) -> Tuple[int]:
+        r""" Fetch the uids registered under a coldkey.
+            Args: 
+                coldkey: (`str`, required):
+                    Coldkey to fetch the uids for.
+            
+            Return:
+                uids: (`Tuple[int]`):
+                    The uids for specified coldkey, empty if coldkey does not exist.
+        """ 
+        return self.identity.coldkey_to_uids.get( coldkey, () )
+
+    def load( self, network:str = None, block:int = None ) -> 'Metagraph':
+        r""" Loads this metagraph object's state from bittensor root dir.
+            Snapshots are preferred over state_dicts saved by previous versions.
             Args: 
                 network: (:obj:`str`, required):
                     Name of state_dict to load, defaults to kusanagi
+                block: (:obj:`int`, `optional`):
+                    Load the latest snapshot in the history directory at or before this block.
+            Raises:
+                ValueError:
+                    If block is set and there is no snapshot in the history directory at or before it.
         """
+        if network == None:
+            network = self.subtensor.network
+        if block != None:
+            blocks = [ b for b in self.history_blocks( network ) if b <= block ]
+            if len( blocks ) == 0:
+                raise ValueError('No metagraph snapshot in history at or before block: {}. Run metagraph.save( history = True ) first.'.format( block ))
         try:
-            if network == None:
-                network = self.subtensor.network
-            metagraph_path = '~/.bittensor/' + str(network) + '.pt'
-            metagraph_path = os.path.expanduser(metagraph_path)
+            if block != None:
+                metagraph_path = self._history_path( network, blocks[-1] )
+            else:
+                metagraph_path = os.path.expanduser( '~/.bittensor/' + str(network) + '.mg' )
+                if not os.path.isfile( metagraph_path ):
+                    metagraph_path = os.path.expanduser( '~/.bittensor/' + str(network) + '.pt' )
             if os.path.isfile(metagraph_path):
                 self.load_from_path( path = metagraph_path )
             else:
@@ -322,26 +429,92 @@ class Metagraph( torch.nn.Module ):
             logger.exception(e)
         return self
 
-    def save( self, network:str = None ) -> 'Metagraph':
-        r""" Saves this metagraph object's state_dict under bittensor root dir.
+    def save( self, network:str = None, history:bool = False, max_history:int = 1000 ) -> 'Metagraph':
+        r""" Saves this metagraph object as a snapshot under bittensor root dir.
             Args: 
                 network: (:obj:`str`, required):
-                    Name of state_dict, defaults to kusanagi
+                    Name of snapshot, defaults to kusanagi
+                history: (:obj:`bool`, `optional`, defaults to False):
+                    Also keep a snapshot for the current block in the history directory.
+                max_history: (:obj:`int`, `optional`, defaults to 1000):
+                    Number of history snapshots to keep, the oldest blocks are removed first. 0 removes all of them.
         """
         if network == None:
             network = self.subtensor.network
-        return self.save_to_path( path = '~/.bittensor/', filename = str(network) + '.pt')
+        self.save_snapshot( '~/.bittensor/' + str(network) + '.mg' )
+        if history:
+            self.save_snapshot( self._history_path( network, self.block.item() ) )
+            blocks = self.history_blocks( network )
+            for block in blocks[ :max( len( blocks ) - max_history, 0 ) ]:
+                os.remove( self._history_path( network, block ) )
+        return self
+
+    def history_blocks( self, network:str = None ) -> List[int]:
+        r""" Returns the blocks with a snapshot in the history directory.
+            Args: 
+                network: (:obj:`str`, required):
+                    Name of network, defaults to kusanagi
+            Returns:
+                blocks (:obj:`List[int]`):
+                    Sorted blocks of the saved snapshots.
+        """
+        if network == None:
+            network = self.subtensor.network
+        history_dir = os.path.dirname( self._history_path( network, 0 ) )
+        if not os.path.isdir( history_dir ):
+            return []
+        return sorted( int( filename[:-3] ) for filename in os.listdir( history_dir ) if filename.endswith( '.mg' ) and filename[:-3].isdigit() )
+
+    @staticmethod
+    def _history_path( network:str, block:int ) -> str:
+        return os.path.expanduser( '~/.bittensor/history/' + str(network) + '/' + str(block) + '.mg' )
 
     def load_from_path(self, path:str ) -> 'Metagraph':
-        r""" Loads this metagraph object with state_dict under the specified path.
+        r""" Loads this metagraph object with the snapshot or state_dict under the specified path.
             Args: 
                 path: (:obj:`str`, required):
                     Path to load state_dict.
         """
         full_path = os.path.expanduser(path)
+        if MetagraphSnapshot.is_snapshot( full_path ):
+            return self.load_snapshot( full_path )
         metastate = torch.load( full_path )
         return self.load_from_state_dict( metastate )
 
+    def save_snapshot( self, path:str ) -> 'Metagraph':
+        r""" Saves this metagraph object as a columnar snapshot to the specified path.
+            Args: 
+                path: (:obj:`str`, required):
+                    Path of the snapshot file.
+        """
+        identity = self.identity
+        strings = {
+            'hotkeys': identity.hotkeys,
+            'coldkeys': identity.coldkeys,
+            'modalities': [ str( modality ) for modality in identity.modalities ],
+            'addresses': identity.addresses,
+        }
+        MetagraphSnapshot.write( path, self.state_dict(), strings = strings )
+        return self
+
+    def load_snapshot( self, path:str ) -> 'Metagraph':
+        r""" Loads this metagraph object from a snapshot under the specified path.
+            The file is memory mapped and each parameter is only read when first used.
+            Args: 
+                path: (:obj:`str`, required):
+                    Path of the snapshot file.
+        """
+        snapshot = MetagraphSnapshot( path )
+        for name in snapshot.parameters:
+            if name in self._parameters:
+                del self._parameters[name]
+            self._lazy_parameters[name] = snapshot
+        self._snapshot = snapshot if 'hotkeys' in snapshot.header['columns'] else None
+        self._endpoint_objs = None
+        self._identity = None
+        self._fingerprints = None
+        return self
+
     def save_to_path(self, path:str, filename:str ) -> 'Metagraph':
         r""" Saves this metagraph object's state_dict to the specified path.
             Args: 
@@ -378,6 +551,10 @@ class Metagraph( torch.nn.Module ):
         self.bonds = torch.nn.Parameter( state_dict['bonds'], requires_grad=False )
         self.endpoints = torch.nn.Parameter( state_dict['endpoints'], requires_grad=False )
         self._endpoint_objs = None
+        self._identity = None
+        self._fingerprints = None
+        self._snapshot = None
+        self._lazy_parameters = {}
         return self
 
     def retrieve_cached_neurons( self, block: int = None ):
@@ -424,8 +601,43 @@ class Metagraph( torch.nn.Module ):
 
         return neurons
 
-    def sync ( self, block: int = None, cached: bool = True ) -> 'Metagraph':
+    @staticmethod
+    def _normalize_sparse_bonds( n_total: int, bond_index: torch.LongTensor, bond_vals: torch.LongTensor ) -> torch.FloatTensor:
+        r""" Column normalizes the bond matrix and adds self ownership without densifying it.
+            Args:
+                n_total (int):
+                    Number of neurons in the graph.
+                bond_index (:obj:`torch.LongTensor` of shape :obj:`(2, nnz)`):
+                    Row and column uids of the chain bonds.
+                bond_vals (:obj:`torch.LongTensor` of shape :obj:`(nnz)`):
+                    Chain bond values.
+            Returns:
+                bonds (:obj:`torch.sparse.FloatTensor` of shape :obj:`(n_total, n_total)`):
+                    Sparse normalized bond matrix.
+        """
+        bonds = torch.sparse_coo_tensor( bond_index, bond_vals.float(), (n_total, n_total) ).coalesce()
+        bond_index, bond_vals = bonds.indices(), bonds.values()
+        column_norm = torch.zeros( n_total, dtype=torch.float32 ).index_add_( 0, bond_index[1], bond_vals.abs() ).clamp( min=1e-12 )
+        diagonal = torch.arange( n_total, dtype=torch.int64 )
+        index = torch.cat( [ bond_index, torch.stack( [diagonal, diagonal] ) ], dim=1 )
+        values = torch.cat( [ bond_vals / column_norm[ bond_index[1] ] * 0.5, torch.full( (n_total,), 0.5 ) ] )
+        return torch.sparse_coo_tensor( index, values, (n_total, n_total) ).coalesce()
+
+    def sync ( self, block: int = None, cached: bool = True, sparse: bool = False, incremental: bool = False ) -> 'Metagraph':
         r""" Synchronizes this metagraph with the chain state.
+            The uids whose registration, endpoint or weights changed since the previous sync are reported in
+            metagraph.changed_uids, the uids which got a new hotkey in metagraph.replaced_uids.
+            Args:
+                block (:obj:`int`, `optional`):
+                    Block to sync at, defaults to the current block.
+                cached (:obj:`bool`, `optional`):
+                    If true, neurons are retrieved from the IPFS cache when available.
+                sparse (:obj:`bool`, `optional`):
+                    If true, weights and bonds are stored as sparse COO tensors instead of dense n x n tensors.
+                incremental (:obj:`bool`, `optional`):
+                    If true, only the endpoint and weight rows of changed uids are rebuilt, by comparing the hotkey,
+                    endpoint and last_update of each uid with the previous sync. Falls back to a full rebuild
+                    after a load, for sparse weights or when the graph shrank.
         """
         logger.success(self.subtensor)
         if block == None:
@@ -474,8 +686,62 @@ class Metagraph( torch.nn.Module ):
                 neurons = self.subtensor.neurons( block = block )
                 n_total = len(neurons)
 
-        # Fill arrays.
-        uids = [ i for i in range(n_total) ]
+        # Keep the last record per uid, rows of repeated uids are overwritten in list order.
+        neurons_by_uid = { n.uid: n for n in neurons }
+        fingerprints = [ None for _ in range(n_total) ]
+        for uid, n in neurons_by_uid.items():
+            fingerprints[uid] = self._fingerprint( n )
+
+        n_previous = self.n.item()
+        previous_hotkeys = self.hotkeys
+        if incremental and self._fingerprints != None and 0 < n_previous <= n_total and not sparse and not self.weights.is_sparse:
+            changed_uids = [ uid for uid in range(n_total) if uid >= n_previous or fingerprints[uid] != self._fingerprints[uid] ]
+            self._patch( neurons_by_uid, n_total, block, changed_uids )
+        else:
+            changed_uids = list( range(n_total) )
+            self._fill( neurons_by_uid, n_total, block, sparse )
+        self._fingerprints = fingerprints
+
+        # Read what is left of a loaded snapshot, the synced state replaces it.
+        self.materialize()
+        self._snapshot = None
+
+        # Rebuild the identity columns and indices once, instead of on every lookup.
+        self._identity = None
+        hotkeys = self.hotkeys
+
+        # Report the rows that changed since the previous sync.
+        self.changed_uids = torch.tensor( changed_uids, dtype=torch.int64 )
+        self.replaced_uids = torch.tensor( [ uid for uid in changed_uids if uid < len(previous_hotkeys) and previous_hotkeys[uid] != hotkeys[uid] ], dtype=torch.int64 )
+
+        # For contructor.
+        return self
+
+    @staticmethod
+    def _fingerprint( neuron ) -> tuple:
+        r""" Returns the fields of a neuron record which only change with its registration, endpoint or weights.
+            Weights are set together with last_update, stake and the incentive columns change every block.
+        """
+        return ( neuron.hotkey, neuron.coldkey, neuron.last_update, neuron.version, neuron.ip_type, neuron.ip, neuron.port, neuron.modality )
+
+    @staticmethod
+    def _endpoint( neuron ) -> 'bittensor.Endpoint':
+        r""" Returns the endpoint of a neuron record.
+        """
+        return bittensor.endpoint(
+            version = int(neuron.version),
+            uid = int(neuron.uid), 
+            hotkey = str(neuron.hotkey), 
+            ip_type = int(neuron.ip_type), 
+            ip = str(neuron.ip), 
+            port = int(neuron.port), 
+            modality = int(neuron.modality), 
+            coldkey = str(neuron.coldkey) 
+        )
+
+    def _set_columns( self, neurons_by_uid: dict, n_total: int, block: int, sparse: bool ):
+        r""" Sets the neuron records, the per neuron columns and the bonds from all neuron records, these change every block.
+        """
         active = [ 0 for _ in range(n_total) ]
         stake = [ 0 for _ in range(n_total) ]
         ranks = [ 0 for _ in range(n_total) ]
@@ -485,85 +751,110 @@ class Metagraph( torch.nn.Module ):
         emission = [ 0 for _ in range(n_total) ]
         dividends = [ 0 for _ in range(n_total) ]
         last_updates = [ -1 for _ in range(n_total) ]
-        endpoints = [ [-1 for _ in range(250) ]  for _ in range(n_total) ]
-        weights = [ [ 0 for _ in range(n_total) ] for _ in range(n_total) ]
-        bonds = [ [0 for _ in range(n_total) ] for _ in range(n_total) ]
-        self._endpoint_objs = [ bittensor.endpoint.dummy() for _ in range(n_total) ]
-        self.neurons = [None for _ in range(n_total)]
-        for n in neurons:
-            self.neurons[n.uid] = n
-            uids[n.uid] = n.uid 
-            active[n.uid] = n.active
-            stake[n.uid] = n.stake 
-            ranks[n.uid] = n.rank
-            trust[n.uid] = n.trust
-            consensus[n.uid] = n.consensus
-            incentive[n.uid] = n.incentive
-            dividends[n.uid] = n.dividends
-            emission[n.uid] = n.emission
-            last_updates[n.uid] = n.last_update
-            endpoint =  bittensor.endpoint(
-                version = int(n.version),
-                uid = int(n.uid), 
-                hotkey = str(n.hotkey), 
-                ip_type = int(n.ip_type), 
-                ip = str(n.ip), 
-                port = int(n.port), 
-                modality = int(n.modality), 
-                coldkey = str(n.coldkey) 
-            )
-            self._endpoint_objs[n.uid] = endpoint 
-            endpoints[n.uid] = endpoint.to_tensor().tolist()
-            if len(n.weights) > 0:
-                w_uids, w_weights = zip(*n.weights)
-                weights[n.uid] = weight_utils.convert_weight_uids_and_vals_to_tensor( n_total, w_uids, w_weights ).tolist()
-            else:
-                weights[n.uid] = [0] * n_total
+        bond_rows, bond_cols, bond_vals = [], [], []
+        for uid, n in neurons_by_uid.items():
+            active[uid] = n.active
+            stake[uid] = n.stake 
+            ranks[uid] = n.rank
+            trust[uid] = n.trust
+            consensus[uid] = n.consensus
+            incentive[uid] = n.incentive
+            dividends[uid] = n.dividends
+            emission[uid] = n.emission
+            last_updates[uid] = n.last_update
             if len(n.bonds) > 0:
                 b_uids, b_bonds = zip(*n.bonds)
-                bonds[n.uid] = weight_utils.convert_bond_uids_and_vals_to_tensor( n_total, b_uids, b_bonds ).tolist()
-            else:
-                bonds[n.uid] = [0] * n_total
-
-        # Set tensors.
-        tn = torch.tensor( n_total, dtype=torch.int64 )
-        tblock = torch.tensor( block, dtype=torch.int64 )
-        tuids = torch.tensor( uids, dtype=torch.int64 )
-        tactive = torch.tensor( active, dtype=torch.int64 )
-        tstake = torch.tensor( stake, dtype=torch.float32 )
-        tranks = torch.tensor( ranks, dtype=torch.float32 )
-        ttrust = torch.tensor( trust, dtype=torch.float32 )
-        tconsensus = torch.tensor( consensus, dtype=torch.float32 )
-        tincentive = torch.tensor( incentive, dtype=torch.float32 )
-        temission = torch.tensor( emission, dtype=torch.float32 )
-        tdividends = torch.tensor( dividends, dtype=torch.float32 )
-        tlast_update = torch.tensor( last_updates, dtype=torch.int64 )
-        tbonds = torch.tensor( bonds, dtype=torch.int64 )
-        tweights = torch.tensor( weights, dtype=torch.float32 )
-        tendpoints = torch.tensor( endpoints, dtype=torch.int64 )
-
-        # Normalize bond ownership.
-        tbonds = torch.nn.functional.normalize( tbonds.float(), p=1, dim=0, eps=1e-12 ) * 0.5 + torch.eye( tn ) * 0.5
+                bond_rows.extend( [uid] * len(b_uids) )
+                bond_cols.extend( b_uids )
+                bond_vals.extend( b_bonds )
+
+        # Scatter the chain (uid, value) pairs into the bond matrix.
+        bond_index = torch.tensor( [bond_rows, bond_cols], dtype=torch.int64 ).view(2, -1)
+        bond_vals = torch.tensor( bond_vals, dtype=torch.int64 )
+        if sparse:
+            tbonds = self._normalize_sparse_bonds( n_total, bond_index, bond_vals )
+        else:
+            tbonds = torch.zeros( (n_total, n_total), dtype=torch.int64 )
+            tbonds[ bond_index[0], bond_index[1] ] = bond_vals
+
+            # Normalize bond ownership.
+            tbonds = torch.nn.functional.normalize( tbonds.float(), p=1, dim=0, eps=1e-12 ) * 0.5 + torch.eye( n_total ) * 0.5
+
+        # Keep the records of every uid, unchanged rows still carry a new stake and rank.
+        self.neurons = [ neurons_by_uid.get( uid ) for uid in range(n_total) ]
 
         # Set params.
-        self.n = torch.nn.Parameter( tn, requires_grad=False )
-        self.block = torch.nn.Parameter( tblock, requires_grad=False )
-        self.uids = torch.nn.Parameter( tuids, requires_grad=False )
-        self.stake = torch.nn.Parameter( tstake, requires_grad=False )
-        self.ranks = torch.nn.Parameter( tranks, requires_grad=False )
-        self.trust = torch.nn.Parameter( ttrust, requires_grad=False )
-        self.consensus = torch.nn.Parameter( tconsensus, requires_grad=False )
-        self.incentive = torch.nn.Parameter( tincentive, requires_grad=False )
-        self.emission = torch.nn.Parameter( temission, requires_grad=False )
-        self.dividends = torch.nn.Parameter( tdividends, requires_grad=False )
-        self.active = torch.nn.Parameter( tactive, requires_grad=False )
-        self.last_update = torch.nn.Parameter( tlast_update, requires_grad=False )
-        self.weights = torch.nn.Parameter( tweights, requires_grad=False )
+        self.n = torch.nn.Parameter( torch.tensor( n_total, dtype=torch.int64 ), requires_grad=False )
+        self.block = torch.nn.Parameter( torch.tensor( block, dtype=torch.int64 ), requires_grad=False )
+        self.uids = torch.nn.Parameter( torch.arange( n_total, dtype=torch.int64 ), requires_grad=False )
+        self.stake = torch.nn.Parameter( torch.tensor( stake, dtype=torch.float32 ), requires_grad=False )
+        self.ranks = torch.nn.Parameter( torch.tensor( ranks, dtype=torch.float32 ), requires_grad=False )
+        self.trust = torch.nn.Parameter( torch.tensor( trust, dtype=torch.float32 ), requires_grad=False )
+        self.consensus = torch.nn.Parameter( torch.tensor( consensus, dtype=torch.float32 ), requires_grad=False )
+        self.incentive = torch.nn.Parameter( torch.tensor( incentive, dtype=torch.float32 ), requires_grad=False )
+        self.emission = torch.nn.Parameter( torch.tensor( emission, dtype=torch.float32 ), requires_grad=False )
+        self.dividends = torch.nn.Parameter( torch.tensor( dividends, dtype=torch.float32 ), requires_grad=False )
+        self.active = torch.nn.Parameter( torch.tensor( active, dtype=torch.int64 ), requires_grad=False )
+        self.last_update = torch.nn.Parameter( torch.tensor( last_updates, dtype=torch.int64 ), requires_grad=False )
         self.bonds = torch.nn.Parameter( tbonds, requires_grad=False )
+
+    def _set_rows( self, neurons_by_uid: dict, uids: List[int], tweights: torch.FloatTensor, tendpoints: torch.LongTensor ):
+        r""" Writes the endpoint and weight row of each uid in uids, unfilled uids get a dummy endpoint.
+        """
+        weight_rows, weight_cols, weight_vals = [], [], []
+        for uid in uids:
+            n = neurons_by_uid.get( uid )
+            if n == None:
+                self._endpoint_objs[uid] = bittensor.endpoint.dummy()
+                continue
+            endpoint = self._endpoint( n )
+            self._endpoint_objs[uid] = endpoint 
+            tendpoints[uid] = endpoint.to_tensor()
+            if len(n.weights) > 0:
+                w_uids, w_weights = zip(*n.weights)
+                weight_rows.extend( [uid] * len(w_uids) )
+                weight_cols.extend( w_uids )
+                weight_vals.extend( w_weights )
+
+        # Scatter the chain (uid, value) pairs into the weight matrix.
+        weight_index = torch.tensor( [weight_rows, weight_cols], dtype=torch.int64 ).view(2, -1)
+        weight_vals = ( torch.tensor( weight_vals, dtype=torch.float64 ) / float(weight_utils.U32_MAX) ).float()
+        if tweights.is_sparse:
+            return torch.sparse_coo_tensor( weight_index, weight_vals, tweights.shape ).coalesce()
+        tweights[ weight_index[0], weight_index[1] ] = weight_vals
+        return tweights
+
+    def _fill( self, neurons_by_uid: dict, n_total: int, block: int, sparse: bool ):
+        r""" Rebuilds every tensor from the neuron records.
+        """
+        tendpoints = torch.full( (n_total, 250), -1, dtype=torch.int64 )
+        if sparse:
+            tweights = torch.sparse_coo_tensor( torch.zeros( (2, 0), dtype=torch.int64 ), torch.zeros( 0 ), (n_total, n_total) )
+        else:
+            tweights = torch.zeros( (n_total, n_total), dtype=torch.float32 )
+        self._endpoint_objs = [ bittensor.endpoint.dummy() for _ in range(n_total) ]
+        tweights = self._set_rows( neurons_by_uid, list( neurons_by_uid.keys() ), tweights, tendpoints )
+        self._set_columns( neurons_by_uid, n_total, block, sparse )
+        self.weights = torch.nn.Parameter( tweights, requires_grad=False )
+        self.endpoints = torch.nn.Parameter( tendpoints, requires_grad=False )
+
+    def _patch( self, neurons_by_uid: dict, n_total: int, block: int, changed_uids: List[int] ):
+        r""" Rewrites the endpoint and weight rows of the changed uids only, growing the graph to n_total.
+            The per neuron columns and bonds are set from all records since they change every block.
+        """
+        n_previous = self.n.item()
+        growth = n_total - n_previous
+        tendpoints = torch.cat( [ self.endpoints.data, torch.full( (growth, 250), -1, dtype=torch.int64 ) ] )
+        tweights = torch.zeros( (n_total, n_total), dtype=torch.float32 )
+        tweights[ :n_previous, :n_previous ] = self.weights.data
+        changed = torch.tensor( changed_uids, dtype=torch.int64 )
+        tweights[ changed ] = 0
+        tendpoints[ changed ] = -1
+        self._endpoint_objs = self.endpoint_objs + [ bittensor.endpoint.dummy() for _ in range(growth) ]
+        tweights = self._set_rows( neurons_by_uid, changed_uids, tweights, tendpoints )
+        self._set_columns( neurons_by_uid, n_total, block, sparse = False )
+        self.weights = torch.nn.Parameter( tweights, requires_grad=False )
         self.endpoints = torch.nn.Parameter( tendpoints, requires_grad=False )
-            
-        # For contructor.
-        return self
 
     def to_dataframe(self):
         try:
@@ -95,6 +95,12 @@ class MockMetagraph( metagraph_impl.Metagraph ):
         self.endpoints = torch.nn.Parameter( torch.tensor( [], dtype=torch.int64), requires_grad=False )
         self.uids = torch.nn.Parameter( torch.tensor([], dtype = torch.int64),requires_grad=False )
         self._endpoint_objs = None
+        self._identity = None
+        self._fingerprints = None
+        self._snapshot = None
+        self._lazy_parameters = {}
+        self.changed_uids = torch.tensor( [], dtype=torch.int64 )
+        self.replaced_uids = torch.tensor( [], dtype=torch.int64 )
         return self
 
     def load( self, network:str = None  ) -> 'Metagraph':
@@ -126,5 +132,5 @@ class MockMetagraph( metagraph_impl.Metagraph ):
             network = 'mock'
         return self.save_to_path( path = '~/.bittensor/', filename = 'mock.pt')
 
-    def sync ( self, block: int = None, cached: bool = True ) -> 'Metagraph':
+    def sync ( self, block: int = None, cached: bool = True, sparse: bool = False, incremental: bool = False ) -> 'Metagraph':
         return self
\ No newline at end of file
@@ -0,0 +1,162 @@
+""" Columnar, memory mapped metagraph snapshots.
+"""
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import json
+import os
+import struct
+from typing import Dict, List
+
+import numpy as np
+import torch
+
+class MetagraphSnapshot:
+    r""" Columnar on disk snapshot of a metagraph state, read back through a memory map.
+    The file holds a magic string, the format version and a json header, followed by one 64 byte aligned
+    buffer per column. Square weight and bond matrices are stored in CSR form as three columns
+    (name.crow_indices, name.col_indices, name.values) and restored dense or sparse as they were saved.
+    Columns are only read from the map when requested.
+    """
+    magic = b'BTMGRAPH'
+    version = 1
+    alignment = 64
+    csr_columns = ( 'weights', 'bonds' )
+
+    def __init__( self, path: str ):
+        r""" Opens the snapshot at path and reads its header.
+            Args:
+                path (str):
+                    Snapshot file path.
+        """
+        self.path = os.path.expanduser( path )
+        with open( self.path, 'rb' ) as f:
+            magic, version, header_size = struct.unpack( '<8sIQ', f.read( 20 ) )
+            if magic != self.magic:
+                raise ValueError( '{} is not a metagraph snapshot'.format( self.path ) )
+            if version > self.version:
+                raise ValueError( 'Metagraph snapshot {} has format version {}, this version reads up to {}'.format( self.path, version, self.version ) )
+            self.header = json.loads( f.read( header_size ) )
+        self.memmap = np.memmap( self.path, dtype = np.uint8, mode = 'c' )
+
+    @classmethod
+    def is_snapshot( cls, path: str ) -> bool:
+        r""" Returns true if the file at path starts with the snapshot magic.
+        """
+        with open( os.path.expanduser( path ), 'rb' ) as f:
+            return f.read( len( cls.magic ) ) == cls.magic
+
+    @property
+    def parameters( self ) -> List[str]:
+        r""" Returns the names of the metagraph parameters in the snapshot.
+        """
+        return self.header['parameters']
+
+    def array( self, name: str ) -> np.ndarray:
+        r""" Returns the column as a copy on write view of the memory map.
+        """
+        column = self.header['columns'][name]
+        buffer = self.memmap[ column['offset']: column['offset'] + column['nbytes'] ]
+        return buffer.view( np.dtype( column['dtype'] ) ).reshape( column['shape'] )
+
+    def tensor( self, name: str ) -> torch.Tensor:
+        r""" Returns the metagraph parameter name, weights and bonds are rebuilt from their CSR columns.
+        """
+        layout = self.header['layouts'].get( name )
+        if layout == None:
+            return torch.from_numpy( self.array( name ) )
+        crow_indices = torch.from_numpy( self.array( name + '.crow_indices' ) )
+        col_indices = torch.from_numpy( self.array( name + '.col_indices' ) )
+        values = torch.from_numpy( self.array( name + '.values' ) )
+        shape = self.header['columns'][ name + '.values' ]['matrix_shape']
+        rows = torch.repeat_interleave( torch.arange( shape[0] ), crow_indices[1:] - crow_indices[:-1] )
+        if layout == 'dense':
+            matrix = torch.zeros( shape, dtype = values.dtype )
+            matrix[ rows, col_indices ] = values
+            return matrix
+        return torch.sparse_coo_tensor( torch.stack( [ rows, col_indices ] ), values, shape ).coalesce()
+
+    def strings( self, name: str ) -> List[str]:
+        r""" Returns a fixed width string column as a list of str.
+        """
+        return [ value.decode( 'utf-8' ) for value in self.array( name ).tolist() ]
+
+    @classmethod
+    def write( cls, path: str, parameters: Dict[str, torch.Tensor], strings: Dict[str, List[str]] = None ):
+        r""" Writes the metagraph parameters and string columns as a snapshot to path.
+            The file is written next to path and moved over it, so open snapshots keep their map.
+            Args:
+                path (str):
+                    Snapshot file path.
+                parameters (:obj:`Dict[str, torch.Tensor]`):
+                    Metagraph parameters by name, as in the state_dict.
+                strings (:obj:`Dict[str, List[str]]`, `optional`):
+                    String columns by name, like the hotkeys of each uid.
+        """
+        columns = {}
+        layouts = {}
+        for name, tensor in parameters.items():
+            tensor = tensor.detach().cpu()
+            if name in cls.csr_columns and tensor.dim() == 2:
+                layouts[name] = 'sparse' if tensor.is_sparse else 'dense'
+                if tensor.is_sparse:
+                    tensor = tensor.coalesce()
+                    ( rows, cols ), values = tensor.indices(), tensor.values()
+                else:
+                    rows, cols = torch.nonzero( tensor, as_tuple = True )
+                    values = tensor[ rows, cols ]
+                crow_indices = torch.zeros( tensor.shape[0] + 1, dtype = torch.int64 )
+                crow_indices[1:] = torch.bincount( rows, minlength = tensor.shape[0] ).cumsum( 0 )
+                columns[ name + '.crow_indices' ] = crow_indices.numpy()
+                columns[ name + '.col_indices' ] = cols.numpy()
+                columns[ name + '.values' ] = values.numpy()
+            else:
+                columns[name] = tensor.numpy()
+        for name, values in ( strings or {} ).items():
+            columns[name] = np.array( [ value.encode( 'utf-8' ) for value in values ], dtype = bytes )
+
+        # Column offsets are relative to the file start, each buffer starts on an aligned offset.
+        header = { 'parameters': list( parameters.keys() ), 'layouts': layouts, 'columns': {} }
+        for name, array in columns.items():
+            header['columns'][name] = { 'dtype': array.dtype.str, 'shape': list( array.shape ), 'nbytes': array.nbytes }
+        for name in layouts:
+            header['columns'][ name + '.values' ]['matrix_shape'] = list( parameters[name].shape )
+        header_size = 0
+        while True:
+            offset = cls._align( 20 + header_size )
+            for name, array in columns.items():
+                header['columns'][name]['offset'] = offset
+                offset = cls._align( offset + array.nbytes )
+            encoded = json.dumps( header ).encode( 'utf-8' )
+            if len( encoded ) <= header_size:
+                break
+            header_size = len( encoded )
+        encoded = encoded.ljust( header_size )
+
+        path = os.path.expanduser( path )
+        os.makedirs( os.path.dirname( path ) or '.', exist_ok = True )
+        with open( path + '.tmp', 'wb' ) as f:
+            f.write( struct.pack( '<8sIQ', cls.magic, cls.version, header_size ) )
+            f.write( encoded )
+            for name, array in columns.items():
+                f.write( b'\0' * ( header['columns'][name]['offset'] - f.tell() ) )
+                f.write( np.ascontiguousarray( array ).tobytes() )
+        os.replace( path + '.tmp', path )
+
+    @classmethod
+    def _align( cls, offset: int ) -> int:
+        return ( offset + cls.alignment - 1 ) // cls.alignment * cls.alignment
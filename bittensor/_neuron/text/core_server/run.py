@@ -104,13 +104,12 @@ def serve(
                 request_type ( bittensor.proto.RequestType, `required`):
                     the request type ('FORWARD' or 'BACKWARD').
         """
-        try:        
-            uid = metagraph.hotkeys.index(pubkey)
-            priority = metagraph.S[uid].item()
-        
-        except:
+        uid = metagraph.hotkey_to_uid(pubkey)
+        if uid == -1:
             # zero priority for those who are not registered.
-            priority =  0
+            priority = 0
+        else:
+            priority = metagraph.S[uid].item()
 
         return priority
 
@@ -172,7 +171,7 @@ def serve(
 
         def registration_check():
             # If we allow non-registered requests return False = not blacklisted.
-            is_registered = pubkey in metagraph.hotkeys
+            is_registered = metagraph.hotkey_to_uid(pubkey) != -1
             if not is_registered:
                 if config.neuron.blacklist_allow_non_registered:
                     return False
@@ -184,8 +183,8 @@ def serve(
         # Check for stake
         def stake_check() -> bool:
             # Check stake.
-            uid = metagraph.hotkeys.index(pubkey)
-            if metagraph.S[uid].item() < config.neuron.blacklist.stake:
+            uid = metagraph.hotkey_to_uid(pubkey)
+            if uid == -1 or metagraph.S[uid].item() < config.neuron.blacklist.stake:
                 prometheus_counters.labels("blacklisted.stake").inc()
 
                 raise Exception('Stake blacklist')
@@ -234,7 +233,9 @@ def serve(
 
         """
         ## Uid that sent the request
-        incoming_uid = metagraph.hotkeys.index(hotkey)
+        incoming_uid = metagraph.hotkey_to_uid(hotkey)
+        if incoming_uid == -1:
+            raise ValueError('{} is not registered'.format(hotkey))
         if synapse.synapse_type == bittensor.proto.Synapse.SynapseType.TEXT_LAST_HIDDEN_STATE:
             
             if metagraph.S[incoming_uid] < config.neuron.lasthidden_stake:
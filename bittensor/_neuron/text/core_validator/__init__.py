@@ -41,7 +41,7 @@ from rich.traceback import install
 from typing import List, Tuple, Callable, Dict, Any, Union, Set
 
 from ..neuron_utilities import ThreadQueue, PositionalEncoding, calc_loss_fct
-from bittensor.utils.tokenizer_utils import phrase_cross_entropy, topk_tokens_to_vocab_size, prune_tokens
+from bittensor.utils.tokenizer_utils import phrase_cross_entropy, topk_first_token_probs, prune_tokens
 
 from torch.nn.functional import kl_div
 from torch.nn.utils import clip_grad_norm_
@@ -92,6 +92,127 @@ neuron_stats_columns = [
 ]
 
 
+class NeuronStats:
+    r""" Columnar store of the validator neuron statistics, one [n] tensor per stat key with a validity mask per key.
+    Exponential moving averages are updated for a batch of uids at once, and rows read back as the stats dict of a
+    uid, so neuron_stats[uid] gives {'stat1': val1, 'stat2': val2, ...} for the stats set on uid.
+
+        Args:
+            n (:obj:`int`, `optional`):
+                Number of uids to hold stats for, grows with resize.
+    """
+    def __init__(self, n: int = 0):
+        self.n = n
+        self.mask = torch.zeros(n, dtype=torch.bool)  # uids with any stats set
+        self.columns = {}  # [key] -> [n] stat values, zero where the stat is not set
+        self.valid = {}  # [key] -> [n] bool, True where the stat is set
+
+    def column(self, key: str) -> torch.Tensor:
+        r""" Returns the [n] values of key, adding an unset column if key is new. Update counts are integers.
+        """
+        if key not in self.columns:
+            self.columns[key] = torch.zeros(self.n, dtype=torch.int64 if key.startswith('updates') else torch.float64)
+            self.valid[key] = torch.zeros(self.n, dtype=torch.bool)
+        return self.columns[key]
+
+    def get(self, key: str) -> torch.Tensor:
+        r""" Returns the [n] values of key, zero where it is not set.
+        """
+        return self.columns[key] if key in self.columns else torch.zeros(self.n, dtype=torch.float64)
+
+    def is_valid(self, key: str) -> torch.BoolTensor:
+        r""" Returns the [n] mask of the uids with key set.
+        """
+        return self.valid[key] if key in self.valid else torch.zeros(self.n, dtype=torch.bool)
+
+    def resize(self, n: int):
+        r""" Grows the columns with unset uids or truncates them to n uids.
+        """
+        if n > self.n:
+            def grow(tensor):
+                return torch.cat([tensor, torch.zeros(n - self.n, dtype=tensor.dtype)])
+        else:
+            def grow(tensor):
+                return tensor[:n].clone()
+        self.mask = grow(self.mask)
+        self.columns = {key: grow(column) for key, column in self.columns.items()}
+        self.valid = {key: grow(valid) for key, valid in self.valid.items()}
+        self.n = n
+
+    def ema(self, key: str, uids: torch.LongTensor, values: torch.Tensor, alpha: float, zeroed: bool = False):
+        r""" Updates the exponential moving average of key at uids with values, skipping NaN values.
+            Uids without key take the value as is, or start from zero if zeroed.
+        """
+        keep = ~values.isnan()
+        uids, values = uids[keep], values[keep].to(torch.float64)
+        column = self.column(key)
+        valid = self.valid[key]
+        previous = column[uids]
+        if zeroed:
+            column[uids] = (1 - alpha) * previous + alpha * values
+        else:
+            column[uids] = torch.where(valid[uids], (1 - alpha) * previous + alpha * values, values)
+        valid[uids] = True
+        self.mask[uids] = True
+
+    def increment(self, key: str, uids: torch.LongTensor):
+        r""" Counts one more update of key at uids.
+        """
+        self.column(key)[uids] += 1
+        self.valid[key][uids] = True
+        self.mask[uids] = True
+
+    def __contains__(self, uid: int) -> bool:
+        return 0 <= uid < self.n and bool(self.mask[uid])
+
+    def __getitem__(self, uid: int) -> Dict[str, Any]:
+        if uid not in self:
+            raise KeyError(uid)
+        return {key: column[uid].item() for key, column in self.columns.items() if self.valid[key][uid]}
+
+    def __delitem__(self, uid: int):
+        if uid not in self:
+            raise KeyError(uid)
+        for key, column in self.columns.items():
+            column[uid] = 0
+            self.valid[key][uid] = False
+        self.mask[uid] = False
+
+    def __iter__(self):
+        return iter(torch.nonzero(self.mask).squeeze(1).tolist())
+
+    def __len__(self) -> int:
+        return int(self.mask.sum())
+
+    def items(self):
+        for uid in self:
+            yield uid, self[uid]
+
+    def state_dict(self) -> Dict[str, Any]:
+        r""" Returns the columns and masks to save.
+        """
+        return {'n': self.n, 'mask': self.mask, 'columns': self.columns, 'valid': self.valid}
+
+    def load_state_dict(self, state_dict: Dict[Any, Any]) -> 'NeuronStats':
+        r""" Loads the columns and masks of state_dict, or the dict of dicts [uid] -> {'stat1': val1, ...} saved by
+        earlier versions.
+        """
+        if 'columns' in state_dict:
+            self.n = state_dict['n']
+            self.mask = state_dict['mask']
+            self.columns = state_dict['columns']
+            self.valid = state_dict['valid']
+            return self
+
+        self.__init__(max(state_dict, default=-1) + 1)
+        for uid, stats in state_dict.items():
+            for key, value in stats.items():
+                self.column(key)[uid] = float(value)
+                self.valid[key][uid] = True
+            self.mask[uid] = True
+        return self
+
+
 class neuron:
     r"""
     Creates a bittensor neuron that specializes validating other peers. The core validator
@@ -180,7 +301,7 @@ class neuron:
         self.loss_agg_mutex = Lock()
 
         # === Neuron statistics variables ===
-        self.neuron_stats = {}  # neuron statistics dict of dicts: [uid] -> {'stat1': val1, 'stat2': val2, ...}
+        self.neuron_stats = NeuronStats()  # neuron statistics columns: [uid] -> {'stat1': val1, 'stat2': val2, ...}
         self.neuron_hotkeys = []  # keep neuron hotkeys to compare and check for changes after metagraph.sync()
         self.neuron_changes = {}  # neuron hotkey changes dict of dicts of dicts: [uid] -> [block] -> {'new_hotkey': , 'old_hotkey': , 'old_stats':}
         self.alpha = 0.1  # EMA coefficient in [0, 1], higher alpha discounts older observations faster
@@ -325,7 +446,7 @@ class neuron:
                 path = self.config.neuron.full_path
 
             state_dict = {
-                'neuron_stats': self.neuron_stats,
+                'neuron_stats': self.neuron_stats.state_dict(),
                 'neuron_hotkeys': self.neuron_hotkeys
             }
 
@@ -345,7 +466,7 @@ class neuron:
                 path = self.config.neuron.full_path
             state_dict = torch.load(f'{path}/model.torch')
 
-            self.neuron_stats = state_dict['neuron_stats']
+            self.neuron_stats = NeuronStats().load_state_dict(state_dict['neuron_stats'])
             self.neuron_hotkeys = state_dict['neuron_hotkeys']
 
             if 'neuron_changes' in state_dict and self.config.neuron.track_hotkey_changes:
@@ -396,7 +517,7 @@ class neuron:
         """
         # === Get params for epoch ===
         # Pulling the latest chain parameters.
-        current_block = self.subtensor.block
+        current_block = self.subtensor.clock.sync()
         batch_size = self.subtensor.validator_batch_size 
         sequence_length = self.subtensor.validator_sequence_length
         validation_len = self.config.neuron.validation_len  # Number of tokens to holdout for phrase validation beyond sequence context
@@ -449,12 +570,12 @@ class neuron:
         # try to query each UID at least once - assumes nucleus samples without replacement
         # but keep minimum epoch duration at blocks_per_epoch * block_period
         # in case of subtensor outage causing invalid block readings to prevent fast repeated weight setting
-        start_block = self.subtensor.block
-        while (self.subtensor.block < start_block + blocks_per_epoch or
+        start_block = self.subtensor.clock.block
+        while (self.subtensor.clock.block < start_block + blocks_per_epoch or
                time.time() - epoch_start_time < blocks_per_epoch * bittensor.__blocktime__):
 
             logger.info(f'Run epoch {self.epoch} (step {epoch_steps}) while '
-                        f'({self.subtensor.block} < {start_block + blocks_per_epoch} '
+                        f'({self.subtensor.clock.block} < {start_block + blocks_per_epoch} '
                         f'= {start_block} + {blocks_per_epoch}) or '
                         f'({time.time() - epoch_start_time:.2f} < {blocks_per_epoch * bittensor.__blocktime__})')
 
@@ -463,7 +584,13 @@ class neuron:
             # === Forward ===
             # Forwards inputs through the network and returns the loss
             # and endpoint scores using shapely approximation of salience.
-            loss, stats = self.nucleus( next(self.dataset) , self.metagraph, self.dendrite )
+            # The time spent waiting on the dataset stream is tracked apart from the step time.
+            data_start_time = time.time()
+            inputs = next(self.dataset)
+            data_wait_time = time.time() - data_start_time
+            self.prometheus_gauges.labels('data_wait_time').set( data_wait_time )
+
+            loss, stats = self.nucleus( inputs , self.metagraph, self.dendrite )
             self.prometheus_gauges.labels("loss").set( loss.item() )
 
             # === Backward ===
@@ -489,7 +616,7 @@ class neuron:
             self.prometheus_gauges.labels("epoch_steps").inc()
 
             # === Block state ===
-            current_block = self.subtensor.block
+            current_block = self.subtensor.clock.block
             self.prometheus_gauges.labels("current_block").set(current_block)
             self.prometheus_gauges.labels("last_updated").set( current_block - self.metagraph.last_update[self.uid] )
 
@@ -531,6 +658,7 @@ class neuron:
                   f'[bright_green not bold]{len(responsive_uids)}[/bright_green not bold]/'
                   f'[white]{len(queried_uids)}[/white] '
                   f'[[yellow]{step_time:.3g}[/yellow]s] '
+                  f'[dim]data[/dim] [[yellow]{data_wait_time:.3g}[/yellow]s] '
                   f'[dim white not bold][green]{len(epoch_responsive_uids)}[/green]/'
                   f'{len(epoch_queried_uids)}[/dim white not bold]')
 
@@ -559,7 +687,7 @@ class neuron:
 
                 wandb.log({'epoch/epoch': self.epoch, 'epoch/epoch_steps': epoch_steps,
                            'epoch/global_steps': self.global_step, 'epoch/loss': loss.item(),
-                           'epoch/time': step_time}, step=current_block, commit=True)
+                           'epoch/time': step_time, 'epoch/data_wait_time': data_wait_time}, step=current_block, commit=True)
 
             # Do the backward request after the a queue of forward requests got finished.  
             if epoch_steps % self.config.neuron.forward_num == 1:
@@ -631,106 +759,113 @@ class neuron:
     def metagraph_sync(self):
         r""" Syncing metagraph together with other metagraph-size related objects
         """
-        old_hotkeys = self.neuron_hotkeys + [] if self.neuron_hotkeys else self.metagraph.hotkeys
-        self.metagraph.sync()
-        self.neuron_hotkeys = self.metagraph.hotkeys
+        old_hotkeys = self.neuron_hotkeys + [] if self.neuron_hotkeys else list(self.metagraph.hotkeys)
+        self.metagraph.sync(incremental=True)
+        self.neuron_hotkeys = list(self.metagraph.hotkeys)
+        self.neuron_stats.resize(self.metagraph.n.item())
+
+        # Compare with the hotkeys the stats were kept for, which may be loaded from file and predate the last metagraph sync.
+        replaced_uids = [uid for uid, old_hotkey in enumerate(old_hotkeys[:len(self.neuron_hotkeys)]) if old_hotkey != self.neuron_hotkeys[uid]]
 
         changed_hotkeys = []
         # === Reset neuron stats if uid got replaced
-        for uid, old_hotkey in enumerate(old_hotkeys):
-            if old_hotkey != self.neuron_hotkeys[uid]:
-                if self.config.neuron.track_hotkey_changes:
-                    block = self.subtensor.block
-                    self.neuron_changes.setdefault(uid, {})  # [uid] -> dict() of blocks
-                    self.neuron_changes[uid][block] = {'new_hotkey': self.neuron_hotkeys[uid], 'old_hotkey': old_hotkey}
-                    if uid in self.neuron_stats:
-                        self.neuron_changes[uid][block]['old_stats'] = self.neuron_stats[uid]
-
+        for uid in replaced_uids:
+            old_hotkey = old_hotkeys[uid]
+            if self.config.neuron.track_hotkey_changes:
+                block = self.subtensor.clock.block
+                self.neuron_changes.setdefault(uid, {})  # [uid] -> dict() of blocks
+                self.neuron_changes[uid][block] = {'new_hotkey': self.neuron_hotkeys[uid], 'old_hotkey': old_hotkey}
                 if uid in self.neuron_stats:
-                    del self.neuron_stats[uid]
-                    changed_hotkeys += [uid]
+                    self.neuron_changes[uid][block]['old_stats'] = self.neuron_stats[uid]
+
+            if uid in self.neuron_stats:
+                del self.neuron_stats[uid]
+                changed_hotkeys += [uid]
 
         if len(changed_hotkeys):
             logger.info(f"Hotkeys changed: {changed_hotkeys}")
             self.save()  # save neuron_stats, neuron_hotkeys, and neuron_changes to filesystem
 
     def neuron_stats_update(self, neuron_stats: Dict[int, Dict[str, Any]]):
-        r""" Updates self.neuron_stats with new individual dictionaries per uid.
+        r""" Updates the self.neuron_stats columns with the new individual dictionaries per uid.
         """
+        queried_uids = list(neuron_stats.keys())
+        if len(queried_uids) == 0:
+            return [], []
+
+        stats = self.neuron_stats
+        stats.resize(max(stats.n, max(queried_uids) + 1))
+        uids = torch.tensor(queried_uids, dtype=torch.int64)
+
+        # Gather the new values per key, with their positions in uids.
+        new_stats = {}  # [key] -> ([positions], [values])
+        for position, _stats in enumerate(neuron_stats.values()):
+            for key, value in _stats.items():
+                new_stats.setdefault(key, ([], []))
+                new_stats[key][0].append(position)
+                new_stats[key][1].append(float(value))
+        new_stats = {key: (torch.tensor(positions, dtype=torch.int64), torch.tensor(values, dtype=torch.float64))
+                     for key, (positions, values) in new_stats.items()}
+
+        # === EMA normal update ===
+        # If synapse responsive push available values into EMA for normal update.
+        # Normal EMA values provide a view on neuron performance if fully responsive.
+        for key, (positions, values) in new_stats.items():  # detailed neuron evaluation fields, e.g. loss, shapley_values, synergy
+            stats.ema(key, uids[positions], values, self.alpha)
+
+        # === Extra stats computation ===
+        # Compute values on EMA stats, such as the scaling law on EMA loss.
+        # Required for values that need to be computed on longer-term stats.
+        extra_stats = {}  # [key] -> (positions, values)
+        if 'loss_nxt' in new_stats:  # elif neuron not responsive then omit
+            positions = new_stats['loss_nxt'][0]
+            positions = positions[stats.is_valid('loss_nxt')[uids[positions]]]
+            _uids = uids[positions]
+
+            # estimate the effective number of model parameters from EMA loss
+            _num_params = scaling_law_loss_to_params(stats.get('loss_nxt')[_uids])
+
+            # powered down number of params, e.g. dynamic range 3 → 6 nats for scaling_law_power=0.5
+            _pow_num_params = torch.pow(_num_params, self.config.nucleus.scaling_law_power)
+
+            extra_stats.update({'est_params_nxt': (positions, _num_params), 'base_params_nxt': (positions, _pow_num_params)})
+
+            # penalize by logits divergence excess, zero where not measured
+            synergy = stats.is_valid('synergy_nxt')[_uids]
+            shapley_values = _pow_num_params + stats.get('synergy_nxt')[_uids]
+            shapley_values /= 1 + self.config.nucleus.logits_divergence * stats.get('logits_excess_nxt')[_uids]
+            extra_stats['shapley_values_nxt'] = (positions[synergy], shapley_values[synergy])
+
+        # === EMA zeroing update ===
+        # Push zero into EMA for synapse_keys to exponentially decay weighting keys if neuron non-responsive
+        stats.increment('updates!', uids)  # number of EMA zeroing updates
+
         responsive_uids = []
-        for _uid, _stats in neuron_stats.items():
-            stats = self.neuron_stats.setdefault(_uid, {})
-
-            # === EMA normal update ===
-            # If synapse responsive push available values into EMA for normal update.
-            # Normal EMA values provide a view on neuron performance if fully responsive.
-            for key in _stats:  # detailed neuron evaluation fields, e.g. loss, shapley_values, synergy
-                if math.isnan(_stats[key]):
-                    continue
-                if key in stats:
-                    stats[key] = (1 - self.alpha) * stats[key] + self.alpha * _stats[key]  # update EMA
-                else:
-                    stats.setdefault(key, _stats[key])
-
-            # === Extra stats computation ===
-            # Compute values on EMA stats, such as the scaling law on EMA loss.
-            # Required for values that need to be computed on longer-term stats.
-            extra_stats = {}
-            if 'loss_nxt' in _stats and 'loss_nxt' in stats:  # elif neuron not responsive then omit
-                # estimate the effective number of model parameters from EMA loss
-                _num_params = scaling_law_loss_to_params(torch.tensor(stats['loss_nxt']))
-
-                # powered down number of params, e.g. dynamic range 3 → 6 nats for scaling_law_power=0.5
-                _pow_num_params = torch.pow(_num_params, self.config.nucleus.scaling_law_power)
-
-                extra_stats.update({'est_params_nxt': _num_params.item(), 'base_params_nxt': _pow_num_params.item()})
-
-                if 'synergy_nxt' in stats:
-                    extra_stats['shapley_values_nxt'] = extra_stats['base_params_nxt'] + stats['synergy_nxt']
-
-                if 'logits_excess_nxt' in stats:
-                    # penalize by logits divergence excess
-                    extra_stats['shapley_values_nxt'] /= 1 + self.config.nucleus.logits_divergence * stats['logits_excess_nxt']
-
-            # === EMA zeroing update ===
-            # Push zero into EMA for synapse_keys to exponentially decay weighting keys if neuron non-responsive
-            if 'updates!' in stats:
-                stats['updates!'] += 1  # increment number of EMA zeroing updates
-            else:
-                stats.setdefault('updates!', 1)  # number of EMA zeroing updates init to zero
-
-            for key in self.synapse_keys:
-                zkey = key + '!'  # zeroing key
-                stats.setdefault(zkey, 0.)  # initialize zkey val to zero to gradually increase with observations
-                if key in _stats and not math.isnan(_stats[key]):
-                    responsive_uids += [_uid]
-                    stats[zkey] = (1 - self.alpha) * stats[zkey] + self.alpha * _stats[key]
-                elif key in extra_stats and not math.isnan(extra_stats[key]):
-                    responsive_uids += [_uid]
-                    stats[zkey] = (1 - self.alpha) * stats[zkey] + self.alpha * extra_stats[key]
-                else:
-                    stats[zkey] = (1 - self.alpha) * stats[zkey]  # + self.alpha * 0
-
-            # === EMA normal update ===
-            # If synapse responsive push available values into EMA for normal update.
-            # Normal EMA values provide a view on neuron performance if fully responsive.
-            for key in self.synapse_keys:
-                if key in _stats or key in extra_stats:
-                    updates = 'updates_' + key
-                    if updates in stats:
-                        stats[updates] += 1  # increment number of normal EMA updates made
-                    else:
-                        stats.setdefault(updates, 1)  # add updates fields for new uid entries
-
-            for key in extra_stats:  # detailed neuron evaluation fields, e.g. loss, shapley_values, synergy
-                if math.isnan(extra_stats[key]):
-                    continue
-                if key in stats:
-                    stats[key] = (1 - self.alpha) * stats[key] + self.alpha * extra_stats[key]  # update EMA
-                else:
-                    stats.setdefault(key, extra_stats[key])
-
-        return responsive_uids, list(neuron_stats.keys())  # responsive_uids, queried_uids
+        for key in self.synapse_keys:
+            zkey = key + '!'  # zeroing key
+            values = torch.zeros(len(uids), dtype=torch.float64)  # zero for non-responsive uids
+            responsive = torch.zeros(len(uids), dtype=torch.bool)
+            for source in [extra_stats, new_stats]:  # new values take precedence over extra stats
+                if key in source:
+                    positions, _values = source[key]
+                    keep = ~_values.isnan()
+                    values[positions[keep]] = _values[keep].to(torch.float64)
+                    responsive[positions[keep]] = True
+            stats.ema(zkey, uids, values, self.alpha, zeroed=True)  # zkey starts at zero to gradually increase with observations
+            responsive_uids += uids[responsive].tolist()
+
+        # === EMA normal update ===
+        # If synapse responsive push available values into EMA for normal update.
+        # Normal EMA values provide a view on neuron performance if fully responsive.
+        for key in self.synapse_keys:
+            positions = [source[key][0] for source in [new_stats, extra_stats] if key in source]
+            if len(positions):
+                stats.increment('updates_' + key, uids[torch.cat(positions).unique()])  # number of normal EMA updates made
+
+        for key, (positions, values) in extra_stats.items():  # detailed neuron evaluation fields, e.g. loss, shapley_values, synergy
+            stats.ema(key, uids[positions], values, self.alpha)
+
+        return responsive_uids, queried_uids  # responsive_uids, queried_uids
 
     def calculate_weights(self):
         r""" Calculates neuron set-weights from weight_key mapped values. Defines weight_key as the neuron stats key
@@ -744,9 +879,8 @@ class neuron:
 
         # === Populate neuron weights ===
         neuron_weights = torch.zeros_like(self.metagraph.S)  # allow unevaluated UIDs for min_allowed_weights
-        for uid in self.neuron_stats:
-            if weight_key in self.neuron_stats[uid]:
-                neuron_weights[uid] = torch.tensor([self.neuron_stats[uid][weight_key]])
+        n = min(len(neuron_weights), self.neuron_stats.n)
+        neuron_weights[:n] = self.neuron_stats.get(weight_key)[:n].to(neuron_weights.dtype)  # zero where not set
 
         # === Filter to non-zero weights ===
         sample_uids = torch.argwhere(neuron_weights > 0).squeeze(dim=1)  # find uids with non-zero weight
@@ -873,6 +1007,7 @@ class nucleus( torch.nn.Module ):
         parser.add_argument('--nucleus.importance', type=float, help='hyperparameter for the importance loss', default=3)
         parser.add_argument('--nucleus.noise_multiplier', type=float, help='Standard deviation multipler on weights', default=2 )
         parser.add_argument('--nucleus.no_dendrite_backward', action='store_true', help='Pass backward request to the server side or not', default=False )
+        parser.add_argument('--nucleus.quorum', type=int, help='Stop waiting on the dendrite once this many endpoints responded successfully, no backward requests are sent for these queries (default value: 0, wait on all endpoints)', default=0 )
         parser.add_argument('--nucleus.scaling_law_power', type=float, help='Power for modified scaling law, powered down to improve dynamic range, e.g. 3 → 6 nats for 0.5. (default value: -1, pulling from subtensor directly)', default=-1)
         parser.add_argument('--nucleus.synergy_scaling_law_power', type=float, help='Power for synergy modified scaling law, powered down to improve dynamic range, e.g. 3 → 6 nats for 0.5. (default value: -1, pulling from subtensor directly)', default=-1)
         parser.add_argument('--nucleus.logits_divergence', type=float, help=' the divergence value for logit anomaly detection (default value: -1, pulling from subtensor directly)', default=-1)
@@ -983,9 +1118,14 @@ class nucleus( torch.nn.Module ):
         # We index into the metagraph's endpoints and return a list of the filtered set of endpoints we wish to query.
         # random_endpoints: List[bittensor.endpoints]: endpoint information for filtered uids.
         # len(neurons) == self.config.nucleus.topk
-        random_endpoints = [metagraph.endpoints[uid] for uid in random_uids]
+        random_endpoints = [metagraph.endpoint_objs[uid] for uid in random_uids]
         num_endpoints = len(random_endpoints)  # in case len(self.permute_uids) < num_endpoints during random_uids select
 
+        # === Pre-connect the next UIDs to query ===
+        # Channels to the next selection connect while this query is in flight, so their first
+        # query does not pay the connection handshake inside the request timeout.
+        dendrite.receptor_pool.warmup([metagraph.endpoint_objs[uid] for uid in self.permute_uids[:num_endpoints]])
+
         logger.info(f'Forward \t| Routing forward <dim>[{time.time() - start_time:.3g}s]</dim>')
         logger.info(f'Dendrite \t| Request {num_endpoints} x {list(inputs_seq.shape)} (prune_len={prune_len})')
         request_start_time = time.time()
@@ -1006,12 +1146,30 @@ class nucleus( torch.nn.Module ):
         # query_responses.shape = self.config.nucleus.topk * num_synapses * [batch_size, sequence_len, synapse_dim]
         # return_ops: (torch.int64): Return ops.
         # return_ops.shape = self.config.nucleus.topk * [num_synapses]
-        query_responses, return_ops, times = dendrite.text(
-            endpoints=random_endpoints,
-            inputs=inputs_seq,
-            synapses=[syn for syn, _ in synapses],
-            timeout=bittensor.__blocktime__
-        )
+        if self.config.nucleus.quorum > 0:
+            # Stop waiting once a quorum of endpoints responded, stragglers are returned as timeouts.
+            # Responses come back in completion order and are placed back in the order of random_endpoints.
+            # The dendrite yields the passed endpoint objects, unfilled uids share the dummy endpoint uid so key on the object.
+            query_responses, return_ops, times = [None] * num_endpoints, [None] * num_endpoints, [None] * num_endpoints
+            positions = {id(endpoint): i for i, endpoint in enumerate(random_endpoints)}
+            for endpoint, responses, ops, call_times in dendrite.text_as_completed(
+                endpoints=random_endpoints,
+                inputs=inputs_seq,
+                synapses=[syn for syn, _ in synapses],
+                timeout=bittensor.__blocktime__,
+                min_successes=self.config.nucleus.quorum
+            ):
+                query_responses[positions[id(endpoint)]] = [syn.to(self.device) for syn in responses]
+                return_ops[positions[id(endpoint)]] = ops.to(self.device)
+                times[positions[id(endpoint)]] = call_times.to(self.device)
+
+        else:
+            query_responses, return_ops, times = dendrite.text(
+                endpoints=random_endpoints,
+                inputs=inputs_seq,
+                synapses=[syn for syn, _ in synapses],
+                timeout=bittensor.__blocktime__
+            )
 
         if self.config.nucleus.no_dendrite_backward:
             query_responses = [[syn.detach().to(self.device) for syn in res] for res in query_responses]
@@ -1129,11 +1287,13 @@ def textcausallm(uids: torch.Tensor, query_responses: List[List[torch.FloatTenso
                            'est_params' + _ext: _num_params, 'base_params' + _ext: _pow_num_params,
                            'synergy' + _ext: 0, 'synergy_loss_diff' + _ext: 0})
 
-    def _synergy(first, second, target, _ext):
-        # Combined logits: log of average probabilities per token between responses
-        combined_logits = torch.log((torch.softmax(first['logits' + _ext], dim=-1) +
-                                     torch.softmax(second['logits' + _ext], dim=-1)) / 2 + 1e-40)
-        measured_loss = calc_loss_fct(loss_fct, combined_logits, target)  # actual measured loss
+    def _synergy(responsives, target, _ext):
+        # Combined logits: log of average probabilities per token between responses, the cross entropy
+        # of the combination only depends on the probability each response assigns to the target tokens
+        target_probs = [torch.softmax(_stats['logits' + _ext], dim=-1).reshape(target.numel(), -1)
+                        .gather(1, target.reshape(-1, 1)).squeeze(1)
+                        for _stats in responsives]  # num_responsives * [num_targets]
+        measured_loss = pairwise_mixture_loss(torch.stack(target_probs))  # actual measured loss
 
         return measured_loss
 
@@ -1240,7 +1400,10 @@ def textcausallmnext(uids: torch.Tensor, query_responses: List[List[torch.FloatT
 
     def _base_params(_stats, query_response):
         # topk_tensor = unravel_topk_token_phrases(query_response, topk=synapse.topk)  # [batch_size, topk + 1, max_len]
-        _losses_val, _losses = phrase_cross_entropy(inputs_nxt, query_response, reduce=False)
+        if _stats['uid'] in phrase_losses:
+            _losses_val, _losses = phrase_losses[_stats['uid']]
+        else:
+            _losses_val, _losses = phrase_cross_entropy(inputs_nxt, query_response, reduce=False)
         _losses_val[_losses_val.isnan()] = 20  # assign large loss
         _losses[_losses.isnan()] = 20  # assign large loss
         _loss_val = _losses_val.mean()
@@ -1249,14 +1412,33 @@ def textcausallmnext(uids: torch.Tensor, query_responses: List[List[torch.FloatT
         _stats.update({'loss_val_nxt': _loss_val, 'losses_nxt': _losses, 'loss_nxt': _loss,
                        'synergy_nxt': 0, 'synergy_loss_diff_nxt': 0})
 
-    def _synergy(first, second, target, ext):
+    def _synergy(responsives, target, ext):
         # average first + second probabilities per batch item, convert to loss
-        measured_loss = -torch.log((torch.exp(-first['losses_nxt']) +
-                                    torch.exp(-second['losses_nxt'])) / 2 + 1e-40).mean()
+        target_probs = torch.exp(-torch.stack([_stats['losses_nxt'] for _stats in responsives]))  # [num_responsives, batch_size]
+        measured_loss = pairwise_mixture_loss(target_probs)
 
         return measured_loss
 
     shapley_start_time = time.time()
+
+    # === Phrase cross entropy ===
+    # On accelerators, score the successful responses of the same shape at once to save kernel launches, on cpu
+    # scoring one by one is faster. The phrase depth follows max_len so responses are grouped by shape instead of
+    # padded. Responses not scored here are scored one by one in _base_params.
+    phrase_losses = {}  # [uid] -> (losses_val, losses)
+    shape_responses = {}  # [shape] -> {uid: response}
+    for index, _uid in enumerate(uids.tolist()):
+        if (inputs_nxt.device.type != 'cpu' and return_ops[index][index_s] == bittensor.proto.ReturnCode.Success and
+                query_responses[index][index_s].dim() == 3):
+            shape_responses.setdefault(tuple(query_responses[index][index_s].shape), {})[_uid] = query_responses[index][index_s]
+    for responses in shape_responses.values():
+        try:
+            topk_tensors = torch.stack(list(responses.values()))  # [num_responses, batch_size, topk + 1, max_len]
+            losses_val, losses = phrase_cross_entropy(inputs_nxt, topk_tensors, reduce=False)  # [num_responses, batch_size]
+            phrase_losses.update({_uid: (losses_val[i], losses[i]) for i, _uid in enumerate(responses)})
+        except Exception as e:
+            logger.warning(f'{str(synapse)} \t| Phrase cross entropy of stacked responses failed, scoring per UID: {e}')
+
     loss, stats, unsuccessful = shapley_base(uids, query_responses, return_ops, times, routing_score,
                                              _base_params, index_s, ext='_nxt')
     logger.info(f'{str(synapse)} \t| Shapley base values (power={scaling_law_power:.1f}) '
@@ -1340,47 +1522,48 @@ def shapley_base(uids: torch.Tensor, query_responses: List[List[torch.FloatTenso
     """
     stats = {}
     unsuccessful = []
-    neuron_loss = 0.  # neuron losses to accumulate to then backward() via dendrite
-    routing_loss = 0.  # validator routing loss for local model update
+    responsive_uids = []  # uids with base parameters, losses are stacked in this order
 
     # === Base parameter estimation ===
     # Shapley values - base level - coalition size 1
     # Collect successful neuron responses, calculate base Shapley values.
     # Measured in effective number of model parameters, according to OpenAI scaling laws.
     for index, _uid in enumerate(uids.tolist()):
-        if return_ops[index][index_s] == bittensor.proto.ReturnCode.Success:
-            _stats = {'uid': _uid,
-                      'response_time' + ext: times[index][index_s],
-                      'routing_score': routing_score[_uid]}
+        _stats = {'uid': _uid,
+                  'response_time' + ext: times[index][index_s],
+                  'routing_score': routing_score[_uid]}
+        stats[_uid] = _stats
 
+        if return_ops[index][index_s] == bittensor.proto.ReturnCode.Success:
             try:
                 base_params(_stats, query_responses[index][index_s])
-
-                neuron_loss += _stats['loss' + ext]  # add sequence loss to be backward() to neuron
-
-                # === Add routing loss ===
-                # MSE loss between predicted routing score and ideal target routing score.
-                # The Bayes risk approx. 1.69, i.e. the minimal loss achievable for next-token
-                # prediction on the full distribution 𝑃, a.k.a the "entropy of natural text"
-                # Hoffmann, Jordan, et al. "Training Compute-Optimal Large Language Models." arXiv:2203.15556 (2022).
-                routing_score_target = torch.exp(-torch.clamp(_stats['loss' + ext].detach() - 1.69, 0))
-                _routing_loss = (routing_score[_uid] - routing_score_target) ** 2  # MSE loss
-                routing_loss += _routing_loss
-                _stats.update({'routing_score_target' + ext: routing_score_target, 'routing_loss' + ext: _routing_loss})
-
-                stats[_uid] = _stats
+                responsive_uids += [_uid]
             except Exception as e:
                 logger.warning(f'Synapse {index_s} error (shapley_base)\t| '
                                f'UID {_uid} <dim>[{times[index][index_s]:.2f}s]</dim>: {e}')
-                stats[_uid] = _stats
                 unsuccessful += [(_uid, return_ops[index][index_s], times[index][index_s])]
         else:
-            stats[_uid] = {'uid': _uid,
-                           'response_time' + ext: times[index][index_s],
-                           'routing_score': routing_score[_uid]}
             unsuccessful += [(_uid, return_ops[index][index_s], times[index][index_s])]
 
-    return neuron_loss + routing_loss, stats, unsuccessful
+    if len(responsive_uids) == 0:
+        return 0., stats, unsuccessful
+
+    # neuron losses to accumulate to then backward() via dendrite
+    losses = torch.stack([torch.as_tensor(stats[_uid]['loss' + ext], dtype=routing_score.dtype,
+                                          device=routing_score.device).reshape(())
+                          for _uid in responsive_uids])  # [num_responsives]
+
+    # === Add routing loss ===
+    # MSE loss between predicted routing score and ideal target routing score.
+    # The Bayes risk approx. 1.69, i.e. the minimal loss achievable for next-token
+    # prediction on the full distribution 𝑃, a.k.a the "entropy of natural text"
+    # Hoffmann, Jordan, et al. "Training Compute-Optimal Large Language Models." arXiv:2203.15556 (2022).
+    routing_score_targets = torch.exp(-torch.clamp(losses.detach() - 1.69, 0))  # [num_responsives]
+    routing_losses = (routing_score[responsive_uids] - routing_score_targets) ** 2  # MSE loss
+    for i, _uid in enumerate(responsive_uids):
+        stats[_uid].update({'routing_score_target' + ext: routing_score_targets[i], 'routing_loss' + ext: routing_losses[i]})
+
+    return losses.sum() + routing_losses.sum(), stats, unsuccessful
 
 
 def logits_divergence(stats: Dict, uids: torch.Tensor, query_responses: List[List[torch.FloatTensor]],
@@ -1407,79 +1590,104 @@ def logits_divergence(stats: Dict, uids: torch.Tensor, query_responses: List[Lis
             ext (:obj:`str`, `optional`):
                 Extension to parameter string for stats key.
     """
-    probs_k = 0
-    probs_avg = None
-
-    # === Probs averaging ===
-    # Calculate the average token distribution for each batch task.
+    # === Stack responses ===
+    # First token probabilities of each successful response in sparse form, instead of dense vocab_size tensors.
+    responsive_uids = []
+    topk_tokens = []  # num_responsives * [batch_size, topk]
+    topk_probs = []  # num_responsives * [batch_size, topk]
     for index, _uid in enumerate(uids.tolist()):
         if return_ops[index][index_s] == bittensor.proto.ReturnCode.Success:
             try:
-                probs = topk_tokens_to_vocab_size(query_responses[index][index_s],
-                                                  bittensor.__vocab_size__)  # [batch_size, vocab_size]
-                if probs_avg is None:
-                    probs_avg = probs
-                else:
-                    probs_avg += probs
-                probs_k += 1
+                _tokens, _probs = topk_first_token_probs(query_responses[index][index_s])  # [batch_size, topk]
+                if len(topk_tokens) and _tokens.shape != topk_tokens[0].shape:
+                    raise ValueError(f'response shape {list(_tokens.shape)} != {list(topk_tokens[0].shape)}')
+                if _tokens.min() < 0 or _tokens.max() >= bittensor.__vocab_size__:
+                    raise ValueError(f'response tokens not in [0, {bittensor.__vocab_size__})')
+                responsive_uids += [_uid]
+                topk_tokens += [_tokens]
+                topk_probs += [_probs]
 
             except Exception as e:
                 logger.warning(f'Synapse {index_s} error (logits_divergence)\t| '
                                f'UID {_uid} <dim>[{times[index][index_s]:.2f}s]</dim>: {e}')
 
-    if probs_avg is not None:
-        probs_avg /= probs_k
-        probs_avg_sqrt = probs_avg.sqrt()
-        batch_divergences = []
+    if len(responsive_uids) == 0:
+        return
 
-        # === Distribution divergence ===
-        # Calculate the Hellinger distance (f-divergence) from the average probability distribution for each batch task.
-        for index, _uid in enumerate(uids.tolist()):
-            if return_ops[index][index_s] == bittensor.proto.ReturnCode.Success:
-                try:
-                    probs = topk_tokens_to_vocab_size(query_responses[index][index_s],
-                                                      bittensor.__vocab_size__)  # [batch_size, vocab_size]
-                    divergences = 0.5 * torch.pow(probs.sqrt() - probs_avg_sqrt, 2).sum(dim=1)  # [batch_size] in [0, 1]
-                    divergences = divergences.sqrt()
-                    stats[_uid]['logits_divergences' + ext] = divergences  # [batch_size]
-                    stats[_uid]['logits_divergence' + ext] = divergences.mean()  # scalar
-                    batch_divergences += [divergences]
+    # Accumulate in double precision, the sparse Hellinger distance below subtracts nearly equal sums.
+    topk_tokens = torch.stack(topk_tokens)  # [num_responsives, batch_size, topk]
+    topk_probs = torch.stack(topk_probs)  # [num_responsives, batch_size, topk]
+    dtype = topk_probs.dtype
+    topk_probs = topk_probs.double()
+    num_responsives, batch_size, topk = topk_tokens.shape
 
-                except Exception as e:
-                    logger.warning(f'Synapse {index_s} error (logits_divergence)\t| '
-                                   f'UID {_uid} <dim>[{times[index][index_s]:.2f}s]</dim>: {e}')
-
-        batch_divergences = torch.stack(batch_divergences)  # [uids_len, batch_size]
-        avg = batch_divergences.mean(dim=0)  # [batch_size]
-        std = batch_divergences.std(dim=0)  # [batch_size]
-
-        # logger.info(f"Logits divergences: "
-        #             f"avg={', '.join([f'{i}:{v:.3g}' for i, v in enumerate(avg)])}")
-        # logger.info(f"std={', '.join([f'{i}:{v:.3g}' for i, v in enumerate(std)])}")
-
-        # === Calculate divergence excess ===
-        # For each batch task, calculate excess deviation above a single stddev, in terms of stddev,
-        # and apply power to increase score above two stddev, and decrease between one and two stddev.
-        # This will effectively allow zero excess below one stddev, and minimal excess below two stddev,
-        # but amplify any excess above two stddev (only 2.1% of population for normal dist).
-        for _uid, _stats in stats.items():
-            if 'logits_divergences' + ext in _stats:
-                try:
-                    excess = torch.clamp(_stats['logits_divergences' + ext] - (avg + std), 0)  # divergence > avg + std
-                    excess /= std + 1e-9  # stddev multiples above 1 stddev
-                    excess = torch.pow(excess, 3)  # reduce < 2std, increase > 2std
-                    excess = torch.clamp(excess, 0, 10)  # maximum excess ratio of 10
+    # === Probs averaging ===
+    # Calculate the average token distribution for each batch task.
+    probs_avg = torch.zeros((batch_size, bittensor.__vocab_size__), dtype=topk_probs.dtype, device=topk_probs.device)
+    probs_avg.scatter_add_(1, topk_tokens.transpose(0, 1).reshape(batch_size, -1),
+                           topk_probs.transpose(0, 1).reshape(batch_size, -1))  # [batch_size, vocab_size]
+    probs_avg /= num_responsives
+
+    # === Distribution divergence ===
+    # Calculate the Hellinger distance (f-divergence) from the average probability distribution for each batch task.
+    # 0.5 * sum_v (sqrt(p_v) - sqrt(a_v))^2 = 0.5 * (sum_v p_v + sum_v a_v - 2 * sum_v sqrt(p_v * a_v)), where the last
+    # sum only runs over the topk tokens of a response. Repeated tokens in a response are merged first.
+    tokens_sorted, order = topk_tokens.sort(dim=-1)  # [num_responsives, batch_size, topk]
+    probs_sorted = topk_probs.gather(-1, order)
+    unique = torch.ones_like(tokens_sorted, dtype=torch.bool)
+    unique[..., 1:] = tokens_sorted[..., 1:] != tokens_sorted[..., :-1]
+    position = unique.cumsum(dim=-1) - 1  # position of each token amongst the unique tokens of its response
+    probs_unique = torch.zeros_like(probs_sorted).scatter_add_(-1, position, probs_sorted)  # zero padded
+    tokens_unique = torch.zeros_like(tokens_sorted).scatter_(-1, position, tokens_sorted)
+    avg_unique = probs_avg.gather(1, tokens_unique.transpose(0, 1).reshape(batch_size, -1))
+    avg_unique = avg_unique.reshape(batch_size, num_responsives, topk).transpose(0, 1)  # [num_responsives, batch_size, topk]
+
+    overlap = (probs_unique * avg_unique).sqrt().sum(dim=-1)  # [num_responsives, batch_size]
+    divergences = 0.5 * (topk_probs.sum(dim=-1) + probs_avg.sum(dim=-1) - 2 * overlap)
+    divergences = torch.clamp(divergences, 0).sqrt().to(dtype)  # [num_responsives, batch_size] in [0, 1]
+
+    avg = divergences.mean(dim=0)  # [batch_size]
+    std = divergences.std(dim=0)  # [batch_size]
+
+    # === Calculate divergence excess ===
+    # For each batch task, calculate excess deviation above a single stddev, in terms of stddev,
+    # and apply power to increase score above two stddev, and decrease between one and two stddev.
+    # This will effectively allow zero excess below one stddev, and minimal excess below two stddev,
+    # but amplify any excess above two stddev (only 2.1% of population for normal dist).
+    excess = torch.clamp(divergences - (avg + std), 0)  # divergence > avg + std
+    excess /= std + 1e-9  # stddev multiples above 1 stddev
+    excess = torch.pow(excess, 3)  # reduce < 2std, increase > 2std
+    excess = torch.clamp(excess, 0, 10)  # maximum excess ratio of 10
+
+    for i, _uid in enumerate(responsive_uids):
+        stats[_uid]['logits_divergence' + ext] = divergences[i].mean()  # scalar
+        stats[_uid]['logits_excess' + ext] = excess[i].mean()  # in [0, 10]
+
+
+def pairwise_mixture_loss(target_probs: torch.FloatTensor, chunk_size: int = 2 ** 24) -> torch.FloatTensor:
+    r"""
+    Calculates the cross entropy loss of every pairwise combination of responses, where a combination averages
+    the probabilities of its two responses, from the probabilities each response assigns to the targets.
+        Args:
+            target_probs (:obj:`torch.FloatTensor`, `required`):
+                [num_responsives, *] Probability of each target per response.
+            chunk_size (:obj:`int`, `optional`):
+                Maximum number of elements materialized at once.
 
-                    _stats['logits_excess' + ext] = excess.mean()  # in [0, 10]
-                    del _stats['logits_divergences' + ext]  # keep only scalar stats beyond this
+        Returns:
+            measured_loss (:obj:`torch.FloatTensor`, `required`):
+                [num_responsives, num_responsives] Mean cross entropy loss of each pairwise combination.
+    """
+    target_probs = target_probs.reshape(len(target_probs), -1)  # [num_responsives, num_targets]
+    num_responsives, num_targets = target_probs.shape
+    rows = max(1, chunk_size // max(1, num_responsives * num_targets))
 
-                    # logger.info(f"UID{uid} divergences [{_stats['logits_divergences' + ext].mean():.4g}]: "
-                    #             f"{', '.join([f'{i}:{dist:.3g}' for i, dist in enumerate(_stats['logits_divergences' + ext])])}")
-                    # logger.info(f"UID{uid} excess [{excess.mean():.3g}]: "
-                    #             f"{', '.join([f'{i}:{exc:.3g}' for i, exc in enumerate(excess)])}")
+    measured_loss = []
+    for start in range(0, num_responsives, rows):
+        first = target_probs[start:start + rows, None, :]  # [rows, 1, num_targets]
+        measured_loss += [-torch.log((first + target_probs[None, :, :]) / 2 + 1e-40).mean(dim=-1)]  # [rows, num_responsives]
 
-                except Exception as e:
-                    logger.warning(f'Synapse {index_s} error (logits_divergence)\t| UID {_uid}: {e}')
+    return torch.cat(measured_loss)
 
 
 def shapley_synergy(stats: Dict, synergy: Callable, ext: str, target: torch.Tensor = None, scaling_law_power: float = 0.5):
@@ -1490,7 +1698,8 @@ def shapley_synergy(stats: Dict, synergy: Callable, ext: str, target: torch.Tens
             stats (:obj:`Dict`, `required`):
                 Statistics per endpoint for this batch.
             synergy (:obj:`Callable`, `required`)
-                Function to calculate measured loss.
+                Function to calculate the measured loss matrix [num_responsives, num_responsives] of all pairs,
+                given the list of responsive stats.
             ext (:obj:`str`, `optional`):
                 Extension to parameter string for stats key.
             target (:obj:`torch.Tensor`, `optional`):
@@ -1508,42 +1717,40 @@ def shapley_synergy(stats: Dict, synergy: Callable, ext: str, target: torch.Tens
     # Measured in effective number of model parameters, just like base Shapley values.
     syn_loss_diff = {}  # expected_loss - measured_loss (where > 0)
     responsives = [uid for uid, stat in stats.items() if 'loss' + ext in stat]
-    for _first, first in stats.items():
-        if 'loss' + ext not in first:
-            continue
-        first_diff = syn_loss_diff.setdefault(_first, {})
-        first_diff[_first] = first['loss' + ext]  # diagonal keeps direct loss
-
-        for _second, second in stats.items():
-            if 'loss' + ext not in second or _second <= _first:
-                continue
-            second_diff = syn_loss_diff.setdefault(_second, {})
-
-            with torch.no_grad():
-                expected_loss = torch.min(first['loss' + ext], second['loss' + ext])  # expecting min loss
-
-                measured_loss = synergy(first, second, target, ext)
-
-                loss_diff_share = torch.clamp(expected_loss - measured_loss, 0) / 2  # record direct loss diff
-                loss_diff_share /= len(responsives)  # average over responsives
-                first['synergy_loss_diff' + ext] += loss_diff_share
-                second['synergy_loss_diff' + ext] += loss_diff_share
-
-                # pairwise loss reduction of expected to measured loss due to synergy between first and second
-                first_diff[_second] = loss_diff_share
-                second_diff[_first] = loss_diff_share
-
-                measured_params = scaling_law_loss_to_params(measured_loss)
-                expected_params = scaling_law_loss_to_params(expected_loss)
-
-                # powered down number of params, e.g. dynamic range 3 → 6 nats for scaling_law_power=0.5
-                pow_measured_params = torch.pow(measured_params, scaling_law_power)
-                pow_expected_params = torch.pow(expected_params, scaling_law_power)
-
-                synergy_share = torch.clamp(pow_measured_params - pow_expected_params, 0) / 2
-                synergy_share /= len(responsives)  # average over responsives
-                first['synergy' + ext] += synergy_share  # share synergy amongst coalition members
-                second['synergy' + ext] += synergy_share
+    if len(responsives) == 0:
+        return syn_loss_diff
+
+    with torch.no_grad():
+        measured_loss = synergy([stats[uid] for uid in responsives], target, ext)  # [num_responsives, num_responsives]
+        losses = torch.stack([torch.as_tensor(stats[uid]['loss' + ext], dtype=measured_loss.dtype,
+                                              device=measured_loss.device).reshape(())
+                              for uid in responsives])  # [num_responsives]
+        expected_loss = torch.min(losses[:, None], losses[None, :])  # expecting min loss
+        pairs = ~torch.eye(len(responsives), dtype=torch.bool, device=measured_loss.device)  # exclude diagonal
+
+        loss_diff_share = torch.clamp(expected_loss - measured_loss, 0) / 2  # record direct loss diff
+        loss_diff_share /= len(responsives)  # average over responsives
+        loss_diff_share *= pairs
+
+        measured_params = scaling_law_loss_to_params(measured_loss)
+        expected_params = scaling_law_loss_to_params(expected_loss)
+
+        # powered down number of params, e.g. dynamic range 3 → 6 nats for scaling_law_power=0.5
+        pow_measured_params = torch.pow(measured_params, scaling_law_power)
+        pow_expected_params = torch.pow(expected_params, scaling_law_power)
+
+        synergy_share = torch.clamp(pow_measured_params - pow_expected_params, 0) / 2
+        synergy_share /= len(responsives)  # average over responsives
+        synergy_share *= pairs
+
+        for i, uid in enumerate(responsives):
+            # share synergy amongst coalition members
+            stats[uid]['synergy_loss_diff' + ext] += loss_diff_share[i].sum()
+            stats[uid]['synergy' + ext] += synergy_share[i].sum()
+
+            # pairwise loss reduction of expected to measured loss due to synergy between uid and each other responsive
+            syn_loss_diff[uid] = dict(zip(responsives, loss_diff_share[i].tolist()))
+            syn_loss_diff[uid][uid] = stats[uid]['loss' + ext]  # diagonal keeps direct loss
 
     return syn_loss_diff
 
@@ -34,23 +34,19 @@ class receptor:
             wallet: 'bittensor.Wallet' = None,
             external_ip: 'str' = None,
             compression: str = None,
+            channel: 'grpc.aio.Channel' = None,
         ) -> 'bittensor.Receptor':
         r""" Initializes a receptor grpc connection.
             Args:
                 endpoint (:obj:`bittensor.Endpoint`, `required`):
                     neuron endpoint descriptor.
+                channel (:obj:`grpc.aio.Channel`, `optional`):
+                    shared channel to the endpoint address, owned by the caller and not closed with the receptor.
         """        
 
         if wallet == None:
             wallet = bittensor.wallet()
 
-        # Get endpoint string.
-        if endpoint.ip == external_ip:
-            ip = "localhost:"
-            endpoint_str = ip + str(endpoint.port)
-        else:
-            endpoint_str = endpoint.ip + ':' + str(endpoint.port)
-
         # Determine the grpc compression algorithm
         if compression == 'gzip':
             compress_alg = grpc.Compression.Gzip
@@ -59,20 +55,39 @@ class receptor:
         else:
             compress_alg = grpc.Compression.NoCompression
 
-        channel = grpc.aio.insecure_channel(
-            endpoint_str,
-            options=[('grpc.max_send_message_length', -1),
-                     ('grpc.max_receive_message_length', -1),
-                     ('grpc.keepalive_time_ms', 100000)])
+        owns_channel = channel == None
+        if owns_channel:
+            channel = receptor.channel( receptor.endpoint_str( endpoint, external_ip ) )
         stub = bittensor.grpc.BittensorStub( channel )
         return receptor_impl.Receptor( 
             endpoint = endpoint,
             channel = channel, 
             wallet = wallet,
             stub = stub,
-            max_processes=max_processes
+            max_processes=max_processes,
+            owns_channel = owns_channel
         )
 
+    @staticmethod
+    def endpoint_str( endpoint: 'bittensor.Endpoint', external_ip: str = None ) -> str:
+        r""" Returns the address string used to connect to the endpoint, endpoints on our own external ip are reached on localhost.
+        """
+        if endpoint.ip == external_ip:
+            ip = "localhost:"
+            return ip + str(endpoint.port)
+        else:
+            return endpoint.ip + ':' + str(endpoint.port)
+
+    @staticmethod
+    def channel( endpoint_str: str ) -> 'grpc.aio.Channel':
+        r""" Creates a grpc.aio channel to the endpoint address.
+        """
+        return grpc.aio.insecure_channel(
+            endpoint_str,
+            options=[('grpc.max_send_message_length', -1),
+                     ('grpc.max_receive_message_length', -1),
+                     ('grpc.keepalive_time_ms', 100000)])
+
         
 
 class receptor_pool:
@@ -83,6 +98,7 @@ class receptor_pool:
             wallet: 'bittensor.Wallet',
             max_active_receptors: int = 4096,
             compression: str = None,
+            warm_ttl: float = 60,
         ) -> 'bittensor.ReceptorPool':
         r""" Initializes a receptor grpc connection.
             Args:
@@ -90,9 +106,12 @@ class receptor_pool:
                     bittensor wallet with hotkey and coldkeypub.
                 max_active_receptors (:type:`int`, `optional`):
                     Maximum allowed active allocated TCP connections.
+                warm_ttl (:type:`float`, `optional`):
+                    Seconds a warmed up receptor is kept out of culling when it is not queried.
         """        
         return bittensor.ReceptorPool ( 
             wallet = wallet,
             max_active_receptors = max_active_receptors,
-            compression = compression
+            compression = compression,
+            warm_ttl = warm_ttl
         )
\ No newline at end of file
@@ -38,6 +38,56 @@ from grpc import _common
 
 
 
+class BroadcastRequest:
+    r""" Forward request serialized once and shared by every receptor sending the same inputs to a different endpoint.
+        The request proto holds no per endpoint fields, the signature travels in the call metadata of each receptor.
+    """
+    def __init__(
+            self,
+            wallet: 'bittensor.wallet',
+            synapses: List[ 'bittensor.Synapse' ],
+            inputs: torch.Tensor,
+        ):
+        r""" Serializes the inputs for each synapse and builds the request bytes.
+
+            Args:
+                wallet (:obj:`bittensor.Wallet`, `required`):
+                    bittensor wallet with the hotkey sending the request.
+                synapses (:obj:`List[ 'bittensor.Synapse' ]` of shape :obj:`(num_synapses)`, `required`):
+                    Bittensor synapse objects with arguments.
+                inputs (:obj:`torch.Tensor` of shape :obj:`(shape)`, `required`):
+                    Single torch tensor sent to every endpoint.
+        """
+        self.inputs = inputs
+        self.codes = [ bittensor.proto.ReturnCode.Success for _ in synapses ]
+        self.messages = [ "Success" for _ in synapses ]
+        self.serialized = None
+
+        serialized_forward_tensors = []
+        serialized_synapses = []
+        for index, synapse in enumerate( synapses ):
+            try:
+                serialized_forward_tensors.append( synapse.serialize_forward_request_tensor ( inputs ))
+                serialized_synapses.append(synapse.serialize_to_wire_proto())
+            except Exception as e:
+                self.codes [index] = bittensor.proto.ReturnCode.RequestSerializationException
+                self.messages [index] = 'Input serialization exception with error:{}'.format(str(e))
+        if bittensor.proto.ReturnCode.Success not in self.codes:
+            return
+
+        try:
+            self.serialized = bittensor.proto.TensorMessage (
+                version = bittensor.__version_as_int__,
+                hotkey = wallet.hotkey.ss58_address,
+                tensors = serialized_forward_tensors,
+                synapses = serialized_synapses,
+                requires_grad = True,
+            ).SerializeToString()
+        except Exception as e:
+            self.codes = [ bittensor.proto.ReturnCode.UnknownException for _ in synapses ]
+            self.messages = [ 'Request proto creation failed with error:{}'.format(str(e)) for _ in synapses ]
+
+
 class Receptor(nn.Module):
 
     def __init__(
@@ -47,6 +97,7 @@ class Receptor(nn.Module):
             channel: 'grpc._Channel',
             stub: 'bittensor.grpc.BittensorStub',
             max_processes: int,
+            owns_channel: bool = True,
         ):
         r""" Initializes a receptor grpc connection.
 
@@ -59,13 +110,23 @@ class Receptor(nn.Module):
                     grpc TCP channel.
                 endpoint (:obj:`bittensor.grpc.BittensorStub`, `required`):
                     bittensor protocol stub created from channel.
+                owns_channel (:obj:`bool`, `optional`):
+                    If false the channel is shared and left open when the receptor is closed.
         """
         super().__init__()
         self.wallet = wallet # Keypair information
         self.endpoint = endpoint # Endpoint information.
         self.channel = channel
         self.stub = stub
+        # Forward call sending request bytes serialized ahead of time, see BroadcastRequest.
+        self.forward_serialized = channel.unary_unary(
+            '/Bittensor/Forward',
+            request_serializer = None,
+            response_deserializer = bittensor.proto.TensorMessage.FromString,
+        )
+        self.owns_channel = owns_channel
         self.receptor_uid = str(uuid.uuid1())
+        self.last_nonce = 0
         self.semaphore = threading.Semaphore(max_processes)
         self.state_dict = _common.CYGRPC_CONNECTIVITY_STATE_TO_CHANNEL_CONNECTIVITY
         self.stats = SimpleNamespace(
@@ -112,6 +173,8 @@ class Receptor(nn.Module):
         return self.__str__()
 
     def __del__ ( self ):
+        if not getattr( self, 'owns_channel', True ):
+            return
         try:
             result = self.channel._channel.check_connectivity_state(True)
             if self.state_dict[result] != self.state_dict[result].SHUTDOWN: 
@@ -146,9 +209,10 @@ class Receptor(nn.Module):
         return self.sign_v1()
 
     def nonce ( self ):
-        r"""creates a string representation of the time
+        r"""creates a wall clock timestamp in nanoseconds, strictly increasing for this receptor
         """
-        return clock.monotonic_ns()
+        self.last_nonce = max( clock.time_ns(), self.last_nonce + 1 )
+        return self.last_nonce
         
     def state ( self ):
         try: 
@@ -245,6 +309,7 @@ class Receptor(nn.Module):
         synapses: List[ 'bittensor.Synapse' ],
         inputs: torch.Tensor, 
         timeout: int,
+        request: 'BroadcastRequest' = None,
     ) -> Tuple[ List[ torch.FloatTensor ], List['bittensor.proto.ReturnCode'], List[float] ]:
         r""" Triggers the grpc call to the remote endpoint.
             This triggers the synapse calls with arguments.
@@ -261,6 +326,9 @@ class Receptor(nn.Module):
 
                 timeout (:obj:`int`, `required`):
                     Request max timeout
+
+                request (:obj:`BroadcastRequest`, `optional`):
+                    Request already serialized from inputs, shared with receptors of other endpoints.
             Returns:
                 outputs (:obj:`List[ Union[torch.FloatTensor, torch.LongTensor] ]`, `required`):
                     outputs.shape = [batch_size, synapse_length, response] 
@@ -345,45 +413,63 @@ class Receptor(nn.Module):
             finalize_stats_and_logs()
             return synapse_responses, synapse_codes, synapse_call_times
 
-        # ==========================
-        # ==== Serialize inputs ====
-        # ==========================
-        serialized_forward_tensors = []
-        serialized_synapses = []
-        for index, synapse in enumerate( synapses ):
-            try:
-                serialized_forward_tensors.append( synapse.serialize_forward_request_tensor ( inputs ))
-                serialized_synapses.append(synapse.serialize_to_wire_proto())
-            except Exception as e:
-                synapse_codes [index] = bittensor.proto.ReturnCode.RequestSerializationException
-                synapse_call_times [index] = clock.time() - start_time
-                synapse_messages [index] = 'Input serialization exception with error:{}'.format(str(e))
-        # Check if the call can stop here.
-        if check_if_should_return():
-            finalize_stats_and_logs()
-            return synapse_responses, synapse_codes, synapse_call_times
+        if request != None:
+            # ===============================================
+            # ==== Use the request serialized in advance ====
+            # ===============================================
+            for index, code in enumerate( request.codes ):
+                if code != bittensor.proto.ReturnCode.Success:
+                    synapse_codes [index] = code
+                    synapse_call_times [index] = clock.time() - start_time
+                    synapse_messages [index] = request.messages [index]
+            # Check if the call can stop here.
+            if check_if_should_return():
+                finalize_stats_and_logs()
+                return synapse_responses, synapse_codes, synapse_call_times
+            grpc_request = request.serialized
+            forward_call = self.forward_serialized
+
+        else:
+            # ==========================
+            # ==== Serialize inputs ====
+            # ==========================
+            serialized_forward_tensors = []
+            serialized_synapses = []
+            for index, synapse in enumerate( synapses ):
+                try:
+                    serialized_forward_tensors.append( synapse.serialize_forward_request_tensor ( inputs ))
+                    serialized_synapses.append(synapse.serialize_to_wire_proto())
+                except Exception as e:
+                    synapse_codes [index] = bittensor.proto.ReturnCode.RequestSerializationException
+                    synapse_call_times [index] = clock.time() - start_time
+                    synapse_messages [index] = 'Input serialization exception with error:{}'.format(str(e))
+            # Check if the call can stop here.
+            if check_if_should_return():
+                finalize_stats_and_logs()
+                return synapse_responses, synapse_codes, synapse_call_times
             
-        # ============================
-        # ==== Build proto request ====
-        # ============================
-        try: 
-            grpc_request = bittensor.proto.TensorMessage (
-                version = bittensor.__version_as_int__,
-                hotkey = self.wallet.hotkey.ss58_address,
-                tensors = serialized_forward_tensors,
-                synapses = serialized_synapses,
-                requires_grad = True,
-            )
-        except Exception as e:
-            # Synapse request creation failed.
-            code = bittensor.proto.ReturnCode.UnknownException
-            call_time = clock.time() - start_time
-            message = 'Request proto creation failed with error:{}'.format(str(e)) 
-            synapse_codes = [code for _ in synapses ]
-            synapse_call_times = [call_time for _ in synapses ]
-            synapse_messages = [ message for _ in synapses ]
-            finalize_stats_and_logs()
-            return synapse_responses, synapse_codes, synapse_call_times
+            # ============================
+            # ==== Build proto request ====
+            # ============================
+            try: 
+                grpc_request = bittensor.proto.TensorMessage (
+                    version = bittensor.__version_as_int__,
+                    hotkey = self.wallet.hotkey.ss58_address,
+                    tensors = serialized_forward_tensors,
+                    synapses = serialized_synapses,
+                    requires_grad = True,
+                )
+            except Exception as e:
+                # Synapse request creation failed.
+                code = bittensor.proto.ReturnCode.UnknownException
+                call_time = clock.time() - start_time
+                message = 'Request proto creation failed with error:{}'.format(str(e)) 
+                synapse_codes = [code for _ in synapses ]
+                synapse_call_times = [call_time for _ in synapses ]
+                synapse_messages = [ message for _ in synapses ]
+                finalize_stats_and_logs()
+                return synapse_responses, synapse_codes, synapse_call_times
+            forward_call = self.stub.Forward
 
 
         # ===============================
@@ -393,7 +479,7 @@ class Receptor(nn.Module):
             self.stats.forward_qps.update(1)
             self.stats.forward_bytes_out.update( sys.getsizeof( grpc_request ) )
             finalize_stats_and_logs()
-            asyncio_future = self.stub.Forward (
+            asyncio_future = forward_call (
                 request = grpc_request, 
                 timeout = timeout,
                 metadata = (
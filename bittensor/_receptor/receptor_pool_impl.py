@@ -17,16 +17,22 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER 
 # DEALINGS IN THE SOFTWARE.
 
-import math
-from typing import Tuple, List, Union
-from threading import Lock
-
+import collections
+import heapq
+import itertools
+import time as clock
+from types import SimpleNamespace
+from typing import Dict, Iterator, AsyncIterator, Tuple, List, Union
+from threading import RLock
+
+import grpc
 import torch
 import asyncio
 from loguru import logger
 import concurrent
 import bittensor
 from bittensor._endpoint import endpoint
+from bittensor._receptor.receptor_impl import BroadcastRequest
 import bittensor.utils.networking as net
 from concurrent.futures import ThreadPoolExecutor
 
@@ -40,16 +46,40 @@ class ReceptorPool ( torch.nn.Module ):
         wallet: 'bittensor.Wallet',
         max_active_receptors: int,
         compression: str,
+        warm_ttl: float = 60,
     ):
         super().__init__()
         self.wallet = wallet
         self.max_active_receptors = max_active_receptors
         self.receptors = {}
-        self.cull_mutex = Lock()
+        # Guards the receptors, channels, eviction keys and warm pins, which forward and backward threads share.
+        self.cull_mutex = RLock()
         self.max_processes = 10
         self.compression = compression
         self.total_requests = 0
 
+        # Channels are shared by every receptor at the same address and closed with the last of them.
+        self.channels = {}
+        self.channel_refs = {}
+
+        # Lazy min heap of ( forward_qps, last_used, hotkey ) eviction keys, entries superseded by a later use are skipped.
+        self.eviction_heap = []
+        self.last_used = {}
+        self.uses = itertools.count()
+
+        # Receptors pre-connected for the next query: hotkey -> expiry time, kept out of culling until queried or expired.
+        self.warm_hotkeys = {}
+        self.warm_ttl = warm_ttl
+        self.stats = SimpleNamespace(
+            created = 0,
+            reused = 0,
+            address_changes = 0,
+            evictions = 0,
+            warmups = 0,
+            warm_expirations = 0,
+            broadcasts = 0,
+        )
+
         try:
             self.external_ip = str(net.get_external_ip())
         except Exception:
@@ -62,8 +92,10 @@ class ReceptorPool ( torch.nn.Module ):
         return self.__str__()
     
     def __exit__(self):
-        for receptor in self.receptors:
-            receptor.__del__()
+        with self.cull_mutex:
+            for endpoint_str in list( self.channels.keys() ):
+                self._close_channel( self.channels.pop( endpoint_str ) )
+            self.channel_refs = {}
 
     def get_total_requests(self):
         return self.total_requests
@@ -73,7 +105,58 @@ class ReceptorPool ( torch.nn.Module ):
                 states (:obj:`List[grpc.channel.state]`)
                     The state of receptor.
         """
-        return {hotkey: v.state() for hotkey, v in self.receptors.items()}
+        with self.cull_mutex:
+            receptors = list( self.receptors.items() )
+        return {hotkey: v.state() for hotkey, v in receptors}
+
+    def get_channel_metrics(self) -> Dict[ str, int ]:
+        r""" Return the number of receptors per channel state along with the pool counters.
+            Returns:
+                metrics (:obj:`Dict[str, int]`)
+                    receptor, channel and warm counts, per state counts keyed by state_<name> and the pool stats.
+        """
+        with self.cull_mutex:
+            metrics = {
+                'receptors': len( self.receptors ),
+                'channels': len( self.channels ),
+                'warm': len( self.warm_hotkeys ),
+            }
+            metrics.update( vars( self.stats ) )
+        for state in self.get_receptors_state().values():
+            key = 'state_' + ( state.name.lower() if isinstance( state, grpc.ChannelConnectivity ) else 'closed' )
+            metrics[ key ] = metrics.get( key, 0 ) + 1
+        return metrics
+
+    def warmup( self, endpoints: List [ 'bittensor.Endpoint' ] ) -> int:
+        r""" Pre-connects channels to the endpoints which will be queried next so that their first query does not pay 
+            the TCP and HTTP/2 handshake inside the request timeout. Warmed receptors are kept out of culling until 
+            a query to them has run or warm_ttl seconds passed.
+
+            Args:
+                endpoints (:obj:`List[ bittensor.Endpoint ]` of shape :obj:`(num_endpoints)`, `required`):
+                    Endpoints expected to be queried next.
+
+            Returns:
+                connecting (:obj:`int`):
+                    Number of channels which were not ready and started connecting.
+        """
+        connecting = 0
+        expiry = clock.time() + self.warm_ttl
+        for endpoint in endpoints:
+            if not endpoint.is_serving:
+                continue
+            with self.cull_mutex:
+                receptor = self._get_or_create_receptor( endpoint )
+                self.warm_hotkeys[ endpoint.hotkey ] = expiry
+            # Reading the state with try_to_connect starts connecting an idle channel without blocking.
+            if receptor.state() != grpc.ChannelConnectivity.READY:
+                connecting += 1
+        with self.cull_mutex:
+            self.stats.warmups += connecting
+        # With no idle receptors allowed culling would only tear down the receptors about to be queried.
+        if self.max_active_receptors > 0:
+            self._destroy_receptors_over_max_allowed()
+        return connecting
 
     def forward (
             self, 
@@ -188,6 +271,78 @@ class ReceptorPool ( torch.nn.Module ):
             ) 
         )
 
+    def forward_as_completed (
+            self, 
+            endpoints: List [ 'bittensor.Endpoint' ],
+            synapses: List[ 'bittensor.Synapse' ],
+            inputs: List [ torch.Tensor ],
+            timeout: int,
+            min_successes: int = None,
+            max_time: float = None,
+        ) -> Iterator[ Tuple[ int, List[torch.Tensor], List[int], List[float] ] ]:
+        r""" Forward tensor inputs to endpoints, yielding each endpoint response as soon as it completes.
+            Calls still in flight make progress while the caller waits on the next response.
+
+            Args:
+                endpoints (:obj:`List[ bittensor.Endpoint ]` of shape :obj:`(num_endpoints)`, `required`):
+                    List of remote endpoints which match length of inputs. Tensors from x are sent forward to these endpoints.
+
+                synapses (:obj:`List[ 'bittensor.Synapse' ]` of shape :obj:`(num_synapses)`, `required`):
+                    Bittensor synapse objects with arguments. Each corresponds to a synapse function on the axon.
+                    Responses are packed in this ordering. 
+
+                inputs (:obj:`List[torch.Tensor]` of shape :obj:`(num_endpoints * [shape])`, `required`):
+                    List of tensors to send to corresponsing endpoints.
+
+                timeout (int):
+                    Request timeout.
+
+                min_successes (int, `optional`):
+                    Stop once this many endpoints responded with at least one successful synapse.
+
+                max_time (float, `optional`):
+                    Stop once this many seconds passed.
+
+            Yields:
+                index (:obj:`int`):
+                    Index of the endpoint in endpoints.
+
+                outputs (:obj:`List[ torch.FloatTensor ]` of shape :obj:`(num_synapses * (shape))`, `required`):
+                    Output encodings produced by the remote endpoint. Non-responses are zeroes of common shape.
+
+                codes (:obj:`List[ bittensor.proto.ReturnCodes ]` of shape :obj:`(num_synapses)`, `required`):
+                    Return code per synapse.
+
+                times (:obj:`List[ float ]` of shape :obj:`(num_synapses)`, `required`):
+                    Call time per synapse.
+        """
+        if len(endpoints) != len(inputs):
+            raise ValueError('Endpoints must have the same length as passed inputs. Got {} and {}'.format(len(endpoints), len(inputs)))
+
+        try:
+            loop = asyncio.get_event_loop()
+        except RuntimeError:
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+        responses = self.async_forward_as_completed(
+            endpoints = endpoints,
+            synapses = synapses,
+            inputs = inputs,
+            timeout = timeout,
+            min_successes = min_successes,
+            max_time = max_time
+        )
+        def drive():
+            try:
+                while True:
+                    try:
+                        yield loop.run_until_complete( responses.__anext__() )
+                    except StopAsyncIteration:
+                        return
+            finally:
+                loop.run_until_complete( responses.aclose() )
+        return drive()
+
     async def async_forward (
             self, 
             endpoints: List [ 'bittensor.Endpoint' ],
@@ -227,13 +382,15 @@ class ReceptorPool ( torch.nn.Module ):
         receptors = [ self._get_or_create_receptor_for_endpoint( endpoint ) for endpoint in endpoints ]
 
         # Make calls.
+        requests = self._broadcast_requests( synapses, inputs )
         calls = []
         for index, receptor in enumerate(receptors):
             calls.append( 
                 receptor.async_forward(
                     synapses = synapses,
                     inputs = inputs[index], 
-                    timeout = timeout
+                    timeout = timeout,
+                    request = requests[index]
                 )
             )
 
@@ -249,10 +406,74 @@ class ReceptorPool ( torch.nn.Module ):
             forward_times.append( response[2] )
 
         # ---- Kill receptors ----
-        self._destroy_receptors_over_max_allowed()
+        self._destroy_receptors_over_max_allowed( queried = endpoints )
         # ---- Return ----
         return forward_outputs, forward_codes, forward_times
 
+    async def async_forward_as_completed (
+            self, 
+            endpoints: List [ 'bittensor.Endpoint' ],
+            synapses: List[ 'bittensor.Synapse' ],
+            inputs: List [ torch.Tensor ],
+            timeout: int,
+            min_successes: int = None,
+            max_time: float = None,
+        ) -> AsyncIterator[ Tuple[ int, List[torch.Tensor], List[int], List[float] ] ]:
+        r""" Forward tensor inputs to endpoints, yielding ( index, outputs, codes, times ) per endpoint in completion order,
+            see :obj:`ReceptorPool.forward_as_completed`. Every endpoint is yielded once, calls cut off by 
+            min_successes or max_time are cancelled and yielded with Timeout codes.
+        """
+        # Init receptors.
+        receptors = [ self._get_or_create_receptor_for_endpoint( endpoint ) for endpoint in endpoints ]
+
+        # Make calls.
+        start_time = clock.time()
+        requests = self._broadcast_requests( synapses, inputs )
+        calls = {}
+        for index, receptor in enumerate(receptors):
+            call = asyncio.ensure_future(
+                receptor.async_forward(
+                    synapses = synapses,
+                    inputs = inputs[index], 
+                    timeout = timeout,
+                    request = requests[index]
+                )
+            )
+            calls[ call ] = index
+
+        successes = 0
+        pending = set( calls.keys() )
+        try:
+            while len( pending ) > 0:
+                remaining_time = None if max_time == None else max( max_time - ( clock.time() - start_time ), 0 )
+                done, pending = await asyncio.wait( pending, timeout = remaining_time, return_when = asyncio.FIRST_COMPLETED )
+                for call in done:
+                    outputs, codes, times = call.result()
+                    successes += int( bittensor.proto.ReturnCode.Success in codes )
+                    yield calls[ call ], outputs, codes, times
+                if len( done ) == 0 or ( min_successes != None and successes >= min_successes ):
+                    break
+
+            # ---- Cancel and return the stragglers as timeouts ----
+            for call in pending:
+                call.cancel()
+            for call in sorted( pending, key = lambda call: calls[ call ] ):
+                index = calls[ call ]
+                call_time = clock.time() - start_time
+                yield (
+                    index,
+                    [ synapse.nill_forward_response_tensor( inputs[ index ] ) for synapse in synapses ],
+                    [ bittensor.proto.ReturnCode.Timeout for _ in synapses ],
+                    [ call_time for _ in synapses ],
+                )
+            pending = set()
+
+        finally:
+            for call in pending:
+                call.cancel()
+            # ---- Kill receptors ----
+            self._destroy_receptors_over_max_allowed( queried = endpoints )
+
     async def async_backward(
                 self, 
                 endpoints: List [ 'bittensor.Endpoint' ],
@@ -317,34 +538,123 @@ class ReceptorPool ( torch.nn.Module ):
             backward_times.append( response[2] )
 
         # ---- Kill receptors ----
-        self._destroy_receptors_over_max_allowed()
+        self._destroy_receptors_over_max_allowed( queried = endpoints )
         # ---- Return ----
         return backward_outputs, backward_codes, backward_times
 
-    def _destroy_receptors_over_max_allowed( self ):
-        r""" Destroys receptors based on QPS until there are no more than max_active_receptors.
+    def _broadcast_requests( self, synapses: List[ 'bittensor.Synapse' ], inputs: List [ torch.Tensor ] ) -> List[ 'BroadcastRequest' ]:
+        r""" Serializes each input tensor sent to more than one endpoint once, returns the shared request per input or None.
+            Inputs are matched by identity, as replicated by the dendrite for a single tensor sent to many endpoints.
         """
+        inputs = list( inputs ) # Holds every input alive while matching ids.
+        counts = collections.Counter( id( x ) for x in inputs )
+        requests = {}
+        for x in inputs:
+            if counts[ id( x ) ] > 1 and id( x ) not in requests:
+                requests[ id( x ) ] = BroadcastRequest( self.wallet, synapses, x )
         with self.cull_mutex:
-            # ---- Finally: Kill receptors over max allowed ----
-            while len(self.receptors) > self.max_active_receptors:
-                min_receptor_qps = math.inf
-                receptor_to_remove = None
-                for next_receptor in self.receptors.values():
-                    next_qps = next_receptor.stats.forward_qps.value
-                    sema_value = next_receptor.semaphore._value
-                    if (min_receptor_qps > next_qps) and (sema_value == self.max_processes):
-                        receptor_to_remove = next_receptor
-                        min_receptor_qps = next_receptor.stats.forward_qps.value
-                        
-                if receptor_to_remove != None:
-                    try:
-                        bittensor.logging.destroy_receptor_log(receptor_to_remove.endpoint)
-                        self.receptors[ receptor_to_remove.endpoint.hotkey ].close()
-                        del self.receptors[ receptor_to_remove.endpoint.hotkey ]
-                    except KeyError:
-                        pass
-                elif receptor_to_remove == None:
-                    break
+            self.stats.broadcasts += len( requests )
+        return [ requests.get( id( x ) ) for x in inputs ]
+
+    def _destroy_receptors_over_max_allowed( self, queried: List[ 'bittensor.Endpoint' ] = [] ):
+        r""" Destroys receptors in ( QPS, least recently used ) order until there are no more than max_active_receptors
+            besides the warmed ones. Receptors with calls in flight are kept.
+
+            Args:
+                queried (:obj:`List[ bittensor.Endpoint ]`, `optional`):
+                    Endpoints whose query has run, their warm pins are released.
+        """
+        with self.cull_mutex:
+            now = clock.time()
+            for endpoint in queried:
+                self.warm_hotkeys.pop( endpoint.hotkey, None )
+            # Pins of warmed receptors which were never queried expire.
+            for hotkey, expiry in list( self.warm_hotkeys.items() ):
+                if expiry <= now:
+                    del self.warm_hotkeys[ hotkey ]
+                    self.stats.warm_expirations += 1
+            kept = []
+            while len(self.receptors) - len(self.warm_hotkeys) > self.max_active_receptors and len(self.eviction_heap) > 0:
+                qps, last_used, hotkey = heapq.heappop( self.eviction_heap )
+                # Skip entries of destroyed receptors and entries superseded by a later use.
+                if self.last_used.get( hotkey ) != last_used:
+                    continue
+                receptor = self.receptors[ hotkey ]
+                # The QPS is updated by calls made after the entry was pushed, re-key it.
+                if receptor.stats.forward_qps.value != qps:
+                    heapq.heappush( self.eviction_heap, ( receptor.stats.forward_qps.value, last_used, hotkey ) )
+                    continue
+                if hotkey in self.warm_hotkeys or receptor.semaphore._value != self.max_processes:
+                    kept.append( ( qps, last_used, hotkey ) )
+                    continue
+                self._destroy_receptor( hotkey )
+                self.stats.evictions += 1
+            for entry in kept:
+                heapq.heappush( self.eviction_heap, entry )
+
+    def _destroy_receptor( self, hotkey: str ):
+        r""" Removes the receptor for hotkey and releases its channel.
+        """
+        receptor = self.receptors.pop( hotkey )
+        self.last_used.pop( hotkey, None )
+        self.warm_hotkeys.pop( hotkey, None )
+        bittensor.logging.destroy_receptor_log( receptor.endpoint )
+        self._release_channel( bittensor.receptor.endpoint_str( receptor.endpoint, self.external_ip ) )
+
+    def _touch( self, hotkey: str ):
+        r""" Marks the receptor for hotkey as the most recently used and pushes its eviction key, expects the cull_mutex to be held.
+        """
+        self.last_used[ hotkey ] = next( self.uses )
+        heapq.heappush( self.eviction_heap, ( self.receptors[ hotkey ].stats.forward_qps.value, self.last_used[ hotkey ], hotkey ) )
+        # Rebuild once superseded entries outnumber the live ones, keeping the heap O(n).
+        if len( self.eviction_heap ) > 2 * len( self.receptors ) + 64:
+            self.eviction_heap = [ ( self.receptors[ key ].stats.forward_qps.value, used, key ) for key, used in self.last_used.items() ]
+            heapq.heapify( self.eviction_heap )
+
+    def _acquire_channel( self, endpoint_str: str ) -> 'grpc.aio.Channel':
+        r""" Returns the shared channel to endpoint_str, creating it if there is none.
+        """
+        if endpoint_str not in self.channels:
+            self.channels[ endpoint_str ] = bittensor.receptor.channel( endpoint_str )
+            self.channel_refs[ endpoint_str ] = 0
+        self.channel_refs[ endpoint_str ] += 1
+        return self.channels[ endpoint_str ]
+
+    def _release_channel( self, endpoint_str: str ):
+        r""" Releases a reference to the shared channel to endpoint_str, closing it once unreferenced.
+        """
+        if endpoint_str not in self.channel_refs:
+            return
+        self.channel_refs[ endpoint_str ] -= 1
+        if self.channel_refs[ endpoint_str ] <= 0:
+            del self.channel_refs[ endpoint_str ]
+            self._close_channel( self.channels.pop( endpoint_str ) )
+
+    @staticmethod
+    def _close_channel( channel: 'grpc.aio.Channel' ):
+        try:
+            loop = asyncio.get_event_loop()
+            if loop.is_running():
+                loop.create_task( channel.close() )
+            else:
+                loop.run_until_complete( channel.close() )
+        except Exception:
+            pass
+
+    def _create_receptor( self, endpoint: 'bittensor.Endpoint' ) -> 'bittensor.Receptor':
+        r""" Creates a receptor for the endpoint on the shared channel to its address.
+        """
+        receptor = bittensor.receptor (
+            endpoint = endpoint, 
+            wallet = self.wallet,
+            external_ip = self.external_ip,
+            max_processes = self.max_processes,
+            compression = self.compression,
+            channel = self._acquire_channel( bittensor.receptor.endpoint_str( endpoint, self.external_ip ) )
+        )
+        self.receptors[ receptor.endpoint.hotkey ] = receptor
+        self.stats.created += 1
+        return receptor
 
     def _get_or_create_receptor_for_endpoint( self, endpoint: 'bittensor.Endpoint' ) -> 'bittensor.Receptor':
         r""" Finds or creates a receptor TCP connection associated with the passed Neuron Endpoint
@@ -352,32 +662,29 @@ class ReceptorPool ( torch.nn.Module ):
                 receptor: (`bittensor.Receptor`):
                     receptor with tcp connection endpoint at endpoint.ip:endpoint.port
         """
+        with self.cull_mutex:
+            return self._get_or_create_receptor( endpoint )
+
+    def _get_or_create_receptor( self, endpoint: 'bittensor.Endpoint' ) -> 'bittensor.Receptor':
+        r""" Finds or creates the receptor of the endpoint, expects the cull_mutex to be held.
+        """
         # ---- Find the active receptor for this endpoint ----
         if endpoint.hotkey in self.receptors:
             receptor = self.receptors[ endpoint.hotkey ]
 
             # Change receptor address.
             if receptor.endpoint.ip != endpoint.ip or receptor.endpoint.port != endpoint.port:
-                #receptor.close()
                 bittensor.logging.update_receptor_log( endpoint )
-                receptor = bittensor.receptor (
-                    endpoint = endpoint, 
-                    wallet = self.wallet,
-                    external_ip = self.external_ip,
-                    max_processes = self.max_processes
-                )            
-                self.receptors[ receptor.endpoint.hotkey ] = receptor
+                self._release_channel( bittensor.receptor.endpoint_str( receptor.endpoint, self.external_ip ) )
+                receptor = self._create_receptor( endpoint )
+                self.stats.address_changes += 1
+            else:
+                self.stats.reused += 1
 
         # ---- Or: Create a new receptor ----
         else:
             bittensor.logging.create_receptor_log( endpoint )
-            receptor = bittensor.receptor (
-                    endpoint = endpoint, 
-                    wallet = self.wallet,
-                    external_ip = self.external_ip,
-                    max_processes = self.max_processes,
-                    compression = self.compression
-            )
-            self.receptors[ receptor.endpoint.hotkey ] = receptor
-            
-        return receptor
\ No newline at end of file
+            receptor = self._create_receptor( endpoint )
+
+        self._touch( endpoint.hotkey )
+        return receptor
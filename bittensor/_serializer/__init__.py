@@ -61,6 +61,8 @@ class serializer:
             return serializer_impl.MSGPackSerializer()
         elif serializer_type == bittensor.proto.Serializer.CMPPACK:
             return serializer_impl.CMPPackSerializer()
+        elif serializer_type == bittensor.proto.Serializer.RAWBUFFER:
+            return serializer_impl.RawBufferSerializer()
         else:
             raise bittensor.serializer.NoSerializerForEnum("No known serialzier for proto type {}".format(serializer_type))
 
@@ -17,6 +17,8 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER 
 # DEALINGS IN THE SOFTWARE.
 
+import sys
+
 import torch
 import msgpack
 import msgpack_numpy
@@ -232,3 +234,79 @@ class CMPPackSerializer( Serializer ):
         torch_object = torch.as_tensor(numpy_object).view(shape).requires_grad_(torch_proto.requires_grad)
         return torch_object.type(dtype)
 
+
+
+class RawBufferSerializer( Serializer ):
+    """ Make conversion between torch and bittensor.proto.torch by writing the contiguous little-endian
+        tensor bytes directly into the proto buffer, avoiding the msgpack encode/decode copies.
+    """
+    def serialize_from_torch(self, torch_tensor: torch.Tensor, modality: bittensor.proto.Modality) -> bittensor.proto.Tensor:
+        """ Serializes a torch.Tensor to an bittensor Tensor proto as raw bytes.
+
+        Args:
+            torch_tensor (torch.Tensor): 
+                Torch tensor to serialize.
+
+            modality (bittensor.proto.Modality): 
+                Datatype modality. i.e. TENSOR, TEXT, IMAGE
+
+        Returns:
+            bittensor.proto.Tensor: 
+                The serialized torch tensor as bittensor.proto.proto. 
+
+        Raises:
+            SerializationException: (Exception): 
+                Raised if the tensor dtype has no bittensor.dtype equivalent.
+        """
+        dtype = bittensor.serializer.torch_dtype_to_bittensor_dtype(torch_tensor.dtype)
+        if dtype == bittensor.proto.DataType.UNKNOWN:
+            raise bittensor.serializer.SerializationException('Raw buffer serialization is not supported for torch.dtype = {}'.format(torch_tensor.dtype))
+        shape = list(torch_tensor.shape)
+        torch_numpy = torch_tensor.detach().cpu().contiguous().numpy()
+        if sys.byteorder != 'little':
+            torch_numpy = torch_numpy.byteswap()
+        torch_proto = bittensor.proto.Tensor (
+                                    version = bittensor.__version_as_int__,
+                                    buffer = torch_numpy.tobytes(),
+                                    shape = shape,
+                                    dtype = dtype,
+                                    serializer = bittensor.proto.Serializer.RAWBUFFER,
+                                    tensor_type = bittensor.proto.TensorType.TORCH,
+                                    modality = modality,
+                                    requires_grad = torch_tensor.requires_grad
+                                )
+        return torch_proto
+
+    def deserialize_to_torch(self, torch_proto: bittensor.proto.Tensor) -> torch.Tensor:
+        """Deserializes an bittensor.proto.Tensor to a torch.Tensor object.
+            The buffer is copied once into writable memory owned by the returned tensor.
+
+        Args:
+            torch_proto (bittensor.proto.Tensor): 
+                Proto containing torch tensor to derserialize.
+
+        Returns:
+            torch.Tensor: 
+                Deserialized torch tensor.
+
+        Raises:
+            DeserializationException: (Exception): 
+                Raised if the buffer size does not match the proto shape and dtype.
+        """
+        dtype = bittensor.serializer.bittensor_dtype_to_torch_dtype(torch_proto.dtype)
+        shape = tuple(torch_proto.shape)
+        buffer = torch_proto.buffer
+        numel = 1
+        for dim in shape:
+            numel *= dim
+        if len(buffer) != numel * torch.empty(0, dtype=dtype).element_size():
+            raise bittensor.serializer.DeserializationException(
+                'Raw buffer of {} bytes does not match shape {} and dtype {}'.format(len(buffer), shape, dtype))
+        if numel == 0:
+            return torch.zeros(shape, dtype=dtype).requires_grad_(torch_proto.requires_grad)
+
+        # The proto bytes are immutable, callers write into the tensor in place.
+        torch_object = torch.frombuffer(bytearray(buffer), dtype=dtype)
+        if sys.byteorder != 'little':
+            torch_object = torch.from_numpy(torch_object.numpy().byteswap())
+        return torch_object.view(shape).requires_grad_(torch_proto.requires_grad)
@@ -155,6 +155,8 @@ class subtensor:
             substrate = substrate,
             network = config.subtensor.get('network', bittensor.defaults.subtensor.network),
             chain_endpoint = config.subtensor.chain_endpoint,
+            cache = config.subtensor.get('cache', bittensor.defaults.subtensor.cache),
+            cache_block_ttl = config.subtensor.get('cache_block_ttl', bittensor.defaults.subtensor.cache_block_ttl),
         )
 
     @staticmethod   
@@ -189,6 +191,8 @@ class subtensor:
                                 help='''The subtensor endpoint flag. If set, overrides the --network flag.
                                     ''')       
             parser.add_argument('--' + prefix_str + 'subtensor._mock', action='store_true', help='To turn on subtensor mocking for testing purposes.', default=bittensor.defaults.subtensor._mock)
+            parser.add_argument('--' + prefix_str + 'subtensor.cache', action='store_true', help='If set, hyperparameters are fetched in one batched call and cached until the next block.', default=bittensor.defaults.subtensor.cache)
+            parser.add_argument('--' + prefix_str + 'subtensor.cache_block_ttl', type=float, help='Seconds to serve the cached block number before polling the chain again.', default=bittensor.defaults.subtensor.cache_block_ttl)
             # registration args. Used for register and re-register and anything that calls register.
             parser.add_argument('--' + prefix_str + 'subtensor.register.num_processes', '-n', dest=prefix_str + 'subtensor.register.num_processes', help="Number of processors to use for registration", type=int, default=bittensor.defaults.subtensor.register.num_processes)
             parser.add_argument('--' + prefix_str + 'subtensor.register.update_interval', '--' + prefix_str + 'subtensor.register.cuda.update_interval', '--' + prefix_str + 'cuda.update_interval', '-u', help="The number of nonces to process before checking for next block during registration", type=int, default=bittensor.defaults.subtensor.register.update_interval)
@@ -214,6 +218,8 @@ class subtensor:
         defaults.subtensor.network = os.getenv('BT_SUBTENSOR_NETWORK') if os.getenv('BT_SUBTENSOR_NETWORK') != None else 'nakamoto'
         defaults.subtensor.chain_endpoint = os.getenv('BT_SUBTENSOR_CHAIN_ENDPOINT') if os.getenv('BT_SUBTENSOR_CHAIN_ENDPOINT') != None else None
         defaults.subtensor._mock = os.getenv('BT_SUBTENSOR_MOCK') if os.getenv('BT_SUBTENSOR_MOCK') != None else False
+        defaults.subtensor.cache = os.getenv('BT_SUBTENSOR_CACHE') if os.getenv('BT_SUBTENSOR_CACHE') != None else False
+        defaults.subtensor.cache_block_ttl = float(os.getenv('BT_SUBTENSOR_CACHE_BLOCK_TTL')) if os.getenv('BT_SUBTENSOR_CACHE_BLOCK_TTL') != None else 1.0
 
         defaults.subtensor.register = bittensor.Config()
         defaults.subtensor.register.num_processes = os.getenv('BT_SUBTENSOR_REGISTER_NUM_PROCESSES') if os.getenv('BT_SUBTENSOR_REGISTER_NUM_PROCESSES') != None else None # uses processor count by default within the function
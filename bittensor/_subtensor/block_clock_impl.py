@@ -0,0 +1,163 @@
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated 
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation 
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, 
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of 
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL 
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION 
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER 
+# DEALINGS IN THE SOFTWARE.
+
+import threading
+import time
+
+from retry import retry
+
+import bittensor
+
+class BlockClock:
+    """
+    Serves the chain block from local state by extrapolating the last observed head with the block time.
+    Every exact block read made through the owning subtensor re-anchors the clock, so all its users share one view of the chain.
+    """
+    def __init__( 
+        self, 
+        subtensor: 'bittensor.Subtensor',
+        block_time: float = None,
+        resync_interval: float = None,
+    ):
+        r""" Initializes a block clock.
+            Args:
+                subtensor (:obj:`bittensor.Subtensor`, `required`): 
+                    subtensor used to read the chain head.
+                block_time (default=bittensor.__blocktime__, type=float)
+                    Expected seconds between blocks.
+                resync_interval (default=3 * block_time, type=float)
+                    Seconds an observation is extrapolated before the chain head is read again.
+        """
+        self.subtensor = subtensor
+        self.block_time = block_time if block_time != None else bittensor.__blocktime__
+        self.resync_interval = resync_interval if resync_interval != None else 3 * self.block_time
+        self.reads = 0
+        self.syncs = 0
+        self._lock = threading.Lock()
+        self._anchor_block = None
+        self._anchor_time = None
+        self._observed_time = None
+        self._epoch_anchor = None
+
+    def __str__(self) -> str:
+        return "BlockClock({}, {})".format( self._anchor_block, self._anchor_time )
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+    def _extrapolate( self, now: float ) -> int:
+        return self._anchor_block + int( ( now - self._anchor_time ) // self.block_time )
+
+    def observe( self, block: int, timestamp: float = None ):
+        r""" Re-anchors the clock on an exact chain block observation.
+            Args:
+                block (int):
+                    Chain head block number.
+                timestamp (float, `optional`):
+                    Seconds since epoch the block was produced at.
+        """
+        now = time.time()
+        with self._lock:
+            if timestamp != None:
+                # Anchor on the production time so extrapolation ticks over with the chain,
+                # clamped to one block time to guard against local clock skew.
+                self.syncs += 1
+                self._observed_time = now
+                self._anchor_block = block
+                self._anchor_time = min( max( timestamp, now - self.block_time ), now )
+                return
+            self.syncs += 1
+            self._observed_time = now
+            if self._anchor_block == None:
+                # Without a timestamp the block phase is unknown, anchor as a late block so readers
+                # keep checking and the next tick over sets the phase, instead of reading the head again.
+                self._anchor_block = block
+                self._anchor_time = now - self.block_time * 0.9
+                return
+            predicted = self._extrapolate( now )
+            if block > predicted:
+                # The clock is behind, the block has just ticked over.
+                self._anchor_block = block
+                self._anchor_time = now
+            elif block < predicted:
+                # The block is late, expect the next one soon so readers keep checking.
+                self._anchor_block = block
+                self._anchor_time = now - self.block_time * 0.9
+
+    def sync( self ) -> int:
+        r""" Reads the chain head with its timestamp and re-anchors the clock on it.
+        Returns:
+            block (int):
+                Current chain block.
+        """
+        @retry(delay=2, tries=3, backoff=2, max_delay=4)
+        def make_substrate_call_with_retry():
+            with self.subtensor.substrate as substrate:
+                block_hash = substrate.get_chain_head()
+                block = substrate.get_block_number( block_hash )
+                try:
+                    timestamp = substrate.query( module='Timestamp', storage_function='Now', block_hash = block_hash ).value / 1000
+                except Exception:
+                    timestamp = None
+                return block, timestamp
+        block, timestamp = make_substrate_call_with_retry()
+        self.observe( block, timestamp )
+        return block
+
+    @property
+    def block( self ) -> int:
+        r""" Returns the current chain block extrapolated from the last observation.
+            The chain head is read again once the observation is older than resync_interval.
+        Returns:
+            block (int):
+                Current chain block.
+        """
+        now = time.time()
+        with self._lock:
+            self.reads += 1
+            if self._observed_time != None and now - self._observed_time < self.resync_interval:
+                return self._extrapolate( now )
+        return self.sync()
+
+    @property
+    def blocks_since_epoch( self ) -> int:
+        r""" Returns blocks since the last epoch extrapolated from the local block.
+            The chain is read again once the extrapolation passes the end of the epoch.
+        Returns:
+            blocks_since_epoch (int):
+                Blocks since the last epoch.
+        """
+        block = self.block
+        if self._epoch_anchor != None:
+            anchor_block, blocks_since_epoch, blocks_per_epoch = self._epoch_anchor
+            blocks_since_epoch += block - anchor_block
+            if blocks_since_epoch < blocks_per_epoch:
+                return blocks_since_epoch
+
+        block = self.sync()
+        blocks_since_epoch = self.subtensor.blocks_since_epoch
+        self._epoch_anchor = ( block, blocks_since_epoch, self.subtensor.blocks_per_epoch )
+        return blocks_since_epoch
+
+    def reset( self ):
+        r""" Drops the last observation, the next read goes to the chain.
+        """
+        with self._lock:
+            self._anchor_block = None
+            self._anchor_time = None
+            self._observed_time = None
+            self._epoch_anchor = None
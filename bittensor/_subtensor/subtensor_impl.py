@@ -26,6 +26,7 @@ import bittensor.utils.weight_utils as weight_utils
 from retry import retry
 from substrateinterface import SubstrateInterface
 from bittensor.utils.balance import Balance
+from bittensor._subtensor.block_clock_impl import BlockClock
 from bittensor.utils import is_valid_bittensor_address_or_public_key
 from types import SimpleNamespace
 
@@ -40,6 +41,14 @@ from sys import platform
 from loguru import logger
 logger = logger.opt(colors=True)
 
+# SubtensorModule storage items served from the per block cache and fetched together in one batched call.
+HYPERPARAMETER_STORAGE_FUNCTIONS = [
+    'Rho', 'Kappa', 'Difficulty', 'TotalIssuance', 'ImmunityPeriod', 'ValidatorBatchSize', 'ValidatorSequenceLength',
+    'ValidatorEpochsPerReset', 'ValidatorEpochLen', 'TotalStake', 'MinAllowedWeights', 'MaxWeightLimit', 'ScalingLawPower',
+    'SynergyScalingLawPower', 'ValidatorExcludeQuantile', 'MaxAllowedMaxMinRatio', 'N', 'MaxAllowedUids', 'BlocksSinceLastStep',
+    'BlocksPerStep', 'ValidatorPruneLen', 'ValidatorLogitsDivergence'
+]
+
 class Subtensor:
     """
     Handles interactions with the subtensor chain.
@@ -49,6 +58,8 @@ class Subtensor:
         substrate: 'SubstrateInterface',
         network: str,
         chain_endpoint: str,
+        cache: bool = False,
+        cache_block_ttl: float = 1.0,
     ):
         r""" Initializes a subtensor chain interface.
             Args:
@@ -63,10 +74,26 @@ class Subtensor:
                     an entry point node from that network.
                 chain_endpoint (default=None, type=str)
                     The subtensor endpoint flag. If set, overrides the network argument.
+                cache (default=False, type=bool)
+                    If true, hyperparameter storage values are memoized per block and fetched in one batched call.
+                cache_block_ttl (default=1.0, type=float)
+                    Seconds the cached block number is served before the chain is polled again.
         """
         self.network = network
         self.chain_endpoint = chain_endpoint
         self.substrate = substrate
+        self.cache = cache
+        self.cache_block_ttl = cache_block_ttl
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.block_cache_hits = 0
+        self.block_cache_misses = 0
+        self._cached_block = None
+        self._cached_block_time = 0
+        self._cached_storage = {}
+        self._cached_storage_block = None
+        self._cached_storage_batch_failed = False
+        self.clock = BlockClock( subtensor = self, block_time = bittensor.__blocktime__ )
 
     def __str__(self) -> str:
         if self.network == self.chain_endpoint:
@@ -134,6 +161,114 @@ To run a local node (See: docs/running_a_validator.md) \n
                 else:
                     return False
 
+    def _query_subtensor_storage( self, storage_function: str ) -> object:
+        r""" Returns the value of a SubtensorModule storage item.
+            Served from the per block cache when caching is enabled.
+        Args:
+            storage_function (str):
+                Name of the SubtensorModule storage item.
+        Returns:
+            value (object):
+                Decoded storage value.
+        """
+        @retry(delay=2, tries=3, backoff=2, max_delay=4)
+        def make_substrate_call_with_retry():
+            with self.substrate as substrate:
+                return substrate.query( module='SubtensorModule', storage_function = storage_function ).value
+
+        if not self.cache or storage_function not in HYPERPARAMETER_STORAGE_FUNCTIONS:
+            return make_substrate_call_with_retry()
+
+        block = self._get_cached_block()
+        if self._cached_storage_block != block:
+            self._cached_storage = {}
+            self._cached_storage_block = block
+            self._cached_storage_batch_failed = False
+        if storage_function in self._cached_storage:
+            self.cache_hits += 1
+            return self._cached_storage[ storage_function ]
+        self.cache_misses += 1
+
+        # A failed batched read is not retried within the same block, reads fall back to single queries.
+        if not self._cached_storage_batch_failed:
+            try:
+                self._cached_storage = self.query_hyperparameters()
+            except Exception as e:
+                logger.warning('Batched hyperparameter query failed with: {}, falling back to single queries until the next block'.format(e))
+                self._cached_storage_batch_failed = True
+            if storage_function in self._cached_storage:
+                return self._cached_storage[ storage_function ]
+
+        value = make_substrate_call_with_retry()
+        self._cached_storage[ storage_function ] = value
+        return value
+
+    def _get_cached_block( self ) -> int:
+        r""" Returns the chain block, polling the chain at most once every cache_block_ttl seconds.
+        Returns:
+            block (int):
+                Current chain block.
+        """
+        if self._cached_block != None and time.time() - self._cached_block_time < self.cache_block_ttl:
+            self.block_cache_hits += 1
+        else:
+            self.block_cache_misses += 1
+            self._cached_block = self.get_current_block()
+            self._cached_block_time = time.time()
+        return self._cached_block
+
+    def query_hyperparameters( self, block: int = None ) -> Dict[str, object]:
+        r""" Returns all subtensor hyperparameter storage values read in one batched storage call.
+        Args:
+            block (int):
+                The block to read at, defaults to the chain head.
+        Returns:
+            hyperparameters (Dict[str, object]):
+                Decoded storage value for each name in HYPERPARAMETER_STORAGE_FUNCTIONS.
+        """
+        @retry(delay=2, tries=3, backoff=2, max_delay=4)
+        def make_substrate_call_with_retry():
+            with self.substrate as substrate:
+                block_hash = substrate.get_chain_head() if block == None else substrate.get_block_hash( block )
+                substrate.init_runtime( block_hash = block_hash )
+                metadata_module = substrate.get_metadata_module( 'SubtensorModule', block_hash = block_hash )
+                storage_items = {}
+                for storage_function in HYPERPARAMETER_STORAGE_FUNCTIONS:
+                    storage_hash = substrate.generate_storage_hash( 
+                        storage_module = metadata_module.value['storage']['prefix'], 
+                        storage_function = storage_function 
+                    )
+                    storage_item = substrate.get_metadata_storage_function( 'SubtensorModule', storage_function, block_hash = block_hash )
+                    if storage_item != None:
+                        storage_items[ storage_hash ] = ( storage_function, storage_item )
+
+                response = substrate.rpc_request( method = 'state_queryStorageAt', params = [ list( storage_items.keys() ), block_hash ] )
+                if 'error' in response:
+                    raise RuntimeError( response['error']['message'] )
+
+                values = {}
+                for result_group in response['result']:
+                    for storage_hash, change_data in result_group['changes']:
+                        storage_function, storage_item = storage_items[ storage_hash ]
+                        if change_data == None:
+                            # Storage items without a stored value fall back to their metadata default.
+                            change_data = storage_item.value_object['default'].value_object
+                        values[ storage_function ] = substrate.decode_scale( 
+                            type_string = storage_item.get_value_type_string(), 
+                            scale_bytes = change_data, 
+                            block_hash = block_hash 
+                        )
+                return values
+        return make_substrate_call_with_retry()
+
+    def clear_cache( self ):
+        r""" Drops all cached block and storage values.
+        """
+        self._cached_block = None
+        self._cached_storage = {}
+        self._cached_storage_block = None
+        self._cached_storage_batch_failed = False
+
     @property
     def rho (self) -> int:
         r""" Incentive mechanism rho parameter.
@@ -141,11 +276,7 @@ To run a local node (See: docs/running_a_validator.md) \n
             rho (int):
                 Incentive mechanism rho parameter.
         """
-        @retry(delay=2, tries=3, backoff=2, max_delay=4)
-        def make_substrate_call_with_retry():
-            with self.substrate as substrate:
-                return substrate.query( module='SubtensorModule', storage_function = 'Rho' ).value
-        return make_substrate_call_with_retry()
+        return self._query_subtensor_storage( 'Rho' )
 
     @property
     def kappa (self) -> int:
@@ -154,11 +285,7 @@ To run a local node (See: docs/running_a_validator.md) \n
             kappa (int):
                 Incentive mechanism kappa parameter.
         """
-        @retry(delay=2, tries=3, backoff=2, max_delay=4)
-        def make_substrate_call_with_retry():
-            with self.substrate as substrate:
-                return substrate.query( module='SubtensorModule', storage_function = 'Kappa' ).value
-        return make_substrate_call_with_retry()
+        return self._query_subtensor_storage( 'Kappa' )
 
     @property
     def difficulty (self) -> int:
@@ -167,11 +294,7 @@ To run a local node (See: docs/running_a_validator.md) \n
             difficulty (int):
                 Registration difficulty.
         """
-        @retry(delay=2, tries=3, backoff=2, max_delay=4)
-        def make_substrate_call_with_retry():
-            with self.substrate as substrate:
-                return substrate.query( module='SubtensorModule', storage_function = 'Difficulty' ).value
-        return make_substrate_call_with_retry()
+        return self._query_subtensor_storage( 'Difficulty' )
 
     @property
     def total_issuance (self) -> 'bittensor.Balance':
@@ -180,11 +303,7 @@ To run a local node (See: docs/running_a_validator.md) \n
             total_issuance (int):
                 Total issuance as balance.
         """
-        @retry(delay=2, tries=3, backoff=2, max_delay=4)
-        def make_substrate_call_with_retry():
-            with self.substrate as substrate:
-                return bittensor.Balance.from_rao( substrate.query(  module='SubtensorModule', storage_function = 'TotalIssuance').value )
-        return make_substrate_call_with_retry()
+        return bittensor.Balance.from_rao( self._query_subtensor_storage( 'TotalIssuance' ) )
 
     @property
     def immunity_period (self) -> int:
@@ -193,11 +312,7 @@ To run a local node (See: docs/running_a_validator.md) \n
             immunity_period (int):
                 Chain registration immunity_period
         """
-        @retry(delay=2, tries=3, backoff=2, max_delay=4)
-        def make_substrate_call_with_retry():
-            with self.substrate as substrate:
-                return substrate.query( module='SubtensorModule', storage_function = 'ImmunityPeriod' ).value
-        return make_substrate_call_with_retry()
+        return self._query_subtensor_storage( 'ImmunityPeriod' )
 
     @property
     def validator_batch_size (self) -> int:
@@ -206,11 +321,7 @@ To run a local node (See: docs/running_a_validator.md) \n
             batch_size (int):
                 Chain default validator batch size.
         """
-        @retry(delay=2, tries=3, backoff=2, max_delay=4)
-        def make_substrate_call_with_retry():
-            with self.substrate as substrate:
-                return substrate.query( module='SubtensorModule', storage_function = 'ValidatorBatchSize' ).value
-        return make_substrate_call_with_retry()
+        return self._query_subtensor_storage( 'ValidatorBatchSize' )
 
 
     @property
@@ -220,11 +331,7 @@ To run a local node (See: docs/running_a_validator.md) \n
             sequence_length (int):
                 Chain default validator sequence length.
         """
-        @retry(delay=2, tries=3, backoff=2, max_delay=4)
-        def make_substrate_call_with_retry():
-            with self.substrate as substrate:
-                return substrate.query( module='SubtensorModule', storage_function = 'ValidatorSequenceLength' ).value
-        return make_substrate_call_with_retry()
+        return self._query_subtensor_storage( 'ValidatorSequenceLength' )
 
     @property
     def validator_epochs_per_reset (self) -> int:
@@ -233,11 +340,7 @@ To run a local node (See: docs/running_a_validator.md) \n
             validator_epochs_per_reset (int):
                 Epochs passed before the validator resets its weights.
         """
-        @retry(delay=2, tries=3, backoff=2, max_delay=4)
-        def make_substrate_call_with_retry():
-            with self.substrate as substrate:
-                return substrate.query( module='SubtensorModule', storage_function = 'ValidatorEpochsPerReset' ).value
-        return make_substrate_call_with_retry()
+        return self._query_subtensor_storage( 'ValidatorEpochsPerReset' )
 
     @property
     def validator_epoch_length (self) -> int:
@@ -246,11 +349,7 @@ To run a local node (See: docs/running_a_validator.md) \n
             validator_epoch_length (int):
                 Default validator epoch length. 
         """
-        @retry(delay=2, tries=3, backoff=2, max_delay=4)
-        def make_substrate_call_with_retry():
-            with self.substrate as substrate:
-                return substrate.query( module='SubtensorModule', storage_function = 'ValidatorEpochLen' ).value
-        return make_substrate_call_with_retry()
+        return self._query_subtensor_storage( 'ValidatorEpochLen' )
 
     @property
     def total_stake (self) -> 'bittensor.Balance':
@@ -259,11 +358,7 @@ To run a local node (See: docs/running_a_validator.md) \n
             total_stake (bittensor.Balance):
                 Total stake as balance.
         """
-        @retry(delay=2, tries=3, backoff=2, max_delay=4)
-        def make_substrate_call_with_retry():
-            with self.substrate as substrate:
-                return bittensor.Balance.from_rao( substrate.query(  module='SubtensorModule', storage_function = 'TotalStake' ).value )
-        return make_substrate_call_with_retry()
+        return bittensor.Balance.from_rao( self._query_subtensor_storage( 'TotalStake' ) )
 
     @property
     def min_allowed_weights (self) -> int:
@@ -272,11 +367,7 @@ To run a local node (See: docs/running_a_validator.md) \n
             min_allowed_weights (int):
                 Min number of weights allowed to be set.
         """
-        @retry(delay=2, tries=3, backoff=2, max_delay=4)
-        def make_substrate_call_with_retry():
-            with self.substrate as substrate:
-                return substrate.query( module='SubtensorModule', storage_function = 'MinAllowedWeights' ).value
-        return make_substrate_call_with_retry()
+        return self._query_subtensor_storage( 'MinAllowedWeights' )
 
     @property
     def max_weight_limit (self) -> int:
@@ -285,12 +376,8 @@ To run a local node (See: docs/running_a_validator.md) \n
             max_weight (int):
                 the max value for weights after normalizaiton
         """
-        @retry(delay=2, tries=3, backoff=2, max_delay=4)
-        def make_substrate_call_with_retry():
-            with self.substrate as substrate:
-                U32_MAX = 4294967295
-                return substrate.query( module='SubtensorModule', storage_function = 'MaxWeightLimit' ).value/U32_MAX
-        return make_substrate_call_with_retry()
+        U32_MAX = 4294967295
+        return self._query_subtensor_storage( 'MaxWeightLimit' )/U32_MAX
 
     @property
     def scaling_law_power (self) -> int:
@@ -299,12 +386,8 @@ To run a local node (See: docs/running_a_validator.md) \n
             ScalingLawPower (float):
                 the power term attached to scaling law
         """
-        @retry(delay=2, tries=3, backoff=2, max_delay=4)
-        def make_substrate_call_with_retry():
-            with self.substrate as substrate:
-                MAX = 100
-                return substrate.query( module='SubtensorModule', storage_function = 'ScalingLawPower' ).value/MAX
-        return make_substrate_call_with_retry()
+        MAX = 100
+        return self._query_subtensor_storage( 'ScalingLawPower' )/MAX
 
     @property
     def synergy_scaling_law_power (self) -> int:
@@ -313,12 +396,8 @@ To run a local node (See: docs/running_a_validator.md) \n
             SynergyScalingLawPower (float):
                 the term attached to synergy calculation during shapley scores
         """
-        @retry(delay=2, tries=3, backoff=2, max_delay=4)
-        def make_substrate_call_with_retry():
-            with self.substrate as substrate:
-                MAX = 100
-                return substrate.query( module='SubtensorModule', storage_function = 'SynergyScalingLawPower' ).value/MAX
-        return make_substrate_call_with_retry()
+        MAX = 100
+        return self._query_subtensor_storage( 'SynergyScalingLawPower' )/MAX
 
     @property
     def validator_exclude_quantile (self) -> int:
@@ -327,12 +406,8 @@ To run a local node (See: docs/running_a_validator.md) \n
             ValidatorExcludeQuantile (float):
                 the quantile that validators should exclude when setting their weights
         """
-        @retry(delay=2, tries=3, backoff=2, max_delay=4)
-        def make_substrate_call_with_retry():
-            with self.substrate as substrate:
-                MAX = 100
-                return substrate.query( module='SubtensorModule', storage_function = 'ValidatorExcludeQuantile' ).value/MAX
-        return make_substrate_call_with_retry()
+        MAX = 100
+        return self._query_subtensor_storage( 'ValidatorExcludeQuantile' )/MAX
 
     @property
     def max_allowed_min_max_ratio(self) -> int:
@@ -341,11 +416,7 @@ To run a local node (See: docs/running_a_validator.md) \n
             max_allowed_min_max_ratio (int):
                 The max ratio allowed between the min and max.
         """
-        @retry(delay=2, tries=3, backoff=2, max_delay=4)
-        def make_substrate_call_with_retry():
-            with self.substrate as substrate:
-                return substrate.query( module='SubtensorModule', storage_function = 'MaxAllowedMaxMinRatio' ).value
-        return make_substrate_call_with_retry()
+        return self._query_subtensor_storage( 'MaxAllowedMaxMinRatio' )
 
     @property
     def n (self) -> int:
@@ -354,11 +425,7 @@ To run a local node (See: docs/running_a_validator.md) \n
             n (int):
                 Total number of neurons on chain.
         """
-        @retry(delay=2, tries=3, backoff=2, max_delay=4)
-        def make_substrate_call_with_retry():
-            with self.substrate as substrate:
-                return substrate.query( module='SubtensorModule', storage_function = 'N' ).value
-        return make_substrate_call_with_retry()
+        return self._query_subtensor_storage( 'N' )
 
     @property
     def max_n (self) -> int:
@@ -367,11 +434,7 @@ To run a local node (See: docs/running_a_validator.md) \n
             max_n (int):
                 Maximum number of neuron positions on the graph.
         """
-        @retry(delay=2, tries=3, backoff=2, max_delay=4)
-        def make_substrate_call_with_retry():
-            with self.substrate as substrate:
-                return substrate.query( module='SubtensorModule', storage_function = 'MaxAllowedUids' ).value
-        return make_substrate_call_with_retry()
+        return self._query_subtensor_storage( 'MaxAllowedUids' )
 
     @property
     def block (self) -> int:
@@ -380,6 +443,8 @@ To run a local node (See: docs/running_a_validator.md) \n
             block (int):
                 Current chain block.
         """
+        if self.cache:
+            return self._get_cached_block()
         return self.get_current_block()
 
     @property
@@ -389,11 +454,7 @@ To run a local node (See: docs/running_a_validator.md) \n
             blocks_since_epoch (int):
                 blocks_since_epoch 
         """
-        @retry(delay=2, tries=3, backoff=2, max_delay=4)
-        def make_substrate_call_with_retry():
-            with self.substrate as substrate:
-                return substrate.query( module='SubtensorModule', storage_function = 'BlocksSinceLastStep' ).value
-        return make_substrate_call_with_retry()
+        return self._query_subtensor_storage( 'BlocksSinceLastStep' )
 
     @property
     def blocks_per_epoch (self) -> int:
@@ -402,11 +463,7 @@ To run a local node (See: docs/running_a_validator.md) \n
             blocks_per_epoch (int):
                 blocks_per_epoch 
         """
-        @retry(delay=2, tries=3, backoff=2, max_delay=4)
-        def make_substrate_call_with_retry():
-            with self.substrate as substrate:
-                return substrate.query( module='SubtensorModule', storage_function = 'BlocksPerStep' ).value
-        return make_substrate_call_with_retry()
+        return self._query_subtensor_storage( 'BlocksPerStep' )
 
     def get_n (self, block: int = None) -> int:
         r""" Returns total number of neurons on the chain.
@@ -431,11 +488,7 @@ To run a local node (See: docs/running_a_validator.md) \n
             prune_len (int):
                 the number of pruned tokens from each requests 
         """
-        @retry(delay=2, tries=3, backoff=2, max_delay=4)
-        def make_substrate_call_with_retry():
-            with self.substrate as substrate:
-                return substrate.query( module='SubtensorModule', storage_function = 'ValidatorPruneLen' ).value
-        return make_substrate_call_with_retry()
+        return self._query_subtensor_storage( 'ValidatorPruneLen' )
 
     @property
     def logits_divergence (self) -> int:
@@ -444,12 +497,8 @@ To run a local node (See: docs/running_a_validator.md) \n
             logits_divergence (int):
                 the divergence value for logit distances, a measure for anomaly detection 
         """
-        @retry(delay=2, tries=3, backoff=2, max_delay=4)
-        def make_substrate_call_with_retry():
-            with self.substrate as substrate:
-                U64MAX = 18446744073709551615
-                return substrate.query( module='SubtensorModule', storage_function = 'ValidatorLogitsDivergence' ).value/U64MAX
-        return make_substrate_call_with_retry()
+        U64MAX = 18446744073709551615
+        return self._query_subtensor_storage( 'ValidatorLogitsDivergence' )/U64MAX
 
     def serve_axon (
         self,
@@ -1555,7 +1604,9 @@ To run a local node (See: docs/running_a_validator.md) \n
         def make_substrate_call_with_retry():
             with self.substrate as substrate:
                 return substrate.get_block_number(None)
-        return make_substrate_call_with_retry()
+        block = make_substrate_call_with_retry()
+        self.clock.observe( block )
+        return block
 
     def get_balances(self, block: int = None) -> Dict[str, Balance]:
         @retry(delay=2, tries=3, backoff=2, max_delay=4)
@@ -1573,15 +1624,26 @@ To run a local node (See: docs/running_a_validator.md) \n
             return_dict[r[0].value] = bal
         return return_dict
 
-    def neurons(self, block: int = None ) -> List[SimpleNamespace]: 
+    def neurons(self, block: int = None, batched: bool = True, page_size: int = 1000 ) -> List[SimpleNamespace]: 
         r""" Returns a list of neuron from the chain. 
         Args:
             block (int):
                 block to sync from.
+            batched (bool):
+                If true, neurons are pulled with paged multi-key storage reads over a single connection,
+                falling back to one query per uid if the batched read fails.
+            page_size (int):
+                Number of neuron storage entries fetched per round trip when batched.
         Returns:
             neuron (List[SimpleNamespace]):
                 List of neuron objects.
         """
+        if batched:
+            try:
+                return self._neurons_batched( block = block, page_size = page_size )
+            except Exception as e:
+                logger.warning('Batched neuron query failed with: {}, falling back to one query per uid'.format(e))
+
         neurons = []
         for id in tqdm(range(self.get_n( block ))): 
             try:
@@ -1592,6 +1654,39 @@ To run a local node (See: docs/running_a_validator.md) \n
                 break
         return neurons
 
+    def _neurons_batched(self, block: int = None, page_size: int = 1000 ) -> List[SimpleNamespace]:
+        r""" Returns a list of neuron from the chain using paged query_map storage reads.
+        Args:
+            block (int):
+                block to sync from.
+            page_size (int):
+                Number of neuron storage entries fetched per round trip.
+        Returns:
+            neuron (List[SimpleNamespace]):
+                List of neuron objects ordered by uid.
+        """
+        start_time = time.time()
+        @retry(delay=2, tries=3, backoff=2, max_delay=4)
+        def make_substrate_call_with_retry():
+            with self.substrate as substrate:
+                result = substrate.query_map( 
+                    module='SubtensorModule',  
+                    storage_function='Neurons', 
+                    block_hash = None if block == None else substrate.get_block_hash( block ),
+                    page_size = page_size
+                )
+                return [ ( uid.value, neuron.value ) for uid, neuron in result ]
+        records = make_substrate_call_with_retry()
+        fetch_time = time.time() - start_time
+
+        start_time = time.time()
+        records.sort( key = lambda record: record[0] )
+        neurons = [ Subtensor._neuron_dict_to_namespace( dict( neuron ) ) for _, neuron in records ]
+        decode_time = time.time() - start_time
+
+        logger.info('Pulled <blue>{}</blue> neurons, fetch: <blue>{:.2f}s</blue>, decode: <blue>{:.2f}s</blue>'.format( len(neurons), fetch_time, decode_time ))
+        return neurons
+
     @staticmethod
     def _null_neuron() -> SimpleNamespace:
         neuron = SimpleNamespace()
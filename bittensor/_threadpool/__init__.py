@@ -31,6 +31,8 @@ class prioritythreadpool:
             config: 'bittensor.config' = None,
             max_workers: int = None,
             maxsize: int = None,
+            max_per_caller: int = None,
+            max_wait: float = None,
         ):
         r""" Initializes a priority thread pool.
             Args:
@@ -40,15 +42,26 @@ class prioritythreadpool:
 .                   The maximum number of threads in thread pool
                 maxsize (default=-1, type=int)
                     The maximum number of tasks in the priority queue
+                max_per_caller (default=8, type=int)
+                    The maximum number of tasks of one caller in the priority queue
+                max_wait (default=5, type=float)
+                    Seconds after which a queued task runs before tasks with a higher priority
         """        
         if config == None: 
             config = prioritythreadpool.config()
         config = copy.deepcopy( config )
         config.axon.priority.max_workers = max_workers if max_workers != None else config.axon.priority.max_workers
         config.axon.priority.maxsize = maxsize if maxsize != None else config.axon.priority.maxsize
+        config.axon.priority.max_per_caller = max_per_caller if max_per_caller != None else config.axon.priority.max_per_caller
+        config.axon.priority.max_wait = max_wait if max_wait != None else config.axon.priority.max_wait
 
         prioritythreadpool.check_config( config )
-        return priority_thread_pool_impl.PriorityThreadPoolExecutor(maxsize = config.axon.priority.maxsize, max_workers = config.axon.priority.max_workers)
+        return priority_thread_pool_impl.PriorityThreadPoolExecutor(
+            maxsize = config.axon.priority.maxsize,
+            max_workers = config.axon.priority.max_workers,
+            max_per_caller = config.axon.priority.max_per_caller,
+            max_wait = config.axon.priority.max_wait
+        )
 
     @classmethod
     def add_args(cls, parser: argparse.ArgumentParser, prefix: str = None ):
@@ -58,6 +71,8 @@ class prioritythreadpool:
         try:
             parser.add_argument('--' + prefix_str + 'axon.priority.max_workers', type = int, help='''maximum number of threads in thread pool''', default = bittensor.defaults.axon.priority.max_workers)
             parser.add_argument('--' + prefix_str + 'axon.priority.maxsize', type=int, help='''maximum size of tasks in priority queue''', default = bittensor.defaults.axon.priority.maxsize)  
+            parser.add_argument('--' + prefix_str + 'axon.priority.max_per_caller', type=int, help='''maximum number of tasks of one caller in priority queue, -1 for no limit''', default = bittensor.defaults.axon.priority.max_per_caller)
+            parser.add_argument('--' + prefix_str + 'axon.priority.max_wait', type=float, help='''seconds after which a queued task runs before tasks with a higher priority''', default = bittensor.defaults.axon.priority.max_wait)
         except argparse.ArgumentError:
             # re-parsing arguments.
             pass
@@ -79,6 +94,8 @@ class prioritythreadpool:
         defaults.axon.priority = bittensor.Config()
         defaults.axon.priority.max_workers = os.getenv('BT_AXON_PRIORITY_MAX_WORKERS') if os.getenv('BT_AXON_PRIORITY_MAX_WORKERS') != None else 5
         defaults.axon.priority.maxsize = os.getenv('BT_AXON_PRIORITY_MAXSIZE') if os.getenv('BT_AXON_PRIORITY_MAXSIZE') != None else 10
+        defaults.axon.priority.max_per_caller = os.getenv('BT_AXON_PRIORITY_MAX_PER_CALLER') if os.getenv('BT_AXON_PRIORITY_MAX_PER_CALLER') != None else 8
+        defaults.axon.priority.max_wait = os.getenv('BT_AXON_PRIORITY_MAX_WAIT') if os.getenv('BT_AXON_PRIORITY_MAX_WAIT') != None else 5
     
     @classmethod   
     def config(cls) -> 'bittensor.Config':
@@ -95,3 +112,4 @@ class prioritythreadpool:
         """
         assert isinstance(config.axon.priority.max_workers, int), 'axon.priority.max_workers must be a int'
         assert isinstance(config.axon.priority.maxsize, int), 'axon.priority.maxsize must be a int'
+        assert isinstance(config.axon.priority.max_per_caller, int), 'axon.priority.max_per_caller must be a int'
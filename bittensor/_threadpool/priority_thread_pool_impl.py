@@ -7,15 +7,16 @@
 __author__ = 'Brian Quinlan (brian@sweetapp.com)'
 
 import os
-import sys
 import bittensor
 from concurrent.futures import _base
+import collections
+import heapq
 import itertools
 import queue
-import random
 import threading
 import weakref
 import time
+from types import SimpleNamespace
 from loguru import logger
 
 # Workers are created as daemon threads. This is done to allow the interpreter
@@ -36,18 +37,21 @@ _threads_queues = weakref.WeakKeyDictionary()
 _shutdown = False
 
 class _WorkItem(object):
-    def __init__(self, future, fn, start_time, args, kwargs):
+    def __init__(self, future, fn, start_time, args, kwargs, caller = None, deadline = None):
         self.future = future
         self.fn = fn
         self.start_time = start_time
         self.args = args
         self.kwargs = kwargs
+        self.caller = caller
+        self.deadline = deadline if deadline != None else start_time + bittensor.__blocktime__
+        self.queued = False
 
     def run(self):
         """ Run the given work item
         """
-        # Checks if future is canceled or if work item is stale
-        if (not self.future.set_running_or_notify_cancel()) or (time.time()-self.start_time > bittensor.__blocktime__):
+        # Checks if future is canceled
+        if not self.future.set_running_or_notify_cancel():
             return
 
         try:
@@ -60,7 +64,192 @@ class _WorkItem(object):
             self.future.set_result(result)
 
 
-NULL_ENTRY = (sys.maxsize, _WorkItem(None, None, time.time(), (), {}))
+    def fail(self, exception):
+        """ Fails the future of a work item which is not run
+        """
+        if self.future.set_running_or_notify_cancel():
+            self.future.set_exception(exception)
+
+
+class _FairQueue(object):
+    """ Weighted fair queue of work items with deadlines.
+
+    Each caller is a flow served in proportion to its priority with self clocked fair queueing:
+    an item is tagged with finish = max(virtual time, finish of the caller's previous item) + 1 / weight
+    and the smallest tag runs first, the virtual time being the tag of the last item run. Items without
+    a caller are tagged alone, so they run by priority. Items waiting longer than max_wait run first
+    regardless of their tag, within aging_share of the runs so that aging can not turn an overloaded
+    queue back into a FIFO, so low priority callers are not starved. Items past their deadline are
+    failed with a TimeoutError instead of being run.
+    """
+    def __init__(self, maxsize = -1, max_per_caller = -1, max_wait = None, min_weight = 1e-3, aging_share = 0.1):
+        self.maxsize = maxsize
+        self.max_per_caller = max_per_caller
+        self.max_wait = max_wait
+        self.min_weight = min_weight
+        self.aging_share = aging_share
+        self.aging_credit = 1.0
+        self.condition = threading.Condition(threading.RLock())
+        self.closed = False
+        # Lazy heap of (finish tag, sequence, item) and arrival order deque, items no longer queued are skipped.
+        self.heap = []
+        self.arrivals = collections.deque()
+        self.depth = 0
+        self.callers = collections.Counter()
+        self.finish_tags = {}
+        self.virtual_time = 0.0
+        self.sequence = itertools.count()
+        self.stats = SimpleNamespace(
+            submitted = 0,
+            executed = 0,
+            expired = 0,
+            cancelled = 0,
+            rejected = 0,
+            shed = 0,
+            aged = 0,
+            max_depth = 0,
+            wait_time = 0.0,
+            max_wait_time = 0.0,
+        )
+
+    def empty(self):
+        return self.depth == 0
+
+    def qsize(self):
+        return self.depth
+
+    def put(self, item, priority):
+        """ Queues the item, raises queue.Full when the queue or the caller's share of it is full.
+        """
+        with self.condition:
+            now = time.time()
+            if self.max_per_caller > 0 and item.caller != None and self.callers[item.caller] >= self.max_per_caller:
+                self.stats.rejected += 1
+                raise queue.Full('caller {} has {} queued items'.format(item.caller, self.callers[item.caller]))
+
+            weight = max(float(priority), self.min_weight)
+            tag = self._tag(item.caller, weight)
+
+            if self.maxsize > 0 and self.depth >= self.maxsize:
+                self._expire(now)
+            if self.maxsize > 0 and self.depth >= self.maxsize:
+                # Sheds the queued item with the largest tag if the new item would run before it.
+                worst = max((entry for entry in self.heap if entry[2].queued), key = lambda entry: entry[0])
+                if worst[0] <= tag:
+                    self.stats.rejected += 1
+                    raise queue.Full('priority queue is full')
+                self._remove(worst[2])
+                worst[2].fail(queue.Full('shed from a full priority queue'))
+                self.stats.shed += 1
+                tag = self._tag(item.caller, weight)
+
+            if item.caller != None:
+                self.finish_tags[item.caller] = tag
+            item.queued = True
+            item.enqueue_time = now
+            heapq.heappush(self.heap, (tag, next(self.sequence), item))
+            self.arrivals.append(item)
+            self.depth += 1
+            self.callers[item.caller] += 1
+            self.stats.submitted += 1
+            self.stats.max_depth = max(self.stats.max_depth, self.depth)
+            self.condition.notify()
+
+    def get(self):
+        """ Blocks for the next item to run, returns None once the queue is closed and drained.
+        """
+        with self.condition:
+            while True:
+                item = self._next(time.time())
+                if item != None:
+                    return item
+                if self.closed:
+                    return None
+                self.condition.wait()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def drain(self):
+        """ Removes and returns all queued items.
+        """
+        with self.condition:
+            items = [entry[2] for entry in self.heap if entry[2].queued]
+            for item in items:
+                self._remove(item)
+            return items
+
+    def _tag(self, caller, weight):
+        start = self.virtual_time if caller == None else max(self.virtual_time, self.finish_tags.get(caller, 0.0))
+        return start + 1 / weight
+
+    def _next(self, now):
+        # Aged items go first, they do not advance the virtual time.
+        while self.arrivals:
+            item = self.arrivals.popleft()
+            if item.queued and not self._evict_dead(item, now):
+                self.arrivals.appendleft(item)
+                break
+        self.aging_credit = min(self.aging_credit + self.aging_share, 1.0)
+        if self.max_wait != None and self.aging_credit >= 1.0 and self.arrivals and now - self.arrivals[0].enqueue_time > self.max_wait:
+            item = self.arrivals.popleft()
+            self.aging_credit -= 1.0
+            self.stats.aged += 1
+            return self._take(item, now)
+
+        while self.heap:
+            tag, _, item = heapq.heappop(self.heap)
+            if not item.queued or self._evict_dead(item, now):
+                continue
+            self.virtual_time = tag
+            return self._take(item, now)
+        return None
+
+    def _take(self, item, now):
+        self._remove(item)
+        wait_time = now - item.enqueue_time
+        self.stats.executed += 1
+        self.stats.wait_time += wait_time
+        self.stats.max_wait_time = max(self.stats.max_wait_time, wait_time)
+        return item
+
+    def _remove(self, item):
+        item.queued = False
+        self.depth -= 1
+        self.callers[item.caller] -= 1
+        if self.callers[item.caller] <= 0:
+            del self.callers[item.caller]
+        if self.depth == 0:
+            # Restarts the virtual clock once idle so tags stay small.
+            self.heap = []
+            self.arrivals.clear()
+            self.finish_tags = {}
+            self.virtual_time = 0.0
+        elif len(self.heap) > 2 * self.depth + 64:
+            self.heap = [entry for entry in self.heap if entry[2].queued]
+            heapq.heapify(self.heap)
+            self.arrivals = collections.deque(queued for queued in self.arrivals if queued.queued)
+
+    def _evict_dead(self, item, now):
+        # Removes the item if it was cancelled or passed its deadline.
+        if item.future.cancelled():
+            self._remove(item)
+            self.stats.cancelled += 1
+            return True
+        if item.deadline < now:
+            self._remove(item)
+            item.fail(_base.TimeoutError('work item passed its deadline in the priority queue'))
+            self.stats.expired += 1
+            return True
+        return False
+
+    def _expire(self, now):
+        for entry in list(self.heap):
+            if entry[2].queued:
+                self._evict_dead(entry[2], now)
+
 
 def _worker(executor_reference, work_queue, initializer, initargs):
     if initializer is not None:
@@ -74,17 +263,13 @@ def _worker(executor_reference, work_queue, initializer, initargs):
             return
     try:
         while True:
-            work_item = work_queue.get(block=True)
-            priority = work_item[0]
-            item = work_item[1]
-            if priority == sys.maxsize:
-                del item
-            elif item is not None:
+            item = work_queue.get()
+            if item is not None:
                 item.run()
                 # Delete references to object. See issue16284
                 del item
                 continue
-                
+
             executor = executor_reference()
             # Exit if:
             #   - The interpreter is shutting down OR
@@ -96,11 +281,10 @@ def _worker(executor_reference, work_queue, initializer, initargs):
                 if executor is not None:
                     executor._shutdown = True
                 # Notice other workers
-                work_queue.put(NULL_ENTRY)
+                work_queue.close()
                 return
             del executor
     except BaseException:
-        logger.error('work_item', work_item)
         _base.LOGGER.critical('Exception in worker', exc_info=True)
 
 
@@ -111,17 +295,20 @@ class BrokenThreadPool(_base.BrokenExecutor):
 
 
 class PriorityThreadPoolExecutor(_base.Executor):
-    """ Base threadpool executor with a priority queue 
+    """ Base threadpool executor with a weighted fair priority queue
     """
     # Used to assign unique thread names when thread_name_prefix is not supplied.
     _counter = itertools.count().__next__
 
     def __init__(self, maxsize = -1, max_workers=None, thread_name_prefix='',
-                 initializer=None, initargs=()):
+                 initializer=None, initargs=(), max_per_caller = -1, max_wait = None):
         """Initializes a new ThreadPoolExecutor instance.
         Args:
+            maxsize: The maximum number of queued calls, -1 for no limit.
             max_workers: The maximum number of threads that can be used to
                 execute the given calls.
+            max_per_caller: The maximum number of queued calls per caller, -1 for no limit.
+            max_wait: Seconds after which a queued call runs before calls with a higher priority, None to disable.
             thread_name_prefix: An optional name prefix to give our threads.
             initializer: An callable used to initialize worker threads.
             initargs: A tuple of arguments to pass to the initializer.
@@ -137,7 +324,7 @@ class PriorityThreadPoolExecutor(_base.Executor):
             raise TypeError("initializer must be a callable")
 
         self._max_workers = max_workers
-        self._work_queue = queue.PriorityQueue(maxsize = maxsize)
+        self._work_queue = _FairQueue(maxsize = maxsize, max_per_caller = max_per_caller, max_wait = max_wait)
         self._idle_semaphore = threading.Semaphore(0)
         self._threads = set()
         self._broken = False
@@ -152,7 +339,35 @@ class PriorityThreadPoolExecutor(_base.Executor):
     def is_empty(self):
         return self._work_queue.empty()
 
+    @property
+    def stats(self):
+        return self._work_queue.stats
+
+    def get_queue_metrics(self):
+        r""" Return the queue depth, number of queued callers, mean wait time and the queue counters.
+        """
+        with self._work_queue.condition:
+            metrics = {
+                'depth': self._work_queue.depth,
+                'callers': len(self._work_queue.callers),
+                'mean_wait_time': self.stats.wait_time / max(self.stats.executed, 1),
+            }
+            metrics.update(vars(self.stats))
+        return metrics
+
     def submit(self, fn, *args, **kwargs):
+        """Submits a callable to be executed with the given arguments.
+
+        The keyword arguments priority, caller and deadline are consumed by the scheduler:
+        calls of the same caller share its queue and run in proportion to its priority,
+        calls still queued at the deadline (time.time() seconds, default one block after
+        submission) fail with a TimeoutError instead of running.
+
+        Raises queue.Full when the queue or the caller's share of it is full.
+
+        Returns:
+            A Future representing the given call.
+        """
         with self._shutdown_lock:
             if self._broken:
                 raise BrokenThreadPool(self._broken)
@@ -163,21 +378,16 @@ class PriorityThreadPoolExecutor(_base.Executor):
                 raise RuntimeError('cannot schedule new futures after '
                                    'interpreter shutdown')
 
-            priority = kwargs.get('priority', random.randint(0, 1000000))
-            if priority == 0:
-                priority = random.randint(1, 100)
-            eplison = random.uniform(0,0.01) * priority
+            priority = kwargs.pop('priority', 0)
+            caller = kwargs.pop('caller', None)
+            deadline = kwargs.pop('deadline', None)
             start_time = time.time()
-            if 'priority' in kwargs:
-                del kwargs['priority']
-            
 
             f = _base.Future()
-            w = _WorkItem(f, fn, start_time, args, kwargs)
-            self._work_queue.put((-float(priority + eplison), w), block=False)
+            w = _WorkItem(f, fn, start_time, args, kwargs, caller = caller, deadline = deadline)
+            self._work_queue.put(w, priority)
             self._adjust_thread_count()
             return f
-    submit.__doc__ = _base.Executor.submit.__doc__
 
 
     def _adjust_thread_count(self):
@@ -188,7 +398,7 @@ class PriorityThreadPoolExecutor(_base.Executor):
         # When the executor gets lost, the weakref callback will wake up
         # the worker threads.
         def weakref_cb(_, q=self._work_queue):
-            q.put(NULL_ENTRY)
+            q.close()
 
         num_threads = len(self._threads)
         if num_threads < self._max_workers:
@@ -209,18 +419,13 @@ class PriorityThreadPoolExecutor(_base.Executor):
             self._broken = ('A thread initializer failed, the thread pool '
                             'is not usable anymore')
             # Drain work queue and mark pending futures failed
-            while True:
-                try:
-                    work_item = self._work_queue.get_nowait()
-                except queue.Empty:
-                    break
-                if work_item is not None:
-                    work_item.future.set_exception(BrokenThreadPool(self._broken))
+            for work_item in self._work_queue.drain():
+                work_item.fail(BrokenThreadPool(self._broken))
 
     def shutdown(self, wait=True):
         with self._shutdown_lock:
             self._shutdown = True
-            self._work_queue.put(NULL_ENTRY)
+            self._work_queue.close()
         
         if wait:
             for t in self._threads:
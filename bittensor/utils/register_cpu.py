@@ -0,0 +1,242 @@
+""" Vectorized CPU kernel for the registration PoW, evaluates a batch of nonces per call with NumPy.
+"""
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+# Copyright © 2022 Opentensor Foundation
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+# The seal is keccak256( sha256( nonce (8 bytes, little endian) + block hash (32 bytes) ) ).
+# Both hashes fit in a single block, so every nonce is one sha256 compression and one keccak-f permutation,
+# computed here for a whole batch of nonces at once with one array lane per nonce.
+
+SHA256_K = np.array([
+    0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+    0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+    0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+    0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+    0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+    0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+    0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+    0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2,
+], dtype = np.uint32)
+
+SHA256_H = np.array([
+    0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a, 0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19,
+], dtype = np.uint32)
+
+KECCAK_RC = np.array([
+    0x0000000000000001, 0x0000000000008082, 0x800000000000808A, 0x8000000080008000,
+    0x000000000000808B, 0x0000000080000001, 0x8000000080008081, 0x8000000000008009,
+    0x000000000000008A, 0x0000000000000088, 0x0000000080008009, 0x000000008000000A,
+    0x000000008000808B, 0x800000000000008B, 0x8000000000008089, 0x8000000000008003,
+    0x8000000000008002, 0x8000000000000080, 0x000000000000800A, 0x800000008000000A,
+    0x8000000080008081, 0x8000000000008080, 0x0000000080000001, 0x8000000080008008,
+], dtype = np.uint64)
+
+# Rotation offsets of the rho step, indexed by lane x + 5 * y.
+KECCAK_ROTATIONS = [
+     0,  1, 62, 28, 27,
+    36, 44,  6, 55, 20,
+     3, 10, 43, 25, 39,
+    41, 45, 15, 21,  8,
+    18,  2, 61, 56, 14,
+]
+
+# Destination lane of the pi step, lane (x, y) moves to (y, 2x + 3y).
+KECCAK_PI = [ y + 5 * ((2 * x + 3 * y) % 5) for y in range(5) for x in range(5) ]
+
+
+def _rotr32( x: np.ndarray, n: int ) -> np.ndarray:
+    return (x >> np.uint32(n)) | (x << np.uint32(32 - n))
+
+
+def sha256_pre_seals( nonces: np.ndarray, block_words: np.ndarray ) -> np.ndarray:
+    r""" Computes sha256( nonce + block hash ) for a batch of nonces.
+        Args:
+            nonces (:obj:`np.ndarray` of type :obj:`np.uint64` and shape :obj:`(batch_size)`, `required`):
+                The nonces to hash.
+            block_words (:obj:`np.ndarray` of type :obj:`np.uint32` and shape :obj:`(8)`, `required`):
+                The block hash as big endian 32 bit words.
+
+        Returns:
+            digests (:obj:`np.ndarray` of type :obj:`np.uint32` and shape :obj:`(8, batch_size)`):
+                The sha256 digests as big endian 32 bit words.
+    """
+    # The 40 byte message is padded to a single 64 byte block, the length is 320 bits.
+    w = [
+        (nonces & np.uint64(0xFFFFFFFF)).astype(np.uint32).byteswap(),
+        (nonces >> np.uint64(32)).astype(np.uint32).byteswap(),
+    ]
+    # Constant words are kept as one element arrays, which broadcast without scalar overflow warnings.
+    w += [ block_words[i:i+1] for i in range(8) ]
+    w += [ np.array([word], dtype = np.uint32) for word in (0x80000000, 0, 0, 0, 0, 320) ]
+    for t in range(16, 64):
+        s0 = _rotr32(w[t-15], 7) ^ _rotr32(w[t-15], 18) ^ (w[t-15] >> np.uint32(3))
+        s1 = _rotr32(w[t-2], 17) ^ _rotr32(w[t-2], 19) ^ (w[t-2] >> np.uint32(10))
+        w.append( w[t-16] + s0 + w[t-7] + s1 )
+
+    a, b, c, d, e, f, g, h = [ np.full( len(nonces), SHA256_H[i], dtype = np.uint32 ) for i in range(8) ]
+    for t in range(64):
+        s1 = _rotr32(e, 6) ^ _rotr32(e, 11) ^ _rotr32(e, 25)
+        temp1 = h + s1 + (g ^ (e & (f ^ g))) + SHA256_K[t] + w[t]
+        s0 = _rotr32(a, 2) ^ _rotr32(a, 13) ^ _rotr32(a, 22)
+        temp2 = s0 + ((a & b) | (c & (a | b)))
+        h, g, f, e, d, c, b, a = g, f, e, d + temp1, c, b, a, temp1 + temp2
+
+    return np.stack([ a, b, c, d, e, f, g, h ]) + SHA256_H[:, None]
+
+
+def keccak256_digests( digests: np.ndarray ) -> np.ndarray:
+    r""" Computes keccak256 of a batch of 32 byte sha256 digests.
+        Args:
+            digests (:obj:`np.ndarray` of type :obj:`np.uint32` and shape :obj:`(8, batch_size)`, `required`):
+                The sha256 digests as big endian 32 bit words.
+
+        Returns:
+            seals (:obj:`np.ndarray` of type :obj:`np.uint64` and shape :obj:`(4, batch_size)`):
+                The keccak256 seals as little endian 64 bit lanes, the byte order of the seal.
+    """
+    batch_size = digests.shape[1]
+    # The digest bytes are absorbed as little endian lanes, followed by the original keccak padding.
+    # Every lane is a separate array so that all steps run in place with constant shifts.
+    words = digests.byteswap().astype(np.uint64)
+    words = words[0::2] | (words[1::2] << np.uint64(32))
+    state = [ words[i].copy() for i in range(4) ] + [ np.zeros( batch_size, dtype = np.uint64 ) for _ in range(21) ]
+    state[4][:] = np.uint64(0x01)
+    state[16][:] = np.uint64(0x8000000000000000)
+
+    shifts = [ (np.uint64(r), np.uint64(64 - r)) for r in KECCAK_ROTATIONS ]
+    columns = [ np.empty( batch_size, dtype = np.uint64 ) for _ in range(5) ]
+    rotated = [ None ] * 25
+    mix = np.empty( batch_size, dtype = np.uint64 )
+    temp = np.empty( batch_size, dtype = np.uint64 )
+    for rc in KECCAK_RC:
+        # Theta
+        for x in range(5):
+            np.bitwise_xor( state[x], state[x + 5], out = columns[x] )
+            columns[x] ^= state[x + 10]
+            columns[x] ^= state[x + 15]
+            columns[x] ^= state[x + 20]
+        for x in range(5):
+            np.left_shift( columns[(x + 1) % 5], np.uint64(1), out = mix )
+            np.right_shift( columns[(x + 1) % 5], np.uint64(63), out = temp )
+            mix |= temp
+            mix ^= columns[(x - 1) % 5]
+            for y in range(0, 25, 5):
+                state[x + y] ^= mix
+
+        # Rho and pi
+        for i in range(25):
+            if KECCAK_ROTATIONS[i] == 0:
+                rotated[KECCAK_PI[i]] = state[i]
+            else:
+                lane = state[i] << shifts[i][0]
+                np.right_shift( state[i], shifts[i][1], out = temp )
+                lane |= temp
+                rotated[KECCAK_PI[i]] = lane
+
+        # Chi
+        for y in range(0, 25, 5):
+            for x in range(5):
+                lane = np.invert( rotated[y + (x + 1) % 5] )
+                lane &= rotated[y + (x + 2) % 5]
+                lane ^= rotated[y + x]
+                state[y + x] = lane
+
+        # Iota
+        state[0] ^= rc
+
+    return np.stack( state[:4] )
+
+
+def seal_hashes( block_bytes: bytes, nonces: np.ndarray ) -> np.ndarray:
+    r""" Computes the seals of a batch of nonces, see :obj:`bittensor.utils.create_seal_hash`.
+        Args:
+            block_bytes (:obj:`bytes`, `required`):
+                The block hash as 64 hex characters, without the 0x prefix.
+            nonces (:obj:`np.ndarray` of type :obj:`np.uint64` and shape :obj:`(batch_size)`, `required`):
+                The nonces to hash.
+
+        Returns:
+            seals (:obj:`np.ndarray` of type :obj:`np.uint8` and shape :obj:`(batch_size, 32)`):
+                The seal bytes of every nonce.
+    """
+    lanes = _seal_lanes( block_bytes, nonces )
+    return np.ascontiguousarray( lanes.T.astype('<u8') ).view(np.uint8).reshape(-1, 32)
+
+
+def _seal_lanes( block_bytes: bytes, nonces: np.ndarray ) -> np.ndarray:
+    block_words = np.frombuffer( bytes.fromhex( bytes(block_bytes).decode('utf-8') ), dtype = '>u4' ).astype(np.uint32)
+    return keccak256_digests( sha256_pre_seals( nonces.astype(np.uint64), block_words ) )
+
+
+def solve_cpu( nonce_start: int, nonce_end: int, block_bytes: bytes, difficulty: int, limit: int, batch_size: int = 16384 ) -> Tuple[int, Optional[bytes]]:
+    r""" Solves the PoW problem for the nonces in [nonce_start, nonce_end), batch_size nonces per kernel call.
+        Nonces wrap around at 2**64.
+        Args:
+            nonce_start (:obj:`int`, `required`):
+                Starting nonce.
+            nonce_end (:obj:`int`, `required`):
+                End of the nonce range, exclusive.
+            block_bytes (:obj:`bytes`, `required`):
+                The block hash as 64 hex characters, without the 0x prefix.
+            difficulty (:obj:`int`, `required`):
+                Difficulty of the PoW problem.
+            limit (:obj:`int`, `required`):
+                A seal solves the problem if seal * difficulty < limit.
+            batch_size (:obj:`int`, `optional`):
+                Number of nonces evaluated per kernel call.
+
+        Returns:
+            nonce (:obj:`int`):
+                The first nonce solving the problem, -1 if no solution is found.
+            seal (:obj:`bytes`):
+                The seal of the solution, None if no solution is found.
+    """
+    # seal * difficulty < limit holds exactly when seal <= (limit - 1) // difficulty.
+    upper = (limit - 1) // difficulty
+    if upper < 0:
+        return -1, None
+    upper = min( upper, 2 ** 256 - 1 )
+    upper_words = [ np.uint64( (upper >> (64 * (3 - i))) & (2 ** 64 - 1) ) for i in range(4) ]
+
+    block_words = np.frombuffer( bytes.fromhex( bytes(block_bytes).decode('utf-8') ), dtype = '>u4' ).astype(np.uint32)
+    offsets = np.arange( batch_size, dtype = np.uint64 )
+    for start in range( nonce_start, nonce_end, batch_size ):
+        count = min( batch_size, nonce_end - start )
+        nonces = offsets[:count] + np.uint64( start % 2 ** 64 )
+        lanes = keccak256_digests( sha256_pre_seals( nonces, block_words ) )
+
+        # Compare the big endian seal numbers with the upper bound, most significant word first.
+        words = lanes.byteswap()
+        meets = np.zeros( count, dtype = bool )
+        equal = np.ones( count, dtype = bool )
+        for word, upper_word in zip( words, upper_words ):
+            meets |= equal & (word < upper_word)
+            equal &= (word == upper_word)
+        meets |= equal
+
+        solutions = np.flatnonzero( meets )
+        if len(solutions) > 0:
+            index = solutions[0]
+            seal = lanes[:, index].astype('<u8').tobytes()
+            return int(nonces[index]), seal
+
+    return -1, None
@@ -5,7 +5,7 @@ import multiprocessing
 import os
 import random
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import timedelta
 from queue import Empty, Full
 from typing import Any, Callable, Dict, List, Optional, Tuple, Union
@@ -17,6 +17,7 @@ from Crypto.Hash import keccak
 from rich import console as rich_console
 from rich import status as rich_status
 
+from .register_cpu import solve_cpu
 from .register_cuda import solve_cuda
 
 
@@ -102,6 +103,75 @@ class POWSolution:
     seal: bytes
 
 
+class BlockHeader:
+    """
+    The block the solvers work on, shared with the solver processes through a seqlock instead of a lock.
+
+    The main process is the only writer, it makes the sequence odd while it writes and even again after.
+    Solvers only compare the sequence after each block of nonces and copy the header when it changed,
+    retrying while a write is in progress or the sequence moved during the copy.
+
+    Layout of the shared words: sequence, block number, difficulty, stop flag, 64 block hash bytes.
+    """
+    words: multiprocessing.RawArray
+
+    def __init__(self):
+        self.words = multiprocessing.RawArray('Q', 12)
+
+    @property
+    def sequence(self) -> int:
+        return self.words[0]
+
+    @property
+    def stopped(self) -> bool:
+        return self.words[3] != 0
+
+    def stop(self) -> None:
+        self.words[3] = 1
+
+    def update(self, block_number: int, block_bytes: bytes, difficulty: int) -> None:
+        """Publishes a new block to the solvers."""
+        self.words[0] += 1
+        self.words[1] = block_number
+        self.words[2] = difficulty
+        block_words = int.from_bytes(block_bytes[:64].ljust(64, b'0'), 'little')
+        for i in range(8):
+            self.words[4 + i] = (block_words >> (64 * i)) & 0xFFFFFFFFFFFFFFFF
+        self.words[0] += 1
+
+    def read(self) -> Tuple[int, int, bytes, int]:
+        """Returns a consistent copy of the header as (sequence, block_number, block_bytes, difficulty)."""
+        while True:
+            sequence = self.words[0]
+            if sequence % 2 == 1:
+                time.sleep(0)
+                continue
+            block_number, difficulty = self.words[1], self.words[2]
+            block_words = self.words[4:12]
+            if self.words[0] == sequence:
+                block_bytes = sum(word << (64 * i) for i, word in enumerate(block_words)).to_bytes(64, 'little')
+                return sequence, block_number, block_bytes, difficulty
+
+
+class HashCounters:
+    """
+    Number of nonces tried by each solver process, in shared memory instead of queue messages.
+    Every process only writes its own counter and every counter has its own cache line.
+    """
+    counts: multiprocessing.RawArray
+    stride: int = 8
+
+    def __init__(self, num_processes: int):
+        self.counts = multiprocessing.RawArray('Q', num_processes * self.stride)
+        self.num_processes = num_processes
+
+    def add(self, proc_num: int, nonces: int) -> None:
+        self.counts[proc_num * self.stride] += nonces
+
+    def totals(self) -> List[int]:
+        return [self.counts[proc_num * self.stride] for proc_num in range(self.num_processes)]
+
+
 class SolverBase(multiprocessing.Process):
     """
     A process that solves the registration PoW problem.
@@ -113,64 +183,23 @@ class SolverBase(multiprocessing.Process):
             The total number of processes running.
         update_interval: int
             The number of nonces to try to solve before checking for a new block.
-        finished_queue: multiprocessing.Queue
-            The queue to put the process number when a process finishes each update_interval.
-            Used for calculating the average time per update_interval across all processes.
         solution_queue: multiprocessing.Queue
             The queue to put the solution the process has found during the pow solve.
-        newBlockEvent: multiprocessing.Event
-            The event to set by the main process when a new block is finalized in the network.
-            The solver process will check for the event after each update_interval.
-            The solver process will get the new block hash and difficulty and start solving for a new nonce.
-        stopEvent: multiprocessing.Event
-            The event to set by the main process when all the solver processes should stop.
-            The solver process will check for the event after each update_interval.
-            The solver process will stop when the event is set.
-            Used to stop the solver processes when a solution is found.
-        curr_block: multiprocessing.Array
-            The array containing this process's current block hash.
-            The main process will set the array to the new block hash when a new block is finalized in the network.
-            The solver process will get the new block hash from this array when newBlockEvent is set.
-        curr_block_num: multiprocessing.Value
-            The value containing this process's current block number.
-            The main process will set the value to the new block number when a new block is finalized in the network.
-            The solver process will get the new block number from this value when newBlockEvent is set.
-        curr_diff: multiprocessing.Array
-            The array containing this process's current difficulty.
-            The main process will set the array to the new difficulty when a new block is finalized in the network.
-            The solver process will get the new difficulty from this array when newBlockEvent is set.
-        check_block: multiprocessing.Lock
-            The lock to prevent this process from getting the new block data while the main process is updating the data.
         limit: int
             The limit of the pow solve for a valid solution.
     """
     proc_num: int
     num_proc: int
     update_interval: int
-    finished_queue: multiprocessing.Queue
     solution_queue: multiprocessing.Queue
-    newBlockEvent: multiprocessing.Event
-    stopEvent: multiprocessing.Event
-    curr_block: multiprocessing.Array
-    curr_block_num: multiprocessing.Value
-    curr_diff: multiprocessing.Array
-    check_block: multiprocessing.Lock
     limit: int
 
-    def __init__(self, proc_num, num_proc, update_interval, finished_queue, solution_queue, stopEvent, curr_block, curr_block_num, curr_diff, check_block, limit):
+    def __init__(self, proc_num, num_proc, update_interval, solution_queue, limit):
         multiprocessing.Process.__init__(self, daemon=True)
         self.proc_num = proc_num
         self.num_proc = num_proc
         self.update_interval = update_interval
-        self.finished_queue = finished_queue
         self.solution_queue = solution_queue
-        self.newBlockEvent = multiprocessing.Event()
-        self.newBlockEvent.clear()
-        self.curr_block = curr_block
-        self.curr_block_num = curr_block_num
-        self.curr_diff = curr_diff
-        self.check_block = check_block
-        self.stopEvent = stopEvent
         self.limit = limit
 
     def run(self):
@@ -178,7 +207,36 @@ class SolverBase(multiprocessing.Process):
 
 
 class Solver(SolverBase):
+    """
+    A process that solves the registration PoW problem on the CPU.
+
+    Args:
+        proc_num: int
+            The number of the process being created.
+        num_proc: int
+            The total number of processes running.
+        update_interval: int
+            The number of nonces to try to solve before checking for a new block.
+        solution_queue: multiprocessing.Queue
+            The queue to put the solution the process has found during the pow solve.
+        header: BlockHeader
+            The block to solve for, the solver checks its sequence after each update_interval
+            and stops when the header is stopped.
+        counters: HashCounters
+            The solver adds the number of nonces tried after each update_interval to its counter.
+        limit: int
+            The limit of the pow solve for a valid solution.
+    """
+    header: BlockHeader
+    counters: HashCounters
+
+    def __init__(self, proc_num, num_proc, update_interval, solution_queue, header, counters, limit):
+        super().__init__(proc_num, num_proc, update_interval, solution_queue, limit)
+        self.header = header
+        self.counters = counters
+
     def run(self):
+        sequence: int = -1
         block_number: int
         block_bytes: bytes
         block_difficulty: int
@@ -187,37 +245,83 @@ class Solver(SolverBase):
         # Start at random nonce
         nonce_start = random.randint( 0, nonce_limit )
         nonce_end = nonce_start + self.update_interval
-        while not self.stopEvent.is_set():
-            if self.newBlockEvent.is_set():
-                with self.check_block:
-                    block_number = self.curr_block_num.value
-                    block_bytes = bytes(self.curr_block)
-                    block_difficulty = registration_diff_unpack(self.curr_diff)
+        while not self.header.stopped:
+            if self.header.sequence != sequence:
+                sequence, block_number, block_bytes, block_difficulty = self.header.read()
 
-                self.newBlockEvent.clear()
-                
             # Do a block of nonces
             solution = solve_for_nonce_block(self, nonce_start, nonce_end, block_bytes, block_difficulty, self.limit, block_number)
             if solution is not None:
                 self.solution_queue.put(solution)
 
-            try:
-                # Send time
-                self.finished_queue.put_nowait(self.proc_num)
-            except Full:
-                pass
-                
+            self.counters.add(self.proc_num, self.update_interval)
+
             nonce_start = random.randint( 0, nonce_limit )
-            nonce_start = nonce_start % nonce_limit
             nonce_end = nonce_start + self.update_interval
 
 
 class CUDASolver(SolverBase):
+    """
+    A process that solves the registration PoW problem on a CUDA device.
+
+    Args:
+        proc_num: int
+            The number of the process being created.
+        num_proc: int
+            The total number of processes running.
+        update_interval: int
+            The number of nonces to try to solve before checking for a new block.
+        finished_queue: multiprocessing.Queue
+            The queue to put the process number when a process finishes each update_interval.
+            Used for calculating the average time per update_interval across all processes.
+        solution_queue: multiprocessing.Queue
+            The queue to put the solution the process has found during the pow solve.
+        stopEvent: multiprocessing.Event
+            The event to set by the main process when all the solver processes should stop.
+            The solver process will check for the event after each update_interval.
+            The solver process will stop when the event is set.
+            Used to stop the solver processes when a solution is found.
+        curr_block: multiprocessing.Array
+            The array containing this process's current block hash.
+            The main process will set the array to the new block hash when a new block is finalized in the network.
+            The solver process will get the new block hash from this array when newBlockEvent is set.
+        curr_block_num: multiprocessing.Value
+            The value containing this process's current block number.
+            The main process will set the value to the new block number when a new block is finalized in the network.
+            The solver process will get the new block number from this value when newBlockEvent is set.
+        curr_diff: multiprocessing.Array
+            The array containing this process's current difficulty.
+            The main process will set the array to the new difficulty when a new block is finalized in the network.
+            The solver process will get the new difficulty from this array when newBlockEvent is set.
+        check_block: multiprocessing.Lock
+            The lock to prevent this process from getting the new block data while the main process is updating the data.
+        limit: int
+            The limit of the pow solve for a valid solution.
+        dev_id: int
+            The CUDA device to solve on.
+        TPB: int
+            The number of threads per block.
+    """
+    finished_queue: multiprocessing.Queue
+    newBlockEvent: multiprocessing.Event
+    stopEvent: multiprocessing.Event
+    curr_block: multiprocessing.Array
+    curr_block_num: multiprocessing.Value
+    curr_diff: multiprocessing.Array
+    check_block: multiprocessing.Lock
     dev_id: int
     TPB: int
 
     def __init__(self, proc_num, num_proc, update_interval, finished_queue, solution_queue, stopEvent, curr_block, curr_block_num, curr_diff, check_block, limit, dev_id: int, TPB: int):
-        super().__init__(proc_num, num_proc, update_interval, finished_queue, solution_queue, stopEvent, curr_block, curr_block_num, curr_diff, check_block, limit)
+        super().__init__(proc_num, num_proc, update_interval, solution_queue, limit)
+        self.finished_queue = finished_queue
+        self.newBlockEvent = multiprocessing.Event()
+        self.newBlockEvent.clear()
+        self.curr_block = curr_block
+        self.curr_block_num = curr_block_num
+        self.curr_diff = curr_diff
+        self.check_block = check_block
+        self.stopEvent = stopEvent
         self.dev_id = dev_id
         self.TPB = TPB
 
@@ -274,21 +378,11 @@ def solve_for_nonce_block_cuda(solver: CUDASolver, nonce_start: int, update_inte
 
 
 def solve_for_nonce_block(solver: Solver, nonce_start: int, nonce_end: int, block_bytes: bytes, difficulty: int, limit: int, block_number: int) -> Optional[POWSolution]:
-    """Tries to solve the POW for a block of nonces (nonce_start, nonce_end)""" 
-    for nonce in range(nonce_start, nonce_end):
-        # Create seal.
-        nonce_bytes = binascii.hexlify(nonce.to_bytes(8, 'little'))
-        pre_seal = nonce_bytes + block_bytes
-        seal_sh256 = hashlib.sha256( bytearray(hex_bytes_to_u8_list(pre_seal)) ).digest()
-        kec = keccak.new(digest_bits=256)
-        seal = kec.update( seal_sh256 ).digest()
-        seal_number = int.from_bytes(seal, "big")
-
-        # Check if seal meets difficulty
-        product = seal_number * difficulty
-        if product < limit:
-            # Found a solution, save it.
-            return POWSolution(nonce, block_number, difficulty, seal)
+    """Tries to solve the POW for a block of nonces (nonce_start, nonce_end), evaluating the nonces in vectorized batches""" 
+    nonce, seal = solve_cpu(nonce_start, nonce_end, block_bytes, difficulty, limit)
+    if nonce != -1:
+        # Found a solution, save it.
+        return POWSolution(nonce, block_number, difficulty, seal)
 
     return None
 
@@ -331,6 +425,8 @@ class RegistrationStatistics:
     difficulty: int
     block_number: int
     block_hash: bytes
+    num_processes: int = 1
+    hash_rates_per_process: List[float] = field(default_factory=list)
     
 
 class RegistrationStatisticsLogger:
@@ -366,6 +462,11 @@ class RegistrationStatisticsLogger:
         f"Registration Difficulty: [bold white]{millify(stats.difficulty)}[/bold white]\n" + \
         f"Iters (Inst/Perp): [bold white]{get_human_readable(stats.hash_rate, 'H')}/s / " + \
             f"{get_human_readable(stats.hash_rate_perpetual, 'H')}/s[/bold white]\n" + \
+        (
+            f"Processes: [bold white]{stats.num_processes}[/bold white] " + \
+            f"(per process min/max: {get_human_readable(min(stats.hash_rates_per_process), 'H')}/s / " + \
+            f"{get_human_readable(max(stats.hash_rates_per_process), 'H')}/s)\n" if verbose and len(stats.hash_rates_per_process) > 0 else ""
+        ) + \
         f"Block Number: [bold white]{stats.block_number}[/bold white]\n" + \
         f"Block Hash: [bold white]{stats.block_hash.encode('utf-8')}[/bold white]\n"
         return message
@@ -389,7 +490,7 @@ def solve_for_difficulty_fast( subtensor, wallet, output_in_place: bool = True,
         output_in_place: bool
             If true, prints the status in place. Otherwise, prints the status on a new line.
         num_processes: int
-            Number of processes to use.
+            Number of processes to use, defaults to the number of cores this process may run on.
         update_interval: int
             Number of nonces to solve before updating block information.
         n_samples: int
@@ -405,29 +506,22 @@ def solve_for_difficulty_fast( subtensor, wallet, output_in_place: bool = True,
         to increase the transparency of the process while still keeping the speed.
     """
     if num_processes == None:
-        # get the number of allowed processes for this process
-        num_processes = min(1, get_cpu_count())
+        # use every core this process is allowed to run on
+        num_processes = max(1, get_cpu_count())
 
     if update_interval is None:
         update_interval = 50_000
         
     limit = int(math.pow(2,256)) - 1
 
-    curr_block = multiprocessing.Array('h', 64, lock=True) # byte array
-    curr_block_num = multiprocessing.Value('i', 0, lock=True) # int
-    curr_diff = multiprocessing.Array('Q', [0, 0], lock=True) # [high, low]
-
-    # Establish communication queues
-    ## See the Solver class for more information on the queues.
-    stopEvent = multiprocessing.Event()
-    stopEvent.clear()
-
+    # The block is published through a seqlock header and the solvers count their nonces in shared counters,
+    # only solutions go through a queue. See the Solver class for more information.
+    header = BlockHeader()
+    counters = HashCounters(num_processes)
     solution_queue = multiprocessing.Queue()
-    finished_queues = [multiprocessing.Queue() for _ in range(num_processes)]
-    check_block = multiprocessing.Lock()
-    
+
     # Start consumers
-    solvers = [ Solver(i, num_processes, update_interval, finished_queues[i], solution_queue, stopEvent, curr_block, curr_block_num, curr_diff, check_block, limit)
+    solvers = [ Solver(i, num_processes, update_interval, solution_queue, header, counters, limit)
                 for i in range(num_processes) ]
 
     # Get first block
@@ -439,12 +533,8 @@ def solve_for_difficulty_fast( subtensor, wallet, output_in_place: bool = True,
     block_bytes = block_hash.encode('utf-8')[2:]
     old_block_number = block_number
     # Set to current block
-    update_curr_block(curr_diff, curr_block, curr_block_num, block_number, block_bytes, difficulty, check_block)
+    header.update(block_number, block_bytes, difficulty)
 
-    # Set new block events for each solver to start at the initial block
-    for worker in solvers:
-        worker.newBlockEvent.set()
-    
     for worker in solvers:
         worker.start() # start the solver processes
 
@@ -460,7 +550,8 @@ def solve_for_difficulty_fast( subtensor, wallet, output_in_place: bool = True,
         hash_rate = 0.0,
         difficulty = difficulty,
         block_number = block_number,
-        block_hash = block_hash
+        block_hash = block_hash,
+        num_processes = num_processes,
     )
 
     start_time_perpetual = time.time()
@@ -474,6 +565,7 @@ def solve_for_difficulty_fast( subtensor, wallet, output_in_place: bool = True,
 
     hash_rates = [0] * n_samples # The last n true hash_rates
     weights = [alpha_ ** i for i in range(n_samples)] # weights decay by alpha
+    hashes_last = [0] * num_processes # nonces tried by each solver at time_last
     
     while not wallet.is_registered(subtensor):
         # Wait until a solver finds a solution
@@ -489,36 +581,27 @@ def solve_for_difficulty_fast( subtensor, wallet, output_in_place: bool = True,
         old_block_number = check_for_newest_block_and_update(
             subtensor = subtensor,
             old_block_number=old_block_number,
-            curr_diff=curr_diff,
-            curr_block=curr_block,
-            curr_block_num=curr_block_num,
+            publish_block=header.update,
             curr_stats=curr_stats,
-            update_curr_block=update_curr_block,
-            check_block=check_block,
-            solvers=solvers
         )
-                
-        num_time = 0
-        for finished_queue in finished_queues:
-            try:
-                proc_num = finished_queue.get(timeout=0.1)
-                num_time += 1
 
-            except Empty:
-                continue
+        hashes = counters.totals()
+        num_time = (sum(hashes) - sum(hashes_last)) // update_interval # work blocks finished since time_last
         
         time_now = time.time() # get current time
         time_since_last = time_now - time_last # get time since last work block(s)
         if num_time > 0 and time_since_last > 0.0:
             # create EWMA of the hash_rate to make measure more robust
         
-            hash_rate_ = (num_time * update_interval) / time_since_last
+            hash_rate_ = (sum(hashes) - sum(hashes_last)) / time_since_last
             hash_rates.append(hash_rate_)
             hash_rates.pop(0) # remove the 0th data point
             curr_stats.hash_rate = sum([hash_rates[i]*weights[i] for i in range(n_samples)])/(sum(weights))
+            curr_stats.hash_rates_per_process = [(hashes[i] - hashes_last[i]) / time_since_last for i in range(num_processes)]
 
             # update time last to now
             time_last = time_now
+            hashes_last = hashes
 
             curr_stats.time_average = (curr_stats.time_average*curr_stats.rounds_total + curr_stats.time_spent)/(curr_stats.rounds_total+num_time)
             curr_stats.rounds_total += num_time
@@ -526,14 +609,14 @@ def solve_for_difficulty_fast( subtensor, wallet, output_in_place: bool = True,
         # Update stats
         curr_stats.time_spent = time_since_last
         new_time_spent_total = time_now - start_time_perpetual
-        curr_stats.hash_rate_perpetual = (curr_stats.rounds_total*update_interval)/ new_time_spent_total
+        curr_stats.hash_rate_perpetual = sum(hashes) / new_time_spent_total
         curr_stats.time_spent_total = new_time_spent_total
 
         # Update the logger
         logger.update(curr_stats, verbose=log_verbose)
 
     # exited while, solution contains the nonce or wallet is registered
-    stopEvent.set() # stop all other processes
+    header.stop() # stop all other processes
     logger.stop()
 
     # terminate and wait for all solvers to exit
@@ -575,40 +658,29 @@ class UsingSpawnStartMethod():
 def check_for_newest_block_and_update(
     subtensor: 'bittensor.Subtensor',
     old_block_number: int,
-    curr_diff: multiprocessing.Array,
-    curr_block: multiprocessing.Array,
-    curr_block_num: multiprocessing.Value,
-    update_curr_block: Callable,
-    check_block: 'multiprocessing.Lock',
-    solvers: List[Solver],
+    publish_block: Callable[[int, bytes, int], None],
     curr_stats: RegistrationStatistics
     ) -> int:
     """
-    Checks for a new block and updates the current block information if a new block is found.
+    Checks for a new block and publishes the new block information to the solvers if a new block is found.
 
     Args:
         subtensor (:obj:`bittensor.Subtensor`, `required`):
             The subtensor object to use for getting the current block.
         old_block_number (:obj:`int`, `required`):
             The old block number to check against.
-        curr_diff (:obj:`multiprocessing.Array`, `required`):
-            The current difficulty as a multiprocessing array.
-        curr_block (:obj:`multiprocessing.Array`, `required`):
-            Where the current block is stored as a multiprocessing array.
-        curr_block_num (:obj:`multiprocessing.Value`, `required`):
-            Where the current block number is stored as a multiprocessing value.
-        update_curr_block (:obj:`Callable`, `required`):
-            A function that updates the current block.
-        check_block (:obj:`multiprocessing.Lock`, `required`):
-            A mp lock that is used to check for a new block.
-        solvers (:obj:`List[Solver]`, `required`):
-            A list of solvers to update the current block for.
+        publish_block (:obj:`Callable[[int, bytes, int], None]`, `required`):
+            Called with the new block number, block bytes and difficulty to hand the new block to the solvers.
         curr_stats (:obj:`RegistrationStatistics`, `required`):
             The current registration statistics to update.
 
     Returns:
         (int) The current block number.
     """
+    if subtensor.clock.block == old_block_number:
+        # The shared block clock does not expect a new block yet, skip the chain read.
+        return old_block_number
+
     block_number = subtensor.get_current_block()
     if block_number != old_block_number:
         old_block_number = block_number
@@ -619,11 +691,7 @@ def check_for_newest_block_and_update(
         block_bytes = block_hash.encode('utf-8')[2:]
         difficulty = subtensor.difficulty
 
-        update_curr_block(curr_diff, curr_block, curr_block_num, block_number, block_bytes, difficulty, check_block)
-        # Set new block events for each solver
-
-        for worker in solvers:
-            worker.newBlockEvent.set()
+        publish_block(block_number, block_bytes, difficulty)
 
         # update stats
         curr_stats.block_number = block_number
@@ -700,12 +768,14 @@ def solve_for_difficulty_fast_cuda( subtensor: 'bittensor.Subtensor', wallet: 'b
         block_bytes = block_hash.encode('utf-8')[2:]
         old_block_number = block_number
         
-        # Set to current block
-        update_curr_block(curr_diff, curr_block, curr_block_num, block_number, block_bytes, difficulty, check_block)
-
-        # Set new block events for each solver to start at the initial block
-        for worker in solvers:
-            worker.newBlockEvent.set()
+        def publish_block(block_number: int, block_bytes: bytes, difficulty: int):
+            update_curr_block(curr_diff, curr_block, curr_block_num, block_number, block_bytes, difficulty, check_block)
+            # Set new block events for each solver
+            for worker in solvers:
+                worker.newBlockEvent.set()
+
+        # Set to current block, the new block events start the solvers at the initial block
+        publish_block(block_number, block_bytes, difficulty)
         
         for worker in solvers:
             worker.start() # start the solver processes
@@ -748,14 +818,9 @@ def solve_for_difficulty_fast_cuda( subtensor: 'bittensor.Subtensor', wallet: 'b
             # check for new block
             old_block_number = check_for_newest_block_and_update(
                 subtensor = subtensor,
-                curr_diff=curr_diff,
-                curr_block=curr_block,
-                curr_block_num=curr_block_num,
                 old_block_number=old_block_number,
+                publish_block=publish_block,
                 curr_stats=curr_stats,
-                update_curr_block=update_curr_block,
-                check_block=check_block,
-                solvers=solvers
             )
                     
             num_time = 0
@@ -588,6 +588,138 @@ def translate_tokenizer_probs(probs: torch.FloatTensor, probs_std: torch.FloatTe
             print('Undefined mapping.')
 
 
+def get_translation_steps(translation_map: Dict[str, Any]) -> List[Dict[str, torch.Tensor]]:
+    r"""
+    Precomputes the gather and scatter indices of a translation map per unrolling depth, cached in the translation map
+    so that they are built once per tokenizer pair.
+        Args:
+            translation_map (:obj:`Dict[str, Any]`, `required`):
+                Maps for each observed length, a source token to a token sequence of that length,
+                with source index to target indices.
+
+        Returns:
+            translation_steps (:obj:`List[Dict[str, torch.Tensor]]`, `required`):
+                For each depth, the source tokens with a mapping longer than the depth ('from'),
+                their target token at that depth ('to'), and the scale of the target token probability
+                averaged into the source token ('scale'): one over the paths crossing the target token at that depth
+                times the mapping length, see :obj:`translate_many_to_one`.
+    """
+    if 'steps' not in translation_map:
+        lengths = translation_map['lengths']
+        counts = translation_map['counts'].float()  # [max_len, to_vocab_size]
+
+        steps = []
+        for depth in range(max(lengths.keys())):
+            from_idx = torch.cat([lengths[l]['from'] for l in lengths if l > depth])  # [subset_size]
+            to_idx = torch.cat([lengths[l]['to'][:, depth] for l in lengths if l > depth])  # [subset_size]
+            map_len = torch.cat([torch.full((len(lengths[l]['from']),), l) for l in lengths if l > depth])
+            steps += [{'from': from_idx, 'to': to_idx, 'scale': 1 / (counts[depth, to_idx] * map_len)}]
+
+        translation_map['steps'] = steps
+
+    return translation_map['steps']
+
+
+def translate_aligned_probs(aligned_probs: List[torch.FloatTensor], mappings: List[List[tuple]],
+                            probs_std: torch.FloatTensor,
+                            to_translation_map: Dict[str, Any], from_translation_map: Dict[str, Any],
+                            chunk_size: int = 128) -> None:
+    r"""
+    Translates aligned source token probability distributions of a whole batch to target probability distributions,
+    performing the one-to-many and many-to-one mappings of all sequences with one gather and scatter per depth and chunk,
+    instead of per sequence position. Equivalent to the sequential mappings of :obj:`translate_tokenizer_probs`.
+        Args:
+            aligned_probs (:obj:`List[torch.FloatTensor]`, `required`):
+                Batch of [aligned_sequence_len, vocab_size] probability distributions over a source tokenizer vocabulary,
+                aligned via source token splitting.
+            mappings (:obj:`List[List[tuple]]`, `required`):
+                Batch of one-to-many / many-to-one mappings from :obj:`get_tokenizer_sequence_mappings`.
+            probs_std (:obj:`torch.FloatTensor`, `required`):
+                [batch_size, std_sequence_len, std_vocab_size] Output probability distribution over a target tokenizer
+                vocabulary. Reference that will be written in-place.
+            to_translation_map (:obj:`Dict[str, Any]`, `required`):
+                Maps for each observed length, a source token to a token sequence of that length,
+                with source index to target indices.
+            from_translation_map (:obj:`Dict[str, Any]`, `required`):
+                Maps for each observed length, a source token to a token sequence of that length,
+                from target index to source indices.
+            chunk_size (:obj:`int`, `optional`):
+                Number of mapped positions translated at once, bounds the [chunk_size, vocab_size] intermediates.
+
+        Returns:
+
+    """
+    batch_size, std_sequence_len, std_vocab_size = probs_std.shape
+    probs_std_flat = probs_std.view(-1, std_vocab_size)  # [batch_size * std_sequence_len, std_vocab_size]
+    to_steps = get_translation_steps(to_translation_map)
+    from_steps = get_translation_steps(from_translation_map)
+
+    # === Collect the mappings of all sequences, in the order they are applied ===
+    one_to_many = {}  # depth -> [(order, std row, source distribution)], added to the std rows
+    many_to_one = {}  # std row -> (order, source distributions), the last one overwrites the std row
+    order = 0
+    for b in range(len(mappings)):
+        std_rows = range(b * std_sequence_len, (b + 1) * std_sequence_len)
+
+        for (right_idx, right_idx_std, segment_count_base, segment_count_std_base,
+             segment_count_overlap, segment_count_std_overlap) in mappings[b][1:]:  # don't map start token
+
+            segment_count = segment_count_base + segment_count_overlap  # calculate effective segments length
+            segment_count_std = segment_count_std_base + segment_count_std_overlap  # calculate effective segments length
+
+            # === One-to-many / one-to-one mapping ===
+            if segment_count_base == 1:
+                start_idx_std = right_idx_std - segment_count_std  # calculate starting index
+                for depth, std_row in enumerate(std_rows[start_idx_std:start_idx_std + segment_count_std]):
+                    if depth < len(to_steps):  # deeper steps have no mappings to unroll
+                        one_to_many.setdefault(depth, []).append((order, std_row, aligned_probs[b][right_idx - 1]))
+
+            # === Many-to-one mapping ===
+            elif segment_count_std_base == 1:  # many-to-one
+                start_idx = right_idx - segment_count  # calculate starting index
+                many_to_one[std_rows[right_idx_std - 1]] = (order, aligned_probs[b][start_idx:right_idx])
+
+            else:
+                print('Undefined mapping.')
+
+            order += 1
+
+    probs_to = torch.empty(chunk_size, std_vocab_size)  # reused output buffer
+
+    # === Many-to-one: average the sequence probabilities over the paths crossing each token ===
+    assigned = list(many_to_one.items())
+    for i in range(0, len(assigned), chunk_size):
+        chunk = assigned[i:i + chunk_size]
+        chunk_probs_to = probs_to[:len(chunk)].zero_()
+        for depth, step in enumerate(from_steps):
+            present = [j for j, (_, (_, probs_from)) in enumerate(chunk) if depth < len(probs_from)]
+            if len(present) == 0:  # sequence beyond its length has probability 0
+                break
+            probs_from = torch.stack([chunk[j][1][1][depth] for j in present])  # [present_size, vocab_size]
+            seq_probs = probs_from.index_select(1, step['to'])  # [present_size, subset_size]
+            seq_probs *= step['scale']
+            if len(present) == len(chunk):
+                chunk_probs_to.index_add_(1, step['from'], seq_probs)
+            else:
+                chunk_probs_to[present] += torch.zeros(len(present), std_vocab_size).index_add_(1, step['from'], seq_probs)
+        std_rows = torch.tensor([std_row for std_row, _ in chunk], dtype=torch.long)
+        probs_std_flat.index_copy_(0, std_rows, chunk_probs_to)
+
+    # === One-to-many: unroll each source distribution into the std sequence, added in-place ===
+    for depth, entries in one_to_many.items():
+        step = to_steps[depth]
+        # an addition is only kept if no many-to-one mapping overwrites its std row afterwards
+        entries = [(std_row, probs_from) for order, std_row, probs_from in entries
+                   if std_row not in many_to_one or many_to_one[std_row][0] < order]
+        for i in range(0, len(entries), chunk_size):
+            chunk = entries[i:i + chunk_size]
+            std_rows = torch.tensor([std_row for std_row, _ in chunk], dtype=torch.long)
+            probs_from = torch.stack([probs_from for _, probs_from in chunk])  # [chunk_size, vocab_size]
+            chunk_probs_to = probs_to[:len(chunk)].zero_()
+            chunk_probs_to.index_add_(1, step['to'], probs_from.index_select(1, step['from']))
+            probs_std_flat.index_add_(0, std_rows, chunk_probs_to)
+
+
 def get_top_probs(probs: torch.FloatTensor, tokenizer: PreTrainedTokenizerBase, amount: int = 10) -> str:
     r"""
     Constructs output string with top amount of highest probability token strings.
@@ -684,15 +816,21 @@ def translate_logits_to_probs_std(logits: torch.FloatTensor,
         padded_probs[..., :vocab_size] = probs
         probs = padded_probs
 
-    # === Translate to probabilities over standard tokenizer ===
-    probs_std = torch.zeros(batch_size, std_sequence_len, std_vocab_size)
+    # === Align tokenized sequences via source token splitting, get one-to-many / many-to-one mappings ===
+    aligned_probs_batch = []
+    mappings_batch = []
     for b in range(batch_size):
         probs_b = probs[b][-len(offset_mapping[b]):]  # remove left padding
         tokens_b = tokens[b][-len(offset_mapping[b]):]  # remove left padding
-        translate_tokenizer_probs(probs_b, probs_std[b], offset_mapping[b], offset_mapping_std[b],
-                                  tokenizer, std_tokenizer,
-                                  split_map_cache, to_translation_map, from_translation_map,
-                                  tokens_b, tokens_std[b])
+        result = align_tokenizer_sequences(probs_b, offset_mapping[b], offset_mapping_std[b],
+                                           tokenizer, split_map_cache, tokens_b.cpu(), tokens_std[b].cpu())
+        aligned_probs, aligned_offset_mapping, aligned_tokens = result
+        aligned_probs_batch += [aligned_probs]
+        mappings_batch += [get_tokenizer_sequence_mappings(aligned_offset_mapping, offset_mapping_std[b])]
+
+    # === Translate to probabilities over standard tokenizer, for the whole batch at once ===
+    probs_std = torch.zeros(batch_size, std_sequence_len, std_vocab_size)
+    translate_aligned_probs(aligned_probs_batch, mappings_batch, probs_std, to_translation_map, from_translation_map)
 
     # === Correct excess probability mass (haircut) ===
     probs_std_sum = probs_std.sum(dim=-1)  # [batch_size, std_sequence_len]
@@ -758,37 +896,27 @@ def topk_token_phrases(logits: torch.Tensor, tokenizer: PreTrainedTokenizerBase,
     remainder_pmass = torch.clamp(1 - topk_pmass, 1e-40, 1)  # [batch_size] remainder probability mass
     floor_probs = remainder_pmass / (vocab_size - topk)  # [batch_size]divide remainder
 
-    # convert to list for faster iteration in list comprehension
-    topk_probs_list = topk_probs.tolist()
-    topk_indices_list = topk_indices.tolist()
-    floor_probs_list = floor_probs.tolist()
-
-    # === Construct topk phrases list ===
-    probs = []  # collect probability tensors with gradients attached (to be grafted into topk_tensor)
-    phrases = []  # form topk token phrases with prob prepend [prob, tok_0, tok_1, ... tok_n]
-
-    for b in range(batch_size):
-        # collect probability tensors with gradients attached (to be grafted into topk_tensor)
-        probs += [topk_probs[b], floor_probs[b]]  # [tensor(prob_k=0_b, prob_k=1_b, ...), tensor(prob_floor_b)]
-
-        # form topk token phrases with prob prepend [prob, tok_0, tok_1, ... tok_n]
-        phrases += [[prob] + tokenizer.std_token_phrases[i]
-                    for prob, i in zip(topk_probs_list[b], topk_indices_list[b])]  # [prob_k, tok_0_k, tok_1_k, ...]
-
-        # also add prob_floor for batch item
-        phrases += [[floor_probs_list[b]]]  # [prob_floor_b]
+    # === Gather topk phrases from the padded std_token_phrases table ===
+    set_std_token_phrases_table(tokenizer)
+    phrases_table = tokenizer.std_token_phrases_table  # [vocab_len, max_phrase_len]
+    indices = topk_indices.to(phrases_table.device)  # [batch_size, topk]
+    phrases_len = tokenizer.std_token_phrases_len[indices]  # [batch_size, topk] std_token_phrase lengths
 
     # determine width of topk_tensor as max len of all phrase lists (with prob in front)
-    max_len = max([len(p) for p in phrases])  # max_{b,k}(len([prob_k, tok_0_k, tok_1_k, ...]))
+    max_len = int(phrases_len.max()) + 1  # max_{b,k}(len([prob_k, tok_0_k, tok_1_k, ...]))
 
-    # form single 2D tensor with all phrase and probs (typically to send to axon wire encoding)
-    topk_tensor = torch.tensor([p + [ignore_index] * (max_len - len(p))
-                                for p in phrases]).to(logits.device)  # [batch_size * (topk + 1), max_len]
+    phrases = phrases_table[indices, :max_len - 1]  # [batch_size, topk, max_len - 1]
+    positions = torch.arange(max_len - 1, device=phrases.device)  # [max_len - 1]
+    phrases = phrases.masked_fill(positions >= phrases_len[..., None], ignore_index)  # pad after phrase end
 
-    # grafting probability tensors into first column to attach gradients
-    topk_tensor[:, 0] = torch.hstack(probs)  # tensor([prob_k=0_b, prob_k=1_b, ..., prob_floor_b])
+    # form single tensor with all phrases, floor phrase only has ignore_index tokens
+    topk_tensor = torch.full((batch_size, topk + 1, max_len), ignore_index,
+                             dtype=torch.float, device=logits.device)  # [batch_size, (topk + 1), max_len]
+    topk_tensor[:, :-1, 1:] = phrases.to(logits.device)
 
-    topk_tensor = topk_tensor.reshape(batch_size, topk + 1, max_len)  # [batch_size, (topk + 1), max_len] reshaped
+    # grafting probability tensors into first column to attach gradients
+    topk_tensor[:, :-1, 0] = topk_probs  # [batch_size, topk] prob_k=0_b, prob_k=1_b, ...
+    topk_tensor[:, -1, 0] = floor_probs  # [batch_size] prob_floor_b
 
     return topk_tensor  # [batch_size, (topk + 1), max_len] (probability gradients attached in first column)
 
@@ -823,11 +951,11 @@ def compact_topk_token_phrases(topk_tensor: torch.Tensor):
                      prob_k=0_b=1, tok_0_k=0_b=1, tok_1_k=0_b=1, ..., prob_k=1_b=1, tok_0_k=1_b=1, ..., prob_floor_b=1,
                      ...]
     """
-    topk_tensor_offset = topk_tensor.clone()  # assume topk_tensor may be reused elsewhere so clone
-    topk_tensor_offset[:, :, 1:] += 2  # add 2 to token ids to preserve [0, 1] for probabilities (in first column)
+    token_offset = torch.full((topk_tensor.shape[-1],), 2., device=topk_tensor.device)  # [max_len]
+    token_offset[0] = 0  # add 2 to token ids to preserve [0, 1] for probabilities (in first column)
+    topk_tensor_offset = topk_tensor + token_offset  # new tensor, topk_tensor may be reused elsewhere
 
-    flattened = topk_tensor_offset.flatten()  # [batch_size * (topk + 1) * max_len] 1D tensor
-    compact_topk = flattened[flattened > -1]  # remove ignore_index < -1 padding to compact content
+    compact_topk = topk_tensor_offset[topk_tensor_offset > -1]  # remove ignore_index < -1 padding to compact content
 
     return compact_topk  # [>= batch_size * (2 * topk + 1)]
 
@@ -913,6 +1041,39 @@ def unravel_topk_token_phrases(compact_topk: torch.Tensor, topk: int, ignore_ind
     return topk_tensor  # [batch_size, (topk + 1), max_len]
 
 
+def split_compact_topk_token_phrases(compact_topk: torch.Tensor, topk: int, split_sizes: List[int]) -> List[torch.Tensor]:
+    r"""
+    Split a compacted topk token phrases 1-D tensor along its batch items, so that each part is itself a valid
+    compact_topk tensor for split_sizes[i] batch items.
+        Args:
+            compact_topk (:obj:`torch.Tensor`, `required`):
+                [sum_b(sum_k(len(phrase_k) + 1)_b)] Compacted 1-D tensor >= batch_size * (2 * topk + 1).
+            topk (:obj:`int`, `required`):
+                Amount of top phrases per batch item.
+            split_sizes (:obj:`List[int]`, `required`):
+                Number of batch items in each part, sums to batch_size.
+
+        Returns:
+            parts (:obj:`List[torch.Tensor]`, `required`):
+                Compacted 1-D tensors, one per entry in split_sizes.
+    """
+    atol = 1e-6  # absolute tolerance
+    # Probability markers, every (topk + 1) markers start a new batch item, expect token_ids >= 2
+    prob_idx = torch.where((-atol < compact_topk) & (compact_topk < 1 + atol))[0]  # [batch_size * (topk + 1)]
+    item_start = prob_idx[::topk + 1].tolist()  # [batch_size] start offset of each batch item
+    assert len(item_start) == sum(split_sizes), f'split_compact_topk_token_phrases() batch mismatch: ' \
+                                                f'{len(item_start)} != {sum(split_sizes)}'
+
+    offsets = []  # start offset of each part in compact_topk
+    item_index = 0
+    for size in split_sizes:
+        offsets.append(item_start[item_index] if item_index < len(item_start) else len(compact_topk))
+        item_index += size
+    offsets.append(len(compact_topk))
+
+    return list(torch.split(compact_topk, [end - start for start, end in zip(offsets[:-1], offsets[1:])]))
+
+
 def phrase_cross_entropy(target_phrases: Union[List[List[int]], torch.Tensor],
                          topk_tensor: torch.Tensor,
                          ignore_index: int = -100, reduce=True, reduction='mean',
@@ -920,11 +1081,13 @@ def phrase_cross_entropy(target_phrases: Union[List[List[int]], torch.Tensor],
     r"""
     Calculates the cross entropy of a phrase prediction against a target phrase, so that this is a multi-token
     extension of typical cross entropy calculated for next token prediction.
+    Sub target matches of all batch items and phrase depths are found together, and a stack of topk tensors,
+    e.g. the responses of several servers, can be scored against the same target phrases at once.
         Args:
             target_phrases (:obj:`List[List[int]]`, `required`):
                 [batch_size, *] Target phrases in standard token sequence list.
             topk_tensor (:obj:`torch.Tensor`, `required`):
-                [batch_size, (topk + 1), max_len] tensor includes topk token probabilities (prob_k) + floor_prob
+                [..., batch_size, (topk + 1), max_len] tensor includes topk token probabilities (prob_k) + floor_prob
                 in first column with gradients attached, with std_tokens in remaining columns with ignore_index padding.
                 Content structure:
                 [[[prob_k=0_b=0, tok_0_k=0_b=0, tok_1_k=0_b=0, ..., ignore_index?],
@@ -947,69 +1110,90 @@ def phrase_cross_entropy(target_phrases: Union[List[List[int]], torch.Tensor],
                 used to prevent the floor_probs from being too large.
         Returns:
             loss_val (:obj:`torch.Tensor`, `required`):
-                Validation cross entropy loss, either scalar if reduce or [batch_size].
+                Validation cross entropy loss, either [...] if reduce or [..., batch_size].
             loss (:obj:`torch.Tensor`, `required`):
-                Phrase cross entropy loss, either scalar if reduce or [batch_size].
+                Phrase cross entropy loss, either [...] if reduce or [..., batch_size].
     """
 
-    batch_size, topk_p1, max_len = topk_tensor.shape  # [batch_size, (topk + 1), max_len]
+    batch_size, topk_p1, max_len = topk_tensor.shape[-3:]  # [..., batch_size, (topk + 1), max_len]
     topk = topk_p1 - 1
+    depth = max_len - 1  # number of phrase tokens
+    device = topk_tensor.device
 
-    topk_tokens = topk_tensor[:, :-1, 1:].round().int()  # [batch_size, topk, max_len - 1] Phrase tokens with ignore_index token for padding.
-    topk_probs = topk_tensor[:, :-1, 0]  # [batch_size, topk] Probabilities for each phrase in topk
-    floor_probs = topk_tensor[:, -1, 0]  # [batch_size] Floor probabilities as mean probability for non-topk tokens
+    topk_tokens = topk_tensor[..., :-1, 1:].round()  # [..., batch_size, topk, max_len - 1] Phrase tokens with ignore_index token for padding.
+    topk_probs = topk_tensor[..., :-1, 0]  # [..., batch_size, topk] Probabilities for each phrase in topk
+    floor_probs = topk_tensor[..., -1, 0]  # [..., batch_size] Floor probabilities as mean probability for non-topk tokens
 
-    topk_probs = torch.clamp(topk_probs, 0, 1)  # [batch_size, topk] ensure probabilities within [0, 1]
-    floor_probs = torch.clamp(floor_probs, 0, 1)  # [batch_size] ensure floor probabilities within [0, 1]
+    topk_probs = torch.clamp(topk_probs, 0, 1)  # [..., batch_size, topk] ensure probabilities within [0, 1]
+    floor_probs = torch.clamp(floor_probs, 0, 1)  # [..., batch_size] ensure floor probabilities within [0, 1]
 
     # === Ensure total probability is 1 ===
-    total_probs = topk_probs.sum(dim=-1) + max(0, vocab_size_min - topk) * floor_probs  # [batch_size] total probs
-    n_topk_probs = topk_probs / total_probs[:, None]  # [batch_size, topk] normalized topk_probs
-    n_floor_probs = floor_probs / total_probs  # [batch_size] normalized floor_probs
-
-    val_probs = torch.zeros(batch_size).to(topk_probs.device)  # accumulate probabilities when first tokens match
-    match_probs = torch.zeros(batch_size).to(topk_probs.device)  # accumulate probabilities when sub target matches phrase
-    for b in range(batch_size):
-        target_phrase = target_phrases[b]
-        if not isinstance(target_phrase, torch.Tensor):
-            target_phrase = torch.tensor(target_phrases[b])
-        if isinstance(target_phrase, torch.FloatTensor):
-            target_phrase = target_phrase.round().int()
-
-        match = (topk_tokens[b, :, 0] == target_phrase[0].item())  # bool where first tokens match (validation token)
-        if match.sum() > 0:
-            val_probs[b] = n_topk_probs[b, match].sum()  # accumulate all matches
-        else:  # no matches
-            val_probs[b] = n_floor_probs[b]  # assume match is in non-topk tokens with avg floor_prob
-
-        # === Integrate sub target matches ===
-        check_len = min(max_len - 1, len(target_phrase))
-        for c in range(1, check_len + 1):  # progressively increase sub target length
-            target = ignore_index * torch.ones(check_len, dtype=torch.int32).to(topk_tensor.device)  # [-100, ..., -100]
-            target[:c] = target_phrase[:c]  # [tok0, tok1, ...tokc, -100, ..., -100]
-
-            # Find sub target matches
-            match = (topk_tokens[b, :, :check_len] == target)
-            match_idx = torch.where(match.sum(dim=-1) == check_len)[0]  # phrase indices which match sub target
-
-            if len(match_idx):  # at least one match
-                match_probs[b] += n_topk_probs[b, match_idx].sum()  # accumulate all matches
-            else:  # no matches
-                match_probs[b] += n_floor_probs[b]  # assume match is in non-topk tokens with avg floor_prob
-
-    val_probs = torch.clamp(val_probs, 0, 1)  # [batch_size] ensure 0 <= total probability <= 1
-    loss_val = - torch.log(val_probs + 1e-40)  # [batch_size] calculate cross entropy loss
-
-    match_probs = torch.clamp(match_probs, 0, 1)  # [batch_size] ensure 0 <= total probability <= 1
-    loss = - torch.log(match_probs + 1e-40)  # [batch_size] calculate cross entropy loss
+    total_probs = topk_probs.sum(dim=-1) + max(0, vocab_size_min - topk) * floor_probs  # [..., batch_size] total probs
+    n_topk_probs = topk_probs / total_probs[..., None]  # [..., batch_size, topk] normalized topk_probs
+    n_floor_probs = floor_probs / total_probs  # [..., batch_size] normalized floor_probs
+
+    # === Pad target phrases to the phrase depth ===
+    targets = ignore_index * torch.ones((batch_size, depth), dtype=topk_tokens.dtype, device=device)  # [batch_size, depth]
+    if isinstance(target_phrases, torch.Tensor):
+        target_phrases = target_phrases[:, :depth]
+        if target_phrases.is_floating_point():
+            target_phrases = target_phrases.round()
+        targets[:, :target_phrases.shape[1]] = target_phrases
+        check_lens = torch.full((batch_size,), target_phrases.shape[1], device=device)
+    else:
+        check_lens = torch.zeros(batch_size, dtype=torch.long, device=device)
+        for b in range(batch_size):
+            target_phrase = torch.as_tensor(target_phrases[b])[:depth]
+            if target_phrase.is_floating_point():
+                target_phrase = target_phrase.round()
+            targets[b, :len(target_phrase)] = target_phrase
+            check_lens[b] = len(target_phrase)
+    checked = torch.arange(depth, device=device) < check_lens[:, None]  # [batch_size, depth] target positions to check
+
+    # === Validation token matches ===
+    match = topk_tokens[..., 0] == targets[:, None, 0]  # [..., batch_size, topk] bool where first tokens match (validation token)
+    val_probs = torch.where(match.any(dim=-1),
+                            (match * n_topk_probs).sum(dim=-1),  # accumulate all matches
+                            n_floor_probs)  # no matches, assume match is in non-topk tokens with avg floor_prob
+
+    # === Integrate sub target matches ===
+    # A phrase matches the sub target of length c when its first c tokens equal the target tokens and its remaining
+    # checked positions are padding, so each phrase matches at most one sub target: the one of its length.
+    # Matching and padding positions are packed into bits, position j as 2^j, to test each phrase at once.
+    bits_dtype = torch.float32 if depth <= 24 else torch.float64  # exact sums of the position bits
+    bits = torch.pow(2., torch.arange(depth, dtype=bits_dtype, device=device)) * checked  # [batch_size, depth]
+    equal_bits = torch.matmul((topk_tokens == targets[:, None, :]).to(bits_dtype), bits[..., None])[..., 0]  # [..., batch_size, topk]
+    padding_bits = torch.matmul((topk_tokens == ignore_index).to(bits_dtype), bits[..., None])[..., 0]  # [..., batch_size, topk]
+    sub_lens = torch.log2(equal_bits + 1).round().long()  # [..., batch_size, topk] sub target length c if bits are a prefix
+    match = ((equal_bits + padding_bits == bits.sum(dim=-1)[:, None]) &  # checked positions either match or are padding
+             (torch.pow(2., sub_lens) - 1 == equal_bits) & (sub_lens > 0))  # [..., batch_size, topk] matching positions are a prefix
+
+    sub_index = torch.where(match, sub_lens, torch.zeros_like(sub_lens))  # [..., batch_size, topk] position c, 0 for no match
+    sub_probs = torch.zeros(n_topk_probs.shape[:-1] + (depth + 1,), dtype=n_topk_probs.dtype, device=device)
+    sub_probs = sub_probs.scatter_add(-1, sub_index, n_topk_probs)  # [..., batch_size, depth + 1] accumulate all matches
+    sub_matches = torch.zeros_like(sub_probs).scatter_add(-1, sub_index, match.to(sub_probs.dtype))  # [..., batch_size, depth + 1]
+    sub_probs = torch.where(sub_matches[..., 1:] > 0,
+                            sub_probs[..., 1:],
+                            n_floor_probs[..., None])  # [..., batch_size, depth] no matches, assume match is in non-topk tokens with avg floor_prob
+    match_probs = (sub_probs * checked).sum(dim=-1)  # [..., batch_size] accumulate sub target lengths up to check_len
+
+    val_probs = torch.clamp(val_probs, 0, 1)  # [..., batch_size] ensure 0 <= total probability <= 1
+    loss_val = - torch.log(val_probs + 1e-40)  # [..., batch_size] calculate cross entropy loss
+
+    match_probs = torch.clamp(match_probs, 0, 1)  # [..., batch_size] ensure 0 <= total probability <= 1
+    loss = - torch.log(match_probs + 1e-40)  # [..., batch_size] calculate cross entropy loss
 
     if reduce:
         if not hasattr(loss_val, reduction) or not hasattr(loss, reduction):
             raise RuntimeError(f'phase_cross_entropy(): Reduction function {reduction} not found.')
-        loss_val = getattr(loss_val, reduction)()
-        loss = getattr(loss, reduction)()
-        if loss.numel() > 1:
-            raise ValueError(f'phase_cross_entropy(): Expected reduction to scalar, obtained {loss.shape} instead.')
+        if loss.dim() > 1:  # reduce each stacked topk tensor over its batch
+            loss_val = getattr(loss_val, reduction)(dim=-1)
+            loss = getattr(loss, reduction)(dim=-1)
+        else:
+            loss_val = getattr(loss_val, reduction)()
+            loss = getattr(loss, reduction)()
+            if loss.numel() > 1:
+                raise ValueError(f'phase_cross_entropy(): Expected reduction to scalar, obtained {loss.shape} instead.')
 
     return loss_val, loss
 
@@ -1041,19 +1225,8 @@ def topk_tokens_to_vocab_size(topk_tensor: torch.Tensor, vocab_size_std: int, vo
                 [batch_size, vocab_size_std] Standard logits.
     """
 
-    batch_size, topk_p1, max_len = topk_tensor.shape  # [batch_size, (topk + 1), max_len]
-    topk = topk_p1 - 1
-
-    topk_tokens = topk_tensor[:, :-1, 1].round().to(torch.int64)  # [batch_size, topk] first tokens
-    topk_probs = topk_tensor[:, :-1, 0]  # [batch_size, topk] Probabilities for each phrase in topk
-    floor_probs = topk_tensor[:, -1, 0]  # [batch_size] Floor probabilities as mean probability for non-topk tokens
-
-    topk_probs = torch.clamp(topk_probs, 0, 1)  # [batch_size, topk] ensure probabilities within [0, 1]
-    floor_probs = torch.clamp(floor_probs, 0, 1)  # [batch_size] ensure floor probabilities within [0, 1]
-
-    # === Ensure total probability is 1 ===
-    total_probs = topk_probs.sum(dim=-1) + max(0, vocab_size_min - topk) * floor_probs  # [batch_size] total probs
-    n_topk_probs = topk_probs / total_probs[:, None]  # [batch_size, topk] normalized topk_probs
+    batch_size = topk_tensor.shape[0]  # [batch_size, (topk + 1), max_len]
+    topk_tokens, n_topk_probs = topk_first_token_probs(topk_tensor, vocab_size_min)  # [batch_size, topk]
 
     # === Convert to logits tensor ===
     probs = torch.zeros((batch_size, vocab_size_std))  # [batch_size, vocab_size_std]
@@ -1062,6 +1235,39 @@ def topk_tokens_to_vocab_size(topk_tensor: torch.Tensor, vocab_size_std: int, vo
     return probs  # [batch_size, vocab_size_std]
 
 
+def topk_first_token_probs(topk_tensor: torch.Tensor, vocab_size_min: int = 50257) -> Tuple[torch.Tensor, torch.Tensor]:
+    r"""
+    Extract the first token of each topk phrase with its normalized probability, the sparse form of
+    topk_tokens_to_vocab_size. Leading dimensions are kept, so stacked responses are handled in one call.
+        Args:
+            topk_tensor (:obj:`torch.Tensor`, `required`):
+                [*, batch_size, (topk + 1), max_len] tensor includes topk token probabilities (prob_k) + floor_prob
+                in first column with gradients attached, with std_tokens in remaining columns with ignore_index padding.
+            vocab_size_min (:obj:`int`, `optional`):
+                Minimum server vocab_size expected, should set to nominal 50257,
+                used to prevent the floor_probs from being too large.
+        Returns:
+            topk_tokens (:obj:`torch.Tensor`, `required`):
+                [*, batch_size, topk] First token of each topk phrase.
+            n_topk_probs (:obj:`torch.Tensor`, `required`):
+                [*, batch_size, topk] Normalized probability of each topk phrase.
+    """
+    topk = topk_tensor.shape[-2] - 1
+
+    topk_tokens = topk_tensor[..., :-1, 1].round().to(torch.int64)  # [*, batch_size, topk] first tokens
+    topk_probs = topk_tensor[..., :-1, 0]  # [*, batch_size, topk] Probabilities for each phrase in topk
+    floor_probs = topk_tensor[..., -1, 0]  # [*, batch_size] Floor probabilities as mean probability for non-topk tokens
+
+    topk_probs = torch.clamp(topk_probs, 0, 1)  # [*, batch_size, topk] ensure probabilities within [0, 1]
+    floor_probs = torch.clamp(floor_probs, 0, 1)  # [*, batch_size] ensure floor probabilities within [0, 1]
+
+    # === Ensure total probability is 1 ===
+    total_probs = topk_probs.sum(dim=-1) + max(0, vocab_size_min - topk) * floor_probs  # [*, batch_size] total probs
+    n_topk_probs = topk_probs / total_probs[..., None]  # [*, batch_size, topk] normalized topk_probs
+
+    return topk_tokens, n_topk_probs
+
+
 def check_tokenizer_equivalence(tokenizer_to_check: PreTrainedTokenizerBase,
                                 target_tokenizer: PreTrainedTokenizerBase) -> bool:
     r"""
@@ -1379,6 +1585,36 @@ def set_std_token_phrases(tokenizer, std_tokenizer):
         # Retokenize phrases to new tokenizer
         tokenizer.std_token_phrases = std_tokenizer(tokenizer.phrases)['input_ids']  # [topk, max_len] convert phrases to tokens sequences
 
+    set_std_token_phrases_table(tokenizer)
+
+
+def set_std_token_phrases_table(tokenizer):
+    r"""
+    Sets std_token_phrases_table and std_token_phrases_len if unset, the std_token_phrases padded into a single
+    [vocab_len, max_phrase_len] tensor with the length of each phrase, so that topk phrases can be gathered
+    with tensor indexing instead of forming python lists.
+    Requires std_token_phrases, see set_std_token_phrases.
+        Args:
+            tokenizer(:obj:`PreTrainedTokenizerBase`, `required`):
+                Tokenizer to set std_token_phrases_table for.
+
+        Returns:
+
+    """
+    if not hasattr(tokenizer, 'std_token_phrases_table'):
+        phrases = tokenizer.std_token_phrases
+        phrases_len = torch.tensor([len(phrase) for phrase in phrases], dtype=torch.long)  # [vocab_len]
+        max_phrase_len = max(int(phrases_len.max()), 1) if len(phrases) else 1
+
+        # pad with 0, positions after each phrase end are masked with ignore_index when gathered
+        phrases_table = torch.zeros((len(phrases), max_phrase_len), dtype=torch.long)  # [vocab_len, max_phrase_len]
+        positions = torch.arange(max_phrase_len)  # [max_phrase_len]
+        phrases_table[positions < phrases_len[:, None]] = torch.tensor([token for phrase in phrases
+                                                                        for token in phrase], dtype=torch.long)
+
+        tokenizer.std_token_phrases_len = phrases_len
+        tokenizer.std_token_phrases_table = phrases_table
+
 
 def prep_tokenizer(tokenizer, std_tokenizer=None):
     tokenizer.padding_side = "left"  # Generative default expects most recent token on right-hand side with padding on left. https://github.com/huggingface/transformers/pull/10552
@@ -15,7 +15,18 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER 
 # DEALINGS IN THE SOFTWARE.
 
+import http.server
+import os
+import threading
+import time
+import urllib.parse
+
+import numpy as np
+import torch
 import bittensor
+from bittensor._dataset import dataset_impl
+from bittensor._dataset.ipfs_fetcher import ContentStore, IPFSFetcher, encode_file
+from bittensor._dataset.token_cache import TokenCache
 from . import constant
 from unittest.mock import MagicMock
 logging = bittensor.logging()
@@ -89,5 +100,185 @@ def test_text_dataset():
     
     dataset.close()
 
+def test_token_cache(tmp_path):
+    header = {'tokenizer': 'gpt2', 'vocab_size': 50258}
+    cache = TokenCache(str(tmp_path), np.uint16, header)
+    first = cache.add('first', np.arange(10))
+    second = cache.add('second', np.arange(5) + 100)
+    assert isinstance(first, np.memmap) and list(first) == list(range(10))
+    assert list(second) == [100, 101, 102, 103, 104]
+
+    # Reopening reads the index back, texts are not tokenized twice.
+    cache = TokenCache(str(tmp_path), np.uint16, header)
+    assert sorted(cache.hashes()) == ['first', 'second']
+    assert list(cache.get('second')) == [100, 101, 102, 103, 104]
+
+    # Caches of another tokenizer use their own files and leave this one intact.
+    other = TokenCache(str(tmp_path), np.uint32, header)
+    assert len(other) == 0 and other.get('first') is None
+    assert sorted(TokenCache(str(tmp_path), np.uint16, header).hashes()) == ['first', 'second']
+    assert all(TokenCache.is_cache_file(file_name) for file_name in os.listdir(str(tmp_path)))
+
+    # Caches sharing the files append after each other's tokens.
+    cache, shared = TokenCache(str(tmp_path), np.uint16, header), TokenCache(str(tmp_path), np.uint16, header)
+    assert list(cache.add('third', np.arange(3))) == [0, 1, 2]
+    assert list(shared.add('fourth', np.arange(4) + 200)) == [200, 201, 202, 203]
+    cache = TokenCache(str(tmp_path), np.uint16, header)
+    assert list(cache.get('third')) == [0, 1, 2] and list(cache.get('fourth')) == [200, 201, 202, 203]
+
+    # Invalid index lines and a partial line left by a crash are skipped, the tokens are kept.
+    token_size = os.path.getsize(cache.token_path)
+    with open(cache.index_path, mode = 'a') as f:
+        f.write('corrupt\nfifth 0 100000\nsixth 0')
+    cache = TokenCache(str(tmp_path), np.uint16, header)
+    assert sorted(cache.hashes()) == ['first', 'fourth', 'second', 'third']
+    assert list(cache.add('seventh', np.arange(2))) == [0, 1]
+    assert sorted(TokenCache(str(tmp_path), np.uint16, header).hashes()) == ['first', 'fourth', 'second', 'seventh', 'third']
+
+    # A partially written token is padded instead of truncating the token file.
+    with open(cache.token_path, mode = 'ab') as f:
+        f.write(b'\x01')
+    cache = TokenCache(str(tmp_path), np.uint16, header)
+    assert os.path.getsize(cache.token_path) == token_size + 6
+    assert list(cache.add('eighth', np.arange(2) + 300)) == [300, 301]
+
+    # An unreadable header starts a new index and leaves the token file in place.
+    with open(cache.index_path, mode = 'w') as f:
+        f.write('corrupt\n')
+    cache = TokenCache(str(tmp_path), np.uint16, header)
+    assert len(cache) == 0 and os.path.getsize(cache.token_path) == token_size + 10
+
+    # Texts past max_size are returned without being cached.
+    cache = TokenCache(str(tmp_path), np.uint32, header, max_size = 16)
+    assert list(cache.add('large', np.arange(8))) == list(range(8))
+    assert 'large' not in cache
+
+class StreamDataset(dataset_impl.GenesisTextDataset):
+    r""" Genesis dataset whose corpus is consecutive token ids, served without IPFS.
+    """
+    def build_hash_table(self):
+        self.block_dir = 'http://127.0.0.1:1/api/v0/block/get'
+        self.dataset_hashes = {}
+        self.next_token = 0
+
+    def construct_text_corpus(self, min_data_len = 0):
+        if self.corpus_size == 0:
+            return []
+        size = max(min_data_len, self.corpus_size)
+        tokens = (np.arange(self.next_token, self.next_token + size) % 60000).astype(self.token_dtype)
+        self.next_token += size
+        return [tokens]
+
+def stream_dataset(tmp_path, corpus_size = 1000, batch_size = 4, block_size = 8):
+    StreamDataset.corpus_size = corpus_size
+    return StreamDataset(
+        block_size = block_size, batch_size = batch_size, num_workers = 0, dataset_name = 'default', data_dir = str(tmp_path),
+        save_dataset = False, max_datasets = 1, no_tokenizer = False, num_batches = 5, max_directories = 1
+    )
+
+def test_stream_refill(tmp_path):
+    dataset = stream_dataset(tmp_path)
+    blocks = torch.cat([next(dataset) for _ in range(12)])
+    assert list(blocks.shape) == [48, 8]
+    # Blocks are consecutive tokens and no token is served twice across refills.
+    assert bool(((blocks[:, 1:] - blocks[:, :-1]) == 1).all())
+    assert len(blocks.flatten().unique()) == blocks.numel()
+    metrics = dataset.get_stream_metrics()
+    assert metrics['batches'] == 12 and metrics['stream_blocks'] < 5 * 4
+    dataset.close()
+
+def test_stream_reslice(tmp_path):
+    dataset = stream_dataset(tmp_path)
+    served = [next(dataset).flatten()]
+    remaining = len(dataset.stream_remaining())
+    dataset.set_data_size(2, 12)
+    # The unserved tokens are re-sliced into the new block size instead of being dropped.
+    assert len(dataset.stream_remaining()) == remaining
+    assert dataset.get_stream_metrics()['reslices'] == 1
+    batch = next(dataset)
+    assert list(batch.shape) == [2, 12]
+    served += [batch.flatten()] + [next(dataset).flatten() for _ in range(10)]
+    served = torch.cat(served)
+    assert len(served.unique()) == len(served)
+
+    # Only block size changes re-slice the stream.
+    dataset.set_data_size(3, 12)
+    assert list(next(dataset).shape) == [3, 12]
+    assert dataset.get_stream_metrics()['reslices'] == 1
+    dataset.close()
+
+def test_stream_shutdown(tmp_path):
+    # Without data the consumer waits on the producer until the dataset is closed.
+    dataset = stream_dataset(tmp_path, corpus_size = 0)
+    raised = threading.Event()
+    def consume():
+        try:
+            next(dataset)
+        except StopIteration:
+            raised.set()
+    consumer = threading.Thread(target = consume)
+    consumer.start()
+    time.sleep(0.5)
+    start_time = time.time()
+    dataset.close()
+    consumer.join(timeout = 5)
+    assert raised.is_set() and not consumer.is_alive()
+    assert not dataset.producer.is_alive()
+    assert time.time() - start_time < 5
+    assert dataset.get_stream_metrics()['waits'] > 0
+
+    # Closing twice is a no-op.
+    dataset.close()
+
+def serve_blocks(blocks):
+    r""" Serves the blocks on a local stub of the IPFS block/get api, returns the server.
+    """
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_POST(self):
+            cid = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)['arg'][0]
+            block = blocks.get(cid)
+            self.send_response(200 if block is not None else 500)
+            self.send_header('Content-Length', str(len(block or b'')))
+            self.end_headers()
+            self.wfile.write(block or b'')
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target = server.serve_forever, daemon = True).start()
+    return server
+
+def test_ipfs_fetcher(tmp_path):
+    texts = [b'small text', bytes(range(256)) * 100]
+    blocks, cids = {}, []
+    for text in texts:
+        cid, file_blocks = encode_file(text, chunk_size = 4096)
+        blocks.update(file_blocks)
+        cids.append(cid)
+    corrupt_cid, corrupt_blocks = encode_file(b'corrupted text')
+    blocks[corrupt_cid] = corrupt_blocks[corrupt_cid].replace(b'corrupted', b'tampered!')
+
+    server = serve_blocks(blocks)
+    block_url = 'http://127.0.0.1:{}/api/v0/block/get'.format(server.server_address[1])
+    fetcher = IPFSFetcher(block_url, store = ContentStore(str(tmp_path), max_size = 1e6), concurrency = 4, retries = 0)
+    results = {}
+    fetcher.fetch(cids + [corrupt_cid], lambda cid, data: results.update({cid: data}))
+    assert [results[cid] for cid in cids] == texts
+    assert results[corrupt_cid] is None
+    assert fetcher.stats.verification_failures == 1
+
+    # Verified blocks are served from the store.
+    fetched_blocks = fetcher.stats.blocks
+    assert fetcher.get(cids[1]) == texts[1]
+    assert fetcher.stats.blocks == fetched_blocks
+    assert fetcher.get_metrics()['hit_rate'] > 0
+
+    # The store evicts the least recently used blocks past its size.
+    store = ContentStore(str(tmp_path), max_size = 5000)
+    assert store.size <= 5000 and store.evictions > 0
+    fetcher.close()
+    server.shutdown()
+
 if __name__ == "__main__":
     test_change_data_size()
\ No newline at end of file
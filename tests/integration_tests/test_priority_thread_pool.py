@@ -15,6 +15,12 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER 
 # DEALINGS IN THE SOFTWARE.
 
+import concurrent
+import queue
+import threading
+import time
+
+import pytest
 import bittensor
 from unittest.mock import MagicMock
 
@@ -31,6 +37,61 @@ def test_priority_thread_pool():
     assert save[0] == 0
     assert save[1] == 9
 
+def blocked_pool( **kwargs ):
+    r""" Returns a single worker pool and an event releasing the task holding its worker.
+    """
+    pool = bittensor.prioritythreadpool( max_workers = 1, maxsize = -1, **kwargs )
+    gate = threading.Event()
+    pool.submit( gate.wait )
+    while not pool.is_empty:
+        time.sleep( 0.001 )
+    return pool, gate
+
+def test_priority_thread_pool_weighted_fair_share():
+    pool, gate = blocked_pool( max_per_caller = -1 )
+    order = []
+    for _ in range(6):
+        pool.submit( order.append, 'heavy', priority = 2, caller = 'heavy' )
+        pool.submit( order.append, 'light', priority = 1, caller = 'light' )
+    gate.set()
+    pool.shutdown( wait = True )
+    # The heavy caller runs twice as often until it is drained.
+    assert order[0] == 'heavy'
+    assert order[:6].count( 'heavy' ) == 4
+    assert order.count( 'light' ) == 6
+
+def test_priority_thread_pool_expires_deadlines():
+    pool, gate = blocked_pool()
+    stale = pool.submit( time.sleep, 0, deadline = time.time() + 0.01 )
+    live = pool.submit( time.sleep, 0, deadline = time.time() + 10 )
+    time.sleep( 0.05 )
+    gate.set()
+    with pytest.raises( concurrent.futures.TimeoutError ):
+        stale.result( timeout = 1 )
+    live.result( timeout = 1 )
+    assert pool.stats.expired == 1
+
+def test_priority_thread_pool_bounds_callers():
+    pool, gate = blocked_pool( max_per_caller = 2 )
+    for _ in range(2):
+        pool.submit( time.sleep, 0, caller = 'flood' )
+    with pytest.raises( queue.Full ):
+        pool.submit( time.sleep, 0, caller = 'flood' )
+    pool.submit( time.sleep, 0, caller = 'other' )
+    metrics = pool.get_queue_metrics()
+    assert metrics['depth'] == 3 and metrics['callers'] == 2 and metrics['rejected'] == 1
+    gate.set()
+
+def test_priority_thread_pool_ages_low_priority():
+    pool, gate = blocked_pool( max_wait = 0.01 )
+    order = []
+    pool.submit( order.append, 'low', priority = 0, caller = 'low' )
+    time.sleep( 0.05 )
+    pool.submit( order.append, 'high', priority = 1000, caller = 'high' )
+    gate.set()
+    pool.shutdown( wait = True )
+    assert order == [ 'low', 'high' ]
+    assert pool.stats.aged == 1
 
 if __name__ == "__main__":
     test_priority_thread_pool()
\ No newline at end of file
@@ -16,6 +16,8 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER 
 # DEALINGS IN THE SOFTWARE.
 
+import asyncio
+import queue
 import time
 import unittest
 import unittest.mock as mock
@@ -26,6 +28,7 @@ import pytest
 import torch
 
 import bittensor
+from bittensor._axon import AuthInterceptor
 from bittensor.utils.test_utils import get_random_unused_port
 import concurrent
 
@@ -37,7 +40,7 @@ axon = bittensor.axon(wallet = wallet)
 sender_wallet = bittensor.wallet.mock()
 
 def gen_nonce():
-    return f"{time.monotonic_ns()}"
+    return f"{time.time_ns()}"
 
 def sign_v1(wallet):
     nonce, receptor_uid = gen_nonce(), str(uuid.uuid1())
@@ -46,8 +49,8 @@ def sign_v1(wallet):
     signature = spliter.join([ nonce, str(wallet.hotkey.ss58_address), "0x" + wallet.hotkey.sign(message).hex(), receptor_uid])
     return signature
 
-def sign_v2(sender_wallet, receiver_wallet):
-    nonce, receptor_uid = gen_nonce(), str(uuid.uuid1())
+def sign_v2(sender_wallet, receiver_wallet, nonce = None):
+    nonce, receptor_uid = gen_nonce() if nonce == None else str(nonce), str(uuid.uuid1())
     sender_hotkey = sender_wallet.hotkey.ss58_address
     receiver_hotkey = receiver_wallet.hotkey.ss58_address
     message = f"{nonce}.{sender_hotkey}.{receiver_hotkey}.{receptor_uid}"
@@ -920,6 +923,38 @@ def test_backward_response_success_text_priority():
     assert code == bittensor.proto.ReturnCode.Success
 
 
+def test_forward_and_backward_shed_by_priority_queue():
+    def priority(pubkey:str, request_type:str, inputs_x):
+        return 100
+
+    priority_threadpool = mock.MagicMock()
+    priority_threadpool.submit.side_effect = queue.Full( 'priority queue is full' )
+    axon = bittensor.axon(wallet = wallet, priority= priority, priority_threadpool = priority_threadpool)
+
+    def forward( inputs_x: torch.FloatTensor, synapses, model_output = None):
+        return None, dict(), torch.zeros( [inputs_x.shape[0], inputs_x.shape[1], bittensor.__network_dim__])
+    axon.attach_synapse_callback( forward, synapse_type = bittensor.proto.Synapse.SynapseType.TEXT_LAST_HIDDEN_STATE)
+
+    inputs_raw = torch.ones((1, 1))
+    grads_raw = torch.zeros((1, 1, bittensor.__network_dim__))
+    synapses = [bittensor.synapse.TextLastHiddenState()]
+    inputs_serialized = synapses[0].serialize_forward_request_tensor(inputs_raw)
+    grads_serialized = synapses[0].serialize_backward_request_gradient(inputs_raw, grads_raw)
+    request = bittensor.proto.TensorMessage(
+        version=bittensor.__version_as_int__,
+        hotkey = axon.wallet.hotkey.ss58_address,
+        tensors=[ inputs_serialized ],
+        synapses= [ syn.serialize_to_wire_proto() for syn in synapses ]
+    )
+    response, code, response_synapses = axon._forward( request )
+    assert code == bittensor.proto.ReturnCode.Backoff
+
+    request.tensors.append( grads_serialized )
+    response, code, response_synapses = axon._backward( request )
+    assert code == bittensor.proto.ReturnCode.Backoff
+    axon.stop()
+
+
 def run_test_grpc_forward_works(receiver_version):
     def forward( inputs_x:torch.FloatTensor, synapse , model_output = None):
         return None, dict(), torch.zeros( [3, 3, bittensor.__network_dim__])
@@ -1128,6 +1163,266 @@ def test_axon_is_destroyed():
     axonB.__del__()
     assert is_port_in_use( port ) == False
 
+def test_batcher_coalesces_requests():
+    calls = []
+    def forward( inputs_x: torch.FloatTensor, synapse, model_output = None):
+        calls.append( inputs_x.shape[0] )
+        return None, None, inputs_x * 2
+    batcher = bittensor.MicroBatcher( max_batch_size = 32, window = 0.1 )
+    synapse = bittensor.synapse.TextLastHiddenState()
+    inputs = [ torch.rand(2, 3), torch.rand(1, 3), torch.rand(3, 3) ]
+    futures = [ batcher.submit( forward, synapse, inputs_x ) for inputs_x in inputs ]
+    for inputs_x, future in zip( inputs, futures ):
+        _, _, response = future.result( timeout = 5 )
+        assert torch.equal( response, inputs_x * 2 )
+    assert calls == [6]
+    assert batcher.stats.requests == 3
+    batcher.stop()
+
+def test_batcher_separates_shapes_and_full_batches():
+    calls = []
+    def forward( inputs_x: torch.FloatTensor, synapse, model_output = None):
+        calls.append( tuple(inputs_x.shape) )
+        return None, None, inputs_x + 1
+    batcher = bittensor.MicroBatcher( max_batch_size = 4, window = 0.1 )
+    synapse = bittensor.synapse.TextCausalLM()
+    inputs = [ torch.rand(2, 3), torch.rand(2, 5), torch.rand(2, 3), torch.rand(2, 3) ]
+    futures = [ batcher.submit( forward, synapse, inputs_x ) for inputs_x in inputs ]
+    for inputs_x, future in zip( inputs, futures ):
+        _, _, response = future.result( timeout = 5 )
+        assert torch.equal( response, inputs_x + 1 )
+    assert sorted( calls ) == [ (2, 3), (2, 5), (4, 3) ]
+    batcher.stop()
+
+def test_batcher_splits_compact_topk_phrases():
+    topk = 2
+    def forward( inputs_x: torch.FloatTensor, synapse, model_output = None):
+        # One phrase of inputs_x[b, 0] tokens per batch item, probabilities 0.3, 0.2 and floor 0.1.
+        topk_tensor = torch.full( [inputs_x.shape[0], topk + 1, 2], -100. )
+        topk_tensor[:, :, 0] = torch.tensor([0.3, 0.2, 0.1])
+        topk_tensor[:, :topk, 1] = inputs_x[:, :1]
+        return None, None, bittensor.utils.tokenizer_utils.compact_topk_token_phrases( topk_tensor )
+    batcher = bittensor.MicroBatcher( max_batch_size = 32, window = 0.1 )
+    synapse = bittensor.synapse.TextCausalLMNext( topk = topk )
+    inputs = [ torch.tensor([[5., 0.], [6., 0.]]), torch.tensor([[7., 0.]]) ]
+    futures = [ batcher.submit( forward, synapse, inputs_x ) for inputs_x in inputs ]
+    for inputs_x, future in zip( inputs, futures ):
+        _, _, response = future.result( timeout = 5 )
+        assert torch.equal( response, forward( inputs_x, synapse )[2] )
+    assert batcher.stats.batches == 1
+    batcher.stop()
+
+def test_forward_last_hidden_success_batched():
+    def forward( inputs_x: torch.FloatTensor, synapse , model_output = None):
+        return None, dict(), torch.zeros( [inputs_x.shape[0], inputs_x.shape[1], bittensor.__network_dim__])
+    axon = bittensor.axon( wallet = wallet, batcher = bittensor.MicroBatcher( window = 0.01 ) )
+    axon.attach_synapse_callback( forward, synapse_type = bittensor.proto.Synapse.SynapseType.TEXT_LAST_HIDDEN_STATE)
+
+    inputs_raw = torch.rand(3, 3)
+    serializer = bittensor.serializer( serializer_type = bittensor.proto.Serializer.MSGPACK )
+    synapses = [bittensor.synapse.TextLastHiddenState()]
+    inputs_serialized = serializer.serialize(inputs_raw, from_type = bittensor.proto.TensorType.TORCH)
+    request = bittensor.proto.TensorMessage(
+        version = bittensor.__version_as_int__,
+        tensors=[inputs_serialized],
+        synapses = [ syn.serialize_to_wire_proto() for syn in synapses ],
+        hotkey = axon.wallet.hotkey.ss58_address, 
+    )
+    response, code, synapses = axon._forward( request )
+    assert code == bittensor.proto.ReturnCode.Success
+    assert synapses[0].return_code == bittensor.proto.ReturnCode.Success
+    assert axon.batcher.stats.requests == 1
+    axon.stop()
+
+def test_forward_batched_timeout_cancels_future():
+    calls = []
+    def forward( inputs_x: torch.FloatTensor, synapse , model_output = None):
+        calls.append( inputs_x.shape[0] )
+        return None, dict(), torch.zeros( [inputs_x.shape[0], inputs_x.shape[1], bittensor.__network_dim__])
+    axon = bittensor.axon( wallet = wallet, batcher = bittensor.MicroBatcher( window = 0.5 ) )
+    axon.attach_synapse_callback( forward, synapse_type = bittensor.proto.Synapse.SynapseType.TEXT_LAST_HIDDEN_STATE)
+    axon.synapse_timeouts[ bittensor.proto.Synapse.SynapseType.TEXT_LAST_HIDDEN_STATE ] = 0.01
+
+    synapses = [bittensor.synapse.TextLastHiddenState()]
+    responses, codes, messages = axon.default_forward_callback( [ torch.rand(3, 3) ], synapses, hotkey = axon.wallet.hotkey.ss58_address )
+    assert codes[0] == bittensor.proto.ReturnCode.Timeout
+    assert responses[0] == None
+    # The cancelled request is dropped when its batch runs.
+    time.sleep( 1 )
+    assert calls == []
+    assert axon.batcher.stats.requests == 0
+    axon.stop()
+
+def test_aio_forward_last_hidden_success():
+    def forward( inputs_x: torch.FloatTensor, synapse , model_output = None):
+        return None, dict(), torch.zeros( [inputs_x.shape[0], inputs_x.shape[1], bittensor.__network_dim__])
+    axon = bittensor.axon( wallet = wallet, aio = True, port = get_random_unused_port() )
+    axon.attach_synapse_callback( forward, synapse_type = bittensor.proto.Synapse.SynapseType.TEXT_LAST_HIDDEN_STATE)
+
+    inputs_raw = torch.rand(3, 3)
+    synapses = [bittensor.synapse.TextLastHiddenState()]
+    inputs_serialized = synapses[0].serialize_forward_request_tensor(inputs_raw)
+    request = bittensor.proto.TensorMessage(
+        version = bittensor.__version_as_int__,
+        tensors=[inputs_serialized],
+        synapses = [ syn.serialize_to_wire_proto() for syn in synapses ],
+        hotkey = axon.wallet.hotkey.ss58_address, 
+    )
+    response, code, synapses = asyncio.run( axon._forward_async( request ) )
+    assert isinstance( axon, bittensor.AioAxon )
+    assert code == bittensor.proto.ReturnCode.Success
+    assert synapses[0].return_code == bittensor.proto.ReturnCode.Success
+    axon.stop()
+
+def test_aio_forward_timeout():
+    def forward( inputs_x: torch.FloatTensor, synapse , model_output = None):
+        time.sleep(3)
+        return None, dict(), torch.zeros( [inputs_x.shape[0], inputs_x.shape[1], bittensor.__network_dim__])
+    axon = bittensor.axon( wallet = wallet, aio = True, port = get_random_unused_port(), synapse_lasthidden_timeout = 1 )
+    axon.attach_synapse_callback( forward, synapse_type = bittensor.proto.Synapse.SynapseType.TEXT_LAST_HIDDEN_STATE)
+
+    inputs_raw = torch.rand(3, 3)
+    synapses = [bittensor.synapse.TextLastHiddenState()]
+    inputs_serialized = synapses[0].serialize_forward_request_tensor(inputs_raw)
+    request = bittensor.proto.TensorMessage(
+        version = bittensor.__version_as_int__,
+        tensors=[inputs_serialized],
+        synapses = [ syn.serialize_to_wire_proto() for syn in synapses ],
+        hotkey = axon.wallet.hotkey.ss58_address, 
+    )
+    response, code, synapses = asyncio.run( axon._forward_async( request ) )
+    assert code == bittensor.proto.ReturnCode.Timeout
+    axon.stop()
+
+def test_grpc_aio_forward_works():
+    def forward( inputs_x:torch.FloatTensor, synapse , model_output = None):
+        return None, dict(), torch.zeros( [3, 3, bittensor.__network_dim__])
+    port = get_random_unused_port()
+    axon = bittensor.axon ( port = port, ip = '127.0.0.1', wallet = wallet, aio = True )
+    axon.attach_synapse_callback( forward, synapse_type = bittensor.proto.Synapse.SynapseType.TEXT_LAST_HIDDEN_STATE)
+    axon.start()
+
+    channel = grpc.insecure_channel( '127.0.0.1:{}'.format( port ) )
+    stub = bittensor.grpc.BittensorStub( channel )
+    inputs_raw = torch.rand(3, 3)
+    synapses = [bittensor.synapse.TextLastHiddenState()]
+    request = bittensor.proto.TensorMessage(
+        version = bittensor.__version_as_int__,
+        hotkey = sender_wallet.hotkey.ss58_address,
+        tensors = [ synapses[0].serialize_forward_request_tensor(inputs_raw) ],
+        synapses = [ syn.serialize_to_wire_proto() for syn in synapses ]
+    )
+    metadata = (
+        ('rpc-auth-header','Bittensor'),
+        ('bittensor-signature',sign_v2(sender_wallet, wallet)),
+        ('bittensor-version',str(bittensor.__version_as_int__)),
+    )
+    response = stub.Forward( request, metadata = metadata )
+    outputs = synapses[0].deserialize_forward_response_proto (inputs_raw, response.tensors[0])
+    assert outputs.size(2) ==  bittensor.__network_dim__
+    assert response.return_code == bittensor.proto.ReturnCode.Success
+
+    # A replayed nonce is rejected by the interceptor.
+    with pytest.raises( grpc.RpcError ) as error:
+        stub.Forward( request, metadata = metadata )
+    assert error.value.code() == grpc.StatusCode.UNAUTHENTICATED
+    axon.stop()
+
+def test_auth_interceptor_caches_keypairs():
+    interceptor = AuthInterceptor( receiver_hotkey = wallet.hotkey.ss58_address, max_keypairs = 1 )
+    for _ in range(2):
+        nonce, sender_hotkey, signature, receptor_uid = sign_v2( sender_wallet, wallet ).split('.')
+        interceptor.check_signature( int(nonce), sender_hotkey, signature, receptor_uid, 2 )
+    assert interceptor.stats['keypair_misses'] == 1
+    assert interceptor.stats['keypair_hits'] == 1
+    assert interceptor.stats['verified'] == 2
+
+    # The least recently used keypair is dropped beyond max_keypairs.
+    other_hotkey = '5GrwvaEF5zXb26Fz9rcQpDWS57CtERHpNehXCPcNoHGKutQY'
+    interceptor.get_keypair( other_hotkey )
+    assert list( interceptor.keypairs.keys() ) == [ other_hotkey ]
+
+def test_auth_interceptor_evicts_nonces():
+    interceptor = AuthInterceptor( receiver_hotkey = wallet.hotkey.ss58_address )
+    signatures = [ sign_v2( sender_wallet, wallet ).split('.') for _ in range(3) ]
+    for nonce, sender_hotkey, signature, receptor_uid in signatures:
+        interceptor.check_signature( int(nonce), sender_hotkey, signature, receptor_uid, 2 )
+    assert len( interceptor.nonces ) == 3
+
+    # Replays of endpoints still in the table are rejected.
+    nonce, sender_hotkey, signature, receptor_uid = signatures[-1]
+    with pytest.raises( Exception, match = 'Nonce is too small' ):
+        interceptor.check_signature( int(nonce), sender_hotkey, signature, receptor_uid, 2 )
+    assert interceptor.stats['nonce_rejections'] == 1
+
+    # Idle endpoints are dropped after the nonce ttl.
+    interceptor.nonce_ttl = 0.05
+    time.sleep( 0.1 )
+    nonce, sender_hotkey, signature, receptor_uid = sign_v2( sender_wallet, wallet ).split('.')
+    interceptor.check_signature( int(nonce), sender_hotkey, signature, receptor_uid, 2 )
+    assert len( interceptor.nonces ) == 1
+    assert interceptor.stats['nonce_evictions'] == 3
+
+    # Requests of dropped endpoints can not be replayed, even when they are recent.
+    interceptor.nonce_ttl = 3600
+    nonce, sender_hotkey, signature, receptor_uid = signatures[0]
+    with pytest.raises( Exception, match = 'Nonce is too old' ):
+        interceptor.check_signature( int(nonce), sender_hotkey, signature, receptor_uid, 2 )
+
+    # The floor only applies to the hotkey of the dropped endpoints.
+    assert list( interceptor.nonce_floors.keys() ) == [ sender_wallet.hotkey.ss58_address ]
+    with interceptor.lock:
+        interceptor.check_nonce( int( signatures[0][0] ), 'other_hotkey', 'other_hotkey:' + str( uuid.uuid1() ) )
+
+    # Nonces older than the nonce ttl are rejected by the wall clock.
+    nonce, sender_hotkey, signature, receptor_uid = sign_v2( sender_wallet, wallet, nonce = time.time_ns() - int( 7200 * 1e9 ) ).split('.')
+    with pytest.raises( Exception, match = 'Nonce is too old' ):
+        AuthInterceptor( receiver_hotkey = wallet.hotkey.ss58_address ).check_signature( int(nonce), sender_hotkey, signature, receptor_uid, 2 )
+
+def test_auth_interceptor_rejects_future_nonces():
+    interceptor = AuthInterceptor( receiver_hotkey = wallet.hotkey.ss58_address, nonce_ttl = 0.05 )
+
+    # Senders may run ahead of this axon by the nonce skew.
+    nonce, sender_hotkey, signature, receptor_uid = sign_v2( sender_wallet, wallet, nonce = time.time_ns() + int( 30 * 1e9 ) ).split('.')
+    interceptor.check_signature( int(nonce), sender_hotkey, signature, receptor_uid, 2 )
+
+    # A nonce far in the future is never recorded, so it can not raise the floor once its endpoint is dropped.
+    nonce, sender_hotkey, signature, receptor_uid = sign_v2( sender_wallet, wallet, nonce = 2**63 - 1 ).split('.')
+    with pytest.raises( Exception, match = 'Nonce is too far ahead' ):
+        interceptor.check_signature( int(nonce), sender_hotkey, signature, receptor_uid, 2 )
+    time.sleep( 0.1 )
+    with interceptor.lock:
+        interceptor.evict_nonces( time.time() )
+        assert list( interceptor.nonce_floors.keys() ) == [ sender_wallet.hotkey.ss58_address ]
+        interceptor.check_nonce( time.time_ns(), 'other_hotkey', 'other_hotkey:' + str( uuid.uuid1() ) )
+
+def test_auth_interceptor_accepts_monotonic_nonces():
+    # Receptors of previous versions sign with nanoseconds since boot.
+    interceptor = AuthInterceptor( receiver_hotkey = wallet.hotkey.ss58_address )
+    nonce = time.monotonic_ns()
+    nonce, sender_hotkey, signature, receptor_uid = sign_v2( sender_wallet, wallet, nonce = nonce ).split('.')
+    interceptor.check_signature( int(nonce), sender_hotkey, signature, receptor_uid, 2 )
+    assert len( interceptor.legacy_nonces ) == 1 and len( interceptor.nonces ) == 0
+    with pytest.raises( Exception, match = 'Nonce is too small' ):
+        interceptor.check_signature( int(nonce), sender_hotkey, signature, receptor_uid, 2 )
+
+def test_auth_interceptor_verifies_before_blacklist():
+    blacklist = mock.MagicMock( return_value = True )
+    interceptor = AuthInterceptor( receiver_hotkey = wallet.hotkey.ss58_address, blacklist = blacklist )
+
+    # The blacklist is not called for unauthenticated hotkeys.
+    nonce, sender_hotkey, signature, receptor_uid = sign_v2( sender_wallet, wallet ).split('.')
+    forged = '.'.join( [ nonce, sender_hotkey, '0x' + '00' * 64, receptor_uid ] )
+    handler_call_details = mock.MagicMock( method = '/Bittensor/Forward', invocation_metadata = [ ( 'bittensor-signature', forged ) ] )
+    with pytest.raises( Exception, match = 'Signature mismatch' ):
+        interceptor.authenticate( handler_call_details )
+    blacklist.assert_not_called()
+
+    handler_call_details = mock.MagicMock( method = '/Bittensor/Forward', invocation_metadata = [ ( 'bittensor-signature', sign_v2( sender_wallet, wallet ) ) ] )
+    with pytest.raises( Exception, match = 'blacklisted' ):
+        interceptor.authenticate( handler_call_details )
+    blacklist.assert_called_once_with( sender_wallet.hotkey.ss58_address, bittensor.proto.RequestType.FORWARD )
+
 # test external axon args
 class TestExternalAxon(unittest.TestCase):
     """
@@ -0,0 +1,201 @@
+# The MIT License (MIT)
+# Copyright © 2021 Yuma Rao
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+# documentation files (the “Software”), to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
+# and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all copies or substantial portions of
+# the Software.
+
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO
+# THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+# THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import copy
+import os
+import random
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import torch
+import bittensor
+from bittensor.utils.weight_utils import U32_MAX
+
+def synthetic_neuron( uid: int, n: int, n_weights: int = 8 ) -> SimpleNamespace:
+    weight_uids = random.sample( range(n), min( n, n_weights ) )
+    return SimpleNamespace(
+        uid = uid, active = 1, stake = float(uid), rank = 0.1, trust = 0.2, consensus = 0.3, incentive = 0.4,
+        dividends = 0.5, emission = 0.6, last_update = uid, version = 1, modality = 0, ip_type = 4,
+        ip = 16843009, port = 8091, priority = 0, is_null = False,
+        hotkey = '5{:047d}'.format( uid ), coldkey = '5{:047d}'.format( uid ),
+        weights = [ ( w_uid, random.randint( 0, U32_MAX ) ) for w_uid in weight_uids ],
+        bonds = [ ( w_uid, random.randint( 0, 2**40 ) ) for w_uid in weight_uids ],
+    )
+
+def synthetic_metagraph( neurons ) -> 'bittensor.Metagraph':
+    subtensor = MagicMock()
+    subtensor.network = 'mock'
+    subtensor.get_current_block.return_value = 10
+    subtensor.neurons.return_value = neurons
+    return bittensor.metagraph( subtensor = subtensor )
+
+class TestMetagraphSync(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(0)
+        self.n = 32
+        self.neurons = [ synthetic_neuron( uid, self.n ) for uid in range( self.n ) ]
+
+    def test_sync_weights_and_bonds(self):
+        metagraph = synthetic_metagraph( self.neurons ).sync()
+        assert metagraph.n.item() == self.n
+        assert metagraph.block.item() == 10
+        assert list(metagraph.weights.shape) == [ self.n, self.n ]
+        for neuron in self.neurons:
+            expected = torch.zeros( self.n )
+            for w_uid, w_val in neuron.weights:
+                expected[ w_uid ] = float( w_val ) / float( U32_MAX )
+            assert torch.equal( metagraph.weights[ neuron.uid ], expected )
+            assert metagraph.stake[ neuron.uid ] == neuron.stake
+            assert metagraph.last_update[ neuron.uid ] == neuron.last_update
+            assert metagraph.hotkeys[ neuron.uid ] == neuron.hotkey
+        assert torch.allclose( metagraph.bonds.sum( dim = 0 ), torch.ones( self.n ) )
+
+    def test_sync_sparse_matches_dense(self):
+        dense = synthetic_metagraph( self.neurons ).sync()
+        sparse = synthetic_metagraph( self.neurons ).sync( sparse = True )
+        assert sparse.weights.is_sparse
+        assert sparse.bonds.is_sparse
+        assert torch.equal( sparse.weights.to_dense(), dense.weights )
+        assert torch.allclose( sparse.bonds.to_dense(), dense.bonds )
+        assert torch.equal( sparse.endpoints, dense.endpoints )
+
+    def test_sync_missing_and_repeated_uids(self):
+        repeated = synthetic_neuron( 0, self.n )
+        metagraph = synthetic_metagraph( self.neurons[:-1] + [ repeated ] ).sync()
+        assert metagraph.n.item() == self.n
+        assert metagraph.neurons[0] is repeated
+        expected = torch.zeros( self.n )
+        for w_uid, w_val in repeated.weights:
+            expected[ w_uid ] = float( w_val ) / float( U32_MAX )
+        assert torch.equal( metagraph.weights[0], expected )
+        assert metagraph.last_update[ self.n - 1 ] == -1
+        assert metagraph.weights[ self.n - 1 ].sum() == 0
+        assert torch.all( metagraph.endpoints[ self.n - 1 ] == -1 )
+
+    def test_identity_index(self):
+        self.neurons[3].coldkey = self.neurons[2].coldkey
+        metagraph = synthetic_metagraph( self.neurons[:-1] + [ self.neurons[0] ] ).sync()
+        assert metagraph.hotkeys == tuple( [ neuron.hotkey for neuron in self.neurons[:-1] ] + [ '' ] )
+        assert metagraph.addresses[0] == bittensor.utils.networking.ip__str__( 4, 16843009, 8091 )
+        for neuron in self.neurons[:-1]:
+            assert metagraph.hotkey_to_uid( neuron.hotkey ) == neuron.uid
+        assert metagraph.hotkey_to_uid( self.neurons[-1].hotkey ) == -1
+        assert metagraph.coldkey_to_uids( self.neurons[2].coldkey ) == ( 2, 3 )
+        assert metagraph.coldkey_to_uids( 'unregistered' ) == ()
+
+        # Identity columns follow the state they were built from.
+        replaced = '5{:047d}'.format( 1000 )
+        self.neurons[5].hotkey = replaced
+        metagraph.subtensor.neurons.return_value = self.neurons
+        metagraph.sync()
+        assert metagraph.hotkeys[5] == replaced
+        assert metagraph.hotkey_to_uid( replaced ) == 5
+        assert metagraph.hotkey_to_uid( self.neurons[-1].hotkey ) == self.n - 1
+
+        loaded = synthetic_metagraph( [] )
+        assert loaded.hotkeys == ()
+        loaded.load_from_state_dict( metagraph.state_dict() )
+        assert loaded.hotkeys == metagraph.hotkeys
+        assert loaded.hotkey_to_uid( replaced ) == 5
+
+    def test_sync_incremental_matches_full(self):
+        metagraph = synthetic_metagraph( self.neurons ).sync()
+        assert metagraph.changed_uids.tolist() == list( range( self.n ) )
+        assert metagraph.replaced_uids.tolist() == []
+
+        # Stake moves everywhere, a few uids set weights, move endpoints, get replaced and register.
+        neurons = [ copy.copy( neuron ) for neuron in self.neurons ] + [ synthetic_neuron( uid, self.n + 2 ) for uid in range( self.n, self.n + 2 ) ]
+        for neuron in neurons:
+            neuron.stake += 1
+            neuron.bonds = [ ( w_uid, bond + 1 ) for w_uid, bond in neuron.bonds ]
+        neurons[3].weights = [ ( self.n + 1, U32_MAX ) ]
+        neurons[3].last_update = 100
+        neurons[7].port = 9000
+        neurons[11] = synthetic_neuron( 11, self.n + 2 )
+        neurons[11].hotkey = '5{:047d}'.format( 1000 )
+        metagraph.subtensor.neurons.return_value = neurons
+        metagraph.sync( incremental = True )
+
+        full = synthetic_metagraph( neurons ).sync()
+        for name, parameter in full.state_dict().items():
+            assert torch.equal( metagraph.state_dict()[ name ], parameter ), name
+        assert metagraph.hotkeys == full.hotkeys
+        assert metagraph.addresses == full.addresses
+        assert all( record is neuron for record, neuron in zip( metagraph.neurons, neurons ) )
+        assert metagraph.neurons[0].stake == neurons[0].stake
+        assert metagraph.changed_uids.tolist() == [ 3, 7, 11, self.n, self.n + 1 ]
+        assert metagraph.replaced_uids.tolist() == [ 11 ]
+
+        # Nothing to patch on the same state.
+        metagraph.sync( incremental = True )
+        assert metagraph.changed_uids.tolist() == []
+        assert torch.equal( metagraph.weights, full.weights )
+
+    def test_snapshot_round_trip(self):
+        self.neurons[3].modality = 1
+        for sparse in [ False, True ]:
+            metagraph = synthetic_metagraph( self.neurons[:-1] + [ self.neurons[0] ] ).sync( sparse = sparse )
+            with tempfile.TemporaryDirectory() as root:
+                path = os.path.join( root, 'mock.mg' )
+                metagraph.save_snapshot( path )
+                loaded = synthetic_metagraph( [] ).load_from_path( path )
+
+                # Identity columns come from the snapshot, parameters are read on first use.
+                assert loaded.hotkeys == metagraph.hotkeys
+                assert loaded.modalities == metagraph.modalities
+                assert loaded.coldkey_to_uids( self.neurons[2].coldkey ) == ( 2, )
+                assert 'endpoints' in loaded._lazy_parameters and loaded._endpoint_objs == None
+                assert torch.equal( loaded.stake, metagraph.stake )
+                assert 'stake' not in loaded._lazy_parameters
+                assert loaded.weights.is_sparse == sparse
+                for name, parameter in metagraph.state_dict().items():
+                    if parameter.is_sparse:
+                        assert torch.equal( loaded.state_dict()[ name ].to_dense(), parameter.to_dense() ), name
+                    else:
+                        assert torch.equal( loaded.state_dict()[ name ], parameter ), name
+                assert loaded._lazy_parameters == {}
+                assert loaded.endpoint_objs[5] == metagraph.endpoint_objs[5]
+
+    def test_snapshot_history(self):
+        metagraph = synthetic_metagraph( self.neurons ).sync()
+        with tempfile.TemporaryDirectory() as root, patch.dict( os.environ, { 'HOME': root } ):
+            for block in [ 10, 20, 30 ]:
+                metagraph.block.data.fill_( block )
+                metagraph.stake.data.fill_( block )
+                metagraph.save( history = True, max_history = 2 )
+            assert metagraph.history_blocks() == [ 20, 30 ]
+
+            loaded = synthetic_metagraph( [] )
+            assert loaded.load( block = 25 ).block.item() == 20
+            assert torch.all( loaded.stake == 20 )
+            assert loaded.load().block.item() == 30
+            with self.assertRaises( ValueError ):
+                loaded.load( block = 15 )
+            assert loaded.block.item() == 30
+
+            # Syncing replaces the loaded snapshot.
+            loaded.subtensor.neurons.return_value = self.neurons
+            loaded.load( block = 20 ).sync()
+            assert torch.equal( loaded.stake, synthetic_metagraph( self.neurons ).sync().stake )
+            assert loaded.hotkeys == metagraph.hotkeys
+
+            # No history is kept with max_history = 0.
+            metagraph.save( history = True, max_history = 0 )
+            assert metagraph.history_blocks() == []
@@ -1,4 +1,5 @@
 from atexit import register
+import asyncio
 from types import SimpleNamespace
 import unittest
 from unittest.mock import MagicMock, patch
@@ -249,6 +250,156 @@ def test_corevalidator_reregister_flag_true():
         # Should try to register the neuron
         mock_register.assert_called_once()
 
+def test_corevalidator_scoring_matches_dense_per_uid():
+    from bittensor._neuron.text.core_validator import logits_divergence, shapley_synergy, pairwise_mixture_loss
+    from bittensor.utils.tokenizer_utils import topk_tokens_to_vocab_size
+
+    num_uids, batch_size, topk = 6, 3, 8
+    topk_tensors = []
+    for uid in range(num_uids):
+        topk_tensor = -100 * torch.ones((batch_size, topk + 1, 3))
+        probs = torch.rand((batch_size, topk))
+        topk_tensor[:, :-1, 0] = 0.9 * probs / probs.sum(dim=-1, keepdim=True)
+        topk_tensor[:, -1, 0] = 0.1 / 50257
+        topk_tensor[:, :-1, 1] = torch.randint(0, 20, (batch_size, topk)).float()  # repeated first tokens
+        topk_tensors += [topk_tensor]
+    uids = torch.arange(num_uids)
+    return_ops = [torch.tensor([bittensor.proto.ReturnCode.Success]) for _ in range(num_uids)]
+    times = [torch.tensor([1.0]) for _ in range(num_uids)]
+    losses = [torch.rand(batch_size) * 5 for _ in range(num_uids)]
+    stats = {uid: {'loss': losses[uid].mean(), 'losses': losses[uid], 'synergy': 0, 'synergy_loss_diff': 0} for uid in range(num_uids)}
+
+    logits_divergence(stats, uids, [[topk_tensor] for topk_tensor in topk_tensors], return_ops, times, ext='')
+    probs = [topk_tokens_to_vocab_size(topk_tensor, bittensor.__vocab_size__) for topk_tensor in topk_tensors]
+    probs_avg = sum(probs) / num_uids
+    for uid in range(num_uids):
+        divergences = (0.5 * torch.pow(probs[uid].sqrt() - probs_avg.sqrt(), 2).sum(dim=1)).sqrt()
+        assert torch.isclose(stats[uid]['logits_divergence'], divergences.mean(), atol=1e-5)
+
+    syn_loss_diff = shapley_synergy(stats, lambda responsives, target, ext: pairwise_mixture_loss(
+        torch.exp(-torch.stack([_stats['losses'] for _stats in responsives]))), '')
+    for first in range(num_uids):
+        for second in range(num_uids):
+            if first != second:
+                measured_loss = -torch.log((torch.exp(-losses[first]) + torch.exp(-losses[second])) / 2 + 1e-40).mean()
+                expected_loss = torch.min(losses[first].mean(), losses[second].mean())
+                loss_diff_share = torch.clamp(expected_loss - measured_loss, 0) / 2 / num_uids
+                assert abs(syn_loss_diff[first][second] - loss_diff_share) < 1e-6
+
+def test_corevalidator_neuron_stats_update():
+    from bittensor._neuron.text.core_validator import neuron, NeuronStats, scaling_law_loss_to_params
+
+    config = SimpleNamespace(nucleus=SimpleNamespace(scaling_law_power=0.5, logits_divergence=0.1))
+    validator = SimpleNamespace(neuron_stats=NeuronStats(), alpha=0.1, synapse_keys=['shapley_values_nxt'], config=config)
+    stats = {3: {'uid': 3, 'response_time_nxt': 2., 'loss_nxt': torch.tensor(3.), 'synergy_nxt': 10., 'logits_excess_nxt': 1.},
+             5: {'uid': 5, 'response_time_nxt': 2., 'loss_nxt': float('nan')}}
+    responsive_uids, queried_uids = neuron.neuron_stats_update(validator, stats)
+    neuron_stats = validator.neuron_stats
+    assert responsive_uids == [3] and queried_uids == [3, 5]
+    assert neuron_stats.n == 6 and list(neuron_stats) == [3, 5] and 4 not in neuron_stats
+
+    shapley_values = (scaling_law_loss_to_params(torch.tensor(3.)).item() ** 0.5 + 10) / 1.1
+    assert abs(neuron_stats[3]['shapley_values_nxt'] / shapley_values - 1) < 1e-6
+    assert abs(neuron_stats[3]['shapley_values_nxt!'] / (0.1 * shapley_values) - 1) < 1e-6
+    assert neuron_stats[3]['updates!'] == 1 and neuron_stats[3]['updates_shapley_values_nxt'] == 1
+    assert 'loss_nxt' not in neuron_stats[5] and 'updates_shapley_values_nxt' not in neuron_stats[5]
+    assert neuron_stats[5]['shapley_values_nxt!'] == 0
+
+    # Non-responsive uids decay their zeroing EMA, other stats keep their EMA.
+    neuron.neuron_stats_update(validator, {3: {'response_time_nxt': 4.}, 5: {'response_time_nxt': 4.}})
+    assert abs(neuron_stats[3]['shapley_values_nxt!'] / (0.09 * shapley_values) - 1) < 1e-6
+    assert abs(neuron_stats[3]['shapley_values_nxt'] / shapley_values - 1) < 1e-6
+    assert neuron_stats[3]['updates!'] == 2 and neuron_stats[3]['updates_shapley_values_nxt'] == 1
+    assert abs(neuron_stats[5]['response_time_nxt'] - 2.2) < 1e-9
+
+    # Saved columns and dicts of dicts load back to the same rows.
+    for state_dict in [neuron_stats.state_dict(), {uid: neuron_stats[uid] for uid in neuron_stats}]:
+        loaded = NeuronStats().load_state_dict(state_dict)
+        assert list(loaded.items()) == list(neuron_stats.items())
+
+    del neuron_stats[3]
+    neuron_stats.resize(8)
+    assert list(neuron_stats) == [5] and neuron_stats.get('loss_nxt').tolist() == [0.] * 8
+
+def test_corevalidator_metagraph_sync_compares_loaded_hotkeys():
+    from bittensor._neuron.text.core_validator import neuron, NeuronStats
+
+    # The metagraph was synced before, after the hotkeys were saved, so its last sync replaced no uids.
+    hotkeys = ['a', 'b', 'c', 'd']
+    metagraph = MagicMock(hotkeys=hotkeys, n=torch.tensor(4), replaced_uids=torch.tensor([], dtype=torch.int64))
+    config = SimpleNamespace(neuron=SimpleNamespace(track_hotkey_changes=True))
+    neuron_stats = NeuronStats().load_state_dict({uid: {'loss_nxt': 1.} for uid in range(3)})
+    validator = SimpleNamespace(metagraph=metagraph, neuron_hotkeys=['a', 'x', 'c'], neuron_stats=neuron_stats,
+                                neuron_changes={}, config=config, subtensor=SimpleNamespace(clock=SimpleNamespace(block=10)),
+                                save=MagicMock())
+    neuron.metagraph_sync(validator)
+    assert validator.neuron_hotkeys == hotkeys
+    assert list(validator.neuron_changes.keys()) == [1]
+    assert validator.neuron_changes[1][10]['old_hotkey'] == 'x' and validator.neuron_changes[1][10]['new_hotkey'] == 'b'
+    assert list(validator.neuron_stats) == [0, 2]
+    validator.save.assert_called_once()
+
+def corevalidator_forward( num_uids: int, topk: int, quorum: int = 0, forwards: int = 1 ):
+    r""" Runs nucleus.forward over a synced metagraph and a dendrite whose receptors answer with their uid, 
+        returning the validation function of the last forward, the validator nucleus, metagraph and receptor pool.
+    """
+    from bittensor._neuron.text.core_validator import neuron, nucleus
+
+    neurons = [SimpleNamespace(
+        uid = uid, active = 1, stake = 1., rank = 0., trust = 0., consensus = 0., incentive = 0., dividends = 0.,
+        emission = 0., last_update = 0, version = 1, modality = 0, ip_type = 4, ip = 16843009, port = 8091 + uid,
+        priority = 0, is_null = False, hotkey = '5{:047d}'.format( uid ), coldkey = '5{:047d}'.format( uid ),
+        weights = [], bonds = []) for uid in range( num_uids )]
+    subtensor = MagicMock( network = 'mock', max_n = num_uids, scaling_law_power = 0.5,
+                           synergy_scaling_law_power = 0.6, logits_divergence = 0.5 )
+    subtensor.get_current_block.return_value = 10
+    subtensor.neurons.return_value = neurons
+    metagraph = bittensor.metagraph( subtensor = subtensor ).sync()
+
+    config = neuron.config()
+    config.nucleus.topk = topk
+    config.nucleus.quorum = quorum
+    model = nucleus( config = config, device = 'cpu', subtensor = subtensor )
+    receptor_pool = bittensor.receptor_pool( wallet = bittensor.wallet.mock(), max_active_receptors = 0 )
+    dendrite = bittensor.dendrite( wallet = bittensor.wallet.mock(), receptor_pool = receptor_pool )
+
+    async def async_forward( receptor, synapses, inputs, timeout, request = None ):
+        # Later uids answer first, responses are tagged with the uid of the answering endpoint.
+        await asyncio.sleep( 0.05 * ( num_uids - receptor.endpoint.uid ) )
+        return [ torch.full( [1], float( receptor.endpoint.uid ) ) for _ in synapses ], \
+               [ bittensor.proto.ReturnCode.Success for _ in synapses ], [ 0. for _ in synapses ]
+
+    validate = MagicMock( return_value = ( torch.tensor( 0. ), {} ) )
+    inputs = torch.randint( 0, 1000, ( 2, 32 ) )
+    with patch( 'bittensor._receptor.receptor_impl.Receptor.async_forward', async_forward ), \
+         patch( 'bittensor._neuron.text.core_validator.textcausallmnext', validate ):
+        for _ in range( forwards ):
+            model( inputs, metagraph, dendrite )
+    return validate, model, metagraph, receptor_pool
+
+def test_corevalidator_forward_warms_next_endpoints():
+    validate, model, metagraph, receptor_pool = corevalidator_forward( num_uids = 6, topk = 2, forwards = 2 )
+    uids, query_responses = validate.call_args[0][:2]
+    assert [ responses[0].item() for responses in query_responses ] == uids.tolist()
+
+    # The uids warmed by the first forward were still connected when the second forward queried them.
+    assert receptor_pool.stats.reused == 2
+
+    # The next uids stay connected until they are queried, even with no idle receptors allowed.
+    next_hotkeys = [ metagraph.hotkeys[uid] for uid in model.permute_uids ]
+    assert sorted( receptor_pool.receptors.keys() ) == sorted( next_hotkeys )
+    assert set( receptor_pool.warm_hotkeys ) == set( next_hotkeys )
+
+def test_corevalidator_forward_quorum_keeps_endpoint_order():
+    validate, model, metagraph, receptor_pool = corevalidator_forward( num_uids = 6, topk = 4, quorum = 2 )
+    uids, query_responses, return_ops = validate.call_args[0][:3]
+    assert len( query_responses ) == len( return_ops ) == 4
+    successes = [ i for i, ops in enumerate( return_ops ) if ops[0] == bittensor.proto.ReturnCode.Success ]
+    assert len( successes ) == 2
+    # Responses arrive latest uid first and are placed back at the position of their uid.
+    assert [ query_responses[i][0].item() for i in successes ] == [ uids[i].item() for i in successes ]
+    assert sorted( uids[successes].tolist() ) == sorted( uids.tolist() )[-2:]
+
 class MockException(Exception):
     pass
 
@@ -24,6 +24,7 @@ import time
 from unittest.mock import MagicMock
 import unittest.mock as mock
 import asyncio
+import concurrent.futures
 
 # --- Receptor Pool ---
 wallet = bittensor.wallet.mock()
@@ -316,6 +317,156 @@ def test_receptor_pool_backward_hang():
     receptor_pool.backward(endpoints, synapses, x, [[hidden_grads, causal_grads, causallmnext_grads, seq_2_seq_grads],
                                                     [hidden_grads, causal_grads, causallmnext_grads, seq_2_seq_grads]], timeout=1)
 
+def make_endpoint( hotkey: str, ip: str = '0.0.0.1', port: int = 12346 ):
+    return bittensor.endpoint(
+        version = bittensor.__version_as_int__,
+        uid = 0,
+        ip = ip,
+        ip_type = 4,
+        port = port,
+        hotkey = hotkey,
+        coldkey = wallet.coldkey.ss58_address,
+        modality = 0
+    )
+
+def test_receptor_pool_evicts_lowest_qps_then_least_recently_used():
+    receptor_pool = bittensor.receptor_pool(wallet=wallet,max_active_receptors=3)
+    hotkeys = [ '5{:047d}'.format(index) for index in range(4) ]
+    for port, hotkey in enumerate(hotkeys):
+        receptor_pool._get_or_create_receptor_for_endpoint( make_endpoint( hotkey, port = 12346 + port ) )
+    receptor_pool.receptors[hotkeys[0]].stats.forward_qps.value = 1.0
+    # Busy receptors are not evicted.
+    receptor_pool.receptors[hotkeys[1]].semaphore.acquire()
+    receptor_pool._destroy_receptors_over_max_allowed()
+    assert list(receptor_pool.receptors.keys()) == [hotkeys[0], hotkeys[1], hotkeys[3]]
+    receptor_pool.max_active_receptors = 1
+    receptor_pool._destroy_receptors_over_max_allowed()
+    assert list(receptor_pool.receptors.keys()) == [hotkeys[1]]
+    assert receptor_pool.stats.evictions == 3
+    receptor_pool.receptors[hotkeys[1]].semaphore.release()
+
+def test_receptor_pool_shares_channels_by_address():
+    receptor_pool = bittensor.receptor_pool(wallet=wallet,max_active_receptors=2)
+    receptor1 = receptor_pool._get_or_create_receptor_for_endpoint( make_endpoint( '5{:047d}'.format(0) ) )
+    receptor2 = receptor_pool._get_or_create_receptor_for_endpoint( make_endpoint( '5{:047d}'.format(1) ) )
+    assert receptor1.channel is receptor2.channel
+    assert len(receptor_pool.channels) == 1
+
+    # Moving one hotkey releases its reference, the channel stays open for the other.
+    receptor_pool._get_or_create_receptor_for_endpoint( make_endpoint( '5{:047d}'.format(1), port = 12347 ) )
+    assert len(receptor_pool.channels) == 2
+    assert receptor_pool.stats.address_changes == 1
+    receptor_pool._destroy_receptor( '5{:047d}'.format(0) )
+    assert len(receptor_pool.channels) == 1
+
+def test_receptor_pool_warmup_keeps_receptors_until_queried():
+    receptor_pool = bittensor.receptor_pool(wallet=wallet,max_active_receptors=0)
+    endpoints = [ make_endpoint( wallet2.hotkey.ss58_address ), make_endpoint( '5{:047d}'.format(0), ip = '0.0.0.0' ) ]
+    assert receptor_pool.warmup( endpoints ) == 1
+    assert list(receptor_pool.receptors.keys()) == [wallet2.hotkey.ss58_address]
+    metrics = receptor_pool.get_channel_metrics()
+    assert metrics['warm'] == 1 and metrics['receptors'] == 1 and metrics['warmups'] == 1
+
+    mock_result = asyncio.Future()
+    mock_result.set_result( bittensor.proto.TensorMessage( version = bittensor.__version_as_int__, return_code = bittensor.proto.ReturnCode.Timeout ) )
+    receptor_pool.receptors[wallet2.hotkey.ss58_address].stub.Forward = MagicMock( return_value = mock_result )
+    # Warming the next endpoints keeps the pins of the endpoints which are yet to be queried.
+    receptor_pool.warmup( [ make_endpoint( '5{:047d}'.format(1), port = 12347 ) ] )
+    assert set( receptor_pool.warm_hotkeys ) == { wallet2.hotkey.ss58_address, '5{:047d}'.format(1) }
+    receptor_pool.forward( endpoints[:1], synapses, torch.ones( (1, 2, 2) ), timeout=1)
+    assert list(receptor_pool.receptors.keys()) == ['5{:047d}'.format(1)]
+    assert len(receptor_pool.channels) == 1
+
+def test_receptor_pool_warm_pins_expire():
+    receptor_pool = bittensor.receptor_pool(wallet=wallet,max_active_receptors=0,warm_ttl=0.05)
+    receptor_pool.warmup( [ make_endpoint( wallet2.hotkey.ss58_address ) ] )
+    receptor_pool._destroy_receptors_over_max_allowed()
+    assert list(receptor_pool.receptors.keys()) == [wallet2.hotkey.ss58_address]
+
+    # A warmed receptor which is never queried is culled once its pin expired.
+    time.sleep( 0.1 )
+    receptor_pool._destroy_receptors_over_max_allowed()
+    assert len(receptor_pool.receptors) == 0 and len(receptor_pool.warm_hotkeys) == 0
+    assert receptor_pool.stats.warm_expirations == 1
+
+def test_receptor_pool_concurrent_receptors():
+    receptor_pool = bittensor.receptor_pool(wallet=wallet,max_active_receptors=4)
+    endpoints = [ make_endpoint( '5{:047d}'.format(i), port = 12000 + i ) for i in range(32) ]
+    def churn( offset ):
+        for i in range(200):
+            receptor_pool._get_or_create_receptor_for_endpoint( endpoints[ (offset + i) % len(endpoints) ] )
+            receptor_pool._destroy_receptors_over_max_allowed()
+    with concurrent.futures.ThreadPoolExecutor( max_workers = 4 ) as executor:
+        list( executor.map( churn, range(4) ) )
+    assert len(receptor_pool.receptors) <= 4
+    assert set(receptor_pool.last_used.keys()) == set(receptor_pool.receptors.keys())
+
+def test_receptor_pool_forward_as_completed_stops_at_quorum():
+    receptor_pool = bittensor.receptor_pool(wallet=wallet,max_active_receptors=2)
+    endpoints = [ make_endpoint( '5{:047d}'.format(0) ), make_endpoint( '5{:047d}'.format(1), port = 12347 ) ]
+    x = torch.ones( (2, 3, 3) )
+    serializer = bittensor.serializer( serializer_type = bittensor.proto.Serializer.MSGPACK )
+    mock_return_val = bittensor.proto.TensorMessage(
+            version = bittensor.__version_as_int__,
+            hotkey = endpoints[1].hotkey,
+            synapses = [synapses[0].serialize_to_wire_proto(code = bittensor.proto.ReturnCode.Success, message= 'Success' )],
+            return_code = bittensor.proto.ReturnCode.Success,
+            tensors = [serializer.serialize(torch.rand(3, 3, bittensor.__network_dim__), from_type = bittensor.proto.TensorType.TORCH)]
+        )
+    mock_result = asyncio.Future()
+    mock_result.set_result( mock_return_val )
+    # The first endpoint never responds.
+    for endpoint, result in zip( endpoints, [ asyncio.Future(), mock_result ] ):
+        receptor_pool._get_or_create_receptor_for_endpoint( endpoint )
+        receptor_pool.receptors[endpoint.hotkey].stub.Forward = MagicMock( return_value = result )
+
+    start_time = time.time()
+    responses = list( receptor_pool.forward_as_completed( endpoints, synapses[:1], x, timeout=5, min_successes=1 ) )
+    assert time.time() - start_time < 5
+    assert [ index for index, _, _, _ in responses ] == [1, 0]
+    assert responses[0][2] == [bittensor.proto.ReturnCode.Success]
+    assert responses[1][2] == [bittensor.proto.ReturnCode.Timeout]
+    assert list(responses[1][1][0].shape) == [3, 3, bittensor.__network_dim__]
+
+def test_receptor_pool_forward_as_completed_max_time():
+    receptor_pool = bittensor.receptor_pool(wallet=wallet,max_active_receptors=1)
+    endpoints = [ make_endpoint( '5{:047d}'.format(0) ) ]
+    receptor_pool._get_or_create_receptor_for_endpoint( endpoints[0] )
+    receptor_pool.receptors[endpoints[0].hotkey].stub.Forward = MagicMock( return_value = asyncio.Future() )
+
+    start_time = time.time()
+    responses = list( receptor_pool.forward_as_completed( endpoints, synapses[:1], torch.ones( (1, 3, 3) ), timeout=5, max_time=0.1 ) )
+    assert time.time() - start_time < 5
+    assert len(responses) == 1 and responses[0][2] == [bittensor.proto.ReturnCode.Timeout]
+
+def test_receptor_pool_forward_serializes_shared_inputs_once():
+    receptor_pool = bittensor.receptor_pool(wallet=wallet,max_active_receptors=3)
+    endpoints = [ make_endpoint( '5{:047d}'.format(index), port = 12346 + index ) for index in range(3) ]
+    x = torch.ones( (3, 3) )
+    serializer = bittensor.serializer( serializer_type = bittensor.proto.Serializer.MSGPACK )
+    mock_return_val = bittensor.proto.TensorMessage(
+            version = bittensor.__version_as_int__,
+            hotkey = wallet.hotkey.ss58_address,
+            synapses = [synapses[0].serialize_to_wire_proto(code = bittensor.proto.ReturnCode.Success, message= 'Success' )],
+            return_code = bittensor.proto.ReturnCode.Success,
+            tensors = [serializer.serialize(torch.rand(3, 3, bittensor.__network_dim__), from_type = bittensor.proto.TensorType.TORCH)]
+        )
+    mock_result = asyncio.Future()
+    mock_result.set_result( mock_return_val )
+    for endpoint in endpoints:
+        receptor_pool._get_or_create_receptor_for_endpoint( endpoint )
+        receptor_pool.receptors[endpoint.hotkey].forward_serialized = MagicMock( return_value = mock_result )
+        receptor_pool.receptors[endpoint.hotkey].stub.Forward = MagicMock( return_value = mock_result )
+
+    # The first two endpoints share the same tensor, the third gets its own.
+    _, codes, _ = receptor_pool.forward( endpoints, synapses[:1], [ x, x, x.clone() ], timeout=1)
+    assert codes == [[bittensor.proto.ReturnCode.Success] for _ in endpoints]
+    requests = [ receptor_pool.receptors[endpoint.hotkey].forward_serialized.call_args for endpoint in endpoints[:2] ]
+    assert requests[0].kwargs['request'] is requests[1].kwargs['request']
+    assert bittensor.proto.TensorMessage.FromString( requests[0].kwargs['request'] ).hotkey == wallet.hotkey.ss58_address
+    assert receptor_pool.receptors[endpoints[2].hotkey].stub.Forward.call_count == 1
+    assert receptor_pool.stats.broadcasts == 1
+
 if __name__ == "__main__":
     #test_receptor_pool_forward()
     test_receptor_pool_backward_hang()
@@ -226,4 +226,78 @@ class TestCMPSerialization(unittest.TestCase):
     
     def test_bittensor_dtype_to_torch_dtype(self):
         with pytest.raises(bittensor.serializer.DeserializationException):
-            bittensor.serializer.bittensor_dtype_to_torch_dtype(11)
\ No newline at end of file
+            bittensor.serializer.bittensor_dtype_to_torch_dtype(11)
+
+
+class TestRawBufferSerialization(unittest.TestCase):
+
+    def test_serialize(self):
+        for _ in range(10):
+            tensor_a = torch.rand([12, 23])
+            serializer = bittensor.serializer( serializer_type = bittensor.proto.Serializer.RAWBUFFER )
+            content = serializer.serialize(tensor_a, modality = bittensor.proto.Modality.TENSOR, from_type = bittensor.proto.TensorType.TORCH)
+            tensor_b = serializer.deserialize(content, to_type = bittensor.proto.TensorType.TORCH)
+            assert torch.all(torch.eq(tensor_a, tensor_b))
+
+    def test_serialize_non_contiguous(self):
+        tensor_a = torch.rand([12, 23]).t()
+        serializer = bittensor.serializer( serializer_type = bittensor.proto.Serializer.RAWBUFFER )
+        content = serializer.serialize(tensor_a, modality = bittensor.proto.Modality.TENSOR, from_type = bittensor.proto.TensorType.TORCH)
+        tensor_b = serializer.deserialize(content, to_type = bittensor.proto.TensorType.TORCH)
+        assert torch.all(torch.eq(tensor_a, tensor_b))
+
+    def test_serialize_deserialize_text(self):
+        data = torch.randint(0, 50258, (5, 20), dtype=torch.int64)
+
+        serializer = bittensor.serializer( serializer_type = bittensor.proto.Serializer.RAWBUFFER )
+        serialized_data_tensor_message = serializer.serialize(data, modality = bittensor.proto.Modality.TEXT, from_type = bittensor.proto.TensorType.TORCH)
+
+        assert list(data.shape) == serialized_data_tensor_message.shape
+        assert serialized_data_tensor_message.dtype == bittensor.proto.DataType.INT64
+        assert serialized_data_tensor_message.serializer == bittensor.proto.Serializer.RAWBUFFER
+        assert len(serialized_data_tensor_message.buffer) == data.element_size() * data.nelement()
+
+        deserialized_data_tensor_message = serializer.deserialize(serialized_data_tensor_message, to_type = bittensor.proto.TensorType.TORCH)
+        assert deserialized_data_tensor_message.dtype == torch.int64
+        assert torch.all(torch.eq(deserialized_data_tensor_message, data))
+
+    def test_serialize_deserialize_half(self):
+        data = torch.rand([12, 23]).half()
+        serializer = bittensor.serializer( serializer_type = bittensor.proto.Serializer.RAWBUFFER )
+        serialized_tensor_message = serializer.serialize(data, modality = bittensor.proto.Modality.TENSOR, from_type = bittensor.proto.TensorType.TORCH)
+        assert serialized_tensor_message.dtype == bittensor.proto.DataType.FLOAT16
+        deserialized_tensor_message = serializer.deserialize(serialized_tensor_message, to_type = bittensor.proto.TensorType.TORCH)
+        assert torch.all(torch.eq(deserialized_tensor_message, data))
+
+    def test_serialize_deserialize_empty(self):
+        data = torch.zeros([0, 23])
+        serializer = bittensor.serializer( serializer_type = bittensor.proto.Serializer.RAWBUFFER )
+        serialized_tensor_message = serializer.serialize(data, modality = bittensor.proto.Modality.TENSOR, from_type = bittensor.proto.TensorType.TORCH)
+        deserialized_tensor_message = serializer.deserialize(serialized_tensor_message, to_type = bittensor.proto.TensorType.TORCH)
+        assert list(deserialized_tensor_message.shape) == [0, 23]
+
+    def test_deserialize_shape_mismatch(self):
+        data = torch.rand([12, 23])
+        serializer = bittensor.serializer( serializer_type = bittensor.proto.Serializer.RAWBUFFER )
+        serialized_tensor_message = serializer.serialize(data, modality = bittensor.proto.Modality.TENSOR, from_type = bittensor.proto.TensorType.TORCH)
+        serialized_tensor_message.shape[0] = 13
+        with pytest.raises(bittensor.serializer.DeserializationException):
+            serializer.deserialize(serialized_tensor_message, to_type = bittensor.proto.TensorType.TORCH)
+
+    def test_deserialize_writable(self):
+        data = torch.rand([12, 23])
+        serializer = bittensor.serializer( serializer_type = bittensor.proto.Serializer.RAWBUFFER )
+        serialized_tensor_message = serializer.serialize(data, modality = bittensor.proto.Modality.TENSOR, from_type = bittensor.proto.TensorType.TORCH)
+        buffer = bytes(serialized_tensor_message.buffer)
+        deserialized_tensor_message = serializer.deserialize(serialized_tensor_message, to_type = bittensor.proto.TensorType.TORCH)
+        # Writing in place leaves the proto buffer untouched.
+        deserialized_tensor_message[0] = 0
+        assert serialized_tensor_message.buffer == buffer
+        assert torch.all(torch.eq(deserialized_tensor_message[1:], data[1:]))
+
+    def test_serialize_requires_grad(self):
+        data = torch.rand([12, 23], requires_grad = True)
+        serializer = bittensor.serializer( serializer_type = bittensor.proto.Serializer.RAWBUFFER )
+        serialized_tensor_message = serializer.serialize(data, modality = bittensor.proto.Modality.TENSOR, from_type = bittensor.proto.TensorType.TORCH)
+        deserialized_tensor_message = serializer.deserialize(serialized_tensor_message, to_type = bittensor.proto.TensorType.TORCH)
+        assert deserialized_tensor_message.requires_grad
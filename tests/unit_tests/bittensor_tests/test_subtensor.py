@@ -182,5 +182,168 @@ class TestStakeMultiple(unittest.TestCase):
             self.assertEqual(kwargs['call_function'], 'add_stake')
             self.assertAlmostEqual(kwargs['call_params']['ammount_staked'], mock_amount.rao, delta=1.0 * 1e9) # delta of 1.0 TAO
 
+
+class TestNeuronsBatched(unittest.TestCase):
+    """
+    Test the batched neurons query
+    """
+
+    @staticmethod
+    def neuron_dict( uid: int ) -> dict:
+        return {
+            'version': 1, 'uid': uid, 'active': 1, 'stake': uid * 1000000000, 'rank': 0, 'trust': 0,
+            'consensus': 0, 'incentive': 0, 'dividends': 0, 'emission': 0, 'last_update': uid,
+            'modality': 0, 'ip_type': 4, 'ip': 0, 'port': 8091, 'priority': 0,
+            'hotkey': '5{:047d}'.format( uid ), 'coldkey': '5{:047d}'.format( uid ),
+            'weights': [], 'bonds': [],
+        }
+
+    def mock_subtensor( self, n: int ) -> 'bittensor.Subtensor':
+        records = [ ( MagicMock( value = uid ), MagicMock( value = self.neuron_dict( uid ) ) ) for uid in reversed( range( n ) ) ]
+        substrate = MagicMock()
+        substrate.__enter__.return_value = substrate
+        substrate.query_map.return_value = records
+        return bittensor.Subtensor( substrate = substrate, network = 'mock', chain_endpoint = 'mock' )
+
+    def test_neurons_batched(self):
+        subtensor = self.mock_subtensor( n = 10 )
+        neurons = subtensor.neurons()
+        subtensor.substrate.query_map.assert_called_once()
+        subtensor.substrate.query.assert_not_called()
+        assert [ neuron.uid for neuron in neurons ] == list( range( 10 ) )
+        assert neurons[3].stake == 3
+        assert not neurons[3].is_null
+
+    def test_neurons_batched_fallback(self):
+        subtensor = self.mock_subtensor( n = 3 )
+        subtensor.substrate.query_map.side_effect = Exception('query_map not supported')
+        subtensor.get_n = MagicMock( return_value = 3 )
+        subtensor.neuron_for_uid = MagicMock( side_effect = lambda uid, block: bittensor.Subtensor._neuron_dict_to_namespace( self.neuron_dict( uid ) ) )
+        with mock.patch('time.sleep'):
+            neurons = subtensor.neurons()
+        assert [ neuron.uid for neuron in neurons ] == [0, 1, 2]
+        assert subtensor.neuron_for_uid.call_count == 3
+
+
+class TestHyperparameterCache(unittest.TestCase):
+    """
+    Test the per block hyperparameter cache
+    """
+
+    def mock_subtensor( self ) -> 'bittensor.Subtensor':
+        substrate = MagicMock()
+        substrate.__enter__.return_value = substrate
+        subtensor = bittensor.Subtensor( substrate = substrate, network = 'mock', chain_endpoint = 'mock', cache = True, cache_block_ttl = 0 )
+        subtensor.get_current_block = MagicMock( return_value = 10 )
+        subtensor.query_hyperparameters = MagicMock( return_value = { 'Rho': 10, 'Kappa': 32767, 'N': 4096 } )
+        return subtensor
+
+    def test_cache_hits_within_block(self):
+        subtensor = self.mock_subtensor()
+        assert subtensor.rho == 10
+        assert subtensor.n == 4096
+        assert subtensor.rho == 10
+        subtensor.query_hyperparameters.assert_called_once()
+        subtensor.substrate.query.assert_not_called()
+        assert subtensor.cache_misses == 1
+        assert subtensor.cache_hits == 2
+        # Every read polls the block, the ttl of zero never serves the cached block.
+        assert subtensor.block_cache_misses == 3
+        assert subtensor.block_cache_hits == 0
+
+    def test_cache_invalidated_on_new_block(self):
+        subtensor = self.mock_subtensor()
+        assert subtensor.kappa == 32767
+        subtensor.get_current_block.return_value = 11
+        subtensor.query_hyperparameters.return_value = { 'Rho': 10, 'Kappa': 16383, 'N': 4096 }
+        assert subtensor.kappa == 16383
+        assert subtensor.query_hyperparameters.call_count == 2
+
+    def test_cache_fallback_to_single_query(self):
+        subtensor = self.mock_subtensor()
+        subtensor.query_hyperparameters.side_effect = Exception('state_queryStorageAt not supported')
+        subtensor.substrate.query.return_value = MagicMock( value = 20 )
+        assert subtensor.rho == 20
+        subtensor.substrate.query.assert_called_once()
+
+    def test_cache_failed_batch_not_retried_within_block(self):
+        subtensor = self.mock_subtensor()
+        subtensor.query_hyperparameters.side_effect = Exception('state_queryStorageAt not supported')
+        subtensor.substrate.query.return_value = MagicMock( value = 20 )
+        assert subtensor.rho == 20
+        assert subtensor.rho == 20
+        assert subtensor.kappa == 20
+        subtensor.query_hyperparameters.assert_called_once()
+        assert subtensor.substrate.query.call_count == 2
+        subtensor.get_current_block.return_value = 11
+        subtensor.query_hyperparameters.side_effect = None
+        assert subtensor.rho == 10
+        assert subtensor.query_hyperparameters.call_count == 2
+
+    def test_cache_disabled(self):
+        subtensor = self.mock_subtensor()
+        subtensor.cache = False
+        subtensor.substrate.query.return_value = MagicMock( value = 20 )
+        assert subtensor.rho == 20
+        assert subtensor.rho == 20
+        subtensor.query_hyperparameters.assert_not_called()
+        assert subtensor.substrate.query.call_count == 2
+
+
+
+class TestBlockClock(unittest.TestCase):
+    """
+    Test the local block clock
+    """
+
+    def mock_subtensor( self, block: int, timestamp: float ) -> 'bittensor.Subtensor':
+        substrate = MagicMock()
+        substrate.__enter__.return_value = substrate
+        substrate.get_block_number.return_value = block
+        substrate.query.return_value = MagicMock( value = int( timestamp * 1000 ) )
+        return bittensor.Subtensor( substrate = substrate, network = 'mock', chain_endpoint = 'mock' )
+
+    def test_block_extrapolates_without_polling(self):
+        subtensor = self.mock_subtensor( block = 100, timestamp = 995.0 )
+        with mock.patch('time.time', return_value = 1000.0):
+            assert subtensor.clock.block == 100
+            assert subtensor.clock.block == 100
+        with mock.patch('time.time', return_value = 1020.0):
+            assert subtensor.clock.block == 102
+        assert subtensor.substrate.get_block_number.call_count == 1
+
+    def test_block_resyncs_after_interval(self):
+        subtensor = self.mock_subtensor( block = 100, timestamp = 995.0 )
+        subtensor.clock.resync_interval = 30
+        with mock.patch('time.time', return_value = 1000.0):
+            assert subtensor.clock.block == 100
+        subtensor.substrate.get_block_number.return_value = 101
+        subtensor.substrate.query.return_value = MagicMock( value = 1030000 )
+        with mock.patch('time.time', return_value = 1031.0):
+            assert subtensor.clock.block == 101
+        assert subtensor.substrate.get_block_number.call_count == 2
+
+    def test_get_current_block_reanchors_clock(self):
+        subtensor = self.mock_subtensor( block = 100, timestamp = 995.0 )
+        with mock.patch('time.time', return_value = 1000.0):
+            assert subtensor.clock.block == 100
+            subtensor.substrate.get_block_number.return_value = 101
+            assert subtensor.get_current_block() == 101
+            assert subtensor.clock.block == 101
+
+    def test_get_current_block_anchors_clock(self):
+        # The first block read anchors the clock, it is not read again with its timestamp.
+        subtensor = self.mock_subtensor( block = 100, timestamp = 995.0 )
+        with mock.patch('time.time', return_value = 1000.0):
+            assert subtensor.get_current_block() == 100
+            assert subtensor.clock.block == 100
+        assert subtensor.substrate.get_block_number.call_count == 1
+        subtensor.substrate.get_chain_head.assert_not_called()
+
+        # The block phase is unknown, the next block is expected soon.
+        with mock.patch('time.time', return_value = 1002.0):
+            assert subtensor.clock.block == 101
+
+
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
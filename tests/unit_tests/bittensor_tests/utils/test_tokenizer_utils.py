@@ -21,6 +21,7 @@ import bittensor
 
 from transformers import AutoTokenizer, AutoModelForCausalLM
 from torch import nn
+from types import SimpleNamespace
 from bittensor.utils.tokenizer_utils import *
 
 EPSILON = 1e-40
@@ -295,6 +296,74 @@ def _test_tokenizer_translation():
         assert torch.isclose(translated_loss, _translated_loss, rtol=1e-2)
 
 
+def random_translation_map(from_vocab_len: int, to_vocab_len: int, max_len: int) -> Dict[str, Any]:
+    r"""
+    Builds a translation map like :obj:`get_translation_map`, from random target token sequences.
+    """
+    to_tokens = [torch.randint(to_vocab_len, (int(torch.randint(1, max_len + 1, (1,))),)).tolist()
+                 for _ in range(from_vocab_len)]
+    to_tokens_lens = [len(p) for p in to_tokens]
+    translation_map = {'lengths': {}}
+    counts = torch.zeros((max(to_tokens_lens), to_vocab_len), dtype=torch.long)
+    for l in set(to_tokens_lens):
+        from_idx = [i for i, k in enumerate(to_tokens_lens) if k == l]
+        to_idx = torch.tensor([to_tokens[i] for i in from_idx], dtype=torch.long)
+        translation_map['lengths'][l] = {'from': torch.tensor(from_idx, dtype=torch.long), 'to': to_idx}
+        counts[:l, :].scatter_add_(1, to_idx.T, torch.ones((l, len(from_idx)), dtype=torch.long))
+    translation_map['counts'] = counts
+    return translation_map
+
+
+def test_translate_aligned_probs(batch_size: int = 4, std_sequence_len: int = 40,
+                                 vocab_len: int = 300, std_vocab_len: int = 200):
+    r"""
+    Asserts that the batched translation equals the sequential one-to-many / many-to-one translations,
+    including mappings with overlapping segments.
+    """
+    torch.manual_seed(0)
+    to_translation_map = random_translation_map(vocab_len, std_vocab_len, 3)
+    from_translation_map = random_translation_map(std_vocab_len, vocab_len, 4)
+
+    aligned_probs = []
+    mappings = []
+    for b in range(batch_size):
+        sequence_len = std_sequence_len * 2
+        aligned_probs += [torch.softmax(torch.randn(sequence_len, vocab_len), dim=-1)]
+        sequence_mappings = [(1, 1, 1, 1, 0, 0)]
+        right_idx, right_idx_std = 1, 1
+        while right_idx < sequence_len - 4 and right_idx_std < std_sequence_len - 3:
+            overlap = int(torch.rand(1) < 0.2)
+            if torch.rand(1) < 0.6:  # one-to-many
+                count_std = int(torch.randint(1, 4, (1,)))
+                right_idx, right_idx_std = right_idx + 1, right_idx_std + count_std
+                sequence_mappings += [(right_idx, right_idx_std, 1, count_std, 0, overlap)]
+            else:  # many-to-one
+                count = int(torch.randint(2, 5, (1,)))
+                right_idx, right_idx_std = right_idx + count, right_idx_std + 1
+                sequence_mappings += [(right_idx, right_idx_std, count, 1, overlap, 0)]
+        mappings += [sequence_mappings]
+
+    probs_std = torch.zeros(batch_size, std_sequence_len, std_vocab_len)
+    for b in range(batch_size):
+        for (right_idx, right_idx_std, segment_count_base, segment_count_std_base,
+             segment_count_overlap, segment_count_std_overlap) in mappings[b][1:]:
+            segment_count = segment_count_base + segment_count_overlap
+            segment_count_std = segment_count_std_base + segment_count_std_overlap
+            if segment_count_base == 1:
+                start_idx_std = right_idx_std - segment_count_std
+                translate_one_to_many(aligned_probs[b][right_idx - 1],
+                                      probs_std[b][start_idx_std:start_idx_std + segment_count_std], to_translation_map)
+            else:
+                translate_many_to_one(aligned_probs[b][right_idx - segment_count:right_idx],
+                                      probs_std[b][right_idx_std - 1], from_translation_map)
+
+    for chunk_size in [1, 7, 128]:
+        probs_std_batched = torch.zeros(batch_size, std_sequence_len, std_vocab_len)
+        translate_aligned_probs(aligned_probs, mappings, probs_std_batched,
+                                to_translation_map, from_translation_map, chunk_size=chunk_size)
+        assert torch.allclose(probs_std_batched, probs_std, atol=1e-7)
+
+
 def tokenizer_topk_phrases(text_batch: List[str], model_name: str, max_length: int,
                            enc_pre_logits: torch.FloatTensor = None,
                            device: str = 'cuda', topk: int = 128):
@@ -433,6 +502,102 @@ def test_topk_token_phrases():
         tokenizer_topk_phrases(sample_text[text_name], model_name, max_length, _enc_pre_logits, topk=128)
 
 
+def test_topk_token_phrases_table(batch_size: int = 4, vocab_len: int = 1000, topk: int = 64,
+                                   ignore_index: int = -100):
+    r"""
+    Asserts that topk_token_phrases gathered from the std_token_phrases table equals the topk_tensor formed
+    from std_token_phrases lists, with probability gradients attached, and survives compact and unravel.
+    """
+    torch.manual_seed(0)
+    std_token_phrases = [torch.randint(2, 50257, (int(torch.randint(1, 6, (1,))),)).tolist() for _ in range(vocab_len)]
+    tokenizer = SimpleNamespace(std_token_phrases=std_token_phrases)
+    logits = torch.randn(batch_size, vocab_len, requires_grad=True)
+
+    topk_tensor = topk_token_phrases(logits, tokenizer, topk=topk, ignore_index=ignore_index)
+
+    probs = torch.softmax(logits.detach(), dim=1)
+    topk_probs, topk_indices = torch.topk(probs, topk)
+    floor_probs = torch.clamp(1 - topk_probs.sum(dim=-1), 1e-40, 1) / (vocab_len - topk)
+    phrases = []
+    for b in range(batch_size):
+        phrases += [[prob] + std_token_phrases[i] for prob, i in zip(topk_probs[b].tolist(), topk_indices[b].tolist())]
+        phrases += [[floor_probs[b].item()]]
+    max_len = max([len(p) for p in phrases])
+    expected = torch.tensor([p + [ignore_index] * (max_len - len(p)) for p in phrases]).reshape(batch_size, topk + 1, max_len)
+
+    assert topk_tensor.shape == expected.shape
+    assert torch.equal(topk_tensor[..., 1:], expected[..., 1:])
+    assert torch.allclose(topk_tensor[..., 0], expected[..., 0])
+    assert topk_tensor.requires_grad
+
+    compact_topk = compact_topk_token_phrases(topk_tensor)
+    assert torch.allclose(unravel_topk_token_phrases(compact_topk, topk=topk), topk_tensor)
+
+
+def phrase_cross_entropy_loop(target_phrases: List[List[int]], topk_tensor: torch.Tensor,
+                              ignore_index: int = -100, vocab_size_min: int = 50257) -> Tuple[torch.Tensor, torch.Tensor]:
+    r"""
+    Unreduced phrase cross entropy, matching one batch item and sub target length at a time.
+    """
+    batch_size, topk_p1, max_len = topk_tensor.shape
+    topk_tokens = topk_tensor[:, :-1, 1:].round().int()
+    topk_probs = torch.clamp(topk_tensor[:, :-1, 0], 0, 1)
+    floor_probs = torch.clamp(topk_tensor[:, -1, 0], 0, 1)
+    total_probs = topk_probs.sum(dim=-1) + max(0, vocab_size_min - topk_p1 + 1) * floor_probs
+    n_topk_probs = topk_probs / total_probs[:, None]
+    n_floor_probs = floor_probs / total_probs
+
+    val_probs = torch.zeros(batch_size)
+    match_probs = torch.zeros(batch_size)
+    for b in range(batch_size):
+        target_phrase = torch.tensor(target_phrases[b])
+        match = topk_tokens[b, :, 0] == target_phrase[0]
+        val_probs[b] = n_topk_probs[b, match].sum() if match.sum() > 0 else n_floor_probs[b]
+
+        check_len = min(max_len - 1, len(target_phrase))
+        for c in range(1, check_len + 1):
+            target = ignore_index * torch.ones(check_len, dtype=torch.int32)
+            target[:c] = target_phrase[:c]
+            match_idx = torch.where((topk_tokens[b, :, :check_len] == target).sum(dim=-1) == check_len)[0]
+            match_probs[b] += n_topk_probs[b, match_idx].sum() if len(match_idx) else n_floor_probs[b]
+
+    return -torch.log(torch.clamp(val_probs, 0, 1) + 1e-40), -torch.log(torch.clamp(match_probs, 0, 1) + 1e-40)
+
+
+def test_phrase_cross_entropy_batched(num_uids: int = 3, batch_size: int = 8, topk: int = 32, max_len: int = 5,
+                                      ignore_index: int = -100):
+    r"""
+    Asserts that the batched phrase_cross_entropy equals the loop over batch items and sub target lengths,
+    for target phrases as lists of different lengths and as a tensor, and for a stack of topk tensors.
+    """
+    torch.manual_seed(0)
+    topk_tensors = ignore_index * torch.ones((num_uids, batch_size, topk + 1, max_len))
+    topk_tensors[..., 0] = torch.rand((num_uids, batch_size, topk + 1)) / topk
+    phrase_lens = torch.randint(1, max_len, (num_uids, batch_size, topk))
+    for uid, b, k in torch.nonzero(phrase_lens).tolist():
+        topk_tensors[uid, b, k, 1:1 + phrase_lens[uid, b, k]] = torch.randint(0, 3, (int(phrase_lens[uid, b, k]),)).float()
+    topk_tensors.requires_grad_()
+
+    target_tensor = torch.randint(0, 3, (batch_size, 3))
+    target_lists = [torch.randint(0, 3, (int(torch.randint(1, max_len + 2, (1,))),)).tolist() for _ in range(batch_size)]
+    for target_phrases in [target_lists, target_tensor]:
+        losses_val, losses = phrase_cross_entropy(target_phrases, topk_tensors, reduce=False)
+        assert losses.shape == (num_uids, batch_size)
+        for uid in range(num_uids):
+            expected_val, expected = phrase_cross_entropy_loop(target_phrases.tolist() if isinstance(target_phrases, torch.Tensor) else target_phrases,
+                                                               topk_tensors[uid].detach(), ignore_index=ignore_index)
+            assert torch.allclose(losses_val[uid], expected_val, atol=1e-5)
+            assert torch.allclose(losses[uid], expected, atol=1e-5)
+
+            loss_val, loss = phrase_cross_entropy(target_phrases, topk_tensors[uid])
+            assert torch.allclose(loss, expected.mean(), atol=1e-5) and torch.allclose(loss_val, expected_val.mean(), atol=1e-5)
+
+    loss_val, loss = phrase_cross_entropy(target_tensor, topk_tensors)
+    assert loss.shape == (num_uids,)
+    loss.sum().backward()
+    assert topk_tensors.grad[..., 0].abs().sum() > 0
+
+
 def _test_random_topk_token_phrases(single_token_ratios: Tuple = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0),
                                     max_len_final: int = 10, batch_size: int = 32, topk: int = 4096,
                                     ignore_index: int = -100, vocab_len: int = 50256):
@@ -2,6 +2,7 @@ import binascii
 import hashlib
 import math
 import multiprocessing
+import multiprocessing.pool
 import os
 import random
 import subprocess
@@ -13,6 +14,7 @@ from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
 import bittensor
+import numpy
 import pytest
 import torch
 from _pytest.fixtures import fixture
@@ -144,6 +146,71 @@ def test_solve_for_difficulty():
     assert nonce == 2
     assert seal == b'\x19\xf2H1mB3\xa3y\xda\xe7)\xc7P\x93t\xe5o\xbc$\x14sQ\x10\xc3M\xc6\x90M8vq'
 
+def test_solve_cpu():
+    block_hash = '0xba7ea4eb0b16dee271dbef5911838c3f359fcf598c74da65a54b919b68b67279'
+    block_bytes = block_hash.encode('utf-8')[2:]
+    limit = int(math.pow(2,256)) - 1
+    nonces = [0, 1, 10, 2**32 - 1, 2**32, 2**64 - 1] + [random.randint(0, 2**64 - 1) for _ in range(10)]
+    seals = bittensor.utils.register_cpu.seal_hashes(block_bytes, numpy.array(nonces, dtype=numpy.uint64))
+    for nonce, seal in zip(nonces, seals):
+        assert bytes(seal) == bittensor.utils.create_seal_hash(block_hash, nonce)
+
+    # The first solving nonce of a block matches the nonce by nonce search, across batch boundaries.
+    for difficulty in [1, 10, 1000]:
+        expected = next(nonce for nonce in range(5, 100000) if int.from_bytes(bittensor.utils.create_seal_hash(block_hash, nonce), "big") * difficulty < limit)
+        nonce, seal = bittensor.utils.solve_cpu(5, 100000, block_bytes, difficulty, limit, batch_size=64)
+        assert nonce == expected
+        assert seal == bittensor.utils.create_seal_hash(block_hash, nonce)
+
+    # Nonces wrap around at 2**64 and the product bound is strict.
+    nonce, seal = bittensor.utils.solve_cpu(2**64 - 1, 2**64 + 1, block_bytes, 1, limit)
+    assert nonce == 2**64 - 1
+    seal_number = int.from_bytes(bittensor.utils.create_seal_hash(block_hash, 10), "big")
+    assert bittensor.utils.solve_cpu(10, 11, block_bytes, 1, seal_number + 1)[0] == 10
+    assert bittensor.utils.solve_cpu(10, 11, block_bytes, 1, seal_number) == (-1, None)
+
+def test_block_header():
+    header = bittensor.utils.BlockHeader()
+    assert header.sequence == 0 and not header.stopped
+
+    block_bytes = '0xba7ea4eb0b16dee271dbef5911838c3f359fcf598c74da65a54b919b68b67279'.encode('utf-8')[2:]
+    header.update(10, block_bytes, 2**64 - 1)
+    assert header.read() == (2, 10, block_bytes, 2**64 - 1)
+
+    # A write in progress leaves the sequence odd, a header copied then is never returned.
+    header.words[0] += 1
+    header.words[1] = 11
+    reader = multiprocessing.pool.ThreadPool(1).apply_async(header.read)
+    time.sleep(0.1)
+    assert not reader.ready()
+    header.words[0] += 1
+    assert reader.get(timeout=1) == (4, 11, block_bytes, 2**64 - 1)
+
+    header.stop()
+    assert header.stopped
+
+def test_hash_counters():
+    counters = bittensor.utils.HashCounters(3)
+    counters.add(0, 10)
+    counters.add(2, 5)
+    counters.add(2, 5)
+    assert counters.totals() == [10, 0, 10]
+
+def test_solve_for_difficulty_fast_multiple_processes():
+    block_hash = '0xba7ea4eb0b16dee271dbef5911838c3f359fcf598c74da65a54b919b68b67279'
+    subtensor = MagicMock()
+    subtensor.get_current_block = MagicMock( return_value=1 )
+    subtensor.difficulty = 1000
+    subtensor.substrate = MagicMock()
+    subtensor.substrate.get_block_hash = MagicMock( return_value=block_hash )
+    wallet = MagicMock()
+    wallet.is_registered = MagicMock( return_value=False )
+
+    solution = bittensor.utils.solve_for_difficulty_fast( subtensor, wallet, num_processes=3, update_interval=1000 )
+    assert solution.block_number == 1
+    assert solution.seal == bittensor.utils.create_seal_hash(block_hash, solution.nonce)
+    assert bittensor.utils.seal_meets_difficulty(solution.seal, 1000)
+
 def test_solve_for_difficulty_fast():
     block_hash = '0xba7ea4eb0b16dee271dbef5911838c3f359fcf598c74da65a54b919b68b67279'
     subtensor = MagicMock()
@@ -263,11 +330,6 @@ class TestUpdateCurrentBlockDuringRegistration(unittest.TestCase):
             MagicMock(),
             MagicMock(),
             MagicMock(),
-            MagicMock(),
-            MagicMock(),
-            MagicMock(),
-            MagicMock(),
-            MagicMock(),
         ), current_block_num)
 
     def test_check_for_newest_block_and_update_new_block(self):
@@ -289,19 +351,7 @@ class TestUpdateCurrentBlockDuringRegistration(unittest.TestCase):
         )
         subtensor.get_current_block = MagicMock( return_value=current_block_num + 1 ) # new block
 
-        mock_update_curr_block = MagicMock()
-
-        mock_solvers = [
-            MagicMock(
-                newBlockEvent=MagicMock(
-                    set=MagicMock()
-                )
-        ), 
-        MagicMock(
-            newBlockEvent=MagicMock(
-                set=MagicMock()
-            )
-        )]
+        mock_publish_block = MagicMock()
 
         mock_curr_stats = MagicMock(
             block_number=current_block_num,
@@ -312,27 +362,33 @@ class TestUpdateCurrentBlockDuringRegistration(unittest.TestCase):
         self.assertEqual(bittensor.utils.check_for_newest_block_and_update(
             subtensor,
             MagicMock(),
-            MagicMock(),
-            MagicMock(),
-            MagicMock(),
-            mock_update_curr_block,
-            MagicMock(),
-            mock_solvers,
+            mock_publish_block,
             mock_curr_stats,
         ), current_block_num + 1)      
 
-        # check that the update_curr_block function was called
-        mock_update_curr_block.assert_called_once()
-
-        # check that the solvers got the event 
-        for solver in mock_solvers:
-            solver.newBlockEvent.set.assert_called_once()
+        # check that the new block was published to the solvers
+        mock_publish_block.assert_called_once_with(current_block_num + 1, mock_block_hash.encode('utf-8')[2:], current_diff + 1)
 
         # check the stats were updated
         self.assertEqual(mock_curr_stats.block_number, current_block_num + 1)
         self.assertEqual(mock_curr_stats.block_hash, mock_block_hash)
         self.assertEqual(mock_curr_stats.difficulty, current_diff + 1)
 
+    def test_check_for_newest_block_and_update_clock_same_block(self):
+        # if the block clock does not expect a new block, the chain should not be read
+        subtensor = MagicMock()
+        current_block_num: int = 1
+        subtensor.clock.block = current_block_num
+        subtensor.get_current_block = MagicMock( return_value=current_block_num + 1 )
+
+        self.assertEqual(bittensor.utils.check_for_newest_block_and_update(
+            subtensor,
+            current_block_num,
+            MagicMock(),
+            MagicMock(),
+        ), current_block_num)
+        subtensor.get_current_block.assert_not_called()
+
 class TestGetBlockWithRetry(unittest.TestCase):
     def test_get_block_with_retry_network_error_exit(self):
         mock_subtensor = MagicMock(